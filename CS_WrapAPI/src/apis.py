@@ -1,78 +1,197 @@
-import json
 import os
 import tempfile
 import shutil
+import uuid
 
-from fastapi import APIRouter, UploadFile, File
-from fastapi.responses import FileResponse, JSONResponse
-from src.dll_api import get_step242_instance
+from fastapi import APIRouter, UploadFile, File, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from src.dll_api import DLL_PATH
 from src.exceptions import CustomException, ExceptionEnum
+from src.worker_pool import get_worker_pool
 
 # DLL API를 FastAPI REST API로 Wrapping하는 엔드포인트 라우터
 router = APIRouter()
 
+@router.get("/version")
+async def dll_version():
+    """
+    로드된 stepdata.dll 버전 반환.
+    변환 결과를 캐시하는 쪽(ISO_api)이 DLL 교체 여부를 판단하는 데 사용.
+    """
+    return {"dll": os.path.basename(DLL_PATH), "version": get_worker_pool().dll_version}
+
+@router.get("/workers")
+async def worker_stats():
+    """
+    DLL 워커 풀 상태 (워커 수, 살아 있는/대기 중인 워커, 대기 요청 수).
+    """
+    return get_worker_pool().stats()
+
 @router.post("/convert/cad/")
 async def convert_cad(file: UploadFile = File(...)):
     """
     STEP(.stp) 파일을 받아 DLL을 통해 CAD 정보(JSON)로 변환하는 API.
-    내부적으로 임시 디렉터리 내 파일 저장 후 DLL 메서드 호출, 결과 JSON 반환.
+    내부적으로 임시 디렉터리 내 파일 저장 후 DLL 메서드 호출, 결과 JSON 파일을 그대로 스트리밍.
+    """
+    return await _convert_single(file, "getCADdata", "_cad.json")
+
+@router.post("/convert/gdt/")
+async def convert_gdt(file: UploadFile = File(...)):
+    """
+    STEP(.stp) 파일을 받아 DLL을 통해 GD&T 정보(JSON)로 변환하는 API.
+    내부적으로 임시 디렉터리 내 파일 저장 후 DLL 메서드 호출, 결과 JSON 파일을 그대로 스트리밍.
+    """
+    return await _convert_single(file, "getGDTdata", "_gdt.json")
+
+_READ_CHUNK = 256 * 1024
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+
+def _iter_json_file(path: str):
+    """DLL 결과 JSON 파일을 chunk 단위로 읽는 제너레이터 (선두 BOM 제거, 파싱 없음)."""
+    with open(path, "rb") as f:
+        head = f.read(len(_UTF8_BOM))
+        if head != _UTF8_BOM:
+            yield head
+        while True:
+            chunk = f.read(_READ_CHUNK)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _json_size(path: str) -> int:
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        return size - len(_UTF8_BOM) if f.read(len(_UTF8_BOM)) == _UTF8_BOM else size
+
+
+async def _convert_single(file: UploadFile, method: str, output_suffix: str):
+    """
+    업로드 STEP 을 임시 디렉터리에 저장 → DLL 워커에서 method 실행 → 결과 JSON 파일 응답.
+    결과는 json.load/재직렬화 없이 파일 bytes 그대로 전송하고, 전송이 끝나면 임시 디렉터리 삭제.
     """
     suffix = os.path.splitext(file.filename)[1].lower()
     if suffix != ".stp":
         # .stp 확장자 체크
         raise CustomException(ExceptionEnum.INVALID_INPUT_FORMAT)
 
-    # 임시 디렉터리 생성
-    with tempfile.TemporaryDirectory() as tmpdir:
+    # 응답 전송 후 삭제해야 하므로 TemporaryDirectory 대신 mkdtemp + BackgroundTask
+    tmpdir = tempfile.mkdtemp()
+    try:
         stp_path = os.path.join(tmpdir, file.filename)
         # 업로드 파일 저장
         with open(stp_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
 
         # 결과 JSON 경로 지정
-        json_output_path = os.path.join(tmpdir, file.filename.replace(suffix, "_cad.json"))
+        json_output_path = os.path.join(tmpdir, file.filename.replace(suffix, output_suffix))
         model_id = 1
 
-        # C# DLL 객체 생성 및 메서드 호출
-        instance = get_step242_instance()
-        instance.getCADdata(stp_path, json_output_path, model_id)
+        # DLL 워커 프로세스에서 메서드 호출 (이벤트 루프 비차단, 크래시 격리)
+        await get_worker_pool().run(method, stp_path, json_output_path, model_id)
 
         # 변환 결과 파일 존재 여부 체크
         if not os.path.exists(json_output_path):
             raise CustomException(ExceptionEnum.FILE_GENERATION_FAILED)
+        size = _json_size(json_output_path)
+    except BaseException:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        raise
 
-        # 변환된 JSON 결과 반환
-        with open(json_output_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            
-        return JSONResponse(content=data)
-        
-@router.post("/convert/gdt/")
-async def convert_gdt(file: UploadFile = File(...)):
+    return StreamingResponse(
+        _iter_json_file(json_output_path),
+        media_type="application/json",
+        headers={
+            "Content-Length": str(size),
+            "X-DLL-Version": get_worker_pool().dll_version or "",
+        },
+        background=BackgroundTask(shutil.rmtree, tmpdir, ignore_errors=True),
+    )
+
+
+@router.post("/convert/all/")
+async def convert_all(
+    file: UploadFile = File(...),
+    format: str = Query("json", pattern="^(json|multipart)$"),
+):
     """
-    STEP(.stp) 파일을 받아 DLL을 통해 GD&T 정보(JSON)로 변환하는 API.
-    내부적으로 임시 디렉터리 내 파일 저장 후 DLL 메서드 호출, 결과 JSON 반환.
+    STEP(.stp) 파일을 한 번 받아 CAD + GD&T 정보를 함께 변환하는 API.
+    - 업로드/임시 파일 저장 1회, 같은 워커의 같은 step242data 인스턴스에서 getCADdata → getGDTdata 실행
+    - format=json      : {"cad": <CAD JSON>, "gdt": <GD&T JSON>} (DLL 출력 파일을 그대로 이어 붙여 스트리밍)
+    - format=multipart : multipart/mixed, part 이름 cad / gdt (호출 측에서 파싱 없이 분리 가능)
     """
     suffix = os.path.splitext(file.filename)[1].lower()
     if suffix != ".stp":
         raise CustomException(ExceptionEnum.INVALID_INPUT_FORMAT)
 
-    with tempfile.TemporaryDirectory() as tmpdir:
+    tmpdir = tempfile.mkdtemp()
+    try:
         stp_path = os.path.join(tmpdir, file.filename)
         with open(stp_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
 
-        json_output_path = os.path.join(tmpdir, file.filename.replace(suffix, "_gdt.json"))
+        outputs = {
+            "cad": os.path.join(tmpdir, file.filename.replace(suffix, "_cad.json")),
+            "gdt": os.path.join(tmpdir, file.filename.replace(suffix, "_gdt.json")),
+        }
         model_id = 1
+        await get_worker_pool().run_batch(
+            [
+                ("getCADdata", (stp_path, outputs["cad"], model_id)),
+                ("getGDTdata", (stp_path, outputs["gdt"], model_id)),
+            ]
+        )
+        if not all(os.path.exists(p) for p in outputs.values()):
+            raise CustomException(ExceptionEnum.FILE_GENERATION_FAILED)
+        sizes = {name: _json_size(p) for name, p in outputs.items()}
+    except BaseException:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        raise
 
-        # C# DLL 객체 생성 및 메서드 호출
-        instance = get_step242_instance()
-        instance.getGDTdata(stp_path, json_output_path, model_id)
+    if format == "multipart":
+        boundary = uuid.uuid4().hex
+        heads = {
+            name: (
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n'
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {sizes[name]}\r\n\r\n"
+            ).encode("utf-8")
+            for name in outputs
+        }
+        tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        separator = b"\r\n"
+        media_type = f"multipart/mixed; boundary={boundary}"
+        total = sum(len(h) + sizes[n] for n, h in heads.items()) + len(separator) + len(tail)
 
-        if not os.path.exists(json_output_path):
-            raise CustomException(ExceptionEnum.FILE_GENERATION_FAILED)
+        def body():
+            for i, (name, path) in enumerate(outputs.items()):
+                if i:
+                    yield separator
+                yield heads[name]
+                yield from _iter_json_file(path)
+            yield tail
+
+    else:
+        media_type = "application/json"
+        total = len(b'{"cad":') + sizes["cad"] + len(b',"gdt":') + sizes["gdt"] + len(b"}")
+
+        def body():
+            yield b'{"cad":'
+            yield from _iter_json_file(outputs["cad"])
+            yield b',"gdt":'
+            yield from _iter_json_file(outputs["gdt"])
+            yield b"}"
+
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={
+            "Content-Length": str(total),
+            "X-DLL-Version": get_worker_pool().dll_version or "",
+        },
+        background=BackgroundTask(shutil.rmtree, tmpdir, ignore_errors=True),
+    )
 
-        with open(json_output_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            
-        return JSONResponse(content=data)
@@ -1,16 +1,53 @@
+import hashlib
 import os
-import clr
+from functools import lru_cache
 
 # stepdata.dll (C# 빌드 DLL) 경로
 DLL_PATH = os.path.abspath("./packages/stepdata.dll")
-# pythonnet의 clr로 DLL 참조 추가
-clr.AddReference(DLL_PATH)
 
-from stepdata import step242data
+# step242data 클래스 (load_dll() 호출 전에는 None)
+_step242data = None
+
+
+def load_dll():
+    """
+    pythonnet의 clr로 DLL 참조 추가 후 step242data 클래스 반환.
+    DLL 워커 프로세스에서만 호출 (API 서버 프로세스는 .NET 런타임을 올리지 않음).
+    """
+    global _step242data
+    if _step242data is None:
+        import clr
+
+        clr.AddReference(DLL_PATH)
+        from stepdata import step242data
+
+        _step242data = step242data
+    return _step242data
+
 
 def get_step242_instance():
     """
     step242data 클래스 인스턴스 반환.
     각 요청마다 새 객체를 만들도록 설계.
     """
-    return step242data()
+    return load_dll()()
+
+
+@lru_cache()
+def get_dll_version() -> str:
+    """
+    stepdata.dll 버전 문자열 반환 ("어셈블리 버전+파일 sha256 앞 12자리").
+    같은 어셈블리 버전으로 다시 빌드된 DLL도 구분되도록 파일 해시를 함께 사용.
+    (ISO_api 변환 결과 캐시 키로 사용됨, DLL 이 로드된 워커 프로세스에서 계산)
+    DLL 을 로드할 수 없으면 예외 (가짜 버전으로 캐시 키를 만들지 않음)
+    """
+    digest = hashlib.sha256()
+    with open(DLL_PATH, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    # DLL 로드 실패는 그대로 전달 → 워커가 ("error", ...) 로 응답해 pre-warm 단계에서 기동 실패
+    load_dll()
+    from System.Reflection import AssemblyName
+
+    assembly_version = str(AssemblyName.GetAssemblyName(DLL_PATH).Version)
+    return f"{assembly_version}+{digest.hexdigest()[:12]}"
@@ -6,12 +6,18 @@ class ExceptionEnum(Enum):
     
     # 500 BAD REQUEST
     FILE_GENERATION_FAILED = ("Failed to create converted file.", 500)
+    CONVERSION_FAILED = ("DLL conversion raised an error.", 500)
+    WORKER_CRASHED = ("DLL worker crashed during conversion.", 500)
+
+    # 503/504 워커 풀
+    WORKER_QUEUE_FULL = ("Conversion queue is full, retry later.", 503)
+    CONVERSION_TIMEOUT = ("Conversion timed out.", 504)
 
     def __init__(self, detail, status_code):
         self.detail = detail
         self.status_code = status_code
 
 class CustomException(Exception):
-    def __init__(self, exception_enum: ExceptionEnum):
-        self.detail = exception_enum.detail
+    def __init__(self, exception_enum: ExceptionEnum, detail: str | None = None):
+        self.detail = detail or exception_enum.detail
         self.status_code = exception_enum.status_code
\ No newline at end of file
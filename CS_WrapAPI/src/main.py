@@ -3,12 +3,22 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from src.exceptions import CustomException
 from src.apis import router as dll_router
+from src.worker_pool import get_worker_pool
 
 logging.basicConfig(level=logging.INFO)
 
 # FastAPI 앱 생성
 app = FastAPI()
 
+# DLL 워커 프로세스 풀 기동 (각 워커가 pythonnet + stepdata.dll 을 미리 로드)
+@app.on_event("startup")
+async def start_worker_pool():
+    await get_worker_pool().start()
+
+@app.on_event("shutdown")
+async def stop_worker_pool():
+    await get_worker_pool().stop()
+
 # 커스텀 예외 핸들러 등록 (커스텀 예외 발생 시 일관된 에러 응답)
 @app.exception_handler(CustomException)
 async def custom_exception_handler(request: Request, exc: CustomException):
@@ -0,0 +1,258 @@
+"""
+DLL 변환 워커 프로세스 풀.
+
+stepdata.dll 호출은 동기이고 오래 걸리며, DLL 내부 오류로 프로세스가 죽을 수도 있다.
+API 서버(이벤트 루프)에서 직접 부르지 않고 미리 띄워 둔 워커 프로세스에 맡긴다.
+
+- 워커마다 pythonnet 런타임 + stepdata.dll 을 기동 시 한 번만 로드 (pre-warm)
+- 동시 변환 수 = 워커 수 (DLL_WORKERS), 대기 요청 상한 (DLL_QUEUE) 초과 시 503
+- 작업별 타임아웃 (DLL_JOB_TIMEOUT) 초과 시 해당 워커만 종료 후 새 워커로 교체 → 504
+- 워커가 비정상 종료(DLL 크래시)하면 그 요청만 실패하고 워커를 교체 → 서버는 계속 동작
+- DLL_MAX_JOBS_PER_WORKER 회 처리한 워커는 교체 (네이티브 메모리 누수 대비, 0 이면 무제한)
+"""
+
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import time
+from typing import Any, List, Optional, Tuple
+
+from src.exceptions import CustomException, ExceptionEnum
+
+logger = logging.getLogger(__name__)
+
+DLL_WORKERS = int(os.getenv("DLL_WORKERS", str(os.cpu_count() or 2)))
+DLL_QUEUE = int(os.getenv("DLL_QUEUE", "32"))
+DLL_JOB_TIMEOUT = float(os.getenv("DLL_JOB_TIMEOUT", "600"))
+DLL_STARTUP_TIMEOUT = float(os.getenv("DLL_STARTUP_TIMEOUT", "120"))
+DLL_MAX_JOBS_PER_WORKER = int(os.getenv("DLL_MAX_JOBS_PER_WORKER", "0"))
+
+_POLL_INTERVAL = 0.05
+_RESPAWN_DELAY = 5.0
+
+
+def _worker_main(conn) -> None:
+    """
+    워커 프로세스 진입점.
+    DLL 로드 후 ("ready", 버전) 전송, 이후 [(method, args), ...] 를 받아
+    하나의 step242data 인스턴스에서 순서대로 실행하고
+    ("ok", [결과, ...]) / ("error", 메시지) 로 응답. None 을 받으면 종료.
+    """
+    from src.dll_api import get_dll_version, get_step242_instance
+
+    try:
+        conn.send(("ready", get_dll_version()))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        try:
+            instance = get_step242_instance()
+            results = []
+            for method, args in message:
+                result = getattr(instance, method)(*args)
+                results.append(None if result is None else str(result))
+            conn.send(("ok", results))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _WorkerDied(Exception):
+    pass
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class DllWorkerPool:
+    """pre-warm 된 DLL 워커 프로세스 풀."""
+
+    def __init__(
+        self,
+        workers: int = DLL_WORKERS,
+        max_queue: int = DLL_QUEUE,
+        timeout: float = DLL_JOB_TIMEOUT,
+        startup_timeout: float = DLL_STARTUP_TIMEOUT,
+        max_jobs_per_worker: int = DLL_MAX_JOBS_PER_WORKER,
+        start_method: str = "spawn",
+    ):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        # pythonnet/.NET 런타임은 fork 와 맞지 않으므로 spawn 사용 (fork 는 DLL 없이 돌리는 테스트용)
+        self._ctx = mp.get_context(start_method)
+        self._idle: "asyncio.Queue[_Worker]" = asyncio.Queue()
+        self._all: List[_Worker] = []
+        self._waiting = 0
+        self._stopping = False
+        self.dll_version: Optional[str] = None
+
+    async def start(self) -> None:
+        """워커를 모두 띄우고 DLL 로드 완료(ready)까지 대기."""
+        spawned = await asyncio.gather(*(self._spawn() for _ in range(self.workers)))
+        for worker in spawned:
+            self._idle.put_nowait(worker)
+        logger.info("[worker_pool] %d DLL workers ready (%s)", self.workers, self.dll_version)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for worker in list(self._all):
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+            worker.kill()
+        self._all.clear()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for w in self._all if w.process.is_alive()),
+            "idle": self._idle.qsize(),
+            "waiting": self._waiting,
+            "max_queue": self.max_queue,
+        }
+
+    async def run(self, method: str, *args: Any, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        idle 워커에서 step242data().<method>(*args) 실행.
+        대기열 초과 503, 타임아웃 504, 워커 크래시/DLL 예외 500 (CustomException).
+        """
+        results = await self.run_batch([(method, args)], timeout=timeout)
+        return results[0]
+
+    async def run_batch(
+        self, calls: List[Tuple[str, tuple]], timeout: Optional[float] = None
+    ) -> List[Optional[str]]:
+        """
+        한 워커, 한 step242data 인스턴스에서 여러 메서드를 순서대로 실행 (워커 왕복 1회).
+        timeout 은 전체 호출에 대한 제한 시간.
+        """
+        method = ",".join(m for m, _ in calls)
+        if self._waiting >= self.max_queue and self._idle.empty():
+            raise CustomException(ExceptionEnum.WORKER_QUEUE_FULL)
+        self._waiting += 1
+        try:
+            worker = await self._idle.get()
+            while not worker.process.is_alive():
+                # 대기 중에 죽은 워커는 요청에 쓰지 않고 교체
+                self._retire(worker)
+                asyncio.ensure_future(self._replace())
+                worker = await self._idle.get()
+        finally:
+            self._waiting -= 1
+
+        replace = False
+        try:
+            worker.conn.send(list(calls))
+            status, payload = await self._recv(worker, timeout or self.timeout)
+            worker.jobs += 1
+            if status != "ok":
+                logger.warning("[worker_pool] %s failed: %s", method, payload)
+                raise CustomException(ExceptionEnum.CONVERSION_FAILED, payload)
+            return payload
+        except asyncio.TimeoutError:
+            replace = True
+            raise CustomException(ExceptionEnum.CONVERSION_TIMEOUT)
+        except (_WorkerDied, OSError):
+            replace = True
+            logger.error(
+                "[worker_pool] worker %s died during %s (exit %s)",
+                worker.process.pid,
+                method,
+                worker.process.exitcode,
+            )
+            raise CustomException(ExceptionEnum.WORKER_CRASHED)
+        except asyncio.CancelledError:
+            # 요청이 끊겨도 워커는 작업 중 → 다음 요청과 섞이지 않도록 교체
+            replace = True
+            raise
+        finally:
+            if replace or (
+                self.max_jobs_per_worker and worker.jobs >= self.max_jobs_per_worker
+            ):
+                self._retire(worker)
+                asyncio.ensure_future(self._replace())
+            else:
+                self._idle.put_nowait(worker)
+
+    async def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx)
+        self._all.append(worker)
+        try:
+            status, payload = await self._recv(worker, self.startup_timeout)
+        except BaseException:
+            self._retire(worker)
+            raise
+        if status != "ready":
+            self._retire(worker)
+            raise RuntimeError(f"DLL worker failed to start: {payload}")
+        self.dll_version = payload
+        return worker
+
+    async def _replace(self) -> None:
+        """죽은/교체 대상 워커 자리를 새 워커로 채움 (실패 시 재시도)."""
+        while not self._stopping:
+            try:
+                worker = await self._spawn()
+            except Exception as e:
+                logger.error("[worker_pool] respawn failed: %s", e)
+                await asyncio.sleep(_RESPAWN_DELAY)
+                continue
+            if self._stopping:
+                worker.kill()
+                return
+            self._idle.put_nowait(worker)
+            return
+
+    def _retire(self, worker: _Worker) -> None:
+        worker.kill()
+        if worker in self._all:
+            self._all.remove(worker)
+
+    async def _recv(self, worker: _Worker, timeout: float):
+        deadline = time.monotonic() + timeout
+        while not worker.conn.poll():
+            if not worker.process.is_alive():
+                if worker.conn.poll():
+                    break
+                raise _WorkerDied()
+            if time.monotonic() > deadline:
+                raise asyncio.TimeoutError()
+            await asyncio.sleep(_POLL_INTERVAL)
+        try:
+            return worker.conn.recv()
+        except EOFError:
+            raise _WorkerDied()
+
+
+_pool: Optional[DllWorkerPool] = None
+
+
+def get_worker_pool() -> DllWorkerPool:
+    global _pool
+    if _pool is None:
+        _pool = DllWorkerPool()
+    return _pool
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import sys
+import time
+import types
+
+import pytest
+
+from src.exceptions import CustomException, ExceptionEnum
+from src.worker_pool import DllWorkerPool
+
+
+class FakeStep242:
+    """step242data 대역: 메서드 이름으로 성공/예외/크래시/지연을 흉내."""
+
+    def convert(self, name):
+        return f"ok:{name}"
+
+    def fail(self):
+        raise ValueError("bad STEP")
+
+    def crash(self):
+        os._exit(7)
+
+    def hang(self):
+        time.sleep(30)
+
+
+@pytest.fixture
+async def pool(monkeypatch):
+    # fork: 워커가 pythonnet 대신 이 가짜 dll_api 모듈을 물려받음
+    fake = types.ModuleType("src.dll_api")
+    fake.get_dll_version = lambda: "test-1"
+    fake.get_step242_instance = FakeStep242
+    monkeypatch.setitem(sys.modules, "src.dll_api", fake)
+
+    p = DllWorkerPool(workers=2, max_queue=8, timeout=10, start_method="fork")
+    await p.start()
+    yield p
+    await p.stop()
+
+
+async def wait_for_workers(pool, alive, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while pool.stats()["alive"] < alive or pool.stats()["idle"] < alive:
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.05)
+
+
+async def test_failures_are_isolated_per_request(pool):
+    assert pool.dll_version == "test-1"
+
+    results = await asyncio.gather(
+        pool.run("convert", "a"),
+        pool.run("fail"),
+        pool.run("crash"),
+        pool.run("convert", "b"),
+        return_exceptions=True,
+    )
+
+    assert results[0] == "ok:a"
+    assert results[3] == "ok:b"
+    assert isinstance(results[1], CustomException)
+    assert results[1].status_code == ExceptionEnum.CONVERSION_FAILED.status_code
+    assert "ValueError: bad STEP" in results[1].detail
+    assert isinstance(results[2], CustomException)
+    assert results[2].detail == ExceptionEnum.WORKER_CRASHED.detail
+
+    # 죽은 워커는 교체되고 풀은 계속 동작
+    await wait_for_workers(pool, 2)
+    assert await pool.run("convert", "c") == "ok:c"
+
+
+async def test_timeout_replaces_only_that_worker(pool):
+    slow, fast = await asyncio.gather(
+        pool.run("hang", timeout=0.3),
+        pool.run("convert", "a"),
+        return_exceptions=True,
+    )
+    assert isinstance(slow, CustomException)
+    assert slow.status_code == ExceptionEnum.CONVERSION_TIMEOUT.status_code
+    assert fast == "ok:a"
+
+    await wait_for_workers(pool, 2)
+    assert await pool.run_batch([("convert", ("x",)), ("convert", ("y",))]) == ["ok:x", "ok:y"]
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from src.database import get_db
+from src.services import get_file_service, FileService
+from src.indexes import ensure_indexes, index_report
+
+# 운영/관리용 API 엔드포인트를 담당하는 FastAPI Router입니다.
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+
+@router.get("/indexes", summary="MongoDB 인덱스 상태 보고")
+async def get_index_report(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    선언된 인덱스 대비 누락(missing)/미선언(undeclared)/미사용(unused) 인덱스와
+    인덱스별 사용 횟수($indexStats)를 컬렉션별로 반환합니다.
+    """
+    return await index_report(db)
+
+
+@router.post("/indexes", summary="선언된 MongoDB 인덱스 재생성")
+async def rebuild_indexes(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    선언된 인덱스를 다시 생성(이미 있으면 no-op)하고 결과를 반환합니다.
+    """
+    return await ensure_indexes(db)
+
+
+
+@router.get("/dedup", summary="GridFS 내용 주소 중복 제거 현황")
+async def get_dedup_report(
+    top: int = 10, file_service: FileService = Depends(get_file_service)
+):
+    """
+    내용 주소(sha256, 파일명) 저장소 기준 blob 수, 참조 수, 실제/논리 저장 바이트,
+    절감 바이트와 중복 제거 비율, 참조 수 상위 항목을 반환합니다.
+    """
+    return await file_service.repository.dedup_report(top=top)
@@ -1,13 +1,66 @@
 import json
-from typing import Optional
-from fastapi import APIRouter, Depends, File, Path, Body, Query, UploadFile
+from typing import AsyncIterator, Optional
+import httpx
+from fastapi import APIRouter, Depends, File, Path, Body, Query, Request, Response, UploadFile
 from src.services import get_file_service, FileService, ProjectService, get_project_service
 from src.schemas.file import FileCreateResponse, StpCreateResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from src.utils.conversion_client import iter_response_body, response_length
+from src.utils.download import gridfs_download_response, iter_gridfs
 from src.utils.exceptions import CustomException, ExceptionEnum
 
 # 변환 관련 API 엔드포인트를 담당하는 FastAPI Router입니다.
 router = APIRouter(prefix="/api/convert", tags=["STP Convert"])
 
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _proxy_response(response: httpx.Response) -> StreamingResponse:
+    """캐시하지 않는 DLL 서버 응답(stream)을 그대로 흘려보냄."""
+    length = response_length(response)
+    return StreamingResponse(
+        iter_response_body(response),
+        media_type=JSON_MEDIA_TYPE,
+        headers={"Content-Length": str(length)} if length is not None else None,
+    )
+
+
+async def _json_response(
+    request: Request, result, filename: str, fields: Optional[str] = None
+) -> Response:
+    """
+    DLL 변환 결과(JSON) 응답.
+    fields 가 없으면 파싱 없이 GridFS 캐시(또는 DLL 서버 응답)를 chunk 단위로 그대로,
+    있으면 결과를 읽어 최상위 키만 골라 반환.
+    """
+    if not fields:
+        if isinstance(result, httpx.Response):
+            return _proxy_response(result)
+        return gridfs_download_response(
+            request,
+            result,
+            filename=filename,
+            media_type=JSON_MEDIA_TYPE,
+            headers={"Content-Disposition": "inline"},
+        )
+    chunks = iter_response_body(result) if isinstance(result, httpx.Response) else iter_gridfs(result)
+    data = json.loads(b"".join([chunk async for chunk in chunks]))
+    if not isinstance(data, dict):
+        raise CustomException(ExceptionEnum.INVALID_FORMAT, detail="fields 는 객체 형식 결과에만 사용할 수 있습니다.")
+    keys = [k.strip() for k in fields.split(",") if k.strip()]
+    return JSONResponse(content={k: data[k] for k in keys if k in data})
+
+
+async def _iter_all(results) -> AsyncIterator[bytes]:
+    """캐시된 cad/gdt 결과를 {"cad": ..., "gdt": ...} 로 이어 붙여 chunk 단위로 전송."""
+    yield b'{"cad":'
+    async for chunk in iter_gridfs(results["cad"]):
+        yield chunk
+    yield b',"gdt":'
+    async for chunk in iter_gridfs(results["gdt"]):
+        yield chunk
+    yield b"}"
+
 """
 ==============================================
    파일 변환 관련 API (STEP → CAD, GD&T)
@@ -17,56 +70,119 @@ router = APIRouter(prefix="/api/convert", tags=["STP Convert"])
 
 @router.get("/cad", status_code=200, summary="STEP to CAD 변환")
 async def convert_from_step_to_cad(
+    request: Request,
     project_id: str = Query(..., description="프로젝트의 ID"),
     stp_id: str = Query(..., description="STP ID"),
+    fields: Optional[str] = Query(None, description="응답에 포함할 최상위 키 (쉼표 구분, 없으면 전체)"),
     project_service: ProjectService = Depends(get_project_service),
     file_service: FileService = Depends(get_file_service),
 ):
     """
     STEP 파일을 CAD 포맷(json)으로 변환합니다.
+    변환 결과는 파싱하지 않고 chunk 단위로 그대로 전달하며, fields 를 지정한 경우에만 JSON 을 파싱해 일부만 반환합니다.
+    캐시된 결과는 ETag/Range 를 지원합니다.
 
     Args:
+        request (Request): ETag/Range 헤더 확인용
         project_id (str): 변환 대상 프로젝트 ID
         stp_id (str): 변환 대상 STEP 파일 ID
+        fields (str, optional): 응답에 포함할 최상위 키 목록
         project_service (ProjectService): 프로젝트 데이터 서비스 DI
         file_service (FileService): 파일 변환 서비스 DI
 
     Returns:
-        dict: CAD 포맷 변환 결과(json)
+        Response: CAD 포맷 변환 결과(json)
     """
     project: dict | None = await project_service.get_project_by_id(project_id)
     if not project.get("step_id"):
         raise CustomException(ExceptionEnum.STP_NOT_FOUND)
     
-    cad_json_bytes = await file_service.convert_stp_to_cad(stp_id, "cad")
-    cad_json = json.loads(cad_json_bytes)
-
-    return cad_json
+    result = await file_service.convert_stp_to_cad(stp_id, "cad")
+    return await _json_response(request, result, f"{stp_id}.cad.json", fields)
 
 @router.get("/gdt", status_code=200, summary="STEP to GD&T 변환")
 async def convert_from_step_to_gdt(
+    request: Request,
     project_id: str = Query(..., description="프로젝트의 ID"),
     stp_id: str = Query(..., description="STP ID"),
+    fields: Optional[str] = Query(None, description="응답에 포함할 최상위 키 (쉼표 구분, 없으면 전체)"),
     project_service: ProjectService = Depends(get_project_service),
     file_service: FileService = Depends(get_file_service),
 ):
     """
     STEP 파일을 GD&T 포맷(json)으로 변환합니다.
+    변환 결과는 파싱하지 않고 chunk 단위로 그대로 전달하며, fields 를 지정한 경우에만 JSON 을 파싱해 일부만 반환합니다.
+    캐시된 결과는 ETag/Range 를 지원합니다.
 
     Args:
+        request (Request): ETag/Range 헤더 확인용
         project_id (str): 변환 대상 프로젝트 ID
         stp_id (str): 변환 대상 STEP 파일 ID
+        fields (str, optional): 응답에 포함할 최상위 키 목록
         project_service (ProjectService): 프로젝트 데이터 서비스 DI
         file_service (FileService): 파일 변환 서비스 DI
 
     Returns:
-        dict: GD&T 포맷 변환 결과(json)
+        Response: GD&T 포맷 변환 결과(json)
     """
     project: dict | None = await project_service.get_project_by_id(project_id)
     if not project.get("step_id"):
         raise CustomException(ExceptionEnum.STP_NOT_FOUND)
     
-    gdt_json_bytes = await file_service.convert_stp_to_cad(stp_id, "gdt")
-    gdt_json = json.loads(gdt_json_bytes)
+    result = await file_service.convert_stp_to_cad(stp_id, "gdt")
+    return await _json_response(request, result, f"{stp_id}.gdt.json", fields)
 
-    return gdt_json
+@router.get("/all", status_code=200, summary="STEP to CAD + GD&T 변환")
+async def convert_from_step_to_all(
+    project_id: str = Query(..., description="프로젝트의 ID"),
+    stp_id: str = Query(..., description="STP ID"),
+    project_service: ProjectService = Depends(get_project_service),
+    file_service: FileService = Depends(get_file_service),
+):
+    """
+    STEP 파일을 CAD, GD&T 포맷(json)으로 한 번에 변환합니다.
+    DLL 서버에는 STEP 파일을 한 번만 전송하고, 타입별 변환 캐시를 공유합니다.
+    결과는 메모리에 모으지 않고 캐시 파일에서 chunk 단위로 이어 붙여 전송합니다.
+
+    Args:
+        project_id (str): 변환 대상 프로젝트 ID
+        stp_id (str): 변환 대상 STEP 파일 ID
+        project_service (ProjectService): 프로젝트 데이터 서비스 DI
+        file_service (FileService): 파일 변환 서비스 DI
+
+    Returns:
+        StreamingResponse: {"cad": CAD 변환 결과(json), "gdt": GD&T 변환 결과(json)}
+    """
+    project: dict | None = await project_service.get_project_by_id(project_id)
+    if not project.get("step_id"):
+        raise CustomException(ExceptionEnum.STP_NOT_FOUND)
+
+    results = await file_service.convert_stp_to_all(stp_id)
+    if isinstance(results, httpx.Response):
+        return _proxy_response(results)
+    # 변환 결과(JSON)를 다시 파싱하지 않고 GridFS 에서 읽으며 그대로 이어 붙여 응답
+    length = len(b'{"cad":,"gdt":}') + sum(int(results[t].length) for t in ("cad", "gdt"))
+    return StreamingResponse(
+        _iter_all(results),
+        media_type=JSON_MEDIA_TYPE,
+        headers={"Content-Length": str(length)},
+    )
+
+@router.delete("/cache", status_code=200, summary="STEP 변환 결과 캐시 삭제")
+async def invalidate_convert_cache(
+    stp_id: Optional[str] = Query(None, description="캐시를 지울 STEP ID (없으면 전체)"),
+    type: Optional[str] = Query(None, pattern="^(cad|gdt)$", description="cad 또는 gdt (없으면 둘 다)"),
+    dll_version: Optional[str] = Query(None, description="특정 DLL 버전의 캐시만 삭제"),
+    file_service: FileService = Depends(get_file_service),
+):
+    """
+    DLL 서버 CAD/GD&T 변환 결과 캐시를 삭제합니다.
+
+    - 캐시 키: (STEP 내용 해시, 변환 타입, DLL 버전)
+    - DLL 이 같은 버전으로 교체되었거나 결과를 다시 만들어야 할 때 사용합니다.
+
+    Returns:
+        dict: {"deleted": 삭제한 캐시 수}
+    """
+    deleted = await file_service.invalidate_conversion_cache(stp_id, type, dll_version)
+    return {"deleted": deleted}
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Depends, File, Path, Query
-from fastapi.responses import FileResponse, StreamingResponse
+from typing import Optional
+from fastapi import APIRouter, Depends, File, Path, Query, Request
+from fastapi.responses import JSONResponse
 from src.services import get_file_service, FileService, ProjectService, get_project_service
 from src.utils.exceptions import CustomException, ExceptionEnum
+from src.utils.download import gridfs_download_response
+from src.utils.tessellation import LOD_PRESETS, resolve_lod
+
+_MESH_MEDIA_TYPES = {"stl": "model/stl", "glb": "model/gltf-binary"}
 
 router = APIRouter(prefix="/api/download", tags=["File Download"])
 
@@ -11,6 +16,7 @@ router = APIRouter(prefix="/api/download", tags=["File Download"])
 
 @router.get("/stp", status_code=200, summary="STEP 파일 다운로드")
 async def download_step_file(
+    request: Request,
     project_id: str = Query(..., description="프로젝트의 ID"),
     project_service: ProjectService = Depends(get_project_service),
     file_service: FileService = Depends(get_file_service),
@@ -26,10 +32,13 @@ async def download_step_file(
     if not file_id:
         raise CustomException(ExceptionEnum.STP_NOT_FOUND)
     file_stream = await file_service.get_file_stream(file_id)
-    return StreamingResponse(file_stream, media_type="application/octet-stream", headers={"Content-Disposition": f"attachment; filename={file_id}.STEP"})
+    return gridfs_download_response(
+        request, file_stream, filename=f"{file_id}.STEP"
+    )
 
 @router.get("/stl", status_code=200, summary="STL 파일 다운로드")
 async def download_stl_file(
+    request: Request,
     project_id: str = Query(..., description="프로젝트의 ID"),
     project_service: ProjectService = Depends(get_project_service),
     file_service: FileService = Depends(get_file_service),
@@ -45,13 +54,56 @@ async def download_stl_file(
     if not file_id:
         raise CustomException(ExceptionEnum.STP_NOT_FOUND)
     file_stream = await file_service.get_file_stream(file_id)
-    return StreamingResponse(
-        file_stream, media_type="application/octet-stream",
-        headers={"Content-Disposition": f"attachment; filename={file_id}.stl"}
+    return gridfs_download_response(
+        request, file_stream, filename=f"{file_id}.stl"
+    )
+
+@router.get("/stl/lod", status_code=200, summary="LOD별 STL/메쉬 파일 다운로드")
+async def download_stl_lod_file(
+    request: Request,
+    project_id: str = Query(..., description="프로젝트의 ID"),
+    lod: str = Query("default", description=f"LOD ({', '.join(LOD_PRESETS)})"),
+    linear_deflection: Optional[float] = Query(None, gt=0, description="직접 지정할 linear deflection"),
+    angular_deflection: Optional[float] = Query(None, gt=0, description="직접 지정할 angular deflection (rad)"),
+    format: str = Query("stl", pattern="^(stl|glb)$", description="stl (binary STL) 또는 glb (인덱스 메쉬)"),
+    wait: bool = Query(True, description="메싱이 필요할 때 완료까지 대기 여부 (False면 202와 job id)"),
+    project_service: ProjectService = Depends(get_project_service),
+    file_service: FileService = Depends(get_file_service),
+):
+    """
+    프로젝트 STEP 의 LOD별 메싱 결과를 다운로드하는 API입니다.
+
+    - 결과는 (STEP 내용 해시, deflection, angular deflection) 기준으로 캐시되어 같은 모델은 다시 메싱하지 않습니다.
+    - 캐시에 없으면 변환 엔진에서 생성합니다 (wait=false면 202와 job id 반환, /api/upload/stp/jobs/{job_id} 로 조회).
+    - **반환값**: binary STL 또는 glTF binary(.glb) 파일 스트림
+    """
+    project: dict = await project_service.get_project_by_id(project_id)
+    step_id = project.get("step_id")
+    if not step_id:
+        raise CustomException(ExceptionEnum.STP_NOT_FOUND)
+    try:
+        spec = resolve_lod(lod, linear_deflection, angular_deflection)
+    except ValueError as e:
+        raise CustomException(ExceptionEnum.INVALID_ATTRIBUTE, detail=str(e))
+
+    result = await file_service.ensure_tessellation(
+        step_id, [spec], mesh=(format == "glb"), wait=wait
+    )
+    if "job_id" in result:
+        return JSONResponse(status_code=202, content=result)
+
+    file_id = result["files"][spec["lod"]][format]
+    file_stream = await file_service.get_file_stream(file_id)
+    return gridfs_download_response(
+        request,
+        file_stream,
+        filename=f"{step_id}.{spec['lod']}.{format}",
+        media_type=_MESH_MEDIA_TYPES[format],
     )
 
 @router.get("/nc", status_code=200, summary="NC 파일 다운로드")
 async def download_nc_file(
+    request: Request,
     nc_id: str = Query(..., description="다운로드할 NC 파일의 Id"),
     workplan_id: str = Query(..., description="NC 파일이 속한 workplan Id"),
     project_id: str = Query(..., description="프로젝트의 ID"),
@@ -67,10 +119,13 @@ async def download_nc_file(
     project: dict = await project_service.get_project_by_id(project_id)
     project_service.valid_file_id(project, workplan_id, nc_id, "nc_code")
     file_stream = await file_service.get_file_stream(nc_id)
-    return StreamingResponse(file_stream, media_type="application/octet-stream", headers={"Content-Disposition": f"attachment; filename={nc_id}.nc"})
+    return gridfs_download_response(
+        request, file_stream, filename=f"{nc_id}.nc"
+    )
 
 @router.get("/vm", status_code=200, summary="Virtual Machine (VM) 파일 다운로드")
 async def download_vm_file(
+    request: Request,
     vm_id: str = Query(..., description="다운로드할 VM 파일의 Id"),
     workplan_id: str = Query(..., description="VM 파일이 속한 workplan Id"),
     project_id: str = Query(..., description="프로젝트의 ID"),
@@ -86,11 +141,13 @@ async def download_vm_file(
     project: dict = await project_service.get_project_by_id(project_id)
     project_service.valid_file_id(project, workplan_id, vm_id, "vm")
     file_stream = await file_service.get_file_stream(vm_id)
-    return StreamingResponse(file_stream, media_type="application/octet-stream", headers={"Content-Disposition": f"attachment; filename={vm_id}.val"}
+    return gridfs_download_response(
+        request, file_stream, filename=f"{vm_id}.val"
     )
 
 @router.get("/tdms", status_code=200, summary="TDMS 파일 다운로드")
 async def download_tdms_file(
+    request: Request,
     tdms_log_id: str = Query(..., description="다운로드할 TDMS 로그 파일의 Id"),
     workplan_id: str = Query(..., description="TDMS 파일이 속한 workplan Id"),
     project_id: str = Query(..., description="프로젝트의 ID"),
@@ -107,5 +164,6 @@ async def download_tdms_file(
     project: dict = await project_service.get_project_by_id(project_id)
     project_service.valid_file_id(project, workplan_id, tdms_log_id, "tdms")
     file_stream = await file_service.get_file_stream(tdms_log_id)
-    return StreamingResponse(file_stream, media_type="application/octet-stream", headers={"Content-Disposition": f"attachment; filename={tdms_log_id}.tdms"}
+    return gridfs_download_response(
+        request, file_stream, filename=f"{tdms_log_id}.tdms"
     )
@@ -1,4 +1,3 @@
-import logging
 from fastapi import (
     APIRouter,
     Depends,
@@ -19,10 +18,14 @@ from src.schemas.project import (
     ProjectListResponse,
     ProjectResponse,
     TdmsPahtListResponse,
+    VmJobStatusResponse,
 )
+from src.database import get_vm_job_collection
+from src.entities.vm_job import VmJobRepository
 from src.utils.exceptions import CustomException, ExceptionEnum
-import requests
-from src.config import settings
+from src.utils.vm_client import get_vm_client
+from src.utils.vm_jobs import get_vm_job_runner, job_result, job_status
+from motor.motor_asyncio import AsyncIOMotorCollection
 
 router = APIRouter(prefix="/api/projects", tags=["Project Management"])
 
@@ -136,59 +139,60 @@ async def extract_tdms_list_attribute(
     return TdmsPahtListResponse(tdms_list=tdms_list)
 
 
-@router.post("/{project_id}/generate-vm-project")
+@router.post("/{project_id}/generate-vm-project", summary="VM 프로젝트 생성")
 async def generate_vm_project(
+    response: Response,
     project_id: str,
+    wait: bool = Query(True, description="VM 프로젝트 생성 완료까지 대기 여부 (False면 job 정보 즉시 반환)"),
     project_service: ProjectService = Depends(get_project_service),
     file_service: FileService = Depends(get_file_service),
+    vm_jobs: AsyncIOMotorCollection = Depends(get_vm_job_collection),
 ):
+    """
+    프로젝트로 VM 프로젝트 데이터(.prj, ncdata.zip)를 만들고 VM 서버에 프로젝트를 생성하는 API입니다.
+
+    - 생성은 백그라운드 작업으로 실행되며, 같은 프로젝트의 진행 중 작업이 있으면 그 작업을 이어서 사용합니다.
+    - wait=true: 완료까지 기다린 뒤 VM 서버 응답 반환 (기다리는 동안 다른 요청은 막히지 않음)
+    - wait=false: 202와 함께 job 정보 반환, /api/projects/{project_id}/vm-jobs/{job_id} 로 진행 상태 조회
+    """
     # 프로젝트 정보 가져오기
-    project = await project_service.repository.get_project_by_id(project_id)
-    # VM용 프로젝트 데이터 만들기
-    project_s3_path, nc_s3_path, project_id = await project_service.process_project_vm(
-        project, file_service
-    )
-
-    # 토큰 발급
-    vm_token_url = f"{settings.vm_api_url}/api/v1/auths/login/access-token"
-    token_body = {
-        "username": settings.vm_username,
-        "password": settings.vm_password,
-    }
-
-    token_headers = {"Content-Type": "application/x-www-form-urlencoded"}
-
-    try:
-        token_res = requests.post(vm_token_url, data=token_body, headers=token_headers)
-        token_res.raise_for_status()
-        access_token = token_res.json()["access_token"]
-    except requests.RequestException as e:
-        logging.warning(msg=str(e))
-        raise CustomException(ExceptionEnum.VM_AUTH_FAIL)
-    except KeyError:
-        raise CustomException(ExceptionEnum.VM_NOT_TOKEN)
-
-    # 프로젝트 header, body 생성
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
-
-    body = {
-        "machine_name": project_id,
-        "upload_file_link1": project_s3_path,
-        "upload_file_link2": nc_s3_path,
-    }
-
-    # vm프로젝트 생성 api 호출
-    vm_url = f"{settings.vm_api_url}/api/v1/macsim"
-
-    try:
-        response = requests.post(vm_url, json=body, headers=headers)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        raise CustomException(ExceptionEnum.VM_PRJ_FAIL)
+    project = await project_service.get_project_by_id(project_id)
+    repo = VmJobRepository(vm_jobs)
+    runner = get_vm_job_runner()
+
+    async def work(progress):
+        return await project_service.generate_vm_project(
+            project, file_service, get_vm_client(), progress
+        )
+
+    job = await runner.submit(repo, project_id, work)
+    if not wait:
+        response.status_code = 202
+        return VmJobStatusResponse(**job_status(job))
+    return job_result(await runner.wait(repo, job["_id"]))
+
+
+@router.get(
+    "/{project_id}/vm-jobs/{job_id}",
+    response_model=VmJobStatusResponse,
+    summary="VM 프로젝트 생성 작업 상태 조회",
+)
+async def get_vm_job(
+    project_id: str = Path(..., description="프로젝트 ID"),
+    job_id: str = Path(..., description="VM 프로젝트 생성 작업 ID"),
+    vm_jobs: AsyncIOMotorCollection = Depends(get_vm_job_collection),
+):
+    """
+    VM 프로젝트 생성 작업 상태를 조회하는 API입니다.
+
+    - status: queued / running / done / failed / timeout / cancelled
+    - stage/progress: 진행 단계 (parse_project → load_nc → split_nc → package → create_vm_project)와 진행률(0~100)
+    - done 이면 result 에 VM 서버 응답이 포함됩니다.
+    """
+    job = await get_vm_job_runner().get(VmJobRepository(vm_jobs), job_id)
+    if job["project_id"] != project_id:
+        raise CustomException(ExceptionEnum.JOB_NOT_FOUND)
+    return VmJobStatusResponse(**job_status(job))
 
 
 @router.get("/{project_id}/vaildate_xml", summary="프로젝트 xml 스키마 검사")
@@ -1,7 +1,12 @@
-from typing import Optional
-from fastapi import APIRouter, Depends, File, Path, Body, UploadFile
+from typing import Optional, Union
+from fastapi import APIRouter, Depends, File, Path, Body, Query, Response, UploadFile
 from src.services import get_file_service, FileService, ProjectService, get_project_service
-from src.schemas.file import FileCreateResponse, StpCreateResponse
+from src.schemas.file import (
+    FileCreateResponse,
+    StpCreateResponse,
+    StpJobResponse,
+    StlJobStatusResponse,
+)
 from src.utils.exceptions import CustomException, ExceptionEnum
 
 router = APIRouter(prefix="/api/upload", tags=["File Upload"])
@@ -9,10 +14,17 @@ router = APIRouter(prefix="/api/upload", tags=["File Upload"])
 ==============================================  파일 업로드 API ==============================================
 """
 
-@router.post("/stp", status_code=201, response_model=StpCreateResponse, summary="STEP 파일 업로드")
+@router.post(
+    "/stp",
+    status_code=201,
+    response_model=Union[StpCreateResponse, StpJobResponse],
+    summary="STEP 파일 업로드",
+)
 async def upload_step_file(
+    response: Response,
     project_id: str = Body(..., description="프로젝트의 ID"),
     step_file: UploadFile = File(..., description="업로드할 STEP 파일"),
+    wait: bool = Query(True, description="STL 변환 완료까지 대기 여부 (False면 job id 즉시 반환)"),
     project_service: ProjectService = Depends(get_project_service),
     file_service: FileService = Depends(get_file_service),
 ):
@@ -21,12 +33,47 @@ async def upload_step_file(
 
     - STEP 파일을 업로드하면 자동으로 STL 변환하여 함께 저장됩니다.
     - 변환된 STL 파일의 Id도 함께 프로젝트에 연결됩니다.
-    - 반환값: 업로드된 STEP, STL 파일 ID
+    - STL 변환은 별도 프로세스에서 실행되어 다른 요청을 막지 않습니다.
+    - wait=false: 202와 함께 job id 반환, /api/upload/stp/jobs/{job_id} 로 상태 조회
+    - 반환값: 업로드된 STEP, STL 파일 ID (또는 변환 작업 정보)
     """
     project = await project_service.get_project_by_id(project_id)
-    stp_stl_flie: dict = await file_service.stp_upload(step_file)
-    await project_service.stp_upload(project['_id'], stp_stl_flie)
-    return StpCreateResponse(**stp_stl_flie)
+
+    async def link_to_project(stp_stl_file: dict):
+        await project_service.stp_upload(project['_id'], stp_stl_file)
+
+    result: dict = await file_service.stp_upload(
+        step_file, wait=wait, on_converted=link_to_project
+    )
+    if "job_id" in result:
+        response.status_code = 202
+        return StpJobResponse(**result)
+    return StpCreateResponse(**result)
+
+@router.get("/stp/jobs/{job_id}", response_model=StlJobStatusResponse, summary="STEP → STL 변환 작업 상태 조회")
+async def get_stl_job(
+    job_id: str = Path(..., description="변환 작업 ID"),
+    file_service: FileService = Depends(get_file_service),
+):
+    """
+    STEP → STL 변환 작업 상태를 조회하는 API입니다.
+
+    - status: queued / running / done / failed / timeout / cancelled
+    - done 이면 result 에 STEP, STL 파일 ID와 LOD 별 파일 ID(files)가 포함됩니다.
+    """
+    return await file_service.get_stl_job(job_id)
+
+@router.delete("/stp/jobs/{job_id}", response_model=StlJobStatusResponse, summary="STEP → STL 변환 작업 취소")
+async def cancel_stl_job(
+    job_id: str = Path(..., description="변환 작업 ID"),
+    file_service: FileService = Depends(get_file_service),
+):
+    """
+    대기/실행 중인 STEP → STL 변환 작업을 취소하는 API입니다.
+
+    - 실행 중이면 변환 프로세스를 종료하고, 업로드된 STEP 파일도 정리됩니다.
+    """
+    return await file_service.cancel_stl_job(job_id)
 
 @router.post("/nc", status_code=201, response_model=FileCreateResponse, summary="NC 파일 업로드")
 async def upload_nc_file(
@@ -44,7 +91,7 @@ async def upload_nc_file(
     - **반환값**: 업로드된 NC 파일의 ID
     """
     project = await project_service.get_project_by_id(project_id)
-    file_id = await file_service.process_upload(nc_file)
+    file_id = await file_service.process_upload(nc_file, nc=True)
     await project_service.nc_upload(project, workplan_id, file_id)
     return FileCreateResponse(file_id=file_id)
 
@@ -1,5 +1,4 @@
-from fastapi import APIRouter, Depends, File, Path, Query
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import APIRouter, Depends, File, Path, Query, Request
 from src.services import (
     get_file_service,
     FileService,
@@ -7,6 +6,7 @@ from src.services import (
     get_asset_project_service,
 )
 from src.utils.exceptions import CustomException, ExceptionEnum
+from src.utils.download import gridfs_download_response
 
 router = APIRouter(prefix="/api/v2/download", tags=["File Download(v2)"])
 
@@ -17,6 +17,7 @@ router = APIRouter(prefix="/api/v2/download", tags=["File Download(v2)"])
 
 @router.get("/nc", status_code=200, summary="NC 파일 다운로드")
 async def download_nc_file(
+    request: Request,
     nc_id: str = Query(..., description="다운로드할 NC 파일의 Id"),
     workplan_id: str = Query(..., description="NC 파일이 속한 workplan Id"),
     project_id: str = Query(..., description="프로젝트의 ID"),
@@ -32,15 +33,14 @@ async def download_nc_file(
     project: dict = await project_service.get_project_by_id(project_id)
     project_service.valid_file_id(project, workplan_id, nc_id, "nc")
     file_stream = await file_service.get_file_stream(nc_id)
-    return StreamingResponse(
-        file_stream,
-        media_type="application/octet-stream",
-        headers={"Content-Disposition": f"attachment; filename={nc_id}.nc"},
+    return gridfs_download_response(
+        request, file_stream, filename=f"{nc_id}.nc"
     )
 
 
 @router.get("/vm", status_code=200, summary="Virtual Machine (VM) 파일 다운로드")
 async def download_vm_file(
+    request: Request,
     vm_id: str = Query(..., description="다운로드할 VM 파일의 Id"),
     workplan_id: str = Query(..., description="VM 파일이 속한 workplan Id"),
     project_id: str = Query(..., description="프로젝트의 ID"),
@@ -56,15 +56,14 @@ async def download_vm_file(
     project: dict = await project_service.get_project_by_id(project_id)
     project_service.valid_file_id(project, workplan_id, vm_id, "vm")
     file_stream = await file_service.get_file_stream(vm_id)
-    return StreamingResponse(
-        file_stream,
-        media_type="application/octet-stream",
-        headers={"Content-Disposition": f"attachment; filename={vm_id}.val"},
+    return gridfs_download_response(
+        request, file_stream, filename=f"{vm_id}.val"
     )
 
 
 @router.get("/tdms", status_code=200, summary="TDMS 파일 다운로드")
 async def download_tdms_file(
+    request: Request,
     tdms_log_id: str = Query(..., description="다운로드할 TDMS 로그 파일의 Id"),
     workplan_id: str = Query(..., description="TDMS 파일이 속한 workplan Id"),
     project_id: str = Query(..., description="프로젝트의 ID"),
@@ -81,8 +80,6 @@ async def download_tdms_file(
     project: dict = await project_service.get_project_by_id(project_id)
     project_service.valid_file_id(project, workplan_id, tdms_log_id, "tdms")
     file_stream = await file_service.get_file_stream(tdms_log_id)
-    return StreamingResponse(
-        file_stream,
-        media_type="application/octet-stream",
-        headers={"Content-Disposition": f"attachment; filename={tdms_log_id}.tdms"},
+    return gridfs_download_response(
+        request, file_stream, filename=f"{tdms_log_id}.tdms"
     )
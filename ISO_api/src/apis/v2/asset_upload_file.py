@@ -32,7 +32,7 @@ async def upload_nc_file(
 
     nc_filename = nc_file.filename
     project = await project_service.get_project_by_id(project_id)
-    file_id = await file_service.process_upload(nc_file)
+    file_id = await file_service.process_upload(nc_file, nc=True)
     await project_service.nc_upload(project, workplan_id, file_id, nc_filename)
     return FileCreateResponse(file_id=file_id)
 
@@ -6,12 +6,13 @@ from fastapi import (
     File,
     Path,
     Query,
+    Request,
     Response,
     UploadFile,
     HTTPException,
     status,
 )
-from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.responses import PlainTextResponse
 from src.services import (
     FileService,
     AssetService,
@@ -26,6 +27,7 @@ from src.schemas.asset import (
     GroupedAssetIdsResponse,
 )
 from src.utils.exceptions import CustomException, ExceptionEnum
+from src.utils.download import gridfs_download_response
 import requests
 from src.config import settings
 
@@ -176,6 +178,12 @@ async def update_asset(
     ),
     xml: UploadFile = File(..., description="교체할 dt_asset XML"),
     upload_file: UploadFile | None = File(None, description="dt_file 바이너리(옵션)"),
+    full_validation: bool = Query(
+        False, description="스키마 전체 검증 (기본: 변경된 요소만 증분 검증)"
+    ),
+    expected_version: Optional[int] = Query(
+        None, description="수정 기준으로 삼은 asset version (다르면 409, 생략 시 검사 안 함)"
+    ),
     asset_service: AssetService = Depends(get_asset_service),
     file_service: FileService = Depends(get_file_service),
 ):
@@ -184,6 +192,7 @@ async def update_asset(
     - (2) update_from_xml / update_from_xml_with_file_id 업데이트
     - (3) 파일 업로드 시, xml의 <display_name>에 파일 이름과 업로드 하는 파일이름이 일치해야 함.
     - dt_project는 해당 API로 수정 불가.
+    - expected_version 을 주면 그 사이 다른 수정이 있었을 때 덮어쓰지 않고 409.
     """
     # 프로젝트 타입은 교체 불가
     if type.strip().lower() == "dt_project":
@@ -218,6 +227,8 @@ async def update_asset(
                 xml=xml_string,
                 forbid_type_change=True,  # type 변경 금지
                 precheck_dup_conflict=True,  # 키 변경시 중복 선검사
+                full_validation=full_validation,
+                expected_version=expected_version,
             )
             return {"ok": True}
         except CustomException as ce:
@@ -225,6 +236,8 @@ async def update_asset(
                 raise HTTPException(status_code=404, detail="Asset not found")
             if ce.enum == ExceptionEnum.ASSET_ID_DUPLICATION:
                 raise HTTPException(status_code=409, detail="Duplicate asset keys")
+            if ce.enum == ExceptionEnum.ASSET_VERSION_CONFLICT:
+                raise HTTPException(status_code=409, detail=ce.detail)
             raise HTTPException(status_code=400, detail=str(ce))
 
     # 5️⃣ 파일 교체 플로우 ----------------------------------------
@@ -243,7 +256,9 @@ async def update_asset(
             raise HTTPException(status_code=400, detail=str(ce))
 
     # 파일 교체 플로우: 새 파일 업로드 → XML 패치+업데이트 → 성공 시 기존 파일 삭제 / 실패 시 새 파일 롤백
-    new_file_id = await file_service.process_upload(file=upload_file)
+    new_file_id = await file_service.process_upload(
+        file=upload_file, nc=(doc.get("category") or "").upper() == "NC"
+    )
     try:
         old_file_id = await asset_service.update_from_xml_with_file_id(
             mongo_id=mongo_id,
@@ -254,6 +269,7 @@ async def update_asset(
             path_template="gridfs://{oid}",
             forbid_type_change=True,
             precheck_dup_conflict=True,
+            expected_version=expected_version,
         )
     except CustomException as ce:
         # 업데이트 실패 → 새 파일 롤백
@@ -265,6 +281,8 @@ async def update_asset(
             raise HTTPException(status_code=404, detail="Asset not found")
         if ce.enum == ExceptionEnum.ASSET_ID_DUPLICATION:
             raise HTTPException(status_code=409, detail="Duplicate asset keys")
+        if ce.enum == ExceptionEnum.ASSET_VERSION_CONFLICT:
+            raise HTTPException(status_code=409, detail=ce.detail)
         raise HTTPException(status_code=400, detail=str(ce))
 
     # 성공 후, 구 파일 정리(있으면 베스트에포트)
@@ -334,6 +352,7 @@ async def extract_assets(
 
 @router.get("/file-download")
 async def download_file_by_asset_keys(
+    request: Request,
     global_asset_id: str = Query(...),
     asset_id: str = Query(...),
     element_id: str = Query(...),
@@ -347,8 +366,8 @@ async def download_file_by_asset_keys(
     Workflow:
     1. AssetService를 통해 XML에서 <value>에 저장된 파일 ObjectId(OID)와 메타데이터(display_name, content_type)를 조회
     2. FileService를 통해 해당 OID로 GridFS에서 파일 스트림(grid_out)을 획득
-    3. grid_out.readchunk()를 이용해 파일을 chunk 단위로 비동기 스트리밍
-    4. StreamingResponse로 클라이언트에 전송
+    3. gridfs_download_response로 chunk 단위 비동기 스트리밍
+       - Range 요청 시 206 Partial Content (이어받기), If-None-Match 일치 시 304
        - Content-Type: XML의 content_type 값 또는 기본값(application/octet-stream)
        - Content-Disposition: 파일명(display_name 또는 filename, 없으면 OID)
 
@@ -360,7 +379,7 @@ async def download_file_by_asset_keys(
         file_service (FileService): 의존성 주입된 FileService, GridFS 파일 스트림 조회
 
     Returns:
-        StreamingResponse: GridFS 파일을 클라이언트로 스트리밍 다운로드
+        Response: GridFS 파일을 클라이언트로 스트리밍 다운로드 (200/206/304/416)
 
     Raises:
         HTTPException:
@@ -377,13 +396,6 @@ async def download_file_by_asset_keys(
         )
         grid_out = await file_service.get_file_stream(oid)
 
-        async def _iter_chunks():
-            while True:
-                chunk = await grid_out.readchunk()
-                if not chunk:
-                    break
-                yield chunk
-
         fname = display_name or getattr(grid_out, "filename", None) or oid
         ctype = (
             content_type
@@ -391,10 +403,8 @@ async def download_file_by_asset_keys(
             or "application/octet-stream"
         )
 
-        return StreamingResponse(
-            _iter_chunks(),
-            media_type=ctype,
-            headers={"Content-Disposition": f'attachment; filename="{fname}"'},
+        return gridfs_download_response(
+            request, grid_out, filename=fname, media_type=ctype
         )
     except CustomException as ce:
         raise HTTPException(status_code=ce.status_code, detail=ce.detail)
@@ -1,4 +1,5 @@
 from typing import Optional, Dict, List, Any
+import json
 import logging
 import xmltodict
 from fastapi import (
@@ -12,6 +13,7 @@ from fastapi import (
     HTTPException,
     Form,
 )
+from fastapi.responses import StreamingResponse
 from src.services import (
     FileService,
     V3ProjectService,
@@ -27,18 +29,21 @@ from src.schemas.asset import (
     AttachRefResponse,
     AssetCreateRequest,
 )
-from src.utils.nc_spliter import extract_tool_sequence
 from src.utils.v3_xml_parser import (
     extract_dtfile_oid,
-    append_ws_into_project_xml,
+    parse_dtasset_doc,
+    serialize_dtasset_doc,
+    append_ws_into_project_doc,
+    build_dtasset_projection,
     create_feature_xml_temp,
-    count_workingsteps_in_workplan_xml,
+    count_workingsteps_in_workplan_doc,
     validate_xml_against_schema,
     inject_cutting_tool_ref,
     get_nested_value,
 )
 from src.utils.exceptions import CustomException, ExceptionEnum
 from src.utils.file_modifier import read_json_file
+from src.utils.stage_timer import StageTimer
 from src.utils.cam_common import (
     invert_cam14649_to_cam13399,
     extract_13399_values_from_cam,
@@ -52,7 +57,7 @@ from src.utils.cam_common import (
     find_cam_key_for_coolant,
     ensure_strategy_with_pathmode,
     reorder_operation_children,
-    normalize_dt_project_structure,
+    normalize_dt_project_doc,
 )
 from src.utils.cam_nx_adapter import pick_nx_ops
 from src.utils.cam_powermill_adapter import (
@@ -221,6 +226,7 @@ async def remove_ref(
     summary="(NX/PowerMill) NC의 T시퀀스에 맞춰 CAM JSON + 매핑으로 Tool/Workingstep 생성 → Workplan에 추가",
 )
 async def apply_cam_into_workplan(
+    response: Response,
     global_asset_id: str = Query(...),
     asset_id: str = Query(...),
     project_element_id: str = Query(..., alias="element_id"),
@@ -233,6 +239,9 @@ async def apply_cam_into_workplan(
     ops_order: str | None = Form(
         None, description="PowerMill 전용: 처리 순서(콤마/JSON 배열). NX는 불필요."
     ),
+    full_validation: bool = Query(
+        False, description="스키마 전체 검증 (기본: 새로 추가된 요소만 증분 검증)"
+    ),
     asset_service: AssetService = Depends(get_asset_service),
     file_service: FileService = Depends(get_file_service),
     project_service: V3ProjectService = Depends(get_v3_project_service),
@@ -242,14 +251,18 @@ async def apply_cam_into_workplan(
     0) NC dt_file 1개를 프로젝트/워크플랜 기준으로 찾아서 T시퀀스 추출
     1) CAM 파일 순서 확정(NX: 단일파일, PowerMill: ops_order 필수) 후 op 리스트 구성
     2) CAM→14649 매핑 로드 + 14649→13399 합성 테이블 준비
-    3) 프로젝트 XML 로딩(원본 보관) + 정책: 기존 워킹스텝 있으면 차단
+    3) 프로젝트 XML 로딩(원본 보관) → dict 문서로 1회 파싱 + 정책: 기존 워킹스텝 있으면 차단
     4) 메모리에서 전부 생성:
        - (중복 T 재사용) 각 T에 대해 13399 tool XML 생성(필요 시) + WS XML/DICT 생성
          - its_tool 스텁 + ref_dt_cutting_tool 주입
          - its_secplane 더미 보강
     5) 스키마 선검증 (툴XML들 + 최종 프로젝트XML)
+       - 프로젝트 문서에 WS 누적 append + 구조 정렬을 dict 상태에서 끝내고 직렬화는 1회
     6) 실제 쓰기(툴 → 프로젝트). DB 오류 시 보상 롤백
+    단계별 소요 시간은 로그와 Server-Timing 응답 헤더로 남긴다.
     """
+    timer = StageTimer("apply_cam_into_workplan")
+
     # --- 0) NC 참조 검증 + T 시퀀스 ---
     g_url = project_service.normalize_global_asset_id(global_asset_id)
 
@@ -284,8 +297,10 @@ async def apply_cam_into_workplan(
             status_code=422, detail="NC file OID not found in asset XML"
         )
 
-    nc_text = await file_service.get_file_text(nc_oid)
-    tool_seq = extract_tool_sequence(nc_text)  # ["T2","T3","T1","T2", ...]
+    with timer.stage("nc"):
+        tool_seq = [  # ["T2","T3","T1","T2", ...]
+            e["tool"] for e in await file_service.get_nc_tool_changes(nc_oid)
+        ]
     if not tool_seq:
         return {"message": "No tool change sequence detected from NC", "applied": 0}
 
@@ -347,11 +362,14 @@ async def apply_cam_into_workplan(
     if not proj_doc or not isinstance(proj_doc.get("data"), str):
         raise HTTPException(status_code=404, detail="Project asset XML not found")
     original_project_xml: str = proj_doc["data"]
-    working_project_xml: str = original_project_xml
+
+    # 작업 문서: 여기서 한 번만 파싱하고 이후 append/정렬은 이 dict 에 in-place 로 적용
+    with timer.stage("parse"):
+        project_doc = parse_dtasset_doc(original_project_xml)
 
     # 정책: 기존 워킹스텝이 있으면 차단 (추가/수정은 별도 API)
-    existing_ws_count = count_workingsteps_in_workplan_xml(
-        original_project_xml, project_element_id, workplan_id
+    existing_ws_count = count_workingsteps_in_workplan_doc(
+        project_doc, project_element_id, workplan_id
     )
     if existing_ws_count > 0:
         raise HTTPException(
@@ -369,226 +387,225 @@ async def apply_cam_into_workplan(
     tool_xmls_to_write: Dict[str, str] = {}  # elem_id -> XML
     ws_nodes_to_append: List[Dict[str, Any]] = []
 
-    for idx, tool_tag in enumerate(tool_seq):
-        cam_op = all_ops[idx]
-
-        # 4-A) cutting tool(13399) 생성/재사용
-        elem_id = tool_cache.get(tool_tag)
-        if not elem_id:
-            # ✅ element_id 는 'T번호' 그대로 사용
-            #    (tool_tag가 'T1','T2' 형태이므로 그대로 element_id로 채택)
-            elem_id = tool_tag.strip() or f"T{idx+1}"
-
-            # ✅ display_name 은 매핑에서 추출한 ToolType(=MachiningTool.its_id) 값 사용, 없으면 tool_tag
-            display = derive_tool_display_name_from_mapping(
-                cam_op=cam_op,
-                cam_to_14649_map=cam_to_14649_map,
-                fallback_display=tool_tag,
-            )
+    with timer.stage("build"):
+        for idx, tool_tag in enumerate(tool_seq):
+            cam_op = all_ops[idx]
+
+            # 4-A) cutting tool(13399) 생성/재사용
+            elem_id = tool_cache.get(tool_tag)
+            if not elem_id:
+                # ✅ element_id 는 'T번호' 그대로 사용
+                #    (tool_tag가 'T1','T2' 형태이므로 그대로 element_id로 채택)
+                elem_id = tool_tag.strip() or f"T{idx+1}"
+
+                # ✅ display_name 은 매핑에서 추출한 ToolType(=MachiningTool.its_id) 값 사용, 없으면 tool_tag
+                display = derive_tool_display_name_from_mapping(
+                    cam_op=cam_op,
+                    cam_to_14649_map=cam_to_14649_map,
+                    fallback_display=tool_tag,
+                )
 
-            vals13399 = extract_13399_values_from_cam(cam_op, cam_to_13399_map)
+                vals13399 = extract_13399_values_from_cam(cam_op, cam_to_13399_map)
 
-            tool_xml = build_cutting_tool_13399_dtasset_xml(
-                global_asset_id_url=g_url,
-                asset_id=tool_asset_id,
-                element_id=elem_id,  # ← T번호
-                display_name=display,  # ← 툴 타입(매핑)
-                values_13399=vals13399,
-            )
-            tool_cache[tool_tag] = elem_id
-            tool_xmls_to_write[elem_id] = tool_xml
+                tool_xml = build_cutting_tool_13399_dtasset_xml(
+                    global_asset_id_url=g_url,
+                    asset_id=tool_asset_id,
+                    element_id=elem_id,  # ← T번호
+                    display_name=display,  # ← 툴 타입(매핑)
+                    values_13399=vals13399,
+                )
+                tool_cache[tool_tag] = elem_id
+                tool_xmls_to_write[elem_id] = tool_xml
 
-        # 4-B) 워킹스텝 XML → dict 변환, its_tool 스텁 + ref_dt_cutting_tool 주입
-        ws_xml = create_feature_xml_temp(
-            json_data=cam_op, mapping_data=cam_to_14649_map, strict_required=False
-        )
-        ws_node = xmltodict.parse(
-            ws_xml,
-            process_namespaces=True,
-            namespaces={
-                "http://digital-thread.re/dt_asset": None,
-                "http://digital-thread.re/iso14649": None,
-                "http://www.w3.org/2001/XMLSchema-instance": "xsi",
-            },
-            attr_prefix="@",
-        )["its_elements"]
-
-        op = ws_node.get("its_operation") or {}
-        # its_tool 더미 유지 …
-        # ref_dt_cutting_tool 구성 (요구 포맷):
-        full_uri = f"{g_url}/{tool_asset_id}/{elem_id}"
-        op["ref_dt_cutting_tool"] = {
-            "element_id": elem_id,  # ✅ ref 자체의 element_id도 tool elem_id와 동일
-            "category": "reference",
-            "display_name": "Cutting Tool Ref",
-            "keys": [
-                {"key": "DT_ELEMENT_FULLPATH", "value": full_uri},  # ✅ 단일 키만 사용
-            ],
-        }
-        ws_node["its_operation"] = op
-
-        # ref_dt_cutting_tool 주입 (이제 FULLPATH + 메타로)
-        full_uri = f"{g_url}/{tool_asset_id}/{elem_id}"
-
-        inject_cutting_tool_ref(
-            ws_node,
-            tool_uri=full_uri,
-            dt_global_url=g_url,  # 호환용 자리만 채움(유틸 내부에서 미사용)
-            tool_asset_id=tool_asset_id,  # 호환용 자리만 채움(유틸 내부에서 미사용)
-            tool_element_id=elem_id,  # ref_dt_cutting_tool.element_id == tool elem_id
-            display_name="Cutting Tool Ref",
-        )
+            # 4-B) 워킹스텝 XML → dict 변환, its_tool 스텁 + ref_dt_cutting_tool 주입
+            ws_xml = create_feature_xml_temp(
+                json_data=cam_op, mapping_data=cam_to_14649_map, strict_required=False
+            )
+            ws_node = xmltodict.parse(
+                ws_xml,
+                process_namespaces=True,
+                namespaces={
+                    "http://digital-thread.re/dt_asset": None,
+                    "http://digital-thread.re/iso14649": None,
+                    "http://www.w3.org/2001/XMLSchema-instance": "xsi",
+                },
+                attr_prefix="@",
+            )["its_elements"]
+
+            op = ws_node.get("its_operation") or {}
+            # its_tool 더미 유지 …
+            # ref_dt_cutting_tool 구성 (요구 포맷):
+            full_uri = f"{g_url}/{tool_asset_id}/{elem_id}"
+            op["ref_dt_cutting_tool"] = {
+                "element_id": elem_id,  # ✅ ref 자체의 element_id도 tool elem_id와 동일
+                "category": "reference",
+                "display_name": "Cutting Tool Ref",
+                "keys": [
+                    {"key": "DT_ELEMENT_FULLPATH", "value": full_uri},  # ✅ 단일 키만 사용
+                ],
+            }
+            ws_node["its_operation"] = op
+
+            # ref_dt_cutting_tool 주입 (이제 FULLPATH + 메타로)
+            full_uri = f"{g_url}/{tool_asset_id}/{elem_id}"
+
+            inject_cutting_tool_ref(
+                ws_node,
+                tool_uri=full_uri,
+                dt_global_url=g_url,  # 호환용 자리만 채움(유틸 내부에서 미사용)
+                tool_asset_id=tool_asset_id,  # 호환용 자리만 채움(유틸 내부에서 미사용)
+                tool_element_id=elem_id,  # ref_dt_cutting_tool.element_id == tool elem_id
+                display_name="Cutting Tool Ref",
+            )
 
-        # its_secplane 더미 보강 (name + 빈 position)
-        ensure_dummy_secplane(ws_node)
+            # its_secplane 더미 보강 (name + 빈 position)
+            ensure_dummy_secplane(ws_node)
 
-        # its_feature 더미 보강
-        ensure_dummy_feature(ws_node)
+            # its_feature 더미 보강
+            ensure_dummy_feature(ws_node)
 
-        # ✅ pathmode 보강(+순서 정렬). CAM 매핑에 있으면 그 값, 없으면 "forward"
-        ensure_strategy_with_pathmode(
-            ws_node, cam_op, cam_to_14649_map, default="forward"
-        )
+            # ✅ pathmode 보강(+순서 정렬). CAM 매핑에 있으면 그 값, 없으면 "forward"
+            ensure_strategy_with_pathmode(
+                ws_node, cam_op, cam_to_14649_map, default="forward"
+            )
 
-        # feedrate_reference 보강 (cutmode는 ws_node 쪽에서 추출 가능하면 넣고, 없으면 None)
-        cutmode = (
-            ws_node.get("its_operation", {})
-            .get("MachiningOperation", {})
-            .get("MillingMachiningOperation", {})
-            .get("MillingTypeOperation", {})
-            .get("FreeformOperation", {})
-            .get("its_machining_strategy", {})
-            .get("FreeformStrategy", {})
-            .get("cutmode")
-        )
+            # feedrate_reference 보강 (cutmode는 ws_node 쪽에서 추출 가능하면 넣고, 없으면 None)
+            cutmode = (
+                ws_node.get("its_operation", {})
+                .get("MachiningOperation", {})
+                .get("MillingMachiningOperation", {})
+                .get("MillingTypeOperation", {})
+                .get("FreeformOperation", {})
+                .get("its_machining_strategy", {})
+                .get("FreeformStrategy", {})
+                .get("cutmode")
+            )
 
-        # ① CAM JSON에서 coolant 원값 뽑기
-        coolant_cam_key = find_cam_key_for_coolant(cam_to_14649_map)
-        raw_coolant = (
-            get_nested_value(cam_op, coolant_cam_key.split("."))
-            if coolant_cam_key
-            else None
-        )
+            # ① CAM JSON에서 coolant 원값 뽑기
+            coolant_cam_key = find_cam_key_for_coolant(cam_to_14649_map)
+            raw_coolant = (
+                get_nested_value(cam_op, coolant_cam_key.split("."))
+                if coolant_cam_key
+                else None
+            )
 
-        # ② 밀링 머신 펑션 보강 (bool 변환 + 필수 필드 채우기)
-        ensure_milling_machine_functions(ws_node, raw_coolant, default=False)
+            # ② 밀링 머신 펑션 보강 (bool 변환 + 필수 필드 채우기)
+            ensure_milling_machine_functions(ws_node, raw_coolant, default=False)
 
-        # its_tool 더미 추가
-        force_dummy_its_tool(ws_node, dummy_id="temp")
+            # its_tool 더미 추가
+            force_dummy_its_tool(ws_node, dummy_id="temp")
 
-        # its_technology, feedrate_reference 보강 + 순서 정렬
-        ensure_milling_technology(ws_node, cutmode=cutmode)
+            # its_technology, feedrate_reference 보강 + 순서 정렬
+            ensure_milling_technology(ws_node, cutmode=cutmode)
 
-        # ✅ its_operation 순서 재정렬 (ref_dt_cutting_tool 맨 앞)
-        ws_node["its_operation"] = reorder_operation_children(ws_node["its_operation"])
+            # ✅ its_operation 순서 재정렬 (ref_dt_cutting_tool 맨 앞)
+            ws_node["its_operation"] = reorder_operation_children(ws_node["its_operation"])
 
-        ws_nodes_to_append.append(ws_node)
+            ws_nodes_to_append.append(ws_node)
 
     # --- 5) 쓰기 전 스키마 검증 → 쓰기 + 보상 롤백 ---
-    created_tool_elements: List[str] = (
-        []
-    )  # 이번 호출에서 '새로 생성한' tool element_id만 기록
+    # 이번 호출에서 '새로 생성한' tool 문서만 기록 (롤백 시 delete_many 1회)
+    created_tools: List[Dict[str, Any]] = []
 
     try:
         # 5-0) 스키마 선검증: (A) 모든 cutting_tool_13399 XML, (B) 최종 프로젝트 XML
-        for _elem_id, tool_xml in tool_xmls_to_write.items():
-            if not validate_xml_against_schema(tool_xml):
-                raise HTTPException(
-                    status_code=422,
-                    detail=f"Invalid tool XML schema: element_id={_elem_id}",
+        with timer.stage("validate_tools"):
+            for _elem_id, tool_xml in tool_xmls_to_write.items():
+                if not validate_xml_against_schema(tool_xml, full=full_validation):
+                    raise HTTPException(
+                        status_code=422,
+                        detail=f"Invalid tool XML schema: element_id={_elem_id}",
+                    )
+
+        # 작업 문서에 WS 누적 → 한 방에 전체 정렬 → 직렬화 1회
+        with timer.stage("assemble"):
+            for ws_node in ws_nodes_to_append:
+                append_ws_into_project_doc(
+                    project_doc,
+                    project_element_id=project_element_id,
+                    workplan_id=workplan_id,
+                    ws_node_dict=ws_node,
                 )
+            normalize_dt_project_doc(project_doc, project_element_id)
 
-        updated_xml = working_project_xml
-        for ws_node in ws_nodes_to_append:
-            updated_xml = append_ws_into_project_xml(
-                project_xml_text=updated_xml,
-                project_element_id=project_element_id,
-                workplan_id=workplan_id,
-                ws_node_dict=ws_node,
-            )
-
-        # ✅ 한 방에 전체 정렬
-        updated_xml = normalize_dt_project_structure(updated_xml, project_element_id)
+        with timer.stage("serialize"):
+            updated_xml = serialize_dtasset_doc(project_doc)
 
-        if not validate_xml_against_schema(updated_xml):
+        with timer.stage("validate"):
+            valid = validate_xml_against_schema(updated_xml, full=full_validation)
+        if not valid:
             with open("debug_updated.xml", "w", encoding="utf-8") as f:
                 f.write(updated_xml)
             raise HTTPException(
                 status_code=422, detail="Updated project XML failed schema validation"
             )
 
-        # 5-1) 실제 쓰기: 툴 → 프로젝트 (DB 에러 대비 롤백 준비)
-        #    - 이미 스키마 통과했으므로 여기서는 DB 오류만 대비
-        for elem_id, tool_xml in tool_xmls_to_write.items():
-            # 존재하면 재사용, 없을 때만 생성
-            from src.utils.v3_xml_parser import extract_dtasset_meta
-
-            meta = extract_dtasset_meta(tool_xml, strict=True)
-            exists = await asset_service.get_by_keys(
-                global_asset_id=meta["global_asset_id"],
-                asset_id=meta["asset_id"],
-                type=meta["type"],
-                element_id=meta["element_id"],
-            )
-            if not exists:
-                await asset_service.create_from_xml(tool_xml, upsert=False)
-                created_tool_elements.append(elem_id)
-
-        ok = await asset_service.update_from_xml(
-            mongo_id=str(proj_doc["_id"]),
-            xml=updated_xml,
-            validate_schema=False,  # 이미 유효성 검증 완료
-            forbid_type_change=True,
-            precheck_dup_conflict=False,
-        )
-        if not ok:
-            raise HTTPException(status_code=500, detail="Project update failed")
+        # 저장용 메타/프로젝션: 직렬화된 XML 기준으로 한 번만 추출해서 update_from_xml 에 전달
+        with timer.stage("projection"):
+            projection = build_dtasset_projection(updated_xml, strict=True)
+
+        # 5-1) 실제 쓰기: 툴 → 프로젝트를 unit-of-work 한 번으로
+        #    - 이미 스키마 통과했으므로 여기서는 DB 오류/동시 수정만 대비
+        #    - 툴: 존재하면 재사용, 없을 때만 생성 ($in 조회 1회 + insert_many 1회)
+        #    - 프로젝트: 3) 에서 읽은 version 기준으로 쓰기 → 그 사이 다른 수정이 있었으면 409
+        #    - replica set 이면 툴+프로젝트가 한 트랜잭션으로 커밋, 아니면 아래 보상 롤백
+        async def _write(session) -> None:
+            nonlocal created_tools
+            with timer.stage("write_tools"):
+                created_tools = await asset_service.create_many_from_xml(
+                    list(tool_xmls_to_write.values()),
+                    validate_schema=False,  # 5-0 에서 검증 완료
+                    session=session,
+                )
+            with timer.stage("write_project"):
+                ok = await asset_service.update_from_xml(
+                    mongo_id=str(proj_doc["_id"]),
+                    xml=updated_xml,
+                    validate_schema=False,  # 이미 유효성 검증 완료
+                    forbid_type_change=True,
+                    precheck_dup_conflict=False,
+                    projection=projection,
+                    expected_version=proj_doc.get("version", 0),
+                    session=session,
+                )
+            if not ok:
+                raise HTTPException(status_code=500, detail="Project update failed")
+
+        # 워크스텝 생성 전체를 다시 할 수는 없으므로 version 충돌은 재시도 없이 409
+        await asset_service.unit_of_work(_write, retries=0)
 
         # 성공
+        timer.log()
+        response.headers["Server-Timing"] = timer.server_timing()
         return {
             "message": f"{cam_type.upper()} CAM applied",
             "order_applied": ordered_names if ct.startswith("power") else None,
             "tool_sequence": tool_seq,
-            "tools_created": len(created_tool_elements),
+            "tools_created": len(created_tools),
             "workingsteps_appended": len(ws_nodes_to_append),
             "project_element_id": project_element_id,
             "workplan_id": workplan_id,
         }
 
-    except HTTPException:
+    except (HTTPException, CustomException):
         # 프로젝트 XML은 아직 DB에 쓰기 전이면 복원 불필요.
-        # 다만 툴 생성이 일부라도 됐으면 삭제(보상 롤백).
-        for elem_id in created_tool_elements:
-            try:
-                await asset_service.repo.rollback_delete_tool_by_keys(
-                    global_asset_id=g_url, asset_id=tool_asset_id, element_id=elem_id
-                )
-            except Exception:
-                logging.exception(
-                    "[apply_cam_into_workplan] tool delete rollback failed: %s",
-                    elem_id,
-                )
+        # 다만 툴 생성이 됐으면 삭제(보상 롤백).
+        await _rollback_created_tools(asset_service, created_tools)
         raise
 
     except Exception as e:
         # 예기치 못한 오류. 프로젝트 XML이 이미 저장됐다면 복원 시도.
+        # (이번 쓰기 직후 version 일 때만 → 그 뒤 다른 요청의 수정은 덮어쓰지 않음)
         try:
             await asset_service.repo.rollback_restore_xml_by_mongo_id(
-                str(proj_doc["_id"]), original_project_xml
+                str(proj_doc["_id"]),
+                original_project_xml,
+                expected_version=proj_doc.get("version", 0) + 1,
             )
         except Exception:
             logging.exception("[apply_cam_into_workplan] project xml restore failed")
 
-        for elem_id in created_tool_elements:
-            try:
-                await asset_service.repo.rollback_delete_tool_by_keys(
-                    global_asset_id=g_url, asset_id=tool_asset_id, element_id=elem_id
-                )
-            except Exception:
-                logging.exception(
-                    "[apply_cam_into_workplan] tool delete rollback failed: %s",
-                    elem_id,
-                )
+        await _rollback_created_tools(asset_service, created_tools)
 
         raise HTTPException(
             status_code=500,
@@ -596,6 +613,76 @@ async def apply_cam_into_workplan(
         )
 
 
+async def _rollback_created_tools(
+    asset_service: AssetService, created_tools: List[Dict[str, Any]]
+) -> None:
+    """apply_cam_into_workplan 보상 롤백: 이번 호출에서 생성한 tool 문서 일괄 삭제."""
+    if not created_tools:
+        return
+    try:
+        await asset_service.repo.rollback_delete_by_mongo_ids(
+            [t["asset_mongo_id"] for t in created_tools]
+        )
+    except Exception:
+        logging.exception(
+            "[apply_cam_into_workplan] tool delete rollback failed: %s",
+            [t["element_id"] for t in created_tools],
+        )
+
+
+@router.post(
+    "/nc/split-batch",
+    summary="NC 파일 여러 개(또는 프로젝트 전체) 툴 교체 기준 일괄 분할 + T시퀀스 추출 (NDJSON)",
+)
+async def split_nc_batch(
+    nc_file_ids: List[str] = Query(None, description="NC 파일 GridFS id 목록"),
+    global_asset_id: Optional[str] = Query(
+        None, description="(프로젝트 단위) 프로젝트 global_asset_id"
+    ),
+    asset_id: Optional[str] = Query(None, description="(프로젝트 단위) 프로젝트 asset_id"),
+    project_element_id: Optional[str] = Query(
+        None, description="(프로젝트 단위) 이 프로젝트를 참조하는 NC 전부 포함"
+    ),
+    store_zip: bool = Query(
+        False, description="세그먼트 zip(ncdata.zip 구조)을 GridFS 에 저장하고 zip_file_id 반환"
+    ),
+    asset_service: AssetService = Depends(get_asset_service),
+    file_service: FileService = Depends(get_file_service),
+):
+    """
+    NC 파일별 작업(분할 + T시퀀스 추출)을 프로세스 풀에서 병렬 실행하고,
+    끝나는 순서대로 한 줄에 하나씩 결과를 보낸다 (application/x-ndjson).
+    - 파일 줄: {"nc_file_id", "base_name", "status": "ok", "segment_count", "segments", "tool_sequence", ...}
+      실패한 파일은 {"nc_file_id", "status": "failed", "error"} 로만 보고하고 배치는 계속
+    - 마지막 줄: {"done": true, "total", "ok", "failed"}
+    """
+    ids = list(nc_file_ids or [])
+    if project_element_id:
+        if not global_asset_id or not asset_id:
+            raise HTTPException(
+                status_code=422,
+                detail="global_asset_id and asset_id are required with project_element_id",
+            )
+        ids += await asset_service.find_nc_file_oids_by_project(
+            global_asset_id=global_asset_id,
+            asset_id=asset_id,
+            project_element_id=project_element_id,
+        )
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HTTPException(status_code=404, detail="No NC files to split")
+
+    async def body():
+        counts = {"ok": 0, "failed": 0}
+        async for item in file_service.split_nc_batch(ids, store_zip=store_zip):
+            counts[item["status"]] += 1
+            yield (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+        summary = {"done": True, "total": len(ids), **counts}
+        yield (json.dumps(summary) + "\n").encode("utf-8")
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
 @router.post("/upload-platform")
 async def upload_project_and_refs(
     global_asset_id: str = Query(..., description="프로젝트 global_asset_id"),
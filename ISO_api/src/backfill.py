@@ -0,0 +1,42 @@
+"""
+assets.parsed(구조화 프로젝션 + parsed.refs 참조 인덱스) 백필 커맨드.
+
+사용 예:
+    python -m src.backfill          # parsed 가 없거나 버전이 낮은 문서만
+    python -m src.backfill --all    # 전체 문서 재계산
+
+PROJECTION_VERSION 이 오르면(예: 3 = refs 값 소문자 정규화) 기본 실행으로 이전 버전 문서가 재계산된다.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from src.database import get_db, get_asset_collection, ensure_asset_indexes
+from src.entities.asset import AssetRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_asset_projections(*, only_missing: bool = True) -> dict:
+    db = await get_db()
+    await ensure_asset_indexes(db)
+    repo = AssetRepository(await get_asset_collection(db))
+    result = await repo.rebuild_projections(only_missing=only_missing)
+    logger.info("asset projection backfill: %s", result)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="assets.parsed / parsed.refs 백필")
+    parser.add_argument(
+        "--all", action="store_true", help="parsed 가 있는 문서도 모두 재계산"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(backfill_asset_projections(only_missing=not args.all))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,18 @@ from motor.motor_asyncio import (
 )
 from dotenv import load_dotenv
 from functools import lru_cache
+from typing import Optional
 from fastapi import Depends
 import os
-from pymongo import ASCENDING
 
 load_dotenv()
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://mongo:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "iso14649")
+# 멀티 문서 트랜잭션: auto(replica set/mongos 면 사용) | off
+MONGO_TRANSACTIONS = os.getenv("MONGO_TRANSACTIONS", "auto").lower()
+
+_transactions_supported: Optional[bool] = None
 
 
 @lru_cache()
@@ -24,6 +28,23 @@ async def get_db() -> AsyncIOMotorDatabase:
     return get_motor_client()[DATABASE_NAME]
 
 
+async def supports_transactions(client: AsyncIOMotorClient) -> bool:
+    """
+    트랜잭션 사용 가능 여부 (standalone mongod 는 불가, replica set / mongos 만 가능).
+    hello 결과는 프로세스당 한 번만 확인해서 캐시.
+    """
+    global _transactions_supported
+    if MONGO_TRANSACTIONS in ("off", "false", "0"):
+        return False
+    if _transactions_supported is None:
+        try:
+            hello = await client.admin.command("hello")
+        except Exception:
+            return False
+        _transactions_supported = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+    return _transactions_supported
+
+
 async def get_project_collection(db: AsyncIOMotorDatabase = Depends(get_db)):
     return db["projects"]
 
@@ -32,6 +53,26 @@ async def get_grid_fs(db: AsyncIOMotorDatabase = Depends(get_db)):
     return AsyncIOMotorGridFSBucket(db, bucket_name="files")
 
 
+# GridFS 파일 문서 컬렉션 (메타데이터 갱신용, 버킷 이름 "files" 와 맞춤)
+async def get_grid_fs_files_collection(db: AsyncIOMotorDatabase = Depends(get_db)):
+    return db["files.files"]
+
+
+# GridFS 내용 주소(sha256) → blob/refcount 컬렉션 (FileRepository 중복 제거용)
+async def get_file_content_collection(db: AsyncIOMotorDatabase = Depends(get_db)):
+    return db["file_contents"]
+
+
+# STEP → STL 변환 작업 상태 (src.utils.tessellation)
+async def get_tessellation_job_collection(db: AsyncIOMotorDatabase = Depends(get_db)):
+    return db["tessellation_jobs"]
+
+
+# VM 프로젝트 생성 작업 상태 (src.utils.vm_jobs)
+async def get_vm_job_collection(db: AsyncIOMotorDatabase = Depends(get_db)):
+    return db["vm_jobs"]
+
+
 # v3용 asset collection 추가
 async def get_asset_collection(db: AsyncIOMotorDatabase = Depends(get_db)):
     return db["assets"]
@@ -39,18 +80,7 @@ async def get_asset_collection(db: AsyncIOMotorDatabase = Depends(get_db)):
 
 # --- 인덱스 유틸 (호출은 main.py/startup에서) ---
 async def ensure_asset_indexes(db: AsyncIOMotorDatabase = Depends(get_db)) -> None:
-    col = db["assets.assets"]
-    await col.create_index(
-        [
-            ("global_asset_id", ASCENDING),
-            ("asset_id", ASCENDING),
-            ("type", ASCENDING),
-            ("element_id", ASCENDING),
-        ],
-        unique=True,
-        name="uniq_gasset_asset_type_element",
-    )
-    await col.create_index([("asset_id", ASCENDING)], name="idx_asset_id")
-    await col.create_index([("type", ASCENDING)], name="idx_type")
-    await col.create_index([("category", ASCENDING)], name="idx_category")
-    await col.create_index([("element_id", ASCENDING)], name="idx_element_id")
+    """assets 컬렉션 인덱스만 생성 (선언은 src/indexes.py)."""
+    from src.indexes import ASSET_COLLECTION, INDEX_SPECS, ensure_indexes
+
+    await ensure_indexes(db, {ASSET_COLLECTION: INDEX_SPECS[ASSET_COLLECTION]})
@@ -1,11 +1,10 @@
 from __future__ import annotations
 
-import re
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorCollection
 from pymongo import ASCENDING
-from pymongo.errors import DuplicateKeyError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from src.utils.exceptions import CustomException, ExceptionEnum
 
 from src.schemas.asset import (
@@ -14,13 +13,48 @@ from src.schemas.asset import (
     AssetDocument,
     AssetSearchQuery,
 )
-from src.utils.v3_xml_parser import extract_dtasset_meta, project_workplan_exists_in_xml
+from src.utils.v3_xml_parser import (
+    PROJECTION_VERSION,
+    build_dtasset_projection,
+    normalize_ref_value,
+)
+from src.entities.unit_of_work import VersionConflict, version_filter
 
 import logging
 
 
-def _esc(s: str) -> str:
-    return re.escape(s)
+def _ref_match(refs: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """
+    parsed.refs 에 대한 $elemMatch 조건 생성 (같은 <reference> 안의 키끼리 AND).
+    - 값이 비어 있으면 해당 키가 없는 reference 와 매칭
+    - 저장 값과 같이 normalize_ref_value 로 정규화 → 대소문자 무시 매칭
+    - 인덱스: idx_refs (database.ensure_asset_indexes)
+    """
+    cond: Dict[str, Any] = {}
+    for k, v in refs.items():
+        cond[k] = normalize_ref_value(v)
+    return {"parsed.refs": {"$elemMatch": cond}}
+
+
+# 일반 조회에서는 parsed(구조화 프로젝션)를 내려받지 않음 (data 와 중복 용량)
+_WITHOUT_PARSED = {"parsed": 0}
+
+_KEY_FIELDS = ("global_asset_id", "asset_id", "type", "element_id")
+
+
+def _keys_in(keys: List[Tuple[str, str, str, str]]) -> Dict[str, Any]:
+    """
+    (global_asset_id, asset_id, type, element_id) 목록 → 조회 조건.
+    앞의 세 키가 같은 것끼리 묶어 element_id $in 으로 (대부분 한 그룹 → 유니크 인덱스 단일 범위 스캔).
+    """
+    groups: Dict[Tuple[str, str, str], List[str]] = {}
+    for g, a, t, e in keys:
+        groups.setdefault((g, a, t), []).append(e)
+    conds = [
+        {"global_asset_id": g, "asset_id": a, "type": t, "element_id": {"$in": elems}}
+        for (g, a, t), elems in groups.items()
+    ]
+    return conds[0] if len(conds) == 1 else {"$or": conds}
 
 
 # Asset 정보를 MongoDB에 저장, 조회, 수정, 삭제 등 프로젝트 관련 DB 작업을 담당하는 클래스입니다.
@@ -36,9 +70,12 @@ class AssetRepository:
           type: str,           # dt_elements의 @xsi:type (예: dt_cutting_tool_13399, dt_file, dt_project ...)
           category: str|None,  # dt_elements/category
           element_id: str,     # dt_elements/element_id
-          data: str,           # 원본 dt_asset XML
+          data: str,           # 원본 dt_asset XML (source of truth)
+          parsed: dict,        # data 의 구조화 프로젝션 (build_dtasset_projection)
+          version: int,        # data 를 쓸 때마다 +1 (낙관적 동시성 제어, 없으면 0 취급)
         }
     - 유니크 인덱스: (global_asset_id, asset_id, type, element_id)
+    - parsed 는 data 를 쓸 때마다 함께 갱신되며, 조회/존재 확인은 parsed 기반 쿼리로 처리.
     """
 
     def __init__(self, db: AsyncIOMotorDatabase):
@@ -53,7 +90,7 @@ class AssetRepository:
         필수 필드(global_asset_id, asset_id, type, element_id) 누락 시 예외.
         중복 키일 경우 DuplicateKeyError 발생.
         """
-        meta = extract_dtasset_meta(req.xml, strict=True)  # 반드시 strip 포함(아래 3번)
+        meta, parsed = build_dtasset_projection(req.xml, strict=True)
         doc = {
             "global_asset_id": meta["global_asset_id"],
             "asset_id": meta["asset_id"],
@@ -61,7 +98,9 @@ class AssetRepository:
             "category": meta.get("category"),
             "element_id": meta["element_id"],
             "is_upload": False,  # <<< NEW: 외부 API 업로드 여부 기본 False
+            "version": 0,
             "data": req.xml,
+            "parsed": parsed,
         }
         try:
             result = await self.collection.insert_one(doc)
@@ -114,7 +153,7 @@ class AssetRepository:
         존재하면 교체(update), 없으면 생성(insert).
         매칭 키: (global_asset_id, asset_id, type, element_id)
         """
-        meta = extract_dtasset_meta(req.xml, strict=True)
+        meta, parsed = build_dtasset_projection(req.xml, strict=True)
         key = {
             "global_asset_id": meta["global_asset_id"],
             "asset_id": meta["asset_id"],
@@ -136,8 +175,10 @@ class AssetRepository:
             "$set": {
                 "category": meta.get("category"),
                 "data": req.xml,
+                "parsed": parsed,
             },
             "$setOnInsert": {"is_upload": False},  # <<< NEW
+            "$inc": {"version": 1},
         }
         result = await self.collection.update_one(key, update, upsert=True)
         if result.upserted_id:
@@ -146,11 +187,95 @@ class AssetRepository:
         existing = await self.collection.find_one(key, projection={"_id": 1})
         return AssetCreateResponse(asset_mongo_id=str(existing["_id"]))
 
+    async def insert_missing_assets(
+        self, reqs: List[AssetCreateRequest], *, session=None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        여러 XML 을 한 번에 저장 (이미 있는 키는 건너뜀).
+        - 존재 확인: 키 전체를 $in 조회 1회
+        - 없는 것만 ordered insert_many 1회 (같은 배치 안의 중복 키는 첫 번째만)
+        - 중간에 중복 키 충돌(경쟁 생성) 시: 트랜잭션이면 session 쪽에서 abort,
+          아니면 이미 들어간 앞부분을 delete_many 로 지우고 ASSET_ID_DUPLICATION
+        반환: reqs 와 같은 순서의 목록.
+          새로 생성 → {asset_mongo_id, global_asset_id, asset_id, type, element_id}, 건너뜀 → None
+        """
+        docs: List[Optional[Dict[str, Any]]] = []
+        seen: Dict[Tuple[str, str, str, str], None] = {}  # 순서 유지
+        for req in reqs:
+            meta, parsed = build_dtasset_projection(req.xml, strict=True)
+            key = tuple(meta[k] for k in _KEY_FIELDS)
+            if key in seen:
+                docs.append(None)
+                continue
+            seen[key] = None
+            docs.append(
+                {
+                    "_id": ObjectId(),
+                    "global_asset_id": meta["global_asset_id"],
+                    "asset_id": meta["asset_id"],
+                    "type": meta["type"],
+                    "category": meta.get("category"),
+                    "element_id": meta["element_id"],
+                    "is_upload": False,
+                    "version": 0,
+                    "data": req.xml,
+                    "parsed": parsed,
+                }
+            )
+        if not seen:
+            return []
+
+        existing = set()
+        cursor = self.collection.find(
+            _keys_in(list(seen)),
+            projection={k: 1 for k in _KEY_FIELDS},
+            session=session,
+        )
+        async for row in cursor:
+            existing.add(tuple(row.get(k) for k in _KEY_FIELDS))
+        docs = [
+            d if d and tuple(d[k] for k in _KEY_FIELDS) not in existing else None
+            for d in docs
+        ]
+        to_insert = [d for d in docs if d]
+        if not to_insert:
+            return docs
+
+        try:
+            await self.collection.insert_many(to_insert, ordered=True, session=session)
+        except BulkWriteError as e:
+            inserted = e.details.get("nInserted", 0)
+            if session is None and inserted:
+                await self.rollback_delete_by_mongo_ids(
+                    [str(d["_id"]) for d in to_insert[:inserted]]
+                )
+            errors = e.details.get("writeErrors", [])
+            if not any(err.get("code") == 11000 for err in errors):
+                raise
+            failed = to_insert[inserted] if inserted < len(to_insert) else None
+            ex = CustomException(ExceptionEnum.ASSET_ID_DUPLICATION)
+            ex.detail = {
+                "message": "Duplicate asset key",
+                "conflict_keys": {k: failed[k] for k in _KEY_FIELDS} if failed else None,
+            }
+            raise ex
+
+        return [
+            {"asset_mongo_id": str(d["_id"]), **{k: d[k] for k in _KEY_FIELDS}}
+            if d
+            else None
+            for d in docs
+        ]
+
     # -----------------------------
     # Read
     # -----------------------------
-    async def get_asset_by_mongo_id(self, mongo_id: str) -> Optional[dict]:
-        return await self.collection.find_one({"_id": ObjectId(mongo_id)})
+    async def get_asset_by_mongo_id(
+        self, mongo_id: str, *, session=None
+    ) -> Optional[dict]:
+        return await self.collection.find_one(
+            {"_id": ObjectId(mongo_id)}, projection=_WITHOUT_PARSED, session=session
+        )
 
     async def get_asset_by_keys(
         self,
@@ -159,6 +284,7 @@ class AssetRepository:
         asset_id: str,
         type: str,
         element_id: str,
+        session=None,
     ) -> Optional[dict]:
         return await self.collection.find_one(
             {
@@ -166,7 +292,9 @@ class AssetRepository:
                 "asset_id": asset_id,
                 "type": type,
                 "element_id": element_id,
-            }
+            },
+            projection=_WITHOUT_PARSED,
+            session=session,
         )
 
     async def search_assets(self, query: AssetSearchQuery) -> List[dict]:
@@ -189,19 +317,19 @@ class AssetRepository:
         if query.data_regex:
             q["data"] = {"$regex": query.data_regex, "$options": "i"}
 
-        cursor = self.collection.find(q)
+        cursor = self.collection.find(q, projection=_WITHOUT_PARSED)
         return await cursor.to_list(length=None)
 
     async def list_by_asset_id(self, asset_id: str) -> List[dict]:
-        cursor = self.collection.find({"asset_id": asset_id})
+        cursor = self.collection.find({"asset_id": asset_id}, _WITHOUT_PARSED)
         return await cursor.to_list(length=None)
 
     async def list_by_type(self, type_name: str) -> List[dict]:
-        cursor = self.collection.find({"type": type_name})
+        cursor = self.collection.find({"type": type_name}, _WITHOUT_PARSED)
         return await cursor.to_list(length=None)
 
     async def list_by_category(self, category: str) -> List[dict]:
-        cursor = self.collection.find({"category": category})
+        cursor = self.collection.find({"category": category}, _WITHOUT_PARSED)
         return await cursor.to_list(length=None)
 
     async def list_distinct_global_asset_ids(self) -> list[str]:
@@ -258,16 +386,26 @@ class AssetRepository:
     # -----------------------------
     # Update
     # -----------------------------
-    async def update_asset_xml_by_mongo_id(self, mongo_id: str, new_xml: str) -> bool:
+    async def update_asset_xml_by_mongo_id(
+        self,
+        mongo_id: str,
+        new_xml: str,
+        *,
+        projection: Optional[Tuple[Dict[str, Optional[str]], Dict[str, Any]]] = None,
+        expected_version: Optional[int] = None,
+        session=None,
+    ) -> bool:
         """
         XML 교체 시, 메타가 달라질 수 있으므로 안전하게:
         - 새 XML 메타 추출
         - 기존 문서의 키와 달라지면 유니크 충돌 가능 → 키도 함께 갱신
+        projection: 호출 측에서 이미 build_dtasset_projection(new_xml) 한 결과 (재파싱 생략)
+        expected_version: 읽을 때의 version. 그 사이 다른 쓰기가 있었으면 VersionConflict (409)
         """
         # 수정 전 잠금 검사 (is_upload=True 면 예외)
-        await self.check_upload_locked(mongo_id)
+        await self.check_upload_locked(mongo_id, session=session)
 
-        meta = extract_dtasset_meta(new_xml, strict=True)
+        meta, parsed = projection or build_dtasset_projection(new_xml, strict=True)
         update = {
             "$set": {
                 "global_asset_id": meta["global_asset_id"],
@@ -276,10 +414,17 @@ class AssetRepository:
                 "category": meta.get("category"),
                 "element_id": meta["element_id"],
                 "data": new_xml,
+                "parsed": parsed,
                 # is_upload 는 여기서 건드리지 않음 (외부 업로드 프로세스가 변경)
-            }
+            },
+            "$inc": {"version": 1},
         }
-        result = await self.collection.update_one({"_id": ObjectId(mongo_id)}, update)
+        query: Dict[str, Any] = {"_id": ObjectId(mongo_id)}
+        if expected_version is not None:
+            query["version"] = version_filter(expected_version)
+        result = await self.collection.update_one(query, update, session=session)
+        if expected_version is not None and result.matched_count == 0:
+            raise VersionConflict(mongo_id)
         return result.modified_count > 0
 
     # -----------------------------
@@ -327,8 +472,8 @@ class AssetRepository:
     async def exists_nc_reference_refset(
         self,
         *,
-        dt_global_asset_url: str,  # URL/문자 그대로 비교 (정확히 동일 문자열)
-        dt_asset_url: str,  # URL 혹은 asset_id… 저장된 그대로 비교
+        dt_global_asset_url: str,  # URL/문자열 비교 (앞뒤 공백, 대소문자 무시)
+        dt_asset_url: str,  # URL 혹은 asset_id (대소문자 무시)
         project_element_id: str,
         workplan_id: str,
     ) -> bool:
@@ -336,53 +481,29 @@ class AssetRepository:
         NC dt_file 문서에서 아래 4개의 키-값이 모두 들어있는지 AND 조건으로 검사.
         - type == "dt_file"
         - category == "NC"
-        - data 안에 아래 4가지 <key>/<value> 쌍이 모두 존재
+        - parsed.refs 의 한 reference 안에 아래 4가지 key/value 쌍이 모두 존재
         """
-        # 각 키-값 쌍을 독립 정규식으로 만들고 $and로 결합
-        rx_proj = {
-            "data": {
-                "$regex": rf"<key>\s*DT_PROJECT\s*</key>\s*<value>\s*{_esc(project_element_id)}\s*</value>",
-                "$options": "is",
-            }
-        }
-        rx_wp = {
-            "data": {
-                "$regex": rf"<key>\s*WORKPLAN\s*</key>\s*<value>\s*{_esc(workplan_id)}\s*</value>",
-                "$options": "is",
-            }
-        }
-        rx_global = {
-            "data": {
-                "$regex": rf"<key>\s*DT_GLOBAL_ASSET\s*</key>\s*<value>\s*{_esc(dt_global_asset_url)}\s*</value>",
-                "$options": "is",
-            }
-        }
-        rx_asset = {
-            "data": {
-                "$regex": rf"<key>\s*DT_ASSET\s*</key>\s*<value>\s*{_esc(dt_asset_url)}\s*</value>",
-                "$options": "is",
-            }
-        }
-
         q = {
-            "$and": [
-                {"type": "dt_file"},
-                {"category": "NC"},
-                rx_proj,
-                rx_wp,
-                rx_global,
-                rx_asset,
-            ]
+            "type": "dt_file",
+            "category": "NC",
+            **_ref_match(
+                {
+                    "DT_GLOBAL_ASSET": dt_global_asset_url,
+                    "DT_ASSET": dt_asset_url,
+                    "DT_PROJECT": project_element_id,
+                    "WORKPLAN": workplan_id,
+                }
+            ),
         }
         doc = await self.collection.find_one(q, projection={"_id": 1})
         return bool(doc)
 
-    async def check_upload_locked(self, mongo_id: str) -> None:
+    async def check_upload_locked(self, mongo_id: str, *, session=None) -> None:
         """
         주어진 mongo_id 문서의 is_upload가 True이면 예외 발생.
         """
         doc = await self.collection.find_one(
-            {"_id": ObjectId(mongo_id)}, {"is_upload": 1}
+            {"_id": ObjectId(mongo_id)}, {"is_upload": 1}, session=session
         )
         if doc and doc.get("is_upload") is True:
             raise CustomException(
@@ -403,23 +524,51 @@ class AssetRepository:
         - True  -> 프로젝트가 있고 해당 워크플랜도 존재
         - False -> 프로젝트가 없거나, 워크플랜이 없음
         """
-        proj = await self.collection.find_one(
-            {
-                "global_asset_id": global_asset_id,
-                "asset_id": asset_id,
-                "type": "dt_project",
-                "element_id": project_element_id,
-            },
-            projection={"_id": 1, "data": 1},
+        workplans = await self.get_project_workplans(
+            global_asset_id=global_asset_id,
+            asset_id=asset_id,
+            project_element_id=project_element_id,
         )
-        if not proj or not isinstance(proj.get("data"), str):
+        if workplans is None:
             return False
+        return any(w.get("workplan_id") == workplan_id for w in workplans)
 
-        return project_workplan_exists_in_xml(
-            proj["data"],
-            project_element_id=project_element_id,
-            workplan_id=workplan_id,
+    async def get_project_workplans(
+        self, *, global_asset_id: str, asset_id: str, project_element_id: str
+    ) -> Optional[List[dict]]:
+        """
+        프로젝트의 workplan 목록(parsed.workplans) 반환. 프로젝트가 없으면 None.
+        - 항목: {project_element_id, workplan_id, workingstep_ids}
+        - parsed 가 없는(백필 이전) 문서는 data 를 파싱해서 계산
+        """
+        key = {
+            "global_asset_id": global_asset_id,
+            "asset_id": asset_id,
+            "type": "dt_project",
+            "element_id": project_element_id,
+        }
+        doc = await self.collection.find_one(
+            key, projection={"_id": 1, "parsed.workplans": 1}
         )
+        if not doc:
+            return None
+
+        parsed = doc.get("parsed")
+        if parsed is None:
+            legacy = await self.collection.find_one(key, projection={"_id": 0, "data": 1})
+            xml_text = (legacy or {}).get("data")
+            if not isinstance(xml_text, str):
+                return None
+            try:
+                _, parsed = build_dtasset_projection(xml_text, strict=False)
+            except ValueError:
+                return []
+
+        return [
+            w
+            for w in parsed.get("workplans") or []
+            if w.get("project_element_id") == project_element_id
+        ]
 
     async def get_project_xml_by_keys(
         self, *, global_asset_id: str, asset_id: str, project_element_id: str
@@ -435,19 +584,62 @@ class AssetRepository:
         )
         return doc["data"] if doc and isinstance(doc.get("data"), str) else None
 
+    async def rebuild_projections(
+        self, *, only_missing: bool = True, batch_size: int = 200
+    ) -> Dict[str, int]:
+        """
+        기존 문서의 parsed 프로젝션 백필/재계산.
+        - only_missing=True: parsed 가 없거나 버전이 낮은 문서만
+        - 파싱 실패 문서는 건너뛰고 failed 로 집계
+        """
+        q: Dict[str, Any] = {}
+        if only_missing:
+            q = {
+                "$or": [
+                    {"parsed": {"$exists": False}},
+                    {"parsed.v": {"$lt": PROJECTION_VERSION}},
+                ]
+            }
+        updated = failed = 0
+        cursor = self.collection.find(
+            q, projection={"_id": 1, "data": 1}, batch_size=batch_size
+        )
+        async for doc in cursor:
+            try:
+                _, parsed = build_dtasset_projection(doc.get("data") or "", strict=False)
+            except Exception as e:
+                failed += 1
+                logging.warning("projection rebuild failed _id=%s: %s", doc["_id"], e)
+                continue
+            await self.collection.update_one(
+                {"_id": doc["_id"]}, {"$set": {"parsed": parsed}}
+            )
+            updated += 1
+        return {"updated": updated, "failed": failed}
+
     ## CAM 실패시 롤백을 위한 추가 함수 ##
     async def rollback_restore_xml_by_mongo_id(
-        self, mongo_id: str, xml_text: str
+        self, mongo_id: str, xml_text: str, *, expected_version: Optional[int] = None
     ) -> bool:
         """
         롤백 전용:
         - 잠금 검사/메타 갱신 무시
-        - data 필드만 강제 복원
+        - data 필드 강제 복원 (parsed 도 data 에 맞춰 재계산)
+        - expected_version: 되돌릴 쓰기 직후의 version. 그 뒤 다른 요청이 쓴 경우엔 복원하지 않음
         """
-        result = await self.collection.update_one(
-            {"_id": ObjectId(mongo_id)},
-            {"$set": {"data": xml_text}},
-        )
+        fields: Dict[str, Any] = {"data": xml_text}
+        try:
+            _, fields["parsed"] = build_dtasset_projection(xml_text, strict=False)
+        except Exception:
+            # 롤백은 실패하면 안 되므로 parsed 만 제거하고 다음 백필에 맡김
+            pass
+        update: Dict[str, Any] = {"$set": fields, "$inc": {"version": 1}}
+        if "parsed" not in fields:
+            update["$unset"] = {"parsed": ""}
+        query: Dict[str, Any] = {"_id": ObjectId(mongo_id)}
+        if expected_version is not None:
+            query["version"] = version_filter(expected_version)
+        result = await self.collection.update_one(query, update)
         return result.modified_count > 0
 
     async def rollback_delete_tool_by_keys(
@@ -475,6 +667,18 @@ class AssetRepository:
         result = await self.collection.delete_one({"_id": ObjectId(mongo_id)})
         return result.deleted_count > 0
 
+    async def rollback_delete_by_mongo_ids(self, mongo_ids: List[str]) -> int:
+        """
+        롤백 전용 (insert_missing_assets 결과 일괄 삭제):
+        - 잠금 검사 무시하고 delete_many 1회
+        """
+        if not mongo_ids:
+            return 0
+        result = await self.collection.delete_many(
+            {"_id": {"$in": [ObjectId(i) for i in mongo_ids]}}
+        )
+        return result.deleted_count
+
     async def set_is_upload_true_by_mongo_id(self, mongo_id: str) -> bool:
         """
         업로드 성공 시 문서의 is_upload 플래그를 True로 세팅.
@@ -514,7 +718,8 @@ class AssetRepository:
         project_element_id: str,
         workplan_id: str,
         workingstep_id: Optional[str] = None,
-        limit: int = 500,
+        limit: Optional[int] = 500,
+        projection: Optional[Dict[str, Any]] = None,
     ) -> list[dict]:
         """
         dt_file 문서들 중에서 reference.keys 안에
@@ -523,45 +728,51 @@ class AssetRepository:
         - DT_PROJECT == project_element_id
         - WORKPLAN == workplan_id
         - (옵션) WORKINGSTEP == workingstep_id
-        를 모두 포함하는 dt_file들을 찾는다.
+        를 모두 포함하는 dt_file들을 찾는다. (parsed.refs 인덱스 조회)
         """
-        conditions = [
-            {"type": "dt_file"},
-            {"category": "NC"},
-            {
-                "data": {
-                    "$regex": f"<key>DT_GLOBAL_ASSET</key>\\s*<value>{re.escape(global_asset_id)}</value>"
-                }
-            },
-            {
-                "data": {
-                    "$regex": f"<key>DT_ASSET</key>\\s*<value>{re.escape(asset_id)}</value>"
-                }
-            },
-            {
-                "data": {
-                    "$regex": f"<key>DT_PROJECT</key>\\s*<value>{re.escape(project_element_id)}</value>"
-                }
-            },
-            {
-                "data": {
-                    "$regex": f"<key>WORKPLAN</key>\\s*<value>{re.escape(workplan_id)}</value>"
-                }
-            },
-        ]
+        refs: Dict[str, Optional[str]] = {
+            "DT_GLOBAL_ASSET": global_asset_id,
+            "DT_ASSET": asset_id,
+            "DT_PROJECT": project_element_id,
+            "WORKPLAN": workplan_id,
+        }
         if workingstep_id:
-            conditions.append(
-                {
-                    "data": {
-                        "$regex": f"<key>WORKINGSTEP</key>\\s*<value>{re.escape(workingstep_id)}</value>"
-                    }
-                }
-            )
+            refs["WORKINGSTEP"] = workingstep_id
+        # WORKINGSTEP 미지정 시 WORKINGSTEP 유무와 관계없이 매칭
+        elem = _ref_match(refs)
 
-        query = {"$and": conditions}
+        query = {"type": "dt_file", "category": "NC", **elem}
         cursor = self.collection.find(
             query,
-            projection={"_id": 1, "global_asset_id": 1, "asset_id": 1, "element_id": 1},
-            limit=limit,
+            projection=projection
+            or {"_id": 1, "global_asset_id": 1, "asset_id": 1, "element_id": 1},
+            limit=limit or 0,
         )
         return await cursor.to_list(length=limit)
+
+    async def find_nc_files_by_project(
+        self,
+        *,
+        global_asset_id: str,
+        asset_id: str,
+        project_element_id: str,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> list[dict]:
+        """
+        dt_file(NC) 문서들 중 reference 에 DT_GLOBAL_ASSET/DT_ASSET/DT_PROJECT 가 일치하는 것
+        (WORKPLAN/WORKINGSTEP 유무와 관계없이, parsed.refs 인덱스 조회)
+        """
+        elem = _ref_match(
+            {
+                "DT_GLOBAL_ASSET": global_asset_id,
+                "DT_ASSET": asset_id,
+                "DT_PROJECT": project_element_id,
+            }
+        )
+        query = {"type": "dt_file", "category": "NC", **elem}
+        cursor = self.collection.find(
+            query,
+            projection=projection
+            or {"_id": 1, "global_asset_id": 1, "asset_id": 1, "element_id": 1},
+        )
+        return await cursor.to_list(length=None)
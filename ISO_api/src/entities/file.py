@@ -1,17 +1,36 @@
+import hashlib
 from io import BytesIO
-from typing import Optional
-from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from typing import Any, AsyncIterator, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorGridFSBucket
 from bson import ObjectId
 
+from dt_common.file_contents import ContentStore, metadata_key
+
 
 # GridFS를 이용한 파일 저장/조회/삭제/존재확인 등 파일 관련 DB 작업을 담당하는 클래스입니다.
+#
+# 내용 주소 기반 중복 제거 (contents 컬렉션이 주어진 경우):
+#   등록/공유/해제 규칙은 Operation_Manager 와 공용인 dt_common.file_contents.ContentStore 에 있음
+#   - 같은 (sha256, filename, 메타데이터) 업로드는 blob 공유 + refcount
+#   - delete_file_by_id 는 refcount 를 감소시키고 0 이 되면 blob 을 삭제
+#   - contents 에 등록되지 않은 기존 파일은 종전처럼 바로 삭제
 class FileRepository:
-    def __init__(self, grid_fs: AsyncIOMotorGridFSBucket):
+    def __init__(
+        self,
+        grid_fs: AsyncIOMotorGridFSBucket,
+        contents: Optional[AsyncIOMotorCollection] = None,
+        files: Optional[AsyncIOMotorCollection] = None,
+    ):
         """
         Args:
             grid_fs (AsyncIOMotorGridFSBucket): MongoDB GridFS 버킷 객체
+            contents (AsyncIOMotorCollection, optional): 내용 주소(refcount) 컬렉션, 없으면 중복 제거 안 함
+            files (AsyncIOMotorCollection, optional): 버킷의 파일 문서 컬렉션, 없으면 업로드 후 메타데이터 갱신 안 함
         """
         self.grid_fs = grid_fs
+        self.contents = contents
+        self.files = files
+        self.store = ContentStore(contents, grid_fs) if contents is not None else None
 
     async def insert_file(
         self, step_file_content: bytes, filename: str, metadata: Optional[dict] = None
@@ -19,19 +38,218 @@ class FileRepository:
         """
         파일을 GridFS에 업로드하고, 업로드된 파일의 ObjectId를 반환합니다.
 
+        같은 (sha256, 파일명, 메타데이터)가 이미 있으면 업로드 없이 기존 ObjectId를 반환합니다.
+
         Args:
-            step_file_content (bytes): 업로드할 파일 데이터
+            step_file_content (bytes | file-like): 업로드할 파일 데이터
             filename (str): 저장 파일명
-            metadata (dict, optional): 추가 메타데이터
+            metadata (dict, optional): 추가 메타데이터 (sha256은 자동 추가)
 
         Returns:
-            str: 업로드된 파일의 ObjectId (문자열)
+            str: 업로드된(또는 공유하는) 파일의 ObjectId (문자열)
         """
+        data = (
+            step_file_content.read()
+            if hasattr(step_file_content, "read")
+            else step_file_content
+        )
+        if self.store is not None:
+            return await self.store.put(data, filename, metadata)
+        sha256 = hashlib.sha256(data).hexdigest()
         file_id = await self.grid_fs.upload_from_stream(
-            filename, step_file_content, metadata=metadata or {}
+            filename, data, metadata={**(metadata or {}), "sha256": sha256}
         )
         return str(file_id)
 
+    async def insert_file_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        metadata: Optional[dict] = None,
+        *,
+        max_bytes: Optional[int] = None,
+        chunk_size_bytes: Optional[int] = None,
+    ) -> Dict[str, object]:
+        """
+        비동기 chunk 이터레이터를 GridFS 업로드 스트림에 바로 기록합니다.
+        전체 파일을 메모리에 올리지 않으며, 기록하는 동안 SHA-256을 계산합니다.
+        (각 chunk 기록을 await 한 뒤 다음 chunk를 읽으므로 자연스럽게 backpressure가 걸림)
+        해시는 기록이 끝나야 알 수 있으므로, 같은 내용(+메타데이터)이 이미 있으면 방금 올린 blob 을 지우고
+        기존 file_id 를 반환합니다.
+
+        Args:
+            chunks (AsyncIterator[bytes]): 업로드할 데이터 조각
+            filename (str): 저장 파일명
+            metadata (dict, optional): 추가 메타데이터 (sha256은 자동 추가)
+            max_bytes (int, optional): 허용 최대 크기, 초과 시 업로드 중단 후 ValueError
+            chunk_size_bytes (int, optional): GridFS chunk 크기 (기본: 드라이버 기본값)
+
+        Returns:
+            dict: {"file_id": str, "length": int, "sha256": str, "deduplicated": bool}
+        """
+        kwargs = {"metadata": dict(metadata or {})}
+        if chunk_size_bytes:
+            kwargs["chunk_size_bytes"] = chunk_size_bytes
+        grid_in = self.grid_fs.open_upload_stream(filename, **kwargs)
+
+        digest = hashlib.sha256()
+        length = 0
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                length += len(chunk)
+                if max_bytes is not None and length > max_bytes:
+                    raise ValueError(f"file exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                await grid_in.write(chunk)
+        except BaseException:
+            # 부분 기록된 chunk 정리
+            await grid_in.abort()
+            raise
+
+        await grid_in.close()
+        sha256 = digest.hexdigest()
+        await grid_in.set("metadata", {**kwargs["metadata"], "sha256": sha256})
+        file_id = str(grid_in._id)
+        if self.store is not None:
+            file_id = await self.store.register(
+                sha256, filename, length, grid_in._id, metadata_key(metadata)
+            )
+        return {
+            "file_id": file_id,
+            "length": length,
+            "sha256": sha256,
+            "deduplicated": file_id != str(grid_in._id),
+        }
+
+    async def retain_file(self, file_id: str) -> bool:
+        """
+        내용 주소에 등록된 파일의 refcount 를 1 올립니다. (캐시된 파일을 프로젝트에 연결할 때)
+
+        Returns:
+            bool: 등록된 파일이면 True, 중복 제거 비활성/미등록 파일이면 False
+        """
+        if self.store is None:
+            return False
+        return await self.store.retain(file_id)
+
+    async def get_content_sha256(self, file_id: str) -> Optional[str]:
+        """
+        파일의 SHA-256 을 반환합니다. 메타데이터에 없으면(이전 업로드) 스트리밍으로 계산합니다.
+
+        Returns:
+            str | None: hex digest, 파일이 없으면 None
+        """
+        cursor = self.grid_fs.find({"_id": ObjectId(file_id)}, limit=1)
+        docs = await cursor.to_list(length=1)
+        if not docs:
+            return None
+        sha256 = (docs[0].metadata or {}).get("sha256")
+        if sha256:
+            return sha256
+        digest = hashlib.sha256()
+        async for chunk in self.iter_file(file_id):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    async def get_file_metadata(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """
+        파일의 GridFS 메타데이터를 반환합니다. (본문은 읽지 않음)
+
+        Returns:
+            dict | None: 메타데이터 (없으면 빈 dict), 파일이 없으면 None
+        """
+        cursor = self.grid_fs.find({"_id": ObjectId(file_id)}, limit=1)
+        docs = await cursor.to_list(length=1)
+        if not docs:
+            return None
+        return dict(docs[0].metadata or {})
+
+    async def set_nc_tool_changes(self, file_id: str, entry: Dict[str, Any]) -> bool:
+        """
+        NC 툴 교체 이벤트 추출 결과를 파일 메타데이터(metadata.nc_tool_changes)에 저장합니다.
+        entry["sha256"] 과 파일 내용 해시가 다르면 저장하지 않습니다. (sha256 이 없던 이전 업로드는 같이 기록)
+
+        Returns:
+            bool: 저장 여부 (files 컬렉션이 없으면 False)
+        """
+        if self.files is None:
+            return False
+        res = await self.files.update_one(
+            {"_id": ObjectId(file_id), "metadata.sha256": {"$in": [entry["sha256"], None]}},
+            {"$set": {"metadata.sha256": entry["sha256"], "metadata.nc_tool_changes": entry}},
+        )
+        return res.matched_count == 1
+
+    async def find_tessellation(
+        self,
+        step_sha256: str,
+        linear_deflection: float,
+        angular_deflection: float,
+        fmt: str,
+    ) -> Optional[str]:
+        """
+        (STEP sha256, linear/angular deflection, 포맷)으로 캐시된 메싱 결과 ObjectId 조회.
+
+        Returns:
+            str | None: 캐시된 파일 ObjectId, 없으면 None
+        """
+        cursor = self.grid_fs.find(
+            {
+                "metadata.kind": "tessellation",
+                "metadata.step_sha256": step_sha256,
+                "metadata.linear_deflection": linear_deflection,
+                "metadata.angular_deflection": angular_deflection,
+                "metadata.format": fmt,
+            },
+            limit=1,
+            sort=[("uploadDate", -1)],
+        )
+        docs = await cursor.to_list(length=1)
+        return str(docs[0]._id) if docs else None
+
+    async def find_conversion(
+        self, step_sha256: str, conversion_type: str, dll_version: str
+    ) -> Optional[str]:
+        """
+        (STEP sha256, 변환 타입, DLL 버전)으로 캐시된 DLL 변환 결과(json) ObjectId 조회.
+
+        Returns:
+            str | None: 캐시된 파일 ObjectId, 없으면 None
+        """
+        cursor = self.grid_fs.find(
+            {
+                "metadata.kind": "dll_conversion",
+                "metadata.step_sha256": step_sha256,
+                "metadata.type": conversion_type,
+                "metadata.dll_version": dll_version,
+            },
+            limit=1,
+            sort=[("uploadDate", -1)],
+        )
+        docs = await cursor.to_list(length=1)
+        return str(docs[0]._id) if docs else None
+
+    async def list_conversions(
+        self,
+        step_sha256: Optional[str] = None,
+        conversion_type: Optional[str] = None,
+        dll_version: Optional[str] = None,
+    ) -> List[str]:
+        """
+        조건에 맞는 DLL 변환 결과 캐시 파일 ObjectId 목록 (조건이 없으면 전체).
+        """
+        query: Dict[str, Any] = {"metadata.kind": "dll_conversion"}
+        if step_sha256:
+            query["metadata.step_sha256"] = step_sha256
+        if conversion_type:
+            query["metadata.type"] = conversion_type
+        if dll_version:
+            query["metadata.dll_version"] = dll_version
+        cursor = self.grid_fs.find(query)
+        return [str(doc._id) async for doc in cursor]
+
     async def get_file(self, file_id: str):
         """
         파일 ObjectId로 GridFS에서 파일 스트림을 조회합니다.
@@ -48,13 +266,78 @@ class FileRepository:
     async def delete_file_by_id(self, file_id: str):
         """
         파일 ObjectId로 GridFS에서 파일을 삭제합니다.
+        내용 주소로 공유 중인 파일이면 refcount 만 감소시키고, 마지막 참조일 때 blob 을 삭제합니다.
 
         Args:
             file_id (str): 삭제할 파일 ObjectId (문자열)
         """
-        await self.grid_fs.delete(ObjectId(file_id))
+        oid = ObjectId(file_id)
+        if self.store is None:
+            await self.grid_fs.delete(oid)
+        else:
+            await self.store.delete(oid)
         return
 
+    async def dedup_report(self, top: int = 10) -> Dict[str, Any]:
+        """
+        내용 주소 저장소의 중복 제거 현황을 반환합니다.
+
+        Returns:
+            dict: blobs/references/stored_bytes/logical_bytes/saved_bytes/dedup_ratio 와
+                  참조 수 상위 항목(top)
+        """
+        if self.contents is None:
+            return {"enabled": False}
+        live = {"$match": {"refcount": {"$gt": 0}}}
+        rows = await self.contents.aggregate(
+            [
+                live,
+                {
+                    "$group": {
+                        "_id": None,
+                        "blobs": {"$sum": 1},
+                        "references": {"$sum": "$refcount"},
+                        "stored_bytes": {"$sum": "$length"},
+                        "logical_bytes": {
+                            "$sum": {"$multiply": ["$length", "$refcount"]}
+                        },
+                    }
+                },
+            ]
+        ).to_list(length=1)
+        totals = rows[0] if rows else {}
+        blobs = int(totals.get("blobs", 0))
+        references = int(totals.get("references", 0))
+        stored = int(totals.get("stored_bytes", 0))
+        logical = int(totals.get("logical_bytes", 0))
+
+        cursor = (
+            self.contents.find(
+                {"refcount": {"$gt": 1}},
+                {"_id": 0, "sha256": 1, "filename": 1, "length": 1, "refcount": 1, "file_id": 1},
+            )
+            .sort("refcount", -1)
+            .limit(top)
+        )
+        top_shared = [
+            {
+                **d,
+                "file_id": str(d["file_id"]),
+                "saved_bytes": d["length"] * (d["refcount"] - 1),
+            }
+            async for d in cursor
+        ]
+        return {
+            "enabled": True,
+            "blobs": blobs,
+            "references": references,
+            "stored_bytes": stored,
+            "logical_bytes": logical,
+            "saved_bytes": logical - stored,
+            "dedup_ratio": round(logical / stored, 4) if stored else 1.0,
+            "top_shared": top_shared,
+        }
+
     async def file_exists(self, file_id: str) -> bool:
         """
         파일 존재 여부를 반환합니다.
@@ -83,3 +366,24 @@ class FileRepository:
         grid_out = await self.grid_fs.open_download_stream(file_id)
         file_bytes = await grid_out.read()
         return BytesIO(file_bytes)
+
+    async def iter_file(
+        self, file_id: str, chunk_size: int = 256 * 1024
+    ) -> AsyncIterator[bytes]:
+        """
+        파일 ObjectId로 GridFS 파일을 chunk 단위로 읽는 비동기 제너레이터입니다.
+        (전체를 메모리에 올리지 않고 다른 서비스/HTTP 바디로 흘려보낼 때 사용)
+
+        Args:
+            file_id (str): 조회할 파일 ObjectId
+            chunk_size (int): 한 번에 읽을 바이트 수
+
+        Yields:
+            bytes: 파일 데이터 조각
+        """
+        grid_out = await self.grid_fs.open_download_stream(ObjectId(file_id))
+        while True:
+            chunk = await grid_out.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
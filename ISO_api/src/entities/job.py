@@ -0,0 +1,302 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from src.utils.exceptions import CustomException, ExceptionEnum
+
+logger = logging.getLogger(__name__)
+
+# 작업 상태 (status)
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_TIMEOUT = "timeout"
+JOB_CANCELLED = "cancelled"
+
+
+# 백그라운드 작업 상태를 MongoDB 에 저장/조회하는 공통 클래스입니다. (VM 프로젝트 생성, STEP 메싱)
+# 실행은 아래 JobRunner 가 담당합니다.
+#
+#   - _id 는 job_id (uuid hex), active=True 인 동안 진행 중 (같은 작업 키의 진행 중 작업은 부분 유니크 인덱스로 하나)
+#   - 끝난 작업은 expires_at 이후 TTL 인덱스로 자동 삭제
+#   - 상태 문서는 작업을 실행하는 프로세스만 갱신하고, 다른 워커/재시작 후에도 조회 가능
+class JobRepository:
+    # 진행 중 작업을 하나로 묶는 필드 이름 (하위 클래스에서 지정)
+    key_field = "key"
+
+    def __init__(self, collection: AsyncIOMotorCollection):
+        """
+        Args:
+            collection (AsyncIOMotorCollection): 작업 상태 컬렉션
+        """
+        self.collection = collection
+
+    async def insert_job(self, job: Dict[str, Any]) -> None:
+        """
+        작업 문서를 저장합니다. (같은 작업 키의 진행 중 작업이 있으면 DuplicateKeyError)
+        """
+        await self.collection.insert_one(job)
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """job_id 로 작업 문서 조회, 없으면 None."""
+        return await self.collection.find_one({"_id": job_id})
+
+    async def find_active_job(self, key: str) -> Optional[Dict[str, Any]]:
+        """작업 키의 진행 중(queued/running) 작업 문서 조회, 없으면 None."""
+        return await self.collection.find_one({self.key_field: key, "active": True})
+
+    async def update_job(self, job_id: str, **fields) -> Optional[Dict[str, Any]]:
+        """
+        진행 중인 작업의 필드를 갱신하고 갱신된 문서를 반환합니다. (updated_at 자동 갱신)
+        이미 끝난 작업이면 갱신하지 않고 None 을 반환합니다.
+        """
+        return await self.collection.find_one_and_update(
+            {"_id": job_id, "active": True},
+            {"$set": {**fields, "updated_at": time.time()}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def finish_job(
+        self,
+        job_id: str,
+        ttl_seconds: float,
+        *,
+        stale_before: Optional[float] = None,
+        **fields,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        진행 중인 작업을 종료 상태로 기록합니다. (active 해제 → 같은 키의 새 작업 등록 가능, TTL 시작)
+
+        Args:
+            ttl_seconds (float): 종료 후 보관 시간(초)
+            stale_before (float, optional): 주어지면 updated_at 이 이보다 오래된 경우에만 기록 (중단된 작업 정리용)
+
+        Returns:
+            dict | None: 갱신된 문서, 이미 끝났거나 조건에 맞지 않으면 None
+        """
+        query: Dict[str, Any] = {"_id": job_id, "active": True}
+        if stale_before is not None:
+            query["updated_at"] = {"$lt": stale_before}
+        now = time.time()
+        return await self.collection.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    **fields,
+                    "active": False,
+                    "finished_at": now,
+                    "updated_at": now,
+                    "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+                }
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+
+
+class JobRunner:
+    """
+    JobRepository 에 상태를 기록하며 작업을 백그라운드 태스크로 실행하는 공통 실행기.
+    (TessellationEngine, VmJobRunner 가 작업 내용만 채워서 사용)
+
+    - 같은 작업 키의 진행 중 작업이 있으면 새로 만들지 않고 그 작업 문서를 반환
+    - heartbeat 가 있으면 실행 중 updated_at 갱신 + 다른 프로세스의 취소 요청(cancel_requested) 확인
+    - stale_after 동안 갱신이 없는 진행 중 작업(실행 프로세스가 죽음)은 조회 시 failed 로 정리
+    - 다른 프로세스에서 실행 중인 작업은 wait_interval 간격으로 상태 조회하며 대기
+    """
+
+    # 로그 접두어 (하위 클래스에서 지정)
+    log_name = "job"
+    # 제한 시간 초과 시 error 메시지 ({timeout}: 작업 문서의 timeout, 없으면 self.timeout)
+    timeout_message = "job exceeded {timeout:.0f}s"
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        timeout: float,
+        ttl: float,
+        stale_after: float,
+        wait_interval: float,
+        heartbeat: Optional[float] = None,
+    ):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self.wait_interval = wait_interval
+        self.heartbeat = heartbeat
+        self._slots = asyncio.Semaphore(self.workers)
+        # 이 프로세스에서 실행 중인 작업 태스크 (상태는 MongoDB)
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    # ----------------- 공개 API -----------------
+
+    async def get(self, repo: JobRepository, job_id: str) -> Dict[str, Any]:
+        """작업 문서 조회 (없으면 JOB_NOT_FOUND)."""
+        job = await repo.get_job(job_id)
+        if job is None:
+            raise CustomException(ExceptionEnum.JOB_NOT_FOUND)
+        return await self._expire_stale(repo, job)
+
+    async def wait(self, repo: JobRepository, job_id: str) -> Dict[str, Any]:
+        """
+        작업 종료까지 대기 후 작업 문서 반환 (대기 중인 요청이 끊겨도 작업 자체는 취소되지 않음).
+        다른 프로세스에서 실행 중인 작업은 wait_interval 간격으로 상태 조회.
+        """
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.wait({task})
+        job = await self.get(repo, job_id)
+        while job["active"]:
+            await asyncio.sleep(self.wait_interval)
+            job = await self.get(repo, job_id)
+        return job
+
+    async def cancel(self, repo: JobRepository, job_id: str) -> Dict[str, Any]:
+        """
+        대기/실행 중 작업 취소 (이 프로세스의 작업이면 태스크 종료 후 반환).
+        다른 프로세스에서 실행 중이면 취소 요청만 기록 → 실행 프로세스가 다음 heartbeat 에 취소.
+        """
+        job = await self.get(repo, job_id)
+        if not job["active"]:
+            return job
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return await self.get(repo, job_id)
+        return await repo.update_job(job_id, cancel_requested=True) or await self.get(repo, job_id)
+
+    def pending(self) -> int:
+        """이 프로세스에서 대기/실행 중인 작업 수."""
+        return len(self._tasks)
+
+    async def shutdown(self) -> None:
+        """서버 종료 시 이 프로세스에서 실행 중인 작업 취소 (상태는 cancelled 로 기록)."""
+        tasks = list(self._tasks.values())
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ----------------- 하위 클래스용 -----------------
+
+    @staticmethod
+    def new_job(**fields) -> Dict[str, Any]:
+        """queued 상태의 새 작업 문서 (fields 는 작업별 추가 필드)."""
+        now = time.time()
+        return {
+            "_id": uuid.uuid4().hex,
+            "status": JOB_QUEUED,
+            "active": True,
+            "created_at": now,
+            "updated_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            **fields,
+        }
+
+    async def _find_active(self, repo: JobRepository, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """key 의 진행 중 작업 문서 (중단된 작업은 정리 후 제외), 없으면 None."""
+        if key is None:
+            return None
+        active = await repo.find_active_job(key)
+        if active is None:
+            return None
+        active = await self._expire_stale(repo, active)
+        return active if active["active"] else None
+
+    async def _insert(self, repo: JobRepository, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """작업 문서 저장 → None, 다른 요청이 같은 key 의 작업을 방금 등록했으면 그 작업 문서."""
+        try:
+            await repo.insert_job(job)
+            return None
+        except DuplicateKeyError:
+            key = job.get(repo.key_field)
+            active = await repo.find_active_job(key) if key is not None else None
+            if active is None:
+                raise
+            return active
+
+    def _start(self, job_id: str, coro: Coroutine[Any, Any, Any]) -> None:
+        """작업 태스크 시작 (끝나면 self._tasks 에서 제거)."""
+        task = asyncio.create_task(coro)
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def _execute(
+        self,
+        repo: JobRepository,
+        job: Dict[str, Any],
+        work: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        work() 실행 후 종료 상태를 기록하고 기록한 필드를 반환.
+        work 는 성공 시 완료 문서에 넣을 필드(result 등)를 반환한다.
+        취소 → cancelled, asyncio.TimeoutError → timeout, 그 외 예외 → failed (CustomException 이면 error_code 포함)
+        """
+        job_id = job["_id"]
+        heartbeat = (
+            asyncio.create_task(self._heartbeat(repo, job_id, asyncio.current_task()))
+            if self.heartbeat
+            else None
+        )
+        fields: Dict[str, Any] = {}
+        try:
+            fields = {**(await work()), "status": JOB_DONE}
+        except asyncio.CancelledError:
+            fields = {"status": JOB_CANCELLED}
+        except asyncio.TimeoutError:
+            timeout = job.get("timeout") or self.timeout
+            fields = {"status": JOB_TIMEOUT, "error": self.timeout_message.format(timeout=timeout)}
+        except CustomException as e:
+            fields = {"status": JOB_FAILED, "error": e.detail, "error_code": e.enum.name}
+            logger.warning("[%s] job %s failed: %s", self.log_name, job_id, e.detail)
+        except Exception as e:
+            fields = {"status": JOB_FAILED, "error": str(e)}
+            logger.warning("[%s] job %s failed: %r", self.log_name, job_id, e)
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+        try:
+            await repo.finish_job(job_id, self.ttl, **fields)
+        except Exception as e:
+            logger.warning("[%s] failed to record job %s: %s", self.log_name, job_id, e)
+        return fields
+
+    async def _expire_stale(self, repo: JobRepository, job: Dict[str, Any]) -> Dict[str, Any]:
+        """실행 프로세스가 사라져 갱신이 멈춘 진행 중 작업을 failed 로 정리."""
+        if not job["active"] or job["_id"] in self._tasks:
+            return job
+        stale_before = time.time() - self.stale_after
+        if job["updated_at"] >= stale_before:
+            return job
+        expired = await repo.finish_job(
+            job["_id"],
+            self.ttl,
+            stale_before=stale_before,
+            status=JOB_FAILED,
+            error="job was interrupted (worker stopped before finishing)",
+        )
+        return expired or await repo.get_job(job["_id"]) or job
+
+    async def _heartbeat(self, repo: JobRepository, job_id: str, task: asyncio.Task) -> None:
+        """실행 중 작업의 updated_at 갱신, 취소 요청이 기록되어 있으면 작업 태스크 취소."""
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            try:
+                job = await repo.update_job(job_id)
+            except Exception as e:
+                logger.warning("[%s] heartbeat failed: %s / %s", self.log_name, job_id, e)
+                continue
+            if job is None or job.get("cancel_requested"):
+                task.cancel()
+                return
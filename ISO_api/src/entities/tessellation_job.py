@@ -0,0 +1,10 @@
+from src.entities.job import JobRepository
+
+
+# STEP → STL 변환(메싱) 작업 상태를 MongoDB(tessellation_jobs)에 저장/조회하는 클래스입니다.
+#
+#   - 같은 key(STEP sha256 + LOD + mesh) 의 진행 중 작업은 하나 (부분 유니크 인덱스 uniq_active_key)
+#     key 가 없는 작업(업로드 후처리가 붙은 작업)은 공유하지 않음
+#   - 저장/갱신/종료/TTL 규칙은 JobRepository 와 같음
+class TessellationJobRepository(JobRepository):
+    key_field = "key"
@@ -0,0 +1,77 @@
+"""
+assets 컬렉션 다중 문서 쓰기용 unit-of-work.
+
+    async def work(session):
+        doc = await repo.get_asset_by_mongo_id(mongo_id, session=session)
+        ...
+        await repo.update_asset_xml_by_mongo_id(
+            mongo_id, new_xml, expected_version=doc.get("version", 0), session=session
+        )
+
+    result = await run_unit_of_work(repo.collection, work)
+
+- replica set / mongos: session.with_transaction 으로 실행 → 여러 문서 쓰기가 한 번에 커밋,
+  TransientTransactionError / UnknownTransactionCommitResult 는 드라이버가 재시도
+- standalone: session=None 으로 실행. 문서의 version 필드로 낙관적 동시성 제어 →
+  읽은 뒤 다른 요청이 먼저 쓴 경우 VersionConflict, work 전체를 retries 회까지 재실행 후 409
+- work 는 읽기부터 다시 하므로 재실행해도 안전해야 함 (GridFS 업로드 등 외부 부작용은 work 밖에서)
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorCollection
+
+from src.database import supports_transactions
+from src.utils.env import get_env_or_default
+from src.utils.exceptions import CustomException, ExceptionEnum
+
+logger = logging.getLogger(__name__)
+
+UOW_CONFLICT_RETRIES = int(get_env_or_default("UOW_CONFLICT_RETRIES", "3"))
+
+T = TypeVar("T")
+Work = Callable[[Optional[AsyncIOMotorClientSession]], Awaitable[T]]
+
+
+class VersionConflict(CustomException):
+    """expected_version 으로 쓴 문서가 그 사이 다른 요청에 의해 바뀜 (409)."""
+
+    def __init__(self, mongo_id: Any):
+        super().__init__(
+            ExceptionEnum.ASSET_VERSION_CONFLICT,
+            detail=f"asset {mongo_id} was modified concurrently, retry",
+        )
+
+
+def version_filter(expected_version: int) -> Any:
+    """version 조건 (필드가 없는 기존 문서는 version 0 으로 취급)."""
+    return expected_version if expected_version else {"$in": [0, None]}
+
+
+async def run_unit_of_work(
+    collection: AsyncIOMotorCollection,
+    work: Work[T],
+    *,
+    retries: int = UOW_CONFLICT_RETRIES,
+) -> T:
+    """
+    work(session) 을 원자적으로 실행하고 결과 반환.
+    retries: VersionConflict 시 work 재실행 횟수 (0 이면 바로 409)
+    """
+    client = collection.database.client
+    transactional = await supports_transactions(client)
+    attempt = 0
+    while True:
+        try:
+            if not transactional:
+                return await work(None)
+            async with await client.start_session() as session:
+                return await session.with_transaction(work)
+        except VersionConflict as e:
+            if attempt >= retries:
+                raise
+            attempt += 1
+            logger.info("[unit_of_work] %s (attempt %d/%d)", e.detail, attempt, retries)
@@ -0,0 +1,9 @@
+from src.entities.job import JobRepository
+
+
+# VM 프로젝트 생성 작업 상태를 MongoDB(vm_jobs)에 저장/조회하는 클래스입니다.
+#
+#   - project_id 별로 진행 중(active=True) 작업은 하나 (부분 유니크 인덱스 uniq_active_project)
+#   - 저장/갱신/종료/TTL 규칙은 JobRepository 와 같음
+class VmJobRepository(JobRepository):
+    key_field = "project_id"
@@ -0,0 +1,172 @@
+"""
+MongoDB 인덱스 선언/검증 모듈 (ISO_api).
+
+- INDEX_SPECS 에 컬렉션별 인덱스를 선언하고, startup 시 ensure_indexes()로 생성/검증
+  (IndexSpec / 생성 / 보고 로직은 두 서비스 공용 dt_common.indexes, 여기는 선언만)
+- required=True 인덱스(유니크 키 등)를 만들 수 없으면 RuntimeError → 서버 기동 중단
+- index_report()는 누락/미선언/미사용 인덱스를 보고 (admin 엔드포인트용)
+
+컬렉션 이름 주의:
+  리포지토리들이 컬렉션 핸들에 다시 ["assets"] / ["projects"] 를 붙이므로
+  실제 저장 위치는 서브 컬렉션 "assets.assets" / "projects.projects" 이다.
+  (get_asset_collection → AssetRepository.collection 경로와 동일)
+
+인덱스 소유:
+  Operation_Manager 와 같이 쓰는 공유 컬렉션(projects.projects, GridFS files.*, file_contents)의
+  인덱스는 여기가 유일한 정의다. Operation_Manager 는 자기 전용 컬렉션(product_logs)만 선언하므로
+  공유 컬렉션 인덱스 변경은 이 파일에서만 한다.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+
+from dt_common.indexes import IndexSpec
+from dt_common.indexes import ensure_indexes as _ensure_indexes
+from dt_common.indexes import index_report as _index_report
+
+ASSET_COLLECTION = "assets.assets"
+PROJECT_COLLECTION = "projects.projects"
+GRIDFS_FILES_COLLECTION = "files.files"
+GRIDFS_CHUNKS_COLLECTION = "files.chunks"
+FILE_CONTENT_COLLECTION = "file_contents"
+VM_JOB_COLLECTION = "vm_jobs"
+TESSELLATION_JOB_COLLECTION = "tessellation_jobs"
+
+
+INDEX_SPECS: Dict[str, List[IndexSpec]] = {
+    ASSET_COLLECTION: [
+        IndexSpec(
+            name="uniq_gasset_asset_type_element",
+            keys=[
+                ("global_asset_id", ASCENDING),
+                ("asset_id", ASCENDING),
+                ("type", ASCENDING),
+                ("element_id", ASCENDING),
+            ],
+            unique=True,
+            required=True,
+        ),
+        IndexSpec(name="idx_asset_id", keys=[("asset_id", ASCENDING)]),
+        IndexSpec(name="idx_type", keys=[("type", ASCENDING)]),
+        IndexSpec(name="idx_category", keys=[("category", ASCENDING)]),
+        IndexSpec(name="idx_element_id", keys=[("element_id", ASCENDING)]),
+        # NC/TDMS/VM dt_file 참조 조회용 (parsed.refs 는 reference 단위 배열 → multikey)
+        IndexSpec(
+            name="idx_refs",
+            keys=[
+                ("type", ASCENDING),
+                ("category", ASCENDING),
+                ("parsed.refs.DT_GLOBAL_ASSET", ASCENDING),
+                ("parsed.refs.DT_ASSET", ASCENDING),
+                ("parsed.refs.DT_PROJECT", ASCENDING),
+                ("parsed.refs.WORKPLAN", ASCENDING),
+                ("parsed.refs.WORKINGSTEP", ASCENDING),
+            ],
+        ),
+    ],
+    PROJECT_COLLECTION: [
+        # v1 프로젝트 목록/검색 (name)
+        IndexSpec(name="idx_name", keys=[("name", ASCENDING)]),
+    ],
+    GRIDFS_FILES_COLLECTION: [
+        # GridFS 드라이버 기본 인덱스 (이름을 맞춰야 충돌 없음)
+        IndexSpec(
+            name="filename_1_uploadDate_1",
+            keys=[("filename", ASCENDING), ("uploadDate", ASCENDING)],
+        ),
+        # STEP 메싱 결과 캐시 조회 (FileRepository.find_tessellation)
+        IndexSpec(
+            name="idx_tessellation_cache",
+            keys=[
+                ("metadata.step_sha256", ASCENDING),
+                ("metadata.linear_deflection", ASCENDING),
+                ("metadata.angular_deflection", ASCENDING),
+                ("metadata.format", ASCENDING),
+            ],
+            partial_filter={"metadata.kind": "tessellation"},
+        ),
+        # DLL CAD/GD&T 변환 결과 캐시 조회 (FileRepository.find_conversion)
+        IndexSpec(
+            name="idx_dll_conversion_cache",
+            keys=[
+                ("metadata.step_sha256", ASCENDING),
+                ("metadata.type", ASCENDING),
+                ("metadata.dll_version", ASCENDING),
+            ],
+            partial_filter={"metadata.kind": "dll_conversion"},
+        ),
+    ],
+    GRIDFS_CHUNKS_COLLECTION: [
+        IndexSpec(
+            name="files_id_1_n_1",
+            keys=[("files_id", ASCENDING), ("n", ASCENDING)],
+            unique=True,
+            required=True,
+        ),
+    ],
+    FILE_CONTENT_COLLECTION: [
+        # 내용 주소 → GridFS blob (중복 제거 무결성: 같은 내용은 문서 하나)
+        # (meta_key: 업로드 메타데이터 해시, 메타데이터가 다르면 blob 을 공유하지 않음)
+        IndexSpec(
+            name="uniq_sha256_filename_meta",
+            keys=[("sha256", ASCENDING), ("filename", ASCENDING), ("meta_key", ASCENDING)],
+            unique=True,
+            required=True,
+            replaces=("uniq_sha256_filename",),
+        ),
+        # delete_file_by_id → refcount 감소
+        IndexSpec(name="idx_file_id", keys=[("file_id", ASCENDING)]),
+    ],
+    TESSELLATION_JOB_COLLECTION: [
+        # 같은 메싱 작업 키(STEP sha256 + LOD + mesh)의 진행 중 작업은 하나 (TessellationEngine.submit 공유)
+        IndexSpec(
+            name="uniq_active_key",
+            keys=[("key", ASCENDING)],
+            unique=True,
+            partial_filter={"active": True, "key": {"$type": "string"}},
+            required=True,
+        ),
+        # 끝난 작업 자동 삭제 (expires_at 은 종료 시 기록)
+        IndexSpec(
+            name="ttl_expires_at",
+            keys=[("expires_at", ASCENDING)],
+            options={"expireAfterSeconds": 0},
+        ),
+    ],
+    VM_JOB_COLLECTION: [
+        # 프로젝트당 진행 중 VM 생성 작업은 하나 (VmJobRunner.submit 중복 등록 방지)
+        IndexSpec(
+            name="uniq_active_project",
+            keys=[("project_id", ASCENDING)],
+            unique=True,
+            partial_filter={"active": True},
+            required=True,
+        ),
+        # 끝난 작업 자동 삭제 (expires_at 은 종료 시 기록)
+        IndexSpec(
+            name="ttl_expires_at",
+            keys=[("expires_at", ASCENDING)],
+            options={"expireAfterSeconds": 0},
+        ),
+    ],
+}
+
+
+async def ensure_indexes(
+    db: AsyncIOMotorDatabase,
+    specs: Dict[str, List[IndexSpec]] = INDEX_SPECS,
+) -> Dict[str, Dict[str, List[str]]]:
+    """선언된 인덱스 생성/검증 (dt_common.indexes.ensure_indexes)."""
+    return await _ensure_indexes(db, specs)
+
+
+async def index_report(
+    db: AsyncIOMotorDatabase,
+    specs: Dict[str, List[IndexSpec]] = INDEX_SPECS,
+) -> Dict[str, Any]:
+    """컬렉션별 인덱스 상태 보고 (dt_common.indexes.index_report)."""
+    return await _index_report(db, specs)
@@ -14,8 +14,33 @@ from src.apis.v2.asset_download_file import router as asset_download_file_router
 from src.apis.v3.asset import router as asset_router
 from src.apis.v3.project import router as v3_project_router
 
-# v3 중복 검사를 위한 인덱스 생성
-from src.database import get_db, ensure_asset_indexes
+from src.apis.admin import router as admin_router
+
+# 인덱스 선언/검증 (v3 중복 검사용 유니크 인덱스 포함)
+from src.database import get_db
+from src.indexes import ensure_indexes
+
+# STEP → STL 변환 엔진 (별도 프로세스)
+from src.utils.tessellation import (
+    get_tessellation_engine,
+    shutdown_tessellation_engine,
+)
+
+# NC 일괄 분할 프로세스 풀
+from src.utils.nc_batch import shutdown_nc_batch_splitter
+
+# DLL 변환 서버 공유 HTTP 클라이언트 (커넥션 풀)
+from src.utils.conversion_client import (
+    close_conversion_client,
+    get_conversion_client,
+)
+
+# VM 서버 공유 HTTP 클라이언트 / VM 프로젝트 생성 작업
+from src.utils.vm_client import close_vm_client
+from src.utils.vm_jobs import shutdown_vm_job_runner
+
+# ISO14649 xsdata 스키마 레지스트리 (startup warm-up)
+from src.utils.schema_registry import warm_schemas
 
 from src.utils.exceptions import CustomException
 from fastapi_mcp import FastApiMCP
@@ -33,7 +58,22 @@ app = FastAPI()
 @app.on_event("startup")
 async def on_startup():
     db = await get_db()
-    await ensure_asset_indexes(db)  # 한번만 호출
+    # 필수(유니크) 인덱스 생성 실패 시 RuntimeError → 기동 중단
+    await ensure_indexes(db)
+    # 스키마 바인딩 메타데이터 선구성 → 첫 검증 요청의 cold 비용 제거
+    warm_schemas()
+    get_tessellation_engine()
+    get_conversion_client()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # 실행 중인 변환 프로세스 정리
+    await shutdown_tessellation_engine()
+    shutdown_nc_batch_splitter()
+    await shutdown_vm_job_runner()
+    await close_conversion_client()
+    await close_vm_client()
 
 
 @app.exception_handler(CustomException)
@@ -53,6 +93,7 @@ app.include_router(asset_upload_file_router)
 app.include_router(asset_download_file_router)
 app.include_router(asset_router)
 app.include_router(v3_project_router)
+app.include_router(admin_router)
 
 mcp = FastApiMCP(
     app,
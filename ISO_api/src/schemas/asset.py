@@ -37,6 +37,7 @@ class AssetDocument(BaseModel):
     category: Optional[str] = None
     element_id: str
     data: str
+    version: int = 0  # 수정 시 expected_version 으로 전달 (낙관적 동시성 제어)
 
 
 class AssetDocumentNoData(BaseModel):
@@ -1,3 +1,4 @@
+from typing import Any, Dict, Optional
 from pydantic import BaseModel
 
 class FileCreateResponse(BaseModel):
@@ -5,4 +6,19 @@ class FileCreateResponse(BaseModel):
 
 class StpCreateResponse(BaseModel):
     step_id: str
-    stl_id: str
\ No newline at end of file
+    stl_id: str
+
+class StpJobResponse(BaseModel):
+    job_id: str
+    status: str
+    step_id: str
+
+class StlJobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    step_id: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 
 class ProjectCreateResponse(BaseModel):
@@ -14,4 +14,16 @@ class ProjectResponse(BaseModel):
     stl_id: Optional[str] = None
     
 class TdmsPahtListResponse(BaseModel):
-    tdms_list: List[str]
\ No newline at end of file
+    tdms_list: List[str]
+
+class VmJobStatusResponse(BaseModel):
+    job_id: str
+    project_id: str
+    status: str
+    stage: Optional[str] = None
+    progress: int = 0
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
@@ -3,15 +3,27 @@ from motor.motor_asyncio import AsyncIOMotorGridFSBucket, AsyncIOMotorCollection
 from src.services.file import FileService
 from src.services.project import ProjectService
 from src.services.v3_project import V3ProjectService
-from src.database import get_grid_fs, get_project_collection, get_asset_collection
+from src.database import (
+    get_grid_fs,
+    get_grid_fs_files_collection,
+    get_project_collection,
+    get_asset_collection,
+    get_file_content_collection,
+    get_tessellation_job_collection,
+)
 from src.services.asset import AssetService
 
 # asset 테스트용 코드 추가
 from src.services.asset_project import AssetProjectService
 
 
-async def get_file_service(grid_fs: AsyncIOMotorGridFSBucket = Depends(get_grid_fs)):
-    return FileService(grid_fs)
+async def get_file_service(
+    grid_fs: AsyncIOMotorGridFSBucket = Depends(get_grid_fs),
+    contents: AsyncIOMotorCollection = Depends(get_file_content_collection),
+    files: AsyncIOMotorCollection = Depends(get_grid_fs_files_collection),
+    jobs: AsyncIOMotorCollection = Depends(get_tessellation_job_collection),
+):
+    return FileService(grid_fs, contents, files, jobs)
 
 
 async def get_project_service(
@@ -1,3 +1,4 @@
+import logging
 import re, os
 from typing import Optional, Dict, Any, List, Tuple
 import xmltodict
@@ -20,6 +21,7 @@ from src.schemas.asset import (
     AssetDocumentNoData,
 )
 from src.entities.asset import AssetRepository
+from src.entities.unit_of_work import UOW_CONFLICT_RETRIES, run_unit_of_work
 from src.services.file import FileService
 from src.utils.v3_xml_parser import (
     extract_dtasset_meta,
@@ -30,13 +32,14 @@ from src.utils.v3_xml_parser import (
     split_dt_asset_xml,
     get_file_display_name,
     inject_file_id_into_xml,
-    workplan_exists_in_project_xml,
     extract_file_reference_tuple,
-    workingstep_exists_in_project_xml,
+    extract_dtfile_oid,
 )
 from src.utils.env import get_env_or_default
 from src.utils.exceptions import CustomException, ExceptionEnum
 
+logger = logging.getLogger(__name__)
+
 
 class AssetService:
     """
@@ -60,6 +63,10 @@ class AssetService:
 
     # --------------- 공용 유틸 ---------------
 
+    async def unit_of_work(self, work, *, retries: int = UOW_CONFLICT_RETRIES):
+        """assets 컬렉션에 대한 run_unit_of_work (라우터에서 여러 쓰기를 묶을 때)."""
+        return await run_unit_of_work(self.repo.collection, work, retries=retries)
+
     def _map_util_error(e: Exception) -> CustomException:
         msg = str(e).lower()
         if "no dt_file" in msg or "not found" in msg:
@@ -161,7 +168,14 @@ class AssetService:
         file_map = {f.filename: f for f in (upload_files or [])}
         has_uploads = bool(file_map)  # 업로드 파일 동봉 여부
 
+        # 검증을 통과한 part: (results 인덱스, 저장할 XML, 이번에 업로드한 파일 OID) → 루프 뒤에 한 번에 저장
+        pending: List[Tuple[int, str, Optional[str]]] = []
+        # 이번 배치에서 저장 예정인 NC 참조 (같은 배치 안의 NC 중복도 차단)
+        pending_nc_refsets = set()
+
         for part_xml in parts:
+            nc_refset = None
+            file_oid = None
             try:
                 # A) 메타 파싱
                 try:
@@ -278,13 +292,13 @@ class AssetService:
                             )
                             continue
 
-                        # 프로젝트 XML 로드
-                        proj_xml = await self.repo.get_project_xml_by_keys(
+                        # 프로젝트 workplan 목록 로드 (parsed 프로젝션, XML 재파싱 없음)
+                        proj_workplans = await self.repo.get_project_workplans(
                             global_asset_id=dt_global_url,
                             asset_id=dt_asset_url,
                             project_element_id=proj_id,
                         )
-                        if not proj_xml:
+                        if proj_workplans is None:
                             failed += 1
                             results.append(
                                 {
@@ -298,9 +312,11 @@ class AssetService:
                             continue
 
                         # WORKPLAN 존재 확인(있으면)
-                        if wp_id and not workplan_exists_in_project_xml(
-                            proj_xml, proj_id, wp_id
-                        ):
+                        wp_entry = next(
+                            (w for w in proj_workplans if w.get("workplan_id") == wp_id),
+                            None,
+                        )
+                        if wp_id and wp_entry is None:
                             failed += 1
                             results.append(
                                 {
@@ -327,9 +343,7 @@ class AssetService:
                                     }
                                 )
                                 continue
-                            if not workingstep_exists_in_project_xml(
-                                proj_xml, proj_id, wp_id, ws_id
-                            ):
+                            if ws_id not in (wp_entry.get("workingstep_ids") or []):
                                 failed += 1
                                 results.append(
                                     {
@@ -344,11 +358,14 @@ class AssetService:
 
                         # NC 전용 중복 체크
                         if (category or "").upper() == "NC":
-                            dup = await self.repo.exists_nc_reference_refset(
-                                dt_global_asset_url=dt_global_url,
-                                dt_asset_url=dt_asset_url,
-                                project_element_id=proj_id,
-                                workplan_id=wp_id or "",
+                            nc_refset = (dt_global_url, dt_asset_url, proj_id, wp_id or "")
+                            dup = nc_refset in pending_nc_refsets or (
+                                await self.repo.exists_nc_reference_refset(
+                                    dt_global_asset_url=dt_global_url,
+                                    dt_asset_url=dt_asset_url,
+                                    project_element_id=proj_id,
+                                    workplan_id=wp_id or "",
+                                )
                             )
                             if dup:
                                 failed += 1
@@ -404,7 +421,9 @@ class AssetService:
 
                         if fobj:
                             try:
-                                file_oid = await file_service.process_upload(file=fobj)
+                                file_oid = await file_service.process_upload(
+                                    file=fobj, nc=(category or "").upper() == "NC"
+                                )
                                 patched_xml = inject_file_id_into_xml(
                                     xml=part_xml,
                                     file_id=file_oid,
@@ -416,6 +435,7 @@ class AssetService:
                                     path_template="",
                                 )
                             except Exception as e:
+                                await self._discard_uploaded(file_service, [file_oid])
                                 failed += 1
                                 results.append(
                                     {
@@ -431,36 +451,21 @@ class AssetService:
                             # 업로드 파일이 없거나(display_name 없음/미매칭 포함) → 베스트에포트: 그대로 저장
                             patched_xml = part_xml
 
-                # D) DB 저장
-                try:
-                    resp = await self.repo.insert_asset(
-                        AssetCreateRequest(xml=patched_xml)
-                    )
-                    created += 1
-                    results.append(
-                        {
-                            "element_id": element_id,
-                            "type": el_type,
-                            "category": category,
-                            "status": "created",
-                            "asset_mongo_id": resp.asset_mongo_id,
-                            "is_upload": False,
-                        }
-                    )
-                except Exception as e:
-                    failed += 1
-                    results.append(
-                        {
-                            "element_id": element_id,
-                            "type": el_type,
-                            "category": category,
-                            "status": "failed",
-                            "reason": f"db-insert-failed: {e}",
-                        }
-                    )
-                    continue
+                # D) DB 저장은 루프 뒤에 한 번에 (결과 자리만 잡아 둠)
+                results.append(
+                    {
+                        "element_id": element_id,
+                        "type": el_type,
+                        "category": category,
+                        "status": "pending",
+                    }
+                )
+                pending.append((len(results) - 1, patched_xml, file_oid))
+                if nc_refset:
+                    pending_nc_refsets.add(nc_refset)
 
             except Exception as e:
+                await self._discard_uploaded(file_service, [file_oid])
                 failed += 1
                 results.append(
                     {
@@ -470,11 +475,66 @@ class AssetService:
                     }
                 )
 
+        # D) DB 저장: 존재 확인 1회 + insert_many 1회를 unit-of-work 로
+        #    배치가 실패하면(경쟁 생성으로 인한 키 충돌 등) part 별로 다시 저장 → 실패는 해당 part 만
+        if pending:
+
+            async def work(session) -> List[Optional[Dict[str, Any]]]:
+                return await self.repo.insert_missing_assets(
+                    [AssetCreateRequest(xml=x) for _, x, _ in pending], session=session
+                )
+
+            try:
+                outcomes = await run_unit_of_work(self.repo.collection, work)
+            except Exception as e:
+                logger.info("[create_from_xml_multi] batch insert failed, retrying per part: %s", e)
+                outcomes = [await self._insert_part(x) for _, x, _ in pending]
+
+            not_saved: List[Optional[str]] = []
+            for (idx, _, oid), outcome in zip(pending, outcomes):
+                if isinstance(outcome, Exception):
+                    reason = f"db-insert-failed: {outcome}"
+                elif outcome:
+                    created += 1
+                    results[idx].update(
+                        status="created",
+                        asset_mongo_id=outcome["asset_mongo_id"],
+                        is_upload=False,
+                    )
+                    continue
+                else:
+                    reason = "db-insert-failed: duplicate asset key"
+                failed += 1
+                results[idx].update(status="failed", reason=reason)
+                not_saved.append(oid)
+            # 저장되지 않은 part 를 위해 올린 파일은 남기지 않음
+            await self._discard_uploaded(file_service, not_saved)
+
         return {
             "results": results,
             "summary": {"total": len(parts), "created": created, "failed": failed},
         }
 
+    async def _insert_part(self, xml: str) -> Dict[str, Any] | Exception:
+        """part 1개 저장 → 생성 정보, 실패 시 예외 객체 (다른 part 저장을 막지 않도록 반환)."""
+        try:
+            resp = await self.repo.insert_asset(AssetCreateRequest(xml=xml))
+        except Exception as e:
+            return e
+        return {"asset_mongo_id": resp.asset_mongo_id}
+
+    async def _discard_uploaded(
+        self, file_service: FileService, file_oids: List[Optional[str]]
+    ) -> None:
+        """DB 에 저장되지 못한 part 의 업로드 파일 삭제 (삭제 실패는 로그만)."""
+        for oid in file_oids:
+            if not oid:
+                continue
+            try:
+                await file_service.delete_file_by_id(oid)
+            except Exception as e:
+                logger.warning("[create_from_xml_multi] failed to delete orphan file %s: %s", oid, e)
+
     async def create_from_xml(
         self, xml: str, *, upsert: bool = False
     ) -> AssetCreateResponse:
@@ -488,24 +548,48 @@ class AssetService:
         if not validate_xml_against_schema(xml):
             raise ValueError("Invalid XML schema")
 
-        # 네임스페이스 보정(파서가 관대한 경우 생략 가능하지만 안전하게)
-        d = xmltodict.parse(xml)
-        if "dt_asset" in d:
-            ensure_dtasset_namespaces(d["dt_asset"])
-            # global_asset_id 보정 (내부 헬퍼 활용)
-            raw_gid = d["dt_asset"].get("asset_global_id")
-            if isinstance(raw_gid, str) and raw_gid.strip():
-                d["dt_asset"]["asset_global_id"] = self._normalize_global_asset_id(
-                    raw_gid
-                )
-
-            xml = self._prettify_xml(d)
-
-        req = AssetCreateRequest(xml=xml)
+        req = AssetCreateRequest(xml=self._normalize_asset_xml(xml))
         if upsert:
             return await self.repo.upsert_asset(req)
         return await self.repo.insert_asset(req)
 
+    async def create_many_from_xml(
+        self, xmls: List[str], *, validate_schema: bool = True, session=None
+    ) -> List[Dict[str, Any]]:
+        """
+        여러 dt_asset XML 을 한 번에 저장 (이미 있는 키는 재사용하고 건너뜀).
+        - create_from_xml 과 같은 보정(네임스페이스/global_asset_id) 후
+          repo.insert_missing_assets 로 존재 확인 1회 + insert_many 1회
+        - session 이 없으면 자체 unit-of-work 로 실행 (replica set 이면 트랜잭션)
+        반환: 새로 생성한 문서 목록 (롤백 시 rollback_delete_by_mongo_ids 에 asset_mongo_id 전달)
+        """
+        if validate_schema:
+            for xml in xmls:
+                if not validate_xml_against_schema(xml):
+                    raise ValueError("Invalid XML schema")
+
+        reqs = [AssetCreateRequest(xml=self._normalize_asset_xml(x)) for x in xmls]
+
+        async def work(s) -> List[Dict[str, Any]]:
+            created = await self.repo.insert_missing_assets(reqs, session=s)
+            return [c for c in created if c]
+
+        if session is not None:
+            return await work(session)
+        return await run_unit_of_work(self.repo.collection, work)
+
+    def _normalize_asset_xml(self, xml: str) -> str:
+        """네임스페이스 누락 / global_asset_id 형식 보정 (파서가 관대한 경우 생략 가능하지만 안전하게)."""
+        d = xmltodict.parse(xml)
+        if "dt_asset" not in d:
+            return xml
+        ensure_dtasset_namespaces(d["dt_asset"])
+        # global_asset_id 보정 (내부 헬퍼 활용)
+        raw_gid = d["dt_asset"].get("asset_global_id")
+        if isinstance(raw_gid, str) and raw_gid.strip():
+            d["dt_asset"]["asset_global_id"] = self._normalize_global_asset_id(raw_gid)
+        return self._prettify_xml(d)
+
     async def create_from_xml_with_file_id(
         self,
         *,
@@ -669,16 +753,27 @@ class AssetService:
         validate_schema: bool = True,
         forbid_type_change: bool = True,
         precheck_dup_conflict: bool = True,
+        full_validation: bool = False,
+        projection: Optional[Tuple[Dict[str, Optional[str]], Dict[str, Any]]] = None,
+        expected_version: Optional[int] = None,
+        session=None,
     ) -> bool:
-        """XML만 교체하는 업데이트."""
-        old = await self.repo.get_asset_by_mongo_id(mongo_id)
+        """
+        XML만 교체하는 업데이트.
+        스키마 검증은 기본 증분 검증(바뀐 dt_elements/workingstep 만), full_validation=True 면 전체 검증.
+        projection: 이미 build_dtasset_projection(xml) 한 (meta, parsed) 가 있으면 전달 → 메타/프로젝션 재파싱 생략
+        expected_version: 호출 측이 XML 을 만들 때 기준으로 삼은 문서 version
+            (없으면 여기서 읽은 version). 그 사이 다른 쓰기가 있었으면 VersionConflict (409)
+        session: run_unit_of_work 안에서 호출할 때의 세션
+        """
+        old = await self.repo.get_asset_by_mongo_id(mongo_id, session=session)
         if not old:
             raise CustomException(ExceptionEnum.NO_DATA_FOUND)
 
-        if validate_schema and not validate_xml_against_schema(xml):
+        if validate_schema and not validate_xml_against_schema(xml, full=full_validation):
             raise CustomException(ExceptionEnum.INVALID_ATTRIBUTE, "Invalid XML schema")
 
-        new_meta = extract_dtasset_meta(xml, strict=True)
+        new_meta = projection[0] if projection else extract_dtasset_meta(xml, strict=True)
 
         # 타입 변경 금지
         if forbid_type_change and old.get("type") != new_meta["type"]:
@@ -698,12 +793,21 @@ class AssetService:
                     asset_id=new_meta["asset_id"],
                     type=new_meta["type"],
                     element_id=new_meta["element_id"],
+                    session=session,
                 )
                 if other and str(other["_id"]) != str(old["_id"]):
                     raise CustomException(ExceptionEnum.ASSET_ID_DUPLICATION)
 
         # 실제 업데이트(유니크 인덱스 충돌은 여기서도 catch 가능)
-        ok = await self.repo.update_asset_xml_by_mongo_id(mongo_id, xml)
+        ok = await self.repo.update_asset_xml_by_mongo_id(
+            mongo_id,
+            xml,
+            projection=projection,
+            expected_version=(
+                old.get("version", 0) if expected_version is None else expected_version
+            ),
+            session=session,
+        )
         return ok
 
     async def update_from_xml_with_file_id(
@@ -720,10 +824,12 @@ class AssetService:
         validate_schema: bool = True,
         forbid_type_change: bool = True,
         precheck_dup_conflict: bool = True,
+        expected_version: Optional[int] = None,
     ) -> str | None:
         """
         새 file_id를 XML(dt_file)에 주입해 업데이트.
         반환: 기존 파일 OID(있으면) -> 라우터에서 정리용.
+        expected_version: 호출 측 기준 version (없으면 여기서 읽은 version)
         """
         old = await self.repo.get_asset_by_mongo_id(mongo_id)
         if not old:
@@ -754,12 +860,16 @@ class AssetService:
         patched_xml = xmltodict.unparse(d)
 
         # 나머지 검증/중복체크/업데이트는 공용 함수 사용
+        # (old_file_id 를 읽은 시점 이후 다른 쓰기가 있었으면 409 → 엉뚱한 파일 정리 방지)
         await self.update_from_xml(
             mongo_id=mongo_id,
             xml=patched_xml,
             validate_schema=validate_schema,
             forbid_type_change=forbid_type_change,
             precheck_dup_conflict=precheck_dup_conflict,
+            expected_version=(
+                old.get("version", 0) if expected_version is None else expected_version
+            ),
         )
         return old_file_id
 
@@ -1033,20 +1143,6 @@ class AssetService:
             return parts[-1] if parts else ""
         return dt_asset_url_or_id
 
-    def _rx_kv(self, key: str, val: str) -> Dict[str, Any]:
-        """<key>KEY</key><value>VAL</value> 정규식 쿼리 보조"""
-        import re
-
-        def _esc(s: str) -> str:
-            return re.escape(s)
-
-        return {
-            "data": {
-                "$regex": rf"<key>\s*{_esc(key)}\s*</key>\s*<value>\s*{_esc(val)}\s*</value>",
-                "$options": "is",
-            }
-        }
-
     async def find_nc_files_by_project_ref(
         self,
         *,
@@ -1079,19 +1175,13 @@ class AssetService:
                     detail=f"project/workplan not found (project={project_element_id}, wp={workplan_id})",
                 )
 
-        # dt_file/NC + 4개 key/value 매칭
-        q = {
-            "$and": [
-                {"type": "dt_file"},
-                {"category": "NC"},
-                self._rx_kv("DT_GLOBAL_ASSET", g_url),
-                self._rx_kv("DT_ASSET", a_url),
-                self._rx_kv("DT_PROJECT", project_element_id),
-                self._rx_kv("WORKPLAN", workplan_id),
-            ]
-        }
-        cursor = self.repo.collection.find(
-            q,
+        # dt_file/NC + 4개 key/value 매칭 (parsed.refs 인덱스)
+        return await self.repo.find_nc_files_by_ref(
+            global_asset_id=g_url,
+            asset_id=a_url,
+            project_element_id=project_element_id,
+            workplan_id=workplan_id,
+            limit=None,
             projection={
                 "_id": 1,
                 "global_asset_id": 1,
@@ -1101,7 +1191,38 @@ class AssetService:
                 "element_id": 1,
             },
         )
-        return await cursor.to_list(length=None)
+
+    async def find_nc_file_oids_by_project(
+        self,
+        *,
+        global_asset_id: str,
+        asset_id: str,
+        project_element_id: str,
+    ) -> List[str]:
+        """
+        프로젝트(워크플랜 무관)를 참조하는 NC dt_file 들의 GridFS OID 목록 (중복 제거, 순서 유지).
+        parsed.file_oids 가 dt_file 1개로 정해지지 않으면(기존 문서 등) XML 에서 element_id 로 추출
+        """
+        rows = await self.repo.find_nc_files_by_project(
+            global_asset_id=self._normalize_global_asset_id(global_asset_id),
+            asset_id=asset_id,
+            project_element_id=project_element_id,
+            projection={"_id": 1, "element_id": 1, "parsed.file_oids": 1},
+        )
+        oids: List[str] = []
+        for row in rows:
+            found = (row.get("parsed") or {}).get("file_oids") or []
+            if len(found) != 1:
+                doc = await self.repo.get_asset_by_mongo_id(str(row["_id"]))
+                data = (doc or {}).get("data")
+                oid = (
+                    extract_dtfile_oid(data, target_element_id=row.get("element_id"))
+                    if isinstance(data, str)
+                    else None
+                )
+                found = [oid] if oid else []
+            oids.extend(found)
+        return list(dict.fromkeys(oids))
 
     def ensure_uploaded_filename_matches_xml(
         self,
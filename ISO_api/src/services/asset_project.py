@@ -1,6 +1,8 @@
+import asyncio
+import io
 import json
-import os
 import re
+import tempfile
 import uuid
 from typing import Optional, Dict, Any, Tuple
 from fastapi import UploadFile
@@ -8,7 +10,7 @@ import xmltodict
 import xml.dom.minidom
 from motor.motor_asyncio import AsyncIOMotorCollection
 from src.schemas.project import ProjectListResponse
-from src.entities.model_v27 import *
+from src.utils import schema_registry
 from src.utils.exceptions import CustomException, ExceptionEnum
 from src.utils.asset_xml_parser import (
     create_feature_xml,
@@ -19,10 +21,10 @@ import logging
 from src.entities.project import ProjectRepository
 
 from src.utils.stock import get_stock_code_by_name
-from src.utils.nc_spliter import process_nc_file, extract_tool_numbers_from_paths
+from src.utils.nc_spliter import write_nc_segments_zip
 from src.utils.file_modifier import (
-    zip_folder,
-    create_prj_file,
+    NC_ZIP_SPOOL_MAX,
+    create_prj_bytes,
     create_vm_project_name,
 )
 
@@ -59,6 +61,13 @@ class AssetProjectService:
         """
         project_id = project_info.get("its_id", f"project_{uuid.uuid4().hex[:8]}")
 
+        # v27 스키마 클래스 (최초 사용 시 로드)
+        v27 = schema_registry.get_class_table("v27")
+        DtAsset, DtAssetKind, DtProject, DtReference, Workplan = (
+            v27[name]
+            for name in ("DtAsset", "DtAssetKind", "DtProject", "DtReference", "Workplan")
+        )
+
         dt_project_instance = DtProject(
             element_id=f"proj-{uuid.uuid4()}",
             category="Project",
@@ -1275,9 +1284,9 @@ class AssetProjectService:
         1. 프로젝트에서 main_workplan 안에 NC 파일 존재 확인
         2. 없으면 예외
         3. 있으면 get_file_stream으로 NC 가져오기
-        4. tmp/프로젝트이름/ 에 저장
-        5. nc_spliter로 tmp/프로젝트이름/ncdata 에 분할 저장
-        6. 분할된 NC 파일에서 툴번호 순서대로 추출
+        4. nc_spliter로 툴별 분할 → 임시 폴더 없이 ncdata.zip 스트림에 바로 기록
+        5. (.prj 는 zip 안의 ncdata/<이름>_<i>/<이름>_<i> 경로 기준)
+        6. 분할하면서 툴번호 순서대로 같이 추출
         7. extract_tool_summary_list() 호출로 툴 정보 가져오기
         8. 개수 다르면 raise
         9. 툴 정보에 순서대로 툴 번호 입력
@@ -1302,63 +1311,58 @@ class AssetProjectService:
         # 3.5 프로젝트 폴더 이름 민들기
         project_folder_name = create_vm_project_name()
 
-        # 4. NC 파일 저장
+        # 4~6. 툴별로 분할 → 세그먼트를 ncdata.zip 에 바로 기록 (tmp 폴더 없음) + 툴 번호 추출
         project_id = xml_dict["project"].get("its_id", "unnamed_project")
-        base_path = os.path.join("tmp", project_folder_name)
-        os.makedirs(base_path, exist_ok=True)
-        nc_path = os.path.join(base_path, f"{project_id}.nc")
-        with open(nc_path, "wb") as f:
-            f.write(nc_bytes)
+        nc_zip = tempfile.SpooledTemporaryFile(max_size=NC_ZIP_SPOOL_MAX)
+        try:
+            split_result = await asyncio.to_thread(
+                write_nc_segments_zip,
+                io.StringIO(nc_bytes.decode("utf-8"), newline=None),
+                project_id,
+                nc_zip,
+            )
+            tool_numbers = split_result.tool_numbers
 
-        # 5. 툴별로 분할
-        split_path = os.path.join(base_path, "ncdata")
-        os.makedirs(split_path, exist_ok=True)
-        split_files = process_nc_file(nc_path, split_path)
+            # 7. 프로젝트 툴 정보 가져오기
+            tool_infos = self.extract_tool_summary_list(project)
 
-        # 6. nc 파일 압축
-        nc_zip_path = os.path.join(base_path, "ncdata.zip")
-        nc_zip_path = zip_folder(split_path, nc_zip_path)
+            # 8. 개수 확인
+            if len(tool_numbers) != len(tool_infos):
+                raise CustomException(ExceptionEnum.INVALID_ATTRIBUTE)
 
-        # 6. 툴 번호 추출 (숫자)
-        tool_numbers = extract_tool_numbers_from_paths(split_files)
+            # 9. 툴 정보에 툴 넘버 할당
+            for idx, info in enumerate(tool_infos):
+                tnum = tool_numbers[idx]
+                info[0] = tnum
 
-        # 7. 프로젝트 툴 정보 가져오기
-        tool_infos = self.extract_tool_summary_list(project)
+            # 10. 소재 타입 가져오기
+            stock_type = self.extract_material_code(project)
 
-        # 8. 개수 확인
-        if len(tool_numbers) != len(tool_infos):
-            raise CustomException(ExceptionEnum.INVALID_ATTRIBUTE)
+            # 11. 소재 사이즈 가져오기
+            stock_coords = self.extract_rawpiece_bounding_box(project)
 
-        # 9. 툴 정보에 툴 넘버 할당
-        for idx, info in enumerate(tool_infos):
-            tnum = tool_numbers[idx]
-            info[0] = tnum
-
-        # 10. 소재 타입 가져오기
-        stock_type = self.extract_material_code(project)
-
-        # 11. 소재 사이즈 가져오기
-        stock_coords = self.extract_rawpiece_bounding_box(project)
-
-        # 12. 프로젝트 파일 만들기
-        prj_file_path = os.path.join(base_path, f"{project_id}.prj")
-        project_file_path = create_prj_file(
-            stock_type=stock_type,
-            stock_coords=stock_coords,
-            nc_file_paths=split_files,
-            tool_infos=tool_infos,
-            output_path=prj_file_path,
-        )
+            # 12. 프로젝트 파일 만들기 (zip 안의 ncdata/<이름>_<i>/<이름>_<i> 기준)
+            prj_bytes = create_prj_bytes(
+                stock_type=stock_type,
+                stock_coords=stock_coords,
+                nc_file_paths=[f"ncdata/{path}" for path in split_result.paths],
+                tool_infos=tool_infos,
+            )
 
-        # # 13. s3에 프로젝트 파일, nc파일 업로드
-        # project_s3_path = vm_file_s3_upload(
-        #     file_path=project_file_path, parent_path=project_folder_name
-        # )
-        # project_s3_path = project_s3_path["file_url"]
-        # nc_s3_path = vm_file_s3_upload(
-        #     file_path=nc_zip_path, parent_path=project_folder_name
-        # )
-        # nc_s3_path = nc_s3_path["file_url"]
+            # # 13. s3에 프로젝트 파일, nc파일 업로드
+            # project_s3_path = vm_file_s3_upload(
+            #     file_path=f"{project_id}.prj",
+            #     content=prj_bytes,
+            #     parent_path=project_folder_name,
+            # )
+            # project_s3_path = project_s3_path["file_url"]
+            # nc_zip.seek(0)
+            # nc_s3_path = vm_file_s3_upload(
+            #     file_path="ncdata.zip", content=nc_zip, parent_path=project_folder_name
+            # )
+            # nc_s3_path = nc_s3_path["file_url"]
+        finally:
+            nc_zip.close()
 
         # 임시코드
         project_s3_path = "https://kitech-file.s3.ap-northeast-2.amazonaws.com/2025-07-02_ap_4_34_05/Test_Project1.prj"
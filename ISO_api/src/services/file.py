@@ -1,18 +1,37 @@
 import asyncio
+from collections import Counter
+import hashlib
 from io import BytesIO
 import logging
 import os
 import tempfile
-from typing import Optional, Set, List, Dict, Any
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 from fastapi import UploadFile
 import httpx
 from src.entities.file import FileRepository
+from src.entities.job import JOB_DONE, JOB_TIMEOUT
+from src.entities.tessellation_job import TessellationJobRepository
+from src.utils.conversion_client import get_conversion_client, read_multipart
+from src.utils.tessellation import get_tessellation_engine, job_status, resolve_lod
 from src.utils.exceptions import CustomException, ExceptionEnum
-from motor.motor_asyncio import AsyncIOMotorGridFSBucket, AsyncIOMotorGridOut
-from OCC.Core.STEPControl import STEPControl_Reader
-from OCC.Core.StlAPI import StlAPI_Writer
-from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
-from OCC.Core.IFSelect import IFSelect_RetDone
+from src.utils.nc_batch import get_nc_batch_splitter
+from src.utils.nc_lexer import NC_LEXER_VERSION, ToolChangeCollector
+from motor.motor_asyncio import (
+    AsyncIOMotorCollection,
+    AsyncIOMotorGridFSBucket,
+    AsyncIOMotorGridOut,
+)
 from dotenv import load_dotenv
 from bson.objectid import ObjectId, InvalidId
 import gridfs
@@ -26,22 +45,56 @@ load_dotenv()
 class FileService:
     """
     파일 업로드/다운로드, 변환, 삭제 등 파일 관련 모든 핵심 로직을 담당하는 서비스 클래스.
-    MongoDB GridFS, 외부 DLL 변환 서버(http API), OpenCASCADE 파이썬 바인딩 사용.
+    MongoDB GridFS, 외부 DLL 변환 서버(http API), OpenCASCADE(변환 엔진 프로세스) 사용.
     """
 
-    DLL_URI = os.getenv(
-        "DLL_URI", "http://dll-server:8010"
-    )  # 외부 DLL 변환 서버 API 주소
-
-    def __init__(self, grid_fs: AsyncIOMotorGridFSBucket):
+    # 외부 DLL 변환 서버 주소/타임아웃/재시도는 src.utils.conversion_client 환경 변수로 설정
+    # DLL 버전 고정값 (없으면 DLL 서버 /version 조회), 조회 결과 캐시 시간(초)
+    DLL_VERSION = os.getenv("DLL_VERSION")
+    DLL_VERSION_TTL = float(os.getenv("DLL_VERSION_TTL", "300"))
+    _dll_version_cache: Dict[str, Any] = {"value": None, "expires": 0.0}
+    # 진행 중인 DLL 변환 (STEP sha256, type, DLL 버전) → Future (single-flight)
+    _conversion_inflight: Dict[tuple, "asyncio.Future[Any]"] = {}
+
+    # 업로드 스트리밍 설정: UploadFile → GridFS 를 chunk 단위로 기록 (peak 메모리 = chunk 크기)
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(255 * 1024)))
+    MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", "0"))  # 0 이면 제한 없음
+    # 동시 업로드 수 제한 (초과 요청은 대기 → 컨테이너 메모리/DB 부하 보호)
+    _upload_slots = asyncio.Semaphore(int(os.getenv("UPLOAD_CONCURRENCY", "8")))
+
+    # STEP 업로드 시 미리 만들어 둘 LOD (default 는 프로젝트 stl_id 로 항상 포함)
+    UPLOAD_LODS = list(
+        dict.fromkeys(
+            ["default"]
+            + [
+                x.strip()
+                for x in os.getenv("TESSELLATION_UPLOAD_LODS", "coarse,default").split(",")
+                if x.strip()
+            ]
+        )
+    )
+    # LOD 마다 인덱스 메쉬(.glb)도 생성할지 여부
+    TESSELLATION_MESH = os.getenv("TESSELLATION_MESH", "0") == "1"
+
+    def __init__(
+        self,
+        grid_fs: AsyncIOMotorGridFSBucket,
+        contents: Optional[AsyncIOMotorCollection] = None,
+        files: Optional[AsyncIOMotorCollection] = None,
+        jobs: Optional[AsyncIOMotorCollection] = None,
+    ):
         # 파일 저장/조회 등 실제 DB 작업은 FileRepository가 담당 (의존성 주입)
-        self.repository = FileRepository(grid_fs)
+        # contents 가 있으면 같은 내용의 업로드는 blob 하나를 공유 (refcount)
+        # files(GridFS 파일 문서)가 있으면 NC 툴 교체 추출 결과를 메타데이터에 저장
+        self.repository = FileRepository(grid_fs, contents, files)
+        # STEP → STL 변환 작업 상태 (tessellation_jobs)
+        self.tessellation_jobs = TessellationJobRepository(jobs)
 
     async def delete_project_dt_files(self, project: dict) -> List[str]:
         """
         프로젝트 XML(dt_asset)에서 모든 dt_file 요소를 찾아,
         그 안에 들어있는 Mongo ObjectId(보통 <value>에 저장)를 전부 삭제한다.
-        - 중복 ID는 한 번만 삭제 시도
+        - dt_file 하나당 한 번씩 삭제(refcount 감소) 시도, 같은 dt_file 안의 중복 ID는 한 번만
         - 존재하지 않는 파일은 무시(로그만)
         - 문제 발생 시 안전 로깅
         반환: 실제 삭제 시도한 file_id(ObjectId 문자열) 리스트
@@ -75,8 +128,10 @@ class FileService:
         dt_file_nodes = self._collect_dt_file_nodes(xml_dict)
 
         # 3) 각 dt_file에서 삭제 대상 ObjectId 추출
-        to_delete: Set[str] = set()
+        # dt_file 마다 참조 1개 (내용 주소 공유 시 같은 OID가 여러 dt_file에 있을 수 있음)
+        ref_counts: Counter = Counter()
         for node in dt_file_nodes:
+            to_delete: Set[str] = set()
             # (a) 기본: <value>에 저장된 OID
             val = node.get("value")
             if self._is_valid_objectid(val):
@@ -104,8 +159,9 @@ class FileService:
                     k and k.endswith("_id") and self._is_valid_objectid(v)
                 ) or self._is_valid_objectid(v):
                     to_delete.add(v)
+            ref_counts.update(to_delete)
 
-        if not to_delete:
+        if not ref_counts:
             logging.info(
                 "[delete_project_dt_files] 삭제할 파일 ID 없음 (dt_file 존재 X 또는 OID 없음)"
             )
@@ -120,8 +176,10 @@ class FileService:
             except Exception as e:
                 logging.error(f"[delete_file_by_id] 삭제 중 에러: {file_id} / {e}")
 
-        await asyncio.gather(*(safe_delete(fid) for fid in to_delete))
-        return list(to_delete)
+        await asyncio.gather(
+            *(safe_delete(fid) for fid, n in ref_counts.items() for _ in range(n))
+        )
+        return list(ref_counts)
 
     # ----------------- 내부 유틸 -----------------
 
@@ -213,16 +271,99 @@ class FileService:
         await self.repository.delete_file_by_id(file_id)
         return
 
-    async def process_upload(self, file: UploadFile, metadata: Optional[dict] = None):
+    async def process_upload(
+        self, file: UploadFile, metadata: Optional[dict] = None, nc: bool = False
+    ):
         """
-        업로드 파일(UploadFile)을 읽어 GridFS에 저장, file_id 반환.
+        업로드 파일(UploadFile)을 chunk 단위로 GridFS에 저장, file_id 반환.
+        nc: NC 프로그램이면 업로드하면서 툴 교체 이벤트도 추출해 메타데이터에 저장
         """
-        step_content = await file.read()
-        filename = file.filename
-        file_id = await self.repository.insert_file(
-            step_content, filename, metadata=metadata
-        )
-        return file_id
+        info = await self.upload_stream(file, metadata=metadata, nc=nc)
+        return info["file_id"]
+
+    async def upload_stream(
+        self,
+        file: UploadFile,
+        metadata: Optional[dict] = None,
+        filename: Optional[str] = None,
+        tee_path: Optional[str] = None,
+        nc: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        UploadFile 을 전체 로드 없이 GridFS 업로드 스트림으로 전송.
+        - UPLOAD_CHUNK_SIZE 단위로 읽고 쓰며, 기록 중 sha256 계산
+        - MAX_UPLOAD_BYTES 초과 시 부분 업로드 정리 후 FILE_TOO_LARGE(413)
+        - tee_path 가 주어지면 같은 chunk 를 로컬 파일에도 기록 (STEP→STL 변환 입력용)
+        - nc 이면 같은 chunk 로 툴 교체 이벤트를 추출해 metadata.nc_tool_changes 에 저장
+        반환: {"file_id", "length", "sha256"}
+        """
+        tee = open(tee_path, "wb") if tee_path else None
+        collector = ToolChangeCollector() if nc else None
+        try:
+            async with self._upload_slots:
+                info = await self.repository.insert_file_stream(
+                    self._iter_upload(file, tee, collector),
+                    filename or file.filename,
+                    metadata=metadata,
+                    max_bytes=self.MAX_UPLOAD_BYTES or None,
+                    chunk_size_bytes=self.UPLOAD_CHUNK_SIZE,
+                )
+        except ValueError as e:
+            raise CustomException(ExceptionEnum.FILE_TOO_LARGE, detail=str(e))
+        finally:
+            if tee:
+                tee.close()
+        if collector is not None:
+            await self._store_nc_tool_changes(info["file_id"], info["sha256"], collector.close())
+        return info
+
+    async def _iter_upload(
+        self, file: UploadFile, tee=None, collector: Optional[ToolChangeCollector] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        UploadFile 을 UPLOAD_CHUNK_SIZE 단위로 읽는 비동기 제너레이터.
+        tee 기록(디스크 I/O) / 툴 교체 렉싱(CPU)은 이벤트 루프를 막지 않도록 워커 스레드에서 수행.
+        """
+        await file.seek(0)
+        while True:
+            chunk = await file.read(self.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if tee is not None or collector is not None:
+                await asyncio.to_thread(self._sink_chunk, chunk, tee, collector)
+            yield chunk
+
+    @staticmethod
+    def _sink_chunk(
+        chunk: bytes, tee=None, collector: Optional[ToolChangeCollector] = None
+    ) -> None:
+        """업로드 chunk 를 tee 파일 / 툴 교체 수집기에 전달 (워커 스레드에서 실행)."""
+        if tee is not None:
+            tee.write(chunk)
+        if collector is not None:
+            collector.feed(chunk)
+
+    async def _upload_local_file(
+        self, path: str, filename: str, metadata: Optional[dict] = None
+    ) -> str:
+        """로컬 파일을 chunk 단위로 GridFS에 저장, file_id 반환."""
+
+        async def _iter_local():
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(self.UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+
+        async with self._upload_slots:
+            info = await self.repository.insert_file_stream(
+                _iter_local(),
+                filename,
+                metadata=metadata,
+                chunk_size_bytes=self.UPLOAD_CHUNK_SIZE,
+            )
+        return info["file_id"]
 
     async def file_exist(self, file_id: str):
         """
@@ -237,91 +378,482 @@ class FileService:
         """파일 ObjectId로 GridFS에서 파일 스트림 조회."""
         return await self.repository.get_file(file_id)
 
-    async def stp_upload(self, step_file: UploadFile):
+    async def stp_upload(
+        self,
+        step_file: UploadFile,
+        wait: bool = True,
+        on_converted: Optional[Callable[[Dict[str, str]], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
         """
         STEP 파일 업로드 후 STL로 변환, 둘 다 GridFS에 저장.
-        변환된 파일 ID(dict) 반환: {"step_id": step_file_id, "stl_id": stl_file_id}
+        - STEP 은 GridFS 로 스트리밍하면서 같은 chunk 를 임시 파일에 기록 (전체 메모리 로드 없음)
+        - STL 변환은 변환 엔진(별도 프로세스)에서 실행 → 이벤트 루프를 막지 않음
+        - UPLOAD_LODS 의 LOD 를 함께 생성해 캐시 (같은 내용의 STEP 재업로드 시 메싱 생략)
+        - 변환 실패/타임아웃/취소 시 방금 올린 STEP 정리
+        - on_converted: STL 준비 후 호출 (프로젝트 연결 등, 비동기 모드에서도 실행)
+
+        완료      → {"step_id": step_file_id, "stl_id": stl_file_id} (stl_id = default LOD)
+        wait=False → {"job_id", "status", "step_id"} 즉시 반환 (상태는 get_stl_job 으로 조회)
         """
-        step_content = await step_file.read()
-        filename = step_file.filename
-
-        stl_filename = await self.stl_convert(step_content)  # STEP → STL 변환
-        step_file_id = await self.repository.insert_file(step_content, filename)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".stp") as tmp_step:
+            tmp_step_path = tmp_step.name
 
-        with open(stl_filename, "rb") as stl_file:
-            stl_content = stl_file.read()
-            stl_file_id = await self.repository.insert_file(
-                stl_content, filename.replace(".STEP", ".stl")
+        try:
+            info = await self.upload_stream(step_file, tee_path=tmp_step_path)
+        except BaseException:
+            os.remove(tmp_step_path)
+            raise
+        step_file_id = info["file_id"]
+
+        async def on_ready(result: Dict[str, Any]) -> None:
+            # 캐시 파일을 프로젝트가 참조 → refcount +1 (프로젝트 삭제 시 캐시는 유지)
+            stl_file_id = result["files"]["default"]["stl"]
+            await self.repository.retain_file(stl_file_id)
+            linked = {"step_id": step_file_id, "stl_id": stl_file_id}
+            result.update(linked)
+            if on_converted is not None:
+                await on_converted(linked)
+
+        async def on_error() -> None:
+            await self.repository.delete_file_by_id(step_file_id)
+
+        lods = [resolve_lod(name) for name in self.UPLOAD_LODS]
+        result = await self.ensure_tessellation(
+            step_file_id,
+            lods,
+            mesh=self.TESSELLATION_MESH,
+            wait=wait,
+            step_path=tmp_step_path,
+            sha256=info["sha256"],
+            on_ready=on_ready,
+            on_error=on_error,
+        )
+        if "job_id" in result:
+            return result
+        return {"step_id": step_file_id, "stl_id": result["stl_id"]}
+
+    async def ensure_tessellation(
+        self,
+        step_id: str,
+        lods: List[Dict[str, Any]],
+        *,
+        mesh: bool = False,
+        wait: bool = True,
+        step_path: Optional[str] = None,
+        sha256: Optional[str] = None,
+        on_ready: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+        on_error: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        STEP 메싱 결과(LOD 별 binary STL, mesh=True 면 .glb 도)를 캐시에서 찾고 없는 것만 생성.
+        캐시 키: (STEP sha256, linear deflection, angular deflection, 포맷) → GridFS metadata
+        - lods: resolve_lod() 결과 목록
+        - step_path: 로컬 STEP 경로 (없으면 GridFS 에서 내려받음), 사용 후 삭제됨
+        - on_ready(result): 결과 준비 시 호출 (캐시 적중이면 즉시)
+        - on_error(): 변환 실패/타임아웃/취소/대기열 초과 시 호출
+
+        완료      → {"status": "done", "step_id", "files": {lod: {"stl": id, "glb": id}}}
+        wait=False → {"job_id", "status", "step_id"} (생성이 필요한 경우)
+        """
+        formats = ["stl", "glb"] if mesh else ["stl"]
+        sha256 = sha256 or await self.repository.get_content_sha256(step_id)
+        if sha256 is None:
+            if step_path and os.path.exists(step_path):
+                os.remove(step_path)
+            raise CustomException(ExceptionEnum.STP_NOT_FOUND)
+
+        files: Dict[str, Dict[str, str]] = {}
+        missing: List[Dict[str, Any]] = []
+        for lod in lods:
+            found: Dict[str, str] = {}
+            for fmt in formats:
+                file_id = await self.repository.find_tessellation(
+                    sha256, lod["linear_deflection"], lod["angular_deflection"], fmt
+                )
+                if file_id:
+                    found[fmt] = file_id
+            files[lod["lod"]] = found
+            if len(found) < len(formats):
+                missing.append(lod)
+
+        if not missing:
+            if step_path and os.path.exists(step_path):
+                os.remove(step_path)
+            result = {"status": JOB_DONE, "step_id": step_id, "files": files}
+            if on_ready is not None:
+                await on_ready(result)
+            return result
+
+        if step_path is None:
+            step_path = await self._download_to_temp(step_id, ".stp")
+
+        async def finalize(outputs: List[Dict[str, Any]]) -> Dict[str, Any]:
+            for out in outputs:
+                entry = files[out["lod"]]
+                for fmt, path_key in (("stl", "stl_path"), ("glb", "mesh_path")):
+                    if fmt not in formats or fmt in entry:
+                        continue
+                    entry[fmt] = await self._upload_local_file(
+                        out[path_key],
+                        f"{sha256[:16]}.{out['lod']}.{fmt}",
+                        metadata={
+                            "kind": "tessellation",
+                            "step_sha256": sha256,
+                            "lod": out["lod"],
+                            "linear_deflection": out["linear_deflection"],
+                            "angular_deflection": out["angular_deflection"],
+                            "format": fmt,
+                        },
+                    )
+            result = {"status": JOB_DONE, "step_id": step_id, "files": files}
+            if on_ready is not None:
+                await on_ready(result)
+            return result
+
+        async def on_job_error(job: Dict[str, Any]) -> None:
+            if on_error is not None:
+                await on_error()
+
+        engine = get_tessellation_engine()
+        try:
+            job = await engine.submit(
+                self.tessellation_jobs,
+                step_path,
+                finalize,
+                lods=missing,
+                mesh=mesh,
+                context={"step_id": step_id},
+                on_error=on_job_error,
+                # 후처리 콜백이 없는 조회 요청끼리는 진행 중인 같은 작업을 공유
+                key=(
+                    None
+                    if on_ready is not None
+                    else f"{sha256}:{','.join(l['lod'] for l in missing)}:{mesh}"
+                ),
             )
+        except CustomException:
+            if on_error is not None:
+                await on_error()
+            raise
+
+        if not wait:
+            return {"job_id": job["_id"], "status": job["status"], "step_id": step_id}
+
+        job = await engine.wait(self.tessellation_jobs, job["_id"])
+        if job["status"] == JOB_TIMEOUT:
+            raise CustomException(ExceptionEnum.CONVERSION_TIMEOUT, detail=job.get("error"))
+        if job["status"] != JOB_DONE:
+            raise CustomException(ExceptionEnum.TESSELLATION_FAILED, detail=job.get("error"))
+        return job["result"]
+
+    async def _download_to_temp(self, file_id: str, suffix: str) -> str:
+        """GridFS 파일을 chunk 단위로 임시 파일에 기록하고 경로 반환."""
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            try:
+                async for chunk in self.repository.iter_file(
+                    file_id, chunk_size=self.UPLOAD_CHUNK_SIZE
+                ):
+                    tmp.write(chunk)
+            except gridfs.errors.NoFile:
+                tmp.close()
+                os.remove(tmp.name)
+                raise CustomException(ExceptionEnum.STP_NOT_FOUND)
+            return tmp.name
+
+    async def get_stl_job(self, job_id: str) -> Dict[str, Any]:
+        """STEP → STL 변환 작업 상태 조회 (없으면 JOB_NOT_FOUND)."""
+        job = await get_tessellation_engine().get(self.tessellation_jobs, job_id)
+        return job_status(job)
+
+    async def cancel_stl_job(self, job_id: str) -> Dict[str, Any]:
+        """STEP → STL 변환 작업 취소 (이미 끝난 작업은 상태만 반환)."""
+        job = await get_tessellation_engine().cancel(self.tessellation_jobs, job_id)
+        return job_status(job)
+
+    async def convert_stp_to_cad(
+        self, step_id: str, type: str
+    ) -> AsyncIOMotorGridOut | httpx.Response:
+        """
+        STEP 파일을 CAD/GD&T 포맷(json)으로 변환.
+        내부적으로 외부 DLL API 서버에 HTTP로 전달.
+        type = "cad" or "gdt"
+        - 결과는 (STEP sha256, type, DLL 버전) 키로 GridFS에 캐시 → 같은 모델은 다시 변환하지 않음
+        - 변환 결과는 DLL 서버 응답에서 GridFS 로 chunk 단위로 바로 기록 (메모리에 모으지 않음)
+        - 같은 키의 동시 요청은 한 번만 변환하고 결과를 공유 (single-flight)
+        - DLL 버전을 알 수 없으면 캐시하지 않고 매번 변환
 
-        os.remove(stl_filename)  # 임시 STL 파일 삭제
-
-        return {"step_id": step_file_id, "stl_id": stl_file_id}
+        반환: 캐시된 결과 GridOut, DLL 버전을 모르면 본문을 읽지 않은 DLL 서버 응답 (stream)
+        """
+        sha256 = await self.repository.get_content_sha256(step_id)
+        if sha256 is None:
+            raise CustomException(ExceptionEnum.STP_NOT_FOUND)
+        dll_version = await self.get_dll_version()
+        if dll_version is None:
+            return await self._open_conversion(step_id, self._conversion_path(type))
+        file_id = await self._cached_conversion_id(step_id, sha256, type, dll_version)
+        return await self.repository.get_file(file_id)
 
-    async def stl_convert(self, step_content: bytes) -> str:
+    async def convert_stp_to_all(
+        self, step_id: str
+    ) -> Dict[str, AsyncIOMotorGridOut] | httpx.Response:
         """
-        STEP 파일 바이너리를 STL 파일로 변환 (OpenCASCADE).
-        변환된 임시 STL 파일 경로 반환 (호출부에서 직접 삭제 필요).
+        STEP 파일을 CAD + GD&T 포맷(json)으로 함께 변환. 반환: {"cad": GridOut, "gdt": GridOut}
+        - 타입별 캐시를 먼저 확인하고, 없는 타입만 변환
+        - 둘 다 없으면 DLL 서버 /convert/all/ 한 번 호출 (STEP 업로드/임시 파일/DLL 인스턴스 1회)
+          → multipart 응답을 part 별로 GridFS 에 바로 기록
+        - 결과는 convert_stp_to_cad 와 같은 타입별 캐시 키로 저장 → 단일 변환 API 와 캐시 공유
+        - DLL 버전을 알 수 없으면 /convert/all/ 의 {"cad", "gdt"} JSON 응답(stream)을 그대로 반환
         """
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".stp") as tmp_step:
-            tmp_step.write(step_content)
-            tmp_step_path = tmp_step.name
+        sha256 = await self.repository.get_content_sha256(step_id)
+        if sha256 is None:
+            raise CustomException(ExceptionEnum.STP_NOT_FOUND)
+        dll_version = await self.get_dll_version()
+        if dll_version is None:
+            return await self._open_conversion(step_id, "/convert/all/")
+
+        file_ids: Dict[str, str] = {}
+        for type in ("cad", "gdt"):
+            cached_id = await self.repository.find_conversion(sha256, type, dll_version)
+            if cached_id:
+                file_ids[type] = cached_id
+        missing = [t for t in ("cad", "gdt") if t not in file_ids]
+        if len(missing) == 1:
+            file_ids[missing[0]] = await self._cached_conversion_id(
+                step_id, sha256, missing[0], dll_version
+            )
+        elif missing:
+            file_ids.update(
+                await self._single_flight(
+                    (sha256, "all", dll_version),
+                    lambda: self._convert_all_and_cache(step_id, sha256, dll_version),
+                )
+            )
+        return {t: await self.repository.get_file(file_ids[t]) for t in ("cad", "gdt")}
+
+    async def _cached_conversion_id(
+        self, step_id: str, sha256: str, type: str, dll_version: str
+    ) -> str:
+        """캐시된 변환 결과 file_id, 없으면 변환 후 캐시 (같은 키는 한 번만 변환)."""
+        cached_id = await self.repository.find_conversion(sha256, type, dll_version)
+        if cached_id:
+            return cached_id
+        return await self._single_flight(
+            (sha256, type, dll_version),
+            lambda: self._convert_and_cache(step_id, sha256, type, dll_version),
+        )
 
-        reader = STEPControl_Reader()
-        status = reader.ReadFile(tmp_step_path)
+    async def _single_flight(self, key: tuple, start: Callable[[], Awaitable[Any]]) -> Any:
+        inflight = self._conversion_inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(start())
+            self._conversion_inflight[key] = inflight
+            inflight.add_done_callback(
+                lambda _: self._conversion_inflight.pop(key, None)
+            )
+        # 한 요청이 끊겨도 공유 중인 변환은 계속 진행
+        return await asyncio.shield(inflight)
 
-        if status == IFSelect_RetDone:
-            reader.TransferRoots()
-            shape = reader.Shape()
+    @staticmethod
+    def _conversion_path(type: str) -> str:
+        return "/convert/cad/" if type == "cad" else "/convert/gdt/"
 
-            mesh = BRepMesh_IncrementalMesh(shape, 0.1)
-            mesh.Perform()
+    async def _convert_all_and_cache(
+        self, step_id: str, sha256: str, dll_version: str
+    ) -> Dict[str, str]:
+        response = await self._open_conversion(step_id, "/convert/all/?format=multipart")
 
-            stl_path = tmp_step_path.replace(".stp", ".stl")
-            stl_writer = StlAPI_Writer()
-            stl_writer.Write(shape, stl_path)
+        async def store(type: str, chunks: AsyncIterator[bytes]) -> str:
+            return await self._store_conversion(chunks, sha256, type, dll_version)
 
-            os.remove(tmp_step_path)
+        try:
+            file_ids = await read_multipart(
+                response.aiter_bytes(), response.headers.get("content-type", ""), store
+            )
+        except ValueError as e:
+            raise CustomException(ExceptionEnum.DLL_CONVERSION_FAILED, detail=str(e))
+        finally:
+            await response.aclose()
+        if "cad" not in file_ids or "gdt" not in file_ids:
+            for file_id in file_ids.values():
+                await self.repository.delete_file_by_id(file_id)
+            raise CustomException(
+                ExceptionEnum.DLL_CONVERSION_FAILED, detail="cad/gdt 결과 누락"
+            )
+        return {"cad": file_ids["cad"], "gdt": file_ids["gdt"]}
 
-            return stl_path
+    async def _convert_and_cache(
+        self, step_id: str, sha256: str, type: str, dll_version: str
+    ) -> str:
+        response = await self._open_conversion(step_id, self._conversion_path(type))
+        try:
+            return await self._store_conversion(
+                response.aiter_bytes(), sha256, type, dll_version
+            )
+        finally:
+            await response.aclose()
+
+    async def _store_conversion(
+        self, chunks: AsyncIterator[bytes], sha256: str, type: str, dll_version: str
+    ) -> str:
+        """변환 결과 chunk 를 캐시 파일로 GridFS 에 기록하고 file_id 반환."""
+        info = await self.repository.insert_file_stream(
+            chunks,
+            # 파일명에 DLL 버전 포함: 버전이 달라 결과가 같아도 blob 공유로 메타데이터가 섞이지 않도록
+            f"{sha256[:16]}.{type}.{dll_version}.json",
+            metadata={
+                "kind": "dll_conversion",
+                "step_sha256": sha256,
+                "type": type,
+                "dll_version": dll_version,
+            },
+            chunk_size_bytes=self.UPLOAD_CHUNK_SIZE,
+        )
+        return info["file_id"]
 
-    async def convert_stp_to_cad(self, step_id: str, type: str) -> bytes:
+    async def get_dll_version(self) -> Optional[str]:
         """
-        STEP 파일을 CAD/GD&T 포맷(json)으로 변환.
-        내부적으로 외부 DLL API 서버에 HTTP로 전달.
-        type = "cad" or "gdt"
+        DLL 변환 서버의 stepdata.dll 버전 (DLL_VERSION 환경 변수가 있으면 그 값).
+        DLL_VERSION_TTL 초 동안 캐시, 조회 실패 시 None (30초 후 재시도).
         """
-        file_stream = await self.repository.get_file_byteio(step_id)
-        filename = f"{step_id}.stp"
-        result = await self._send_to_conversion_api(file_stream, filename, type)
-        return result
+        if self.DLL_VERSION:
+            return self.DLL_VERSION
+        cache = FileService._dll_version_cache
+        now = time.monotonic()
+        if now < cache["expires"]:
+            return cache["value"]
+        try:
+            response = await get_conversion_client().client.get("/version", timeout=5.0)
+            response.raise_for_status()
+            value = response.json().get("version")
+        except (httpx.HTTPError, ValueError) as e:
+            logging.warning(f"[get_dll_version] DLL 버전 조회 실패: {e}")
+            value = None
+        cache["value"] = value
+        cache["expires"] = now + (self.DLL_VERSION_TTL if value else 30.0)
+        return value
+
+    async def invalidate_conversion_cache(
+        self,
+        step_id: Optional[str] = None,
+        type: Optional[str] = None,
+        dll_version: Optional[str] = None,
+    ) -> int:
+        """
+        DLL 변환 결과 캐시 삭제. 조건(STEP, 타입, DLL 버전)이 없으면 전체 삭제.
+        반환: 삭제한 캐시 파일 수
+        """
+        sha256 = None
+        if step_id:
+            sha256 = await self.repository.get_content_sha256(step_id)
+            if sha256 is None:
+                raise CustomException(ExceptionEnum.STP_NOT_FOUND)
+        file_ids = await self.repository.list_conversions(sha256, type, dll_version)
+        for file_id in file_ids:
+            try:
+                await self.repository.delete_file_by_id(file_id)
+            except gridfs.errors.NoFile:
+                pass
+        if dll_version is None and step_id is None and type is None:
+            FileService._dll_version_cache["expires"] = 0.0
+        return len(file_ids)
 
-    async def _send_to_conversion_api(
-        self, file_bytes: BytesIO, filename: str, type: str
-    ) -> bytes:
+    async def _open_conversion(self, step_id: str, path: str) -> httpx.Response:
         """
-        외부 DLL 서버에 파일을 POST로 전송하여 CAD/GD&T 변환 결과(json) 받기.
+        외부 DLL 서버에 STEP 파일을 POST로 전송하고, 본문을 읽지 않은 응답을 반환 (호출자가 닫음).
+        - 공유 커넥션 풀 클라이언트 사용, 연결 오류/5xx 는 재시도
+        - 요청 바디는 GridFS 에서 chunk 단위로 읽어 바로 전송 (재시도 시 처음부터 다시 읽음)
         실패시 예외 발생.
         """
-        file_bytes.seek(0)
-        files = {"file": (filename, file_bytes, "application/octet-stream")}
-        async with httpx.AsyncClient() as client:
-            if type == "cad":
-                response = await client.post(
-                    self.DLL_URI + "/convert/cad/", files=files
-                )
-            else:
-                response = await client.post(
-                    self.DLL_URI + "/convert/gdt/", files=files
-                )
-            response.raise_for_status()
-            return response.content  # 변환 결과 bytes (json)
+        grid_out = await self.repository.get_file(step_id)
+        return await get_conversion_client().post_file(
+            path,
+            filename=f"{step_id}.stp",
+            length=int(grid_out.length),
+            chunks=lambda: self.repository.iter_file(
+                step_id, chunk_size=self.UPLOAD_CHUNK_SIZE
+            ),
+            stream=True,
+        )
 
     async def get_file_text(self, file_id: str, encoding: str = "utf-8") -> str:
         bio = await self.repository.get_file_byteio(file_id)  # BytesIO 반환
         bio.seek(0)
         return bio.read().decode(encoding, errors="ignore")
 
+    async def get_nc_tool_changes(
+        self, file_id: str, lookahead_lines: int = 2
+    ) -> List[Dict[str, Any]]:
+        """
+        NC 파일 툴 교체 이벤트 [{tool, line, raw, mode}, ...] (업로드 시 저장해 둔 값).
+        - metadata.nc_tool_changes 의 sha256 / lexer 버전 / lookahead 가 맞으면 메타데이터 조회 한 번으로 반환
+        - 없거나 맞지 않으면(이전 업로드, 판정 규칙 변경) 한 번 스트리밍해서 해시 + 추출 후 저장
+        """
+        metadata = await self.repository.get_file_metadata(file_id)
+        if metadata is None:
+            raise CustomException(ExceptionEnum.NC_NOT_EXIST)
+        cached = metadata.get("nc_tool_changes") or {}
+        if (
+            metadata.get("sha256")
+            and cached.get("sha256") == metadata["sha256"]
+            and cached.get("version") == NC_LEXER_VERSION
+            and cached.get("lookahead_lines") == lookahead_lines
+        ):
+            return cached["events"]
+
+        digest = hashlib.sha256()
+        collector = ToolChangeCollector(lookahead_lines=lookahead_lines)
+        async for chunk in self.repository.iter_file(file_id):
+            digest.update(chunk)
+            await asyncio.to_thread(collector.feed, chunk)
+        events = collector.close()
+        await self._store_nc_tool_changes(file_id, digest.hexdigest(), events, lookahead_lines)
+        return events
+
+    async def _store_nc_tool_changes(
+        self,
+        file_id: str,
+        sha256: str,
+        events: List[Dict[str, Any]],
+        lookahead_lines: int = 2,
+    ) -> None:
+        """툴 교체 이벤트를 파일 메타데이터에 저장 (실패해도 다음 조회 때 다시 계산하므로 로그만)."""
+        entry = {
+            "sha256": sha256,
+            "version": NC_LEXER_VERSION,
+            "lookahead_lines": lookahead_lines,
+            "events": events,
+        }
+        try:
+            await self.repository.set_nc_tool_changes(file_id, entry)
+        except Exception as e:
+            logging.warning(f"[nc_tool_changes] 메타데이터 저장 실패: {file_id} / {e}")
+
+    async def split_nc_batch(
+        self, nc_file_ids: List[str], store_zip: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        NC 파일 여러 개를 프로세스 풀에서 분할 + 툴 시퀀스 추출, 끝나는 순서대로 결과 생성.
+        store_zip: 세그먼트 zip(ncdata.zip 구조)을 GridFS 에 저장하고 zip_file_id 를 결과에 포함
+        """
+
+        async def load(nc_file_id: str) -> Tuple[bytes, str]:
+            grid_out = await self.repository.get_file(nc_file_id)
+            data = await grid_out.read()
+            return data, os.path.splitext(grid_out.filename or nc_file_id)[0]
+
+        async def store(nc_file_id: str, base_name: str, data: bytes) -> str:
+            # 메타데이터가 중복 제거 키에 포함되므로 내용이 같은 zip 이라도 NC 파일별로 blob 이 따로 남아
+            # nc_file_id 연결이 보존됨 (같은 NC 를 다시 분할하면 그 blob 을 공유)
+            return await self.repository.insert_file(
+                data,
+                f"{base_name}_ncdata.zip",
+                metadata={"kind": "nc_split", "nc_file_id": nc_file_id},
+            )
+
+        splitter = get_nc_batch_splitter()
+        async for item in splitter.run(nc_file_ids, load, store if store_zip else None):
+            yield item
+
     async def get_file_bytes(self, file_id: str) -> bytes:
         """GridFS에서 파일을 읽어 bytes로 반환."""
         bio = await self.repository.get_file_byteio(file_id)
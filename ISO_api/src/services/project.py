@@ -1,16 +1,18 @@
+import asyncio
+import io
 import json
-import os
 import re
+import tempfile
 from typing import Optional
 from fastapi import UploadFile
 import xmltodict
 import xml.etree.ElementTree as ET
 from motor.motor_asyncio import AsyncIOMotorCollection
 from src.schemas.project import ProjectListResponse
-from src.entities.model import Project
 from src.utils.exceptions import CustomException, ExceptionEnum
 from src.utils.xml_parser import (
     create_feature_xml,
+    get_class_by_name,
     ensure_empty_lists,
     update_xml_from_dataclass,
     parser,
@@ -21,10 +23,12 @@ import logging
 from src.entities.project import ProjectRepository
 import xml.dom.minidom
 from src.utils.stock import get_stock_code_by_name
-from src.utils.nc_spliter import process_nc_file, extract_tool_numbers_from_paths
+from src.utils.nc_spliter import write_nc_segments_zip
+from src.utils.vm_client import VmClient
+from src.utils.vm_jobs import Progress
 from src.utils.file_modifier import (
-    zip_folder,
-    create_prj_file,
+    NC_ZIP_SPOOL_MAX,
+    create_prj_bytes,
     create_vm_project_name,
     vm_file_s3_upload,
 )
@@ -265,7 +269,7 @@ class ProjectService:
         pretty XML string 반환.
         """
         data = xmltodict.unparse(data, pretty=True)
-        data_class = parser.from_string(data, Project)
+        data_class = parser.from_string(data, get_class_by_name("Project"))
         xml_string = update_xml_from_dataclass(data, data_class)
         # pretty_xml = xml.dom.minidom.parseString(xml_string).toprettyxml(indent="\t")
 
@@ -416,13 +420,16 @@ class ProjectService:
         except Exception as e:
             raise ValueError(f"소재 이름 추출 실패: {e}")
 
-    def extract_rawpiece_bounding_box(self, project: dict) -> list[float] | str:
+    def extract_rawpiece_bounding_box(
+        self, project: dict, xml_dict: Optional[dict] = None
+    ) -> list[float] | str:
         """
         rawpiece 영역의 좌표를 순서대로 [min_x, min_y, min_z, max_x, max_y, max_z]로 반환.
         값이 하나라도 없으면 오류 메시지를 반환.
+        xml_dict: 이미 파싱한 프로젝트 dict (없으면 project["data"] 파싱)
         """
-        data = project["data"]
-        xml_dict = xmltodict.parse(data)
+        if xml_dict is None:
+            xml_dict = xmltodict.parse(project["data"])
 
         try:
             workpiece = xml_dict["project"]["its_workpieces"]["workpiece"]
@@ -447,14 +454,17 @@ class ProjectService:
         except Exception:
             return "소재 정보를 추출할 수 없습니다."
 
-    def extract_material_code(self, project: dict) -> int | str:
+    def extract_material_code(
+        self, project: dict, xml_dict: Optional[dict] = None
+    ) -> int | str:
         """
         XML에서 소재 이름을 추출하고, 대응되는 소재 코드(int)를 반환.
         해당 코드가 없으면 메시지를 반환.
+        xml_dict: 이미 파싱한 프로젝트 dict (없으면 project["data"] 파싱)
         """
-        data = project["data"]
         try:
-            xml_dict = xmltodict.parse(data)
+            if xml_dict is None:
+                xml_dict = xmltodict.parse(project["data"])
             workpiece = xml_dict["project"]["its_workpieces"]["workpiece"]
 
             # 단일 또는 리스트 구조 대응
@@ -470,13 +480,17 @@ class ProjectService:
         except Exception:
             return "소재 정보를 추출할 수 없습니다."
 
-    def extract_tool_summary_list(self, project: dict) -> list[list]:
+    def extract_tool_summary_list(
+        self, project: dict, xml_dict: Optional[dict] = None
+    ) -> list[list]:
         """
         프로젝트 XML에서 main_workplan 아래 its_elements에 있는 툴 정보를 추출하여 리스트 반환.
         [툴번호, dia, rad, edis, fdis, bangle, sangle, 툴길이, 툴날수]
+        xml_dict: 이미 파싱한 프로젝트 dict (없으면 project["data"] 파싱)
         """
         try:
-            xml_dict = xmltodict.parse(project["data"])
+            if xml_dict is None:
+                xml_dict = xmltodict.parse(project["data"])
             elements = (
                 xml_dict["project"].get("main_workplan", {}).get("its_elements", [])
             )
@@ -519,20 +533,14 @@ class ProjectService:
             print(f"툴 정보 추출 실패: {e}")
             return []
 
-    async def process_project_vm(self, project: dict, file_service) -> list[list]:
+    def build_vm_context(self, project: dict) -> dict:
+        """
+        VM 프로젝트 생성에 필요한 값을 프로젝트 XML 한 번 파싱으로 모두 추출.
+        반환: {"project_id", "nc_id", "tool_infos", "stock_type", "stock_coords"}
         """
-        1. 프로젝트에서 main_workplan 안에 NC 파일 존재 확인
-        2. 없으면 예외
-        3. 있으면 get_file_stream으로 NC 가져오기
-        4. tmp/프로젝트이름/ 에 저장
-        5. nc_spliter로 tmp/프로젝트이름/ncdata 에 분할 저장
-        6. 분할된 NC 파일에서 툴번호 순서대로 추출
-        7. extract_tool_summary_list() 호출로 툴 정보 가져오기
-        8. 개수 다르면 raise
-        9. 툴 정보에 순서대로 툴 번호 입력
-        """
-        # 1~2. NC ID 확인
         xml_dict = self.xml_to_dict(project["data"])
+
+        # main_workplan 안에 NC 파일 존재 확인, 없으면 예외
         main_workplan = xml_dict.get("project", {}).get("main_workplan", {})
         nc_codes = main_workplan.get("nc_code")
         if not nc_codes:
@@ -544,73 +552,118 @@ class ProjectService:
         if not nc_id:
             raise CustomException(ExceptionEnum.NO_DATA_FOUND)
 
-        # 3. NC 파일 가져오기
-        nc_stream = await file_service.get_file_stream(nc_id)
-        nc_bytes = await nc_stream.read()
+        return {
+            "project_id": xml_dict["project"].get("its_id", "unnamed_project"),
+            "nc_id": nc_id,
+            "tool_infos": self.extract_tool_summary_list(project, xml_dict),
+            "stock_type": self.extract_material_code(project, xml_dict),
+            "stock_coords": self.extract_rawpiece_bounding_box(project, xml_dict),
+        }
 
-        # 3.5 프로젝트 폴더 이름 민들기
-        project_folder_name = create_vm_project_name()
+    async def process_project_vm(
+        self, project: dict, file_service, progress: Optional[Progress] = None
+    ) -> tuple:
+        """
+        1. 프로젝트 XML 한 번 파싱 → NC ID, 툴 정보, 소재 코드/사이즈 (build_vm_context)
+        2. NC ID 없으면 예외
+        3. 있으면 get_file_stream으로 NC 가져오기
+        4. nc_spliter로 툴별 분할 → 임시 폴더 없이 ncdata.zip 스트림에 바로 기록
+        5. (.prj 는 zip 안의 ncdata/<이름>_<i>/<이름>_<i> 경로 기준)
+        6. 분할하면서 툴번호 순서대로 같이 추출
+        7. 툴 정보와 개수 다르면 raise
+        8. 툴 정보에 순서대로 툴 번호 입력
+        progress: (단계, 진행률) 기록 콜백 (VM 생성 작업 상태 조회용)
+        XML 파싱/NC 분할은 CPU 작업이라 스레드에서 실행 (이벤트 루프를 막지 않음)
+        """
 
-        # 4. NC 파일 저장
-        project_id = xml_dict["project"].get("its_id", "unnamed_project")
-        base_path = os.path.join("tmp", project_folder_name)
-        os.makedirs(base_path, exist_ok=True)
-        nc_path = os.path.join(base_path, f"{project_id}.nc")
-        with open(nc_path, "wb") as f:
-            f.write(nc_bytes)
+        async def report(stage: str, percent: int) -> None:
+            if progress is not None:
+                await progress(stage, percent)
 
-        # 5. 툴별로 분할
-        split_path = os.path.join(base_path, "ncdata")
-        os.makedirs(split_path, exist_ok=True)
-        split_files = process_nc_file(nc_path, split_path)
+        # 1~2. 프로젝트 정보 추출
+        await report("parse_project", 5)
+        context = await asyncio.to_thread(self.build_vm_context, project)
+        project_id = context["project_id"]
+        tool_infos = context["tool_infos"]
 
-        # 6. nc 파일 압축
-        nc_zip_path = os.path.join(base_path, "ncdata.zip")
-        nc_zip_path = zip_folder(split_path, nc_zip_path)
+        # 3. NC 파일 가져오기
+        await report("load_nc", 15)
+        nc_stream = await file_service.get_file_stream(context["nc_id"])
+        nc_bytes = await nc_stream.read()
 
-        # 6. 툴 번호 추출 (숫자)
-        tool_numbers = extract_tool_numbers_from_paths(split_files)
+        # 3.5 프로젝트 폴더 이름 민들기
+        project_folder_name = create_vm_project_name()
 
-        # 7. 프로젝트 툴 정보 가져오기
-        tool_infos = self.extract_tool_summary_list(project)
+        # 4~6. 툴별로 분할 → 세그먼트를 ncdata.zip 에 바로 기록 (tmp 폴더 없음) + 툴 번호 추출
+        await report("split_nc", 30)
+        nc_zip = tempfile.SpooledTemporaryFile(max_size=NC_ZIP_SPOOL_MAX)
 
-        # 8. 개수 확인
-        if len(tool_numbers) != len(tool_infos):
-            raise CustomException(ExceptionEnum.INVALID_ATTRIBUTE)
+        def split_to_zip():
+            source = io.StringIO(nc_bytes.decode("utf-8"), newline=None)
+            return write_nc_segments_zip(source, project_id, nc_zip)
 
-        # 9. 툴 정보에 툴 넘버 할당
-        for idx, info in enumerate(tool_infos):
-            tnum = tool_numbers[idx]
-            info[0] = tnum
-
-        # 10. 소재 타입 가져오기
-        stock_type = self.extract_material_code(project)
-
-        # 11. 소재 사이즈 가져오기
-        stock_coords = self.extract_rawpiece_bounding_box(project)
-
-        # 12. 프로젝트 파일 만들기
-        prj_file_path = os.path.join(base_path, f"{project_id}.prj")
-        project_file_path = create_prj_file(
-            stock_type=stock_type,
-            stock_coords=stock_coords,
-            nc_file_paths=split_files,
-            tool_infos=tool_infos,
-            output_path=prj_file_path,
-        )
+        try:
+            split_result = await asyncio.to_thread(split_to_zip)
+            tool_numbers = split_result.tool_numbers
+
+            # 7. 개수 확인
+            if len(tool_numbers) != len(tool_infos):
+                raise CustomException(ExceptionEnum.INVALID_ATTRIBUTE)
+
+            # 8. 툴 정보에 툴 넘버 할당
+            for idx, info in enumerate(tool_infos):
+                tnum = tool_numbers[idx]
+                info[0] = tnum
+
+            # 9. 프로젝트 파일 만들기 (zip 안의 ncdata/<이름>_<i>/<이름>_<i> 기준)
+            await report("package", 70)
+            prj_bytes = create_prj_bytes(
+                stock_type=context["stock_type"],
+                stock_coords=context["stock_coords"],
+                nc_file_paths=[f"ncdata/{path}" for path in split_result.paths],
+                tool_infos=tool_infos,
+            )
 
-        # # 13. s3에 프로젝트 파일, nc파일 업로드
-        # project_s3_path = vm_file_s3_upload(
-        #     file_path=project_file_path, parent_path=project_folder_name
-        # )
-        # project_s3_path = project_s3_path["file_url"]
-        # nc_s3_path = vm_file_s3_upload(
-        #     file_path=nc_zip_path, parent_path=project_folder_name
-        # )
-        # nc_s3_path = nc_s3_path["file_url"]
+            # # 10. s3에 프로젝트 파일, nc파일 업로드 (requests 동기 호출이므로 스레드에서)
+            # await report("upload", 80)
+            # project_s3_path = await asyncio.to_thread(
+            #     vm_file_s3_upload,
+            #     file_path=f"{project_id}.prj",
+            #     content=prj_bytes,
+            #     parent_path=project_folder_name,
+            # )
+            # project_s3_path = project_s3_path["file_url"]
+            # nc_zip.seek(0)
+            # nc_s3_path = await asyncio.to_thread(
+            #     vm_file_s3_upload,
+            #     file_path="ncdata.zip",
+            #     content=nc_zip,
+            #     parent_path=project_folder_name,
+            # )
+            # nc_s3_path = nc_s3_path["file_url"]
+        finally:
+            nc_zip.close()
 
         # 임시코드
         project_s3_path = "https://kitech-file.s3.ap-northeast-2.amazonaws.com/2025-07-02_ap_4_34_05/Test_Project1.prj"
         nc_s3_path = "https://kitech-file.s3.ap-northeast-2.amazonaws.com/2025-07-02_ap_4_34_05/ncdata.zip"
 
         return (project_s3_path, nc_s3_path, project_id)
+
+    async def generate_vm_project(
+        self,
+        project: dict,
+        file_service,
+        vm_client: VmClient,
+        progress: Optional[Progress] = None,
+    ) -> dict:
+        """
+        VM 프로젝트 데이터(.prj, ncdata.zip) 생성 후 VM 서버에 프로젝트 생성 요청 → VM 서버 응답(json).
+        (VmJobRunner 백그라운드 작업으로 실행)
+        """
+        project_s3_path, nc_s3_path, project_id = await self.process_project_vm(
+            project, file_service, progress
+        )
+        if progress is not None:
+            await progress("create_vm_project", 85)
+        return await vm_client.create_project(project_id, project_s3_path, nc_s3_path)
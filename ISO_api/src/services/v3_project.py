@@ -8,6 +8,7 @@ from motor.motor_asyncio import AsyncIOMotorCollection
 from pymongo.errors import DuplicateKeyError
 
 from src.entities.asset import AssetRepository
+from src.entities.unit_of_work import run_unit_of_work
 from src.utils.v3_xml_parser import (
     extract_dtasset_meta,
     validate_xml_against_schema,
@@ -150,6 +151,44 @@ class V3ProjectService:
         workplan_id: Optional[str] = None,
         workpiece_id: Optional[str] = None,
         workingstep_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        참조 추가: 대상 문서(프로젝트 또는 dt_file) 읽기 → 수정 → 쓰기를 unit-of-work 로 실행.
+        읽은 뒤 다른 요청이 같은 문서를 먼저 고쳤으면 (version 불일치) 다시 읽어서 재적용.
+        """
+        return await run_unit_of_work(
+            self.repo.collection,
+            lambda session: self._attach_ref(
+                session,
+                global_asset_id=global_asset_id,
+                asset_id=asset_id,
+                project_element_id=project_element_id,
+                ref_global_asset_id=ref_global_asset_id,
+                ref_asset_id=ref_asset_id,
+                ref_element_id=ref_element_id,
+                ref_type=ref_type,
+                ref_category=ref_category,
+                workplan_id=workplan_id,
+                workpiece_id=workpiece_id,
+                workingstep_id=workingstep_id,
+            ),
+        )
+
+    async def _attach_ref(
+        self,
+        session,
+        *,
+        global_asset_id: str,
+        asset_id: str,
+        project_element_id: str,
+        ref_global_asset_id: str,
+        ref_asset_id: str,
+        ref_element_id: str,
+        ref_type: str,
+        ref_category: Optional[str] = None,
+        workplan_id: Optional[str] = None,
+        workpiece_id: Optional[str] = None,
+        workingstep_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         # 프로젝트 존재 확인
         project_doc = await self.repo.get_asset_by_keys(
@@ -157,6 +196,7 @@ class V3ProjectService:
             asset_id=asset_id,
             type="dt_project",
             element_id=project_element_id,
+            session=session,
         )
         if not project_doc:
             raise CustomException(
@@ -175,6 +215,7 @@ class V3ProjectService:
                 asset_id=ref_asset_id,
                 type="dt_file",
                 element_id=ref_element_id,
+                session=session,
             )
             if not file_doc:
                 raise CustomException(
@@ -193,7 +234,12 @@ class V3ProjectService:
             if not changed:
                 raise CustomException(ExceptionEnum.REF_ALREADY_EXISTS)
             new_xml = xmltodict.unparse(doc)
-            await self.repo.update_asset_xml_by_mongo_id(str(file_doc["_id"]), new_xml)
+            await self.repo.update_asset_xml_by_mongo_id(
+                str(file_doc["_id"]),
+                new_xml,
+                expected_version=file_doc.get("version", 0),
+                session=session,
+            )
             return {"updated": True, "file_mongo_id": str(file_doc["_id"])}
 
         # 비-파일 타입
@@ -269,7 +315,12 @@ class V3ProjectService:
             self._move_child_to_end(target, tag)
 
         new_xml = xmltodict.unparse(doc)
-        await self.repo.update_asset_xml_by_mongo_id(str(project_doc["_id"]), new_xml)
+        await self.repo.update_asset_xml_by_mongo_id(
+            str(project_doc["_id"]),
+            new_xml,
+            expected_version=project_doc.get("version", 0),
+            session=session,
+        )
         return {"updated": True, "project_mongo_id": str(project_doc["_id"])}
 
     async def remove_ref(
@@ -286,6 +337,44 @@ class V3ProjectService:
         workplan_id: Optional[str] = None,
         workpiece_id: Optional[str] = None,
         workingstep_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        참조 삭제: 대상 문서(프로젝트 또는 dt_file) 읽기 → 수정 → 쓰기를 unit-of-work 로 실행.
+        읽은 뒤 다른 요청이 같은 문서를 먼저 고쳤으면 (version 불일치) 다시 읽어서 재적용.
+        """
+        return await run_unit_of_work(
+            self.repo.collection,
+            lambda session: self._remove_ref(
+                session,
+                global_asset_id=global_asset_id,
+                asset_id=asset_id,
+                project_element_id=project_element_id,
+                ref_global_asset_id=ref_global_asset_id,
+                ref_asset_id=ref_asset_id,
+                ref_element_id=ref_element_id,
+                ref_type=ref_type,
+                ref_category=ref_category,
+                workplan_id=workplan_id,
+                workpiece_id=workpiece_id,
+                workingstep_id=workingstep_id,
+            ),
+        )
+
+    async def _remove_ref(
+        self,
+        session,
+        *,
+        global_asset_id: str,
+        asset_id: str,
+        project_element_id: str,
+        ref_global_asset_id: str,
+        ref_asset_id: str,
+        ref_element_id: str,
+        ref_type: str,
+        ref_category: Optional[str] = None,
+        workplan_id: Optional[str] = None,
+        workpiece_id: Optional[str] = None,
+        workingstep_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         if (ref_type or "").strip() == "dt_file":
             if not workplan_id:
@@ -298,6 +387,7 @@ class V3ProjectService:
                 asset_id=ref_asset_id,
                 type="dt_file",
                 element_id=ref_element_id,
+                session=session,
             )
             if not file_doc:
                 raise CustomException(
@@ -318,7 +408,12 @@ class V3ProjectService:
                     ExceptionEnum.REF_NOT_FOUND, detail="reference not found in dt_file"
                 )
             new_xml = xmltodict.unparse(doc)
-            await self.repo.update_asset_xml_by_mongo_id(str(file_doc["_id"]), new_xml)
+            await self.repo.update_asset_xml_by_mongo_id(
+                str(file_doc["_id"]),
+                new_xml,
+                expected_version=file_doc.get("version", 0),
+                session=session,
+            )
             return {"removed": True, "file_mongo_id": str(file_doc["_id"])}
 
         project_doc = await self.repo.get_asset_by_keys(
@@ -326,6 +421,7 @@ class V3ProjectService:
             asset_id=asset_id,
             type="dt_project",
             element_id=project_element_id,
+            session=session,
         )
         if not project_doc:
             raise CustomException(
@@ -403,7 +499,12 @@ class V3ProjectService:
             )
 
         new_xml = xmltodict.unparse(doc)
-        await self.repo.update_asset_xml_by_mongo_id(str(project_doc["_id"]), new_xml)
+        await self.repo.update_asset_xml_by_mongo_id(
+            str(project_doc["_id"]),
+            new_xml,
+            expected_version=project_doc.get("version", 0),
+            session=session,
+        )
         return {"removed": True, "project_mongo_id": str(project_doc["_id"])}
 
     # ---------------- DP 업로드 ----------------
@@ -1,18 +1,11 @@
 import re, io
 import xmltodict
 import dataclasses
-from xsdata.formats.dataclass.parsers import XmlParser
-from xsdata.formats.dataclass.parsers.config import ParserConfig
-from xsdata.formats.dataclass.context import XmlContext
-from xsdata.utils import text
-from xsdata.formats.dataclass.context import XmlContext
-from xsdata.formats.dataclass.serializers import XmlSerializer
-from xsdata.formats.dataclass.serializers.config import SerializerConfig
 from xsdata.exceptions import ParserError
 import xml.etree.ElementTree as ET
 from typing import Any, Dict, get_origin, get_args, Optional
 from enum import Enum
-from src.entities.model_v27 import *
+from src.utils import schema_registry
 
 import logging
 
@@ -24,18 +17,11 @@ if not logger.handlers:  # 중복 핸들러 방지
     )
 
 # --- xsdata 파서 및 시리얼라이저 설정 ---
-
-# 관대한 파서 (스키마에 없는 속성은 무시)
-lenient_parser_config = ParserConfig(fail_on_unknown_properties=False)
-lenient_context = XmlContext(element_name_generator=text.snake_case)
-lenient_parser = XmlParser(config=lenient_parser_config, context=lenient_context)
-
-# 엄격한 파서 (유효성 검증용)
-strict_parser = XmlParser()
-
-# XML 생성용 시리얼라이저
-serializer_config = SerializerConfig(pretty_print=True)
-serializer = XmlSerializer(config=serializer_config)
+# 스키마 레지스트리의 공유 context/파서/시리얼라이저 사용 (v27 스키마)
+SCHEMA_VERSION = "v27"
+lenient_parser = schema_registry.lenient_parser
+strict_parser = schema_registry.strict_parser
+serializer = schema_registry.serializer
 
 
 def validate_xml_against_schema(xml_content: str) -> bool:
@@ -43,12 +29,8 @@ def validate_xml_against_schema(xml_content: str) -> bool:
     주어진 XML 문자열이 DtAsset 스키마 구조에 맞는지 엄격하게 검증합니다.
     """
     try:
-        # 문자열을 바이트로 변환하여 BytesIO 사용
-        xml_bytes = xml_content.encode("utf-8")
-        stream = io.BytesIO(xml_bytes)
-
         # 엄격한 파서(strict_parser)를 사용하여 검증
-        strict_parser.parse(stream, DtAsset)
+        schema_registry.validate_or_raise(xml_content, SCHEMA_VERSION, "DtAsset")
         print("성공: XML이 스키마 구조와 일치합니다.")
         return True
     except ParserError as e:
@@ -81,7 +63,7 @@ def remove_empty_lists(data):
 
 
 def get_class_by_name(class_name):
-    return globals().get(class_name)
+    return schema_registry.get_class(class_name, SCHEMA_VERSION)
 
 
 def camel_to_snake(name):
@@ -226,8 +208,12 @@ def _validate_required_fields(
 
 
 def create_feature_xml(
-    json_data: Dict[str, Any], mapping_data: dict, dataclass_type=MachiningWorkingstep
+    json_data: Dict[str, Any], mapping_data: dict, dataclass_type=None
 ):
+    # 경로의 클래스명 → 스키마 클래스 (lazy 로드된 스키마 클래스 테이블)
+    classes = schema_registry.get_class_table(SCHEMA_VERSION)
+    if dataclass_type is None:
+        dataclass_type = classes["MachiningWorkingstep"]
     nested_structure = {
         "its_id": {},
         "its_secplane": {},
@@ -249,11 +235,11 @@ def create_feature_xml(
         for i, part in enumerate(path_parts):
             if part[0].isupper():
                 # 클래스 전환(기존 로직 그대로)
-                if part in globals():
-                    new_type = globals()[part]
+                if part in classes:
+                    new_type = classes[part]
                     if isinstance(new_type, type):
                         if prev_key and prev_key[0].isupper():
-                            parent_type = globals().get(prev_key)
+                            parent_type = classes.get(prev_key)
                             if (
                                 parent_type
                                 and isinstance(parent_type, type)
@@ -323,7 +309,7 @@ def create_feature_xml(
 def create_feature_xml_temp(
     json_data: Dict[str, Any],
     mapping_data: dict,
-    dataclass_type=MachiningWorkingstep,  # 루트 스키마 타입
+    dataclass_type=None,  # 루트 스키마 타입
 ) -> str:
     """
     엄격 모드:
@@ -332,6 +318,9 @@ def create_feature_xml_temp(
     - required=True 인 필드는 값이 비어 있으면 에러.
     - @xsi:type 은 노드마다 1회만 주입.
     """
+    classes = schema_registry.get_class_table(SCHEMA_VERSION)
+    if dataclass_type is None:
+        dataclass_type = classes["MachiningWorkingstep"]
     nested = {
         "its_id": {},
         "its_secplane": {},
@@ -355,7 +344,7 @@ def create_feature_xml_temp(
 
             if part[0].isupper():
                 # ---- 클래스명 전환(엄격) ----
-                new_type = globals().get(part)
+                new_type = classes.get(part)
                 if not (isinstance(new_type, type)):
                     raise ValueError(
                         f"알 수 없는 클래스명 '{part}' in path '{dataclass_path}' (json_key={json_key})"
@@ -620,6 +620,18 @@ def normalize_dt_project_structure(xml_text: str, project_element_id: str) -> st
     - 입력: XML 문자열, 대상 project element_id
     - 출력: 정렬된 XML 문자열
     """
+    doc = xmltodict.parse(xml_text)
+    if not normalize_dt_project_doc(doc, project_element_id):
+        return xml_text
+    return xmltodict.unparse(doc, pretty=True)
+
+
+def normalize_dt_project_doc(doc: Dict[str, Any], project_element_id: str) -> bool:
+    """
+    normalize_dt_project_structure 의 dict 버전 (in-place).
+    - 입력: {"dt_asset": {...}} 문서 (xmltodict.parse / parse_dtasset_doc 결과)
+    - 반환: 정리했으면 True, 대상 dt_project 가 없어 손대지 않았으면 False
+    """
 
     def _ordered(d: Dict[str, Any], prefer_keys: List[str]) -> "OrderedDict[str, Any]":
         od = OrderedDict()
@@ -746,23 +758,20 @@ def normalize_dt_project_structure(xml_text: str, project_element_id: str) -> st
         ordered["ref_dt_material"] = val_ref
         return ordered
 
-    # --- 파싱 ---
-    doc = xmltodict.parse(xml_text)
     dt_asset = doc.get("dt_asset")
     if not isinstance(dt_asset, dict):
-        return xml_text
-
-    # 루트 정리
-    _normalize_root(dt_asset)
+        return False
 
     proj = dt_asset.get("dt_elements")
     if not isinstance(proj, dict):
-        return xml_text
-    # 대상 프로젝트만 정리
+        return False
     if proj.get("@xsi:type") and proj["@xsi:type"] != "dt_project":
-        return xml_text
+        return False
     if proj.get("element_id") != project_element_id:
-        return xml_text
+        return False
+
+    # 루트 정리
+    _normalize_root(dt_asset)
 
     # main_workplan 정리
     if "main_workplan" in proj and isinstance(proj["main_workplan"], dict):
@@ -787,6 +796,4 @@ def normalize_dt_project_structure(xml_text: str, project_element_id: str) -> st
         "its_workpieces",
     ]
     dt_asset["dt_elements"] = _ordered(proj, proj_order)
-
-    # --- 직렬화 ---
-    return xmltodict.unparse(doc, pretty=True)
+    return True
@@ -0,0 +1,328 @@
+"""
+ISO_api → CS_WrapAPI(DLL 변환 서버) HTTP 클라이언트.
+
+- 앱 startup 에서 생성, shutdown 에서 종료되는 공유 httpx.AsyncClient (keep-alive 커넥션 풀)
+- 커넥션 수/keep-alive 상한 (httpx 는 파이프라이닝을 하지 않으므로 요청당 커넥션 1개 → 상한으로 동시성 제어)
+- connect/read/write/pool 타임아웃 개별 설정
+- 연결 오류/5xx 응답 시 지수 백오프 + full jitter 재시도
+- multipart 요청 바디를 비동기 chunk 로 직접 구성 → GridFS 파일을 메모리에 올리지 않고 전송
+- stream=True 이면 응답 본문을 읽지 않은 채 반환 → 결과 JSON 을 메모리에 모으지 않고 GridFS/클라이언트로 전달
+- multipart/mixed 응답(/convert/all/)을 JSON 파싱 없이 part 별 chunk 스트림으로 분리
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import uuid
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from src.utils.env import get_env_or_default
+
+logger = logging.getLogger(__name__)
+
+DLL_URI = get_env_or_default("DLL_URI", "http://dll-server:8010")
+DLL_CONNECT_TIMEOUT = float(get_env_or_default("DLL_CONNECT_TIMEOUT", "5"))
+DLL_READ_TIMEOUT = float(get_env_or_default("DLL_READ_TIMEOUT", "300"))
+DLL_WRITE_TIMEOUT = float(get_env_or_default("DLL_WRITE_TIMEOUT", "60"))
+DLL_POOL_TIMEOUT = float(get_env_or_default("DLL_POOL_TIMEOUT", "30"))
+DLL_MAX_CONNECTIONS = int(get_env_or_default("DLL_MAX_CONNECTIONS", "16"))
+DLL_MAX_KEEPALIVE = int(get_env_or_default("DLL_MAX_KEEPALIVE", "8"))
+DLL_KEEPALIVE_EXPIRY = float(get_env_or_default("DLL_KEEPALIVE_EXPIRY", "30"))
+DLL_RETRIES = int(get_env_or_default("DLL_RETRIES", "3"))
+DLL_BACKOFF_BASE = float(get_env_or_default("DLL_BACKOFF_BASE", "0.5"))
+DLL_BACKOFF_MAX = float(get_env_or_default("DLL_BACKOFF_MAX", "8"))
+
+BodyFactory = Callable[[], AsyncIterator[bytes]]
+T = TypeVar("T")
+
+
+def _is_retryable_error(exc: Exception) -> bool:
+    # 변환 중 응답 대기 타임아웃은 서버가 이미 작업 중이므로 재시도하지 않음
+    if isinstance(exc, httpx.ReadTimeout):
+        return False
+    return isinstance(exc, httpx.TransportError)
+
+
+class ConversionClient:
+    """DLL 변환 서버 전용 공유 비동기 HTTP 클라이언트."""
+
+    def __init__(
+        self,
+        base_url: str = DLL_URI,
+        *,
+        retries: int = DLL_RETRIES,
+        backoff_base: float = DLL_BACKOFF_BASE,
+        backoff_max: float = DLL_BACKOFF_MAX,
+    ):
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(
+                connect=DLL_CONNECT_TIMEOUT,
+                read=DLL_READ_TIMEOUT,
+                write=DLL_WRITE_TIMEOUT,
+                pool=DLL_POOL_TIMEOUT,
+            ),
+            limits=httpx.Limits(
+                max_connections=DLL_MAX_CONNECTIONS,
+                max_keepalive_connections=DLL_MAX_KEEPALIVE,
+                keepalive_expiry=DLL_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def _backoff(self, attempt: int) -> float:
+        """full jitter: [0, min(max, base * 2^attempt)]"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2**attempt)))
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        body_factory: Optional[BodyFactory] = None,
+        stream: bool = False,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        재시도 포함 요청. 응답 본문을 모두 읽은 httpx.Response 반환 (최종 실패 시 raise_for_status 예외).
+
+        Args:
+            body_factory: 시도마다 새 요청 바디 이터레이터를 만드는 함수 (스트리밍 바디 재전송용)
+            stream: True 이면 본문을 읽지 않은 응답 반환 (호출자가 iter_response_body 로 읽고 닫음)
+        """
+        attempt = 0
+        while True:
+            if body_factory is not None:
+                kwargs["content"] = body_factory()
+            try:
+                request = self.client.build_request(method, url, **kwargs)
+                response = await self.client.send(request, stream=stream)
+            except Exception as e:
+                if attempt >= self.retries or not _is_retryable_error(e):
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(
+                    "[conversion_client] %s %s failed (%s), retry in %.2fs", method, url, e, delay
+                )
+            else:
+                if response.status_code < 500 or attempt >= self.retries:
+                    if response.is_error:
+                        await response.aclose()
+                    response.raise_for_status()
+                    return response
+                await response.aclose()
+                delay = self._backoff(attempt)
+                logger.warning(
+                    "[conversion_client] %s %s -> %s, retry in %.2fs",
+                    method,
+                    url,
+                    response.status_code,
+                    delay,
+                )
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def post_file(
+        self,
+        url: str,
+        *,
+        filename: str,
+        length: int,
+        chunks: BodyFactory,
+        field: str = "file",
+        content_type: str = "application/octet-stream",
+        stream: bool = False,
+    ) -> httpx.Response:
+        """
+        multipart/form-data 단일 파일 업로드를 스트리밍으로 전송.
+        (길이를 알고 있으므로 Content-Length 를 지정 → chunked 인코딩 없이 전송)
+
+        Args:
+            filename (str): multipart 파일명
+            length (int): 파일 바이트 수
+            chunks: 시도마다 파일 chunk 이터레이터를 새로 만드는 함수
+            stream (bool): True 이면 응답 본문을 읽지 않은 채 반환
+        """
+        boundary = uuid.uuid4().hex
+        head = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+        async def body() -> AsyncIterator[bytes]:
+            yield head
+            async for chunk in chunks():
+                yield chunk
+            yield tail
+
+        return await self.request(
+            "POST",
+            url,
+            body_factory=body,
+            stream=stream,
+            headers={
+                "Content-Type": f"multipart/form-data; boundary={boundary}",
+                "Content-Length": str(len(head) + length + len(tail)),
+            },
+        )
+
+
+async def iter_response_body(response: httpx.Response) -> AsyncIterator[bytes]:
+    """stream=True 응답 본문을 chunk 단위로 읽고, 끝나거나 중단되면 응답(커넥션)을 닫음."""
+    try:
+        async for chunk in response.aiter_bytes():
+            yield chunk
+    finally:
+        await response.aclose()
+
+
+def response_length(response: httpx.Response) -> Optional[int]:
+    """전달할 본문 길이 (Content-Length 가 없거나 압축 전송이면 None)."""
+    length = response.headers.get("content-length")
+    if length is None or response.headers.get("content-encoding"):
+        return None
+    return int(length)
+
+
+class _StreamBuffer:
+    """비동기 chunk 이터레이터 위의 읽기 버퍼 (multipart 경계 탐색용)."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks.__aiter__()
+        self.buf = bytearray()
+
+    async def fill(self) -> bool:
+        """chunk 하나를 더 읽어 버퍼에 추가, 스트림이 끝났으면 False."""
+        try:
+            self.buf += await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return False
+        return True
+
+    async def skip_through(self, marker: bytes) -> bytes:
+        """marker 까지 읽어 버리고, marker 앞부분을 반환."""
+        while True:
+            pos = self.buf.find(marker)
+            if pos != -1:
+                head = bytes(self.buf[:pos])
+                del self.buf[: pos + len(marker)]
+                return head
+            if not await self.fill():
+                raise ValueError("multipart 바디가 잘렸습니다.")
+
+    async def ensure(self, size: int) -> None:
+        while len(self.buf) < size:
+            if not await self.fill():
+                raise ValueError("multipart 바디가 잘렸습니다.")
+
+
+async def read_multipart(
+    chunks: AsyncIterator[bytes],
+    content_type: str,
+    handle_part: Callable[[str, AsyncIterator[bytes]], Awaitable[T]],
+) -> Dict[str, T]:
+    """
+    multipart 응답 바디를 전체를 모으지 않고 part 단위로 흘려보냄 (part 내용은 파싱하지 않음).
+    part 마다 handle_part(이름, 내용 chunk 이터레이터)를 await 하고 그 결과를 {part 이름: 결과} 로 반환.
+    part 에 Content-Length 가 있으면 그 길이만큼 그대로, 없으면 다음 경계 직전까지 전달.
+    """
+    boundary = None
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "boundary":
+            boundary = value.strip('"')
+    if not boundary:
+        raise ValueError("multipart boundary 가 없습니다.")
+
+    delimiter = f"--{boundary}".encode("utf-8")
+    # 길이 없는 part 의 끝 표시 (내용 뒤 CRLF + 경계)
+    part_end = b"\r\n" + delimiter
+    stream = _StreamBuffer(chunks)
+    results: Dict[str, T] = {}
+    await stream.skip_through(delimiter)
+    while True:
+        await stream.ensure(2)
+        if stream.buf.startswith(b"--"):
+            break
+        raw_headers = await stream.skip_through(b"\r\n\r\n")
+        headers = {}
+        for line in raw_headers.decode("latin-1").split("\r\n"):
+            key, _, value = line.partition(":")
+            if key:
+                headers[key.strip().lower()] = value.strip()
+        length = headers.get("content-length")
+        done = False
+
+        async def body() -> AsyncIterator[bytes]:
+            nonlocal done
+            if length is not None:
+                remaining = int(length)
+                while remaining > 0:
+                    if not stream.buf:
+                        await stream.ensure(1)
+                    chunk = bytes(stream.buf[:remaining])
+                    del stream.buf[: len(chunk)]
+                    remaining -= len(chunk)
+                    yield chunk
+                await stream.skip_through(delimiter)
+            else:
+                while True:
+                    pos = stream.buf.find(part_end)
+                    if pos != -1:
+                        chunk = bytes(stream.buf[:pos])
+                        del stream.buf[: pos + len(part_end)]
+                        if chunk:
+                            yield chunk
+                        break
+                    # 경계가 chunk 사이에 걸칠 수 있으므로 끝부분은 남겨 둠
+                    keep = len(part_end) - 1
+                    if len(stream.buf) > keep:
+                        chunk = bytes(stream.buf[:-keep])
+                        del stream.buf[:-keep]
+                        yield chunk
+                    if not await stream.fill():
+                        raise ValueError("multipart 바디가 잘렸습니다.")
+            done = True
+
+        name = None
+        for param in headers.get("content-disposition", "").split(";")[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "name":
+                name = value.strip('"')
+        part = body()
+        if name:
+            results[name] = await handle_part(name, part)
+        # 처리기가 끝까지 읽지 않은 part 는 버림
+        if not done:
+            async for _ in part:
+                pass
+    return results
+
+
+_client: Optional[ConversionClient] = None
+
+
+def get_conversion_client() -> ConversionClient:
+    """프로세스 전역 변환 서버 클라이언트 (startup 전 호출 시 즉시 생성)."""
+    global _client
+    if _client is None:
+        _client = ConversionClient()
+    return _client
+
+
+async def close_conversion_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
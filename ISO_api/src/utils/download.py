@@ -0,0 +1,163 @@
+"""
+GridFS 파일 스트리밍 다운로드 응답 유틸.
+
+- GridOut 을 chunk 단위로 읽어 StreamingResponse 로 전송 (메모리 사용량은 chunk 크기로 고정)
+- Range: bytes=start-end (단일 구간) → 206 Partial Content, 범위 오류 시 416
+- If-None-Match / ETag → 304 Not Modified
+- If-Range 가 현재 ETag 와 다르면 Range 무시 (전체 전송)
+- Content-Length / Accept-Ranges 항상 설정
+"""
+
+from __future__ import annotations
+
+import re
+from typing import AsyncIterator, Dict, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+from src.utils.env import get_env_or_default
+
+DOWNLOAD_CHUNK_SIZE = int(get_env_or_default("DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+
+_RANGE_RE = re.compile(r"^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$", re.IGNORECASE)
+
+
+def gridfs_etag(grid_out) -> str:
+    """GridFS md5(있으면) 또는 (_id, uploadDate, length) 기반 강한 ETag."""
+    md5 = getattr(grid_out, "md5", None)
+    if md5:
+        return f'"{md5}"'
+    upload_date = getattr(grid_out, "upload_date", None)
+    stamp = int(upload_date.timestamp() * 1000) if upload_date else 0
+    return f'"{grid_out._id}-{stamp}-{grid_out.length}"'
+
+
+def content_disposition(filename: str) -> str:
+    """attachment 헤더 생성 (비 ASCII 파일명은 RFC 5987 filename* 병기)."""
+    try:
+        filename.encode("latin-1")
+        return f'attachment; filename="{filename}"'
+    except UnicodeEncodeError:
+        fallback = filename.encode("ascii", "replace").decode("ascii")
+        return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [c.strip() for c in header.split(",")]
+    # 약한 비교: W/ 접두 무시
+    return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def parse_range(header: Optional[str], length: int) -> Optional[Tuple[int, int]]:
+    """
+    단일 bytes 범위를 (start, end_inclusive)로 변환.
+    - 헤더 없음/다중 범위 → None (전체 전송)
+    - 만족 불가 범위 → ValueError (416)
+      (빈 파일은 어떤 범위도 만족할 수 없음)
+    """
+    if not header or "," in header:
+        return None
+    m = _RANGE_RE.match(header)
+    if not m:
+        return None
+    first, last = m.group(1), m.group(2)
+    if not first and not last:
+        return None
+    if length <= 0:
+        raise ValueError("unsatisfiable range")
+    if not first:
+        # 접미 범위: 마지막 N 바이트
+        n = int(last)
+        if n == 0:
+            raise ValueError("unsatisfiable range")
+        return max(length - n, 0), length - 1
+    start = int(first)
+    end = int(last) if last else length - 1
+    if start >= length or end < start:
+        raise ValueError("unsatisfiable range")
+    return start, min(end, length - 1)
+
+
+async def iter_gridfs(
+    grid_out, start: int = 0, length: Optional[int] = None, chunk_size: int = DOWNLOAD_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """GridOut 을 start 부터 length 바이트만큼 chunk 단위로 읽는 비동기 제너레이터."""
+    remaining = grid_out.length - start if length is None else length
+    if start:
+        grid_out.seek(start)
+    while remaining > 0:
+        chunk = await grid_out.read(min(chunk_size, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+def gridfs_download_response(
+    request: Request,
+    grid_out,
+    *,
+    filename: str,
+    media_type: str = "application/octet-stream",
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    GridOut → 다운로드 응답 (200/206/304/416).
+
+    Args:
+        request (Request): Range / If-None-Match / If-Range 헤더 확인용
+        grid_out: open_download_stream() 결과
+        filename (str): Content-Disposition 파일명
+        media_type (str): Content-Type
+        headers (dict, optional): 추가 응답 헤더
+    """
+    total = int(grid_out.length)
+    etag = gridfs_etag(grid_out)
+    base_headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": content_disposition(filename),
+        **(headers or {}),
+    }
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=base_headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and not _etag_matches(if_range, etag):
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, total)
+    except ValueError:
+        return Response(
+            status_code=416,
+            headers={**base_headers, "Content-Range": f"bytes */{total}"},
+        )
+
+    if byte_range is None:
+        return StreamingResponse(
+            iter_gridfs(grid_out),
+            media_type=media_type,
+            headers={**base_headers, "Content-Length": str(total)},
+        )
+
+    start, end = byte_range
+    size = end - start + 1
+    return StreamingResponse(
+        iter_gridfs(grid_out, start, size),
+        status_code=206,
+        media_type=media_type,
+        headers={
+            **base_headers,
+            "Content-Length": str(size),
+            "Content-Range": f"bytes {start}-{end}/{total}",
+        },
+    )
@@ -8,6 +8,7 @@ class ExceptionEnum(Enum):
     NO_DATA_FOUND = ("Requested data not found", 404)
     NC_NOT_EXIST = ("Please enter the nc code first", 404)
     REF_NOT_FOUND = ("Reference not exists", 404)
+    JOB_NOT_FOUND = ("Conversion job not found", 404)
 
     # 400 BAD REQUEST
     INVALID_XML_FORMAT = ("Invalid XML format", 400)
@@ -22,6 +23,8 @@ class ExceptionEnum(Enum):
     WORKPLAN_EXIST = ("Already Workplan Exist", 400)
     ASSET_ID_DUPLICATION = ("Already asset id existed", 409)
     REF_ALREADY_EXISTS = ("Reference already exists", 409)
+    ASSET_VERSION_CONFLICT = ("Asset was modified concurrently, retry", 409)
+    FILE_TOO_LARGE = ("Uploaded file exceeds the size limit", 413)
 
     # 500 INTERNAL SERVER ERROR
     PROJECT_UPLOAD_FAILED = ("Project file upload failed.", 500)
@@ -31,11 +34,18 @@ class ExceptionEnum(Enum):
     ASSET_REF_FAILED = ("Asset add ref failed", 500)
     STP_UPLOAD_FAILED = ("STEP file upload failed", 500)
     STP_DELETE_FAILED = ("STEP file deletion failed", 500)
+    TESSELLATION_FAILED = ("STEP tessellation failed", 500)
+    DLL_CONVERSION_FAILED = ("DLL conversion response is invalid", 502)
     NO_FILE_UPLOADED = ("No file uploaded", 500)
     VM_AUTH_FAIL = ("vm server authauthorization fail", 500)
     VM_NOT_TOKEN = ("vm not access token", 500)
     VM_PRJ_FAIL = ("vm fail to create project", 500)
 
+    # 503/504 변환 엔진
+    CONVERSION_QUEUE_FULL = ("Conversion queue is full, retry later", 503)
+    CONVERSION_TIMEOUT = ("Conversion timed out", 504)
+    VM_PRJ_TIMEOUT = ("vm project generation timed out", 504)
+
     def __init__(self, detail, status_code):
         self.detail = detail
         self.status_code = status_code
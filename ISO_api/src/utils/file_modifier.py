@@ -1,32 +1,25 @@
 import os
-import shutil
 import json
 from datetime import datetime
 from src.config import settings
+from src.utils.env import get_env_or_default
 import requests
-from typing import Optional, Any
+from typing import IO, Optional, Any, Union
 from fastapi import UploadFile
 
-
-def zip_folder(source_dir: str, zip_path: str):
-    """
-    지정한 폴더(source_dir)를 zip_path로 압축 저장한다.
-    zip_path는 .zip 확장자를 포함해야 한다.
-    """
-    base_name = os.path.splitext(zip_path)[0]
-    shutil.make_archive(base_name, "zip", root_dir=source_dir)
-    return zip_path
+# ncdata.zip 을 메모리에 두는 상한 (넘으면 SpooledTemporaryFile 이 익명 임시파일로 넘김)
+NC_ZIP_SPOOL_MAX = int(get_env_or_default("NC_ZIP_SPOOL_MAX", str(32 * 1024 * 1024)))
 
 
-def create_prj_file(
+def build_prj_data(
     stock_type: int,
     stock_coords: list[float],
     nc_file_paths: list[str],
     tool_infos: list[list],
-    output_path: str,
-):
+) -> dict:
     """
-    NC 파일 경로들과 툴 정보, 프로젝트의 소재 정보를 이용하여 .prj 파일 생성
+    NC 파일 경로들과 툴 정보, 프로젝트의 소재 정보를 이용하여 .prj 내용(dict) 생성
+    nc_file_paths 는 실제 경로 또는 zip 안의 "ncdata/<이름>_<i>/<이름>_<i>" 경로
     """
 
     stock_size = ",".join(
@@ -69,18 +62,23 @@ def create_prj_file(
         )
 
     # 5. 최종 .prj 구조
-    prj_data = {
+    return {
         "stock_type": stock_type,
         "stock_size": stock_size,
         "process_count": len(process_list),
         "process": process_list,
     }
 
-    # 6. 저장
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(prj_data, f, indent=2)
 
-    return output_path
+def create_prj_bytes(
+    stock_type: int,
+    stock_coords: list[float],
+    nc_file_paths: list[str],
+    tool_infos: list[list],
+) -> bytes:
+    """build_prj_data 로 만든 .prj 내용을 bytes(JSON) 로 반환"""
+    prj_data = build_prj_data(stock_type, stock_coords, nc_file_paths, tool_infos)
+    return json.dumps(prj_data, indent=2).encode("utf-8")
 
 
 def create_vm_project_name() -> str:
@@ -102,9 +100,14 @@ def create_vm_project_name() -> str:
     return f"{year}-{month}-{day}_{ampm}_{hour_12}_{minute}_{second}"
 
 
-def vm_file_s3_upload(file_path: str, parent_path: Optional[str] = None):
+def vm_file_s3_upload(
+    file_path: str,
+    parent_path: Optional[str] = None,
+    content: Optional[Union[bytes, IO[bytes]]] = None,
+):
     """
     생성한 프로젝트 파일과 ncdata.zip 파일을 s3에 업로드 하는 함수.
+    content 가 있으면 로컬 파일 대신 그 내용을 업로드 (file_path 는 파일명으로만 사용)
     """
 
     """
@@ -122,6 +125,11 @@ def vm_file_s3_upload(file_path: str, parent_path: Optional[str] = None):
         params["parent_path"] = parent_path
 
     try:
+        if content is not None:
+            files = {"file": (os.path.basename(file_path), content)}
+            response = requests.post(s3_url, params=params, files=files)
+            response.raise_for_status()
+            return response.json()
         with open(file_path, "rb") as f:
             files = {"file": f}
             response = requests.post(s3_url, params=params, files=files)
@@ -0,0 +1,166 @@
+"""
+여러 NC 프로그램 일괄 분할/툴 시퀀스 추출 엔진.
+
+NC 분할(lexer + 리넘버링)은 CPU 만 쓰는 동기 작업이라 요청 핸들러에서 파일 수십 개를 차례로
+돌리면 이벤트 루프가 그동안 멈춘다. 이 모듈은 파일별 작업을 프로세스 풀에 나눠 실행하고,
+끝나는 순서대로 결과를 내보낸다.
+
+- 워커 수 NC_BATCH_WORKERS, 동시 다운로드(= 풀에 넘기기 전 메모리에 올라와 있는 파일) 상한 NC_BATCH_INFLIGHT
+- 파일별 실패(다운로드/디코딩/분할/저장)는 해당 항목의 status="failed" 로만 보고, 배치는 계속
+- 워커 프로세스가 죽으면(BrokenProcessPool) 풀을 새로 만들어 남은 파일 처리
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.utils.env import get_env_or_default
+from src.utils.nc_spliter import scan_nc, write_nc_segments_zip
+
+logger = logging.getLogger(__name__)
+
+NC_BATCH_WORKERS = int(
+    get_env_or_default("NC_BATCH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))
+)
+NC_BATCH_INFLIGHT = int(get_env_or_default("NC_BATCH_INFLIGHT", str(NC_BATCH_WORKERS * 2)))
+# spawn: 부모(Motor 스레드 등) 상태를 물려받지 않는 깨끗한 자식 프로세스
+NC_BATCH_START_METHOD = get_env_or_default("NC_BATCH_START_METHOD", "spawn")
+
+# nc 파일 id → (NC 원본 bytes, 세그먼트 이름 base)
+Loader = Callable[[str], Awaitable[Tuple[bytes, str]]]
+# (nc 파일 id, 세그먼트 이름 base, zip bytes) → 저장된 zip 파일 id
+ZipStorer = Callable[[str, str, bytes], Awaitable[str]]
+
+
+def split_nc_bytes(data: bytes, base_name: str, build_zip: bool = False) -> Dict[str, Any]:
+    """
+    (워커 프로세스) NC 원본 bytes → 세그먼트/툴 정보 (+ build_zip 이면 ncdata.zip bytes).
+    """
+    source = io.StringIO(data.decode("utf-8"), newline=None)
+    zip_bytes: Optional[bytes] = None
+    if build_zip:
+        buf = io.BytesIO()
+        result = write_nc_segments_zip(source, base_name, buf)
+        zip_bytes = buf.getvalue()
+        tool_numbers, events = result.tool_numbers, result.tool_changes
+    else:
+        scan = scan_nc(source)
+        tool_numbers, events = scan.tool_numbers, scan.tool_changes
+    return {
+        "segments": [
+            {"name": f"{base_name}_{i + 1}", "tool_number": number}
+            for i, number in enumerate(tool_numbers)
+        ],
+        "tool_sequence": [e["tool"] for e in events],
+        "tool_changes": events,
+        "zip": zip_bytes,
+    }
+
+
+class NcBatchSplitter:
+    """NC 일괄 분할용 프로세스 풀 (첫 사용 시 생성)."""
+
+    def __init__(
+        self,
+        workers: int = NC_BATCH_WORKERS,
+        inflight: int = NC_BATCH_INFLIGHT,
+        start_method: str = NC_BATCH_START_METHOD,
+    ):
+        self.workers = max(1, workers)
+        self.inflight = max(1, inflight)
+        self._ctx = mp.get_context(start_method)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._ctx)
+        return self._pool
+
+    def _reset_pool(self, broken: ProcessPoolExecutor) -> None:
+        if self._pool is broken:
+            logger.warning("[nc_batch] worker process died, recreating pool")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _run_one(
+        self,
+        nc_file_id: str,
+        load: Loader,
+        store_zip: Optional[ZipStorer],
+        slots: asyncio.Semaphore,
+    ) -> Dict[str, Any]:
+        item: Dict[str, Any] = {"nc_file_id": nc_file_id}
+        try:
+            async with slots:
+                data, base_name = await load(nc_file_id)
+                item["base_name"] = base_name
+                pool = self._get_pool()
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        pool, split_nc_bytes, data, base_name, store_zip is not None
+                    )
+                except BrokenProcessPool:
+                    self._reset_pool(pool)
+                    raise
+            zip_bytes = result.pop("zip")
+            if store_zip is not None:
+                result["zip_file_id"] = await store_zip(nc_file_id, base_name, zip_bytes)
+            item.update(status="ok", segment_count=len(result["segments"]), **result)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info("[nc_batch] %s failed: %r", nc_file_id, e)
+            item.update(status="failed", error=f"{type(e).__name__}: {e}")
+        return item
+
+    async def run(
+        self,
+        nc_file_ids: List[str],
+        load: Loader,
+        store_zip: Optional[ZipStorer] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        NC 파일 id 목록 → 파일별 결과를 끝나는 순서대로 생성.
+        소비 쪽이 중간에 멈추면(클라이언트 연결 종료) 남은 작업은 취소.
+        """
+        slots = asyncio.Semaphore(self.inflight)
+        tasks = [
+            asyncio.create_task(self._run_one(nc_file_id, load, store_zip, slots))
+            for nc_file_id in nc_file_ids
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_splitter: Optional[NcBatchSplitter] = None
+
+
+def get_nc_batch_splitter() -> NcBatchSplitter:
+    """프로세스 전역 NC 일괄 분할 엔진."""
+    global _splitter
+    if _splitter is None:
+        _splitter = NcBatchSplitter()
+    return _splitter
+
+
+def shutdown_nc_batch_splitter() -> None:
+    global _splitter
+    if _splitter is not None:
+        _splitter.shutdown()
+        _splitter = None
@@ -0,0 +1,264 @@
+"""
+NC(G-code) 프로그램 스트리밍 lexer.
+
+한 줄(블록)씩 한 번만 읽으면서
+- 주석 제거 ( ... ), ; 이후
+- 툴 교체 이벤트 (same-line "T1 M6" / "M06 T1", next-line "T1" → 1~N줄 안의 "M6")
+- N번호 포맷 통계 (패딩 여부 + 평균 자리수)
+를 같이 만든다. 툴 교체가 있는 블록이 곧 세그먼트 시작 블록이므로 분할(nc_spliter)과
+툴 순서 추출이 같은 판정을 쓴다.
+
+    lexer = NcLexer()
+    for chunk in chunks:                 # str chunk (파일, GridFS 디코딩 결과 등)
+        for block in lexer.feed(chunk):
+            ...
+    for block in lexer.close():
+        ...
+
+메모리: 줄 하나 + next-line 판정을 위해 보류 중인 블록(최대 lookahead_lines + 1개)
+"""
+
+from __future__ import annotations
+
+import codecs
+import io
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+_VALUE = r"\s*([-+]?(?:\d+\.?\d*|\.\d+)?)"
+# 모든 영문자가 word 의 시작이므로 T/M word 만 바로 찾아도 주소 경계가 어긋나지 않음
+_TOOL_WORD = re.compile(r"([TM])" + _VALUE, re.IGNORECASE)
+_COMMENT = re.compile(r"\([^)]*\)?")
+_N_NUMBER = re.compile(r"\s*N(\d+)")
+
+# 툴 교체 판정 규칙 버전 (규칙이 바뀌면 올려서 저장된 추출 결과를 다시 계산하게 함)
+NC_LEXER_VERSION = 1
+
+
+@dataclass
+class ToolChange:
+    """툴 교체 이벤트. line/raw 는 M6 가 있는 줄 기준 (1-based)."""
+
+    number: int
+    line: int
+    raw: str
+    mode: str
+
+    @property
+    def tool(self) -> str:
+        return f"T{self.number}"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"tool": self.tool, "line": self.line, "raw": self.raw, "mode": self.mode}
+
+
+@dataclass
+class NcBlock:
+    """NC 한 줄. index 는 0-based 줄 번호, raw 는 개행 포함 원본, code 는 주석 제거본."""
+
+    index: int
+    raw: str
+    code: str
+    tool_change: Optional[ToolChange] = None
+
+    @property
+    def is_percent(self) -> bool:
+        return "%" in self.raw
+
+
+@dataclass
+class NFormatStats:
+    """줄 맨 앞 N번호 통계 → {"padding", "width"} (N번호가 없으면 기본 4자리 패딩)."""
+
+    count: int = 0
+    width_sum: int = 0
+    padded: bool = True
+
+    def observe(self, raw: str) -> None:
+        m = _N_NUMBER.match(raw)
+        if not m:
+            return
+        digits = m.group(1)
+        self.count += 1
+        self.width_sum += len(digits)
+        if self.padded and not (digits.startswith("0") and len(digits) >= 3):
+            self.padded = False
+
+    @property
+    def has_n_number(self) -> bool:
+        return self.count > 0
+
+    def as_format(self) -> Dict[str, Any]:
+        if not self.count:
+            return {"padding": True, "width": 4}
+        return {"padding": self.padded, "width": round(self.width_sum / self.count)}
+
+
+def strip_comments(line: str) -> str:
+    """NC 주석 제거: ; 이후, ( ... ) (닫히지 않은 괄호는 줄 끝까지)."""
+    if ";" in line:
+        line = line.split(";", 1)[0]
+    if "(" in line:
+        line = _COMMENT.sub("", line)
+    return line.strip()
+
+
+def split_chunk(partial: str, text: str) -> Tuple[List[str], str]:
+    """
+    (이전 미완성 줄, 새 chunk) → (완성된 줄 목록, 새 미완성 줄).
+    "\n" 으로 끝나지 않은 마지막 조각은 보류 ("\r" 뒤에 다음 chunk 의 "\n" 이 올 수 있음)
+    """
+    if not text:
+        return [], partial
+    lines = (partial + text).splitlines(keepends=True)
+    return (lines, "") if lines[-1].endswith("\n") else (lines[:-1], lines[-1])
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    text chunk iterable → 줄 스트림 (같은 입력이면 lex_nc 와 같은 줄 index).
+    텍스트 모드 파일 객체는 이미 줄 단위이므로 그대로 사용
+    """
+    if isinstance(chunks, io.TextIOBase):
+        yield from chunks
+        return
+    partial = ""
+    for chunk in chunks:
+        lines, partial = split_chunk(partial, chunk)
+        yield from lines
+    if partial:
+        yield partial
+
+
+class NcLexer:
+    """
+    NC 텍스트를 chunk 단위로 받아 NcBlock 을 순서대로 내보내는 incremental lexer.
+
+    툴 교체 판정 (블록 단위, word 기준):
+    - M6 앞에 T 가 있으면 그 중 마지막 T          → "same-line T->M6"
+    - 없고 M6 뒤에 T 가 있으면 첫 T               → "same-line M6->T"
+    - M6 만 있으면 lookahead_lines 줄 이내 앞선 T-only 블록의 T → "next-line(+j)"
+      (이벤트는 T 블록에 붙여 세그먼트가 T 줄부터 시작하도록 함)
+    """
+
+    def __init__(self, lookahead_lines: int = 2):
+        self.lookahead_lines = lookahead_lines
+        self.n_stats = NFormatStats()
+        self._index = 0
+        self._partial = ""
+        self._held: Deque[NcBlock] = deque()
+        self._pending: Optional[Tuple[NcBlock, int]] = None  # (T-only 블록, T 번호)
+
+    def feed(self, text: str) -> List[NcBlock]:
+        """text chunk 를 넣고 확정된 블록 반환 (마지막 미완성 줄은 다음 chunk 까지 보류)."""
+        lines, self._partial = split_chunk(self._partial, text)
+        out: List[NcBlock] = []
+        for raw in lines:
+            out.extend(self.push_line(raw))
+        return out
+
+    def close(self) -> List[NcBlock]:
+        """남은 미완성 줄/보류 블록을 모두 내보냄."""
+        out: List[NcBlock] = []
+        if self._partial:
+            out.extend(self.push_line(self._partial))
+            self._partial = ""
+        self._pending = None
+        out.extend(self._held)
+        self._held.clear()
+        return out
+
+    def push_line(self, raw: str) -> List[NcBlock]:
+        """완성된 한 줄 처리 → 확정된 블록 반환."""
+        index = self._index
+        self._index += 1
+        self.n_stats.observe(raw)
+        code = strip_comments(raw)
+        block = NcBlock(index, raw, code)
+
+        pending = self._pending
+        # 보류 중인 T 가 lookahead 범위를 벗어났으면 해제
+        if pending and index - pending[0].index > self.lookahead_lines:
+            pending = self._pending = None
+
+        tools: List[Tuple[int, int]] = []  # (word 위치, T 번호)
+        m6_pos = -1
+        for pos, (addr, value) in enumerate(_TOOL_WORD.findall(code)):
+            if not value.isdigit():
+                continue
+            if addr in "Tt":
+                tools.append((pos, int(value)))
+            elif m6_pos < 0 and int(value) == 6:
+                m6_pos = pos
+
+        if m6_pos >= 0:
+            before = [n for p, n in tools if p < m6_pos]
+            after = [n for p, n in tools if p > m6_pos]
+            if before:
+                block.tool_change = ToolChange(before[-1], index + 1, raw.rstrip(), "same-line T->M6")
+            elif after:
+                block.tool_change = ToolChange(after[0], index + 1, raw.rstrip(), "same-line M6->T")
+            elif pending:
+                t_block, number = pending
+                t_block.tool_change = ToolChange(
+                    number, index + 1, raw.rstrip(), f"next-line(+{index - t_block.index})"
+                )
+            self._pending = None
+        elif tools:
+            self._pending = (block, tools[-1][1])
+
+        if self._pending is None and not self._held:
+            return [block]
+        self._held.append(block)
+        out: List[NcBlock] = []
+        # 보류 중인 T 블록 이전까지는 확정
+        while self._held and (self._pending is None or self._held[0] is not self._pending[0]):
+            out.append(self._held.popleft())
+        return out
+
+
+def lex_nc(lines: Iterable[str], lookahead_lines: int = 2) -> Iterator[NcBlock]:
+    """줄(또는 text chunk) iterable → NcBlock 스트림 (파일 객체를 그대로 넘겨도 됨)."""
+    lexer = NcLexer(lookahead_lines)
+    for raw in iter_lines(lines):
+        yield from lexer.push_line(raw)
+    yield from lexer.close()
+
+
+class ToolChangeCollector:
+    """
+    bytes chunk 를 받아 툴 교체 이벤트만 모으는 수집기.
+    업로드 스트림 등 다른 용도로 이미 읽고 있는 chunk 에 끼워 넣어 추가 읽기 없이 추출할 때 사용.
+    """
+
+    def __init__(self, encoding: str = "utf-8", lookahead_lines: int = 2):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+        self._lexer = NcLexer(lookahead_lines)
+        self.events: List[Dict[str, Any]] = []
+
+    def _collect(self, blocks: List[NcBlock]) -> None:
+        self.events.extend(b.tool_change.as_dict() for b in blocks if b.tool_change)
+
+    def feed(self, chunk: bytes) -> None:
+        self._collect(self._lexer.feed(self._decoder.decode(chunk)))
+
+    def close(self) -> List[Dict[str, Any]]:
+        self._collect(self._lexer.feed(self._decoder.decode(b"", final=True)))
+        self._collect(self._lexer.close())
+        return self.events
+
+
+def tool_changes(blocks: Iterable[NcBlock]) -> List[Dict[str, Any]]:
+    """블록 스트림에서 툴 교체 이벤트 dict 목록 추출."""
+    return [b.tool_change.as_dict() for b in blocks if b.tool_change]
@@ -1,104 +1,106 @@
+import io
 import os
 import re
-from typing import List, Dict, Any, Optional
+import zipfile
+from dataclasses import dataclass, field
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.utils.nc_lexer import (
+    NcBlock,
+    NcLexer,
+    NFormatStats,
+    iter_lines,
+    lex_nc,
+    tool_changes,
+)
 
 
 def detect_n_format(n_lines: List[str]):
     """기존 N번호 포맷 감지 (패딩 여부 + 자리수)"""
-    n_values = []
+    stats = NFormatStats()
     for line in n_lines:
-        match = re.match(r"^N(\d+)", line.strip())
-        if match:
-            n_values.append(match.group(1))
-    if not n_values:
-        return {"padding": True, "width": 4}
-    widths = [len(n) for n in n_values]
-    avg_width = round(sum(widths) / len(widths))
-    padding = all(n.startswith("0") and len(n) >= 3 for n in n_values)
-    return {"padding": padding, "width": avg_width}
+        stats.observe(line)
+    return stats.as_format()
 
 
-def renumber_lines(
-    lines: List[str], start: int = 10, step: int = 10, n_format: Dict = None
-):
-    """리넘버링 수행: 기존 N넘버가 코드에 붙어 있으면 새로운 N도 붙여서 출력"""
-    if n_format is None:
-        n_format = {"padding": True, "width": 4}
+_N_PREFIX = re.compile(r"N(\d+)(.*)")
+
 
-    renumbered = []
-    n = start
+class _Renumberer:
+    """renumber_lines 의 줄 단위 버전 (세그먼트를 스트리밍으로 쓸 때 사용)."""
 
-    prev_attached = False
+    def __init__(self, start: int = 10, step: int = 10, n_format: Dict = None):
+        self.n = start
+        self.step = step
+        self.n_format = n_format or {"padding": True, "width": 4}
+        self.prev_attached = False
 
-    for line in lines:
+    def __call__(self, line: str) -> Optional[str]:
         original_line = line.strip()
         if not original_line:
-            continue
+            return None
 
         attached = False  # N번호와 코드가 붙어 있는지 여부
 
         # 기존 N 제거 + 붙어 있는지 판별
         if original_line.startswith("N"):
-            match = re.match(r"^N(\d+)(.*)", original_line)
+            match = _N_PREFIX.match(original_line)
             if match:
                 n_val, rest = match.groups()
                 attached = not rest.startswith(" ")
-                prev_attached = attached
+                self.prev_attached = attached
                 content = rest.lstrip()
             else:
                 content = original_line[1:]
         # N 번호 없는 것(추가한 종료코드에 대해서)도 붙여줘야 한다.
         else:
             content = original_line.lstrip()
-            attached = prev_attached
+            attached = self.prev_attached
 
         # 새로운 N 생성
-        if n_format["padding"]:
-            n_str = f"N{n:0{n_format['width']}d}"
+        if self.n_format["padding"]:
+            n_str = f"N{self.n:0{self.n_format['width']}d}"
         else:
-            n_str = f"N{n}"
+            n_str = f"N{self.n}"
+        self.n += self.step
 
         # 붙여서 출력 여부
         if attached:
-            renumbered.append(f"{n_str}{content}\n")
-        else:
-            renumbered.append(f"{n_str} {content}\n")
+            return f"{n_str}{content}\n"
+        return f"{n_str} {content}\n"
 
-        n += step
 
-    return renumbered
+def renumber_lines(
+    lines: List[str], start: int = 10, step: int = 10, n_format: Dict = None
+):
+    """리넘버링 수행: 기존 N넘버가 코드에 붙어 있으면 새로운 N도 붙여서 출력"""
+    renumber = _Renumberer(start, step, n_format)
+    return [out for out in map(renumber, lines) if out is not None]
 
 
-def split_by_tool_change_with_preamble(lines: List[str]):
+def split_by_tool_change_with_preamble(lines: Iterable[str]):
     """툴 교체 기준으로 NC 세그먼트 분할 + 초기 셋팅 블럭 반환"""
     segments = []
     current = []
     preamble = []
-    tool_pattern = re.compile(r"(T0*\d{1,3}\s*M0?6)|(M0?6\s*T0*\d{1,3})", re.IGNORECASE)
-    # 기존 패턴 tool_pattern = re.compile(r"T0*\d{1,3}\s*M0?6", re.IGNORECASE)
-    tool_found = False
 
-    for line in lines:
+    for block in lex_nc(lines):
         # 라인에 %가 있으면 바로 패스한다.
-        if "%" in line:
+        if block.is_percent:
             continue
 
-        if tool_pattern.search(line):
-            tool_found = True
+        if block.tool_change:
             if current:
                 segments.append(current)
-            current = [line]
+            current = [block.raw]
+        elif segments or current:
+            current.append(block.raw)
         else:
-            if tool_found:
-                current.append(line)
-            else:
-                preamble.append(line)
+            preamble.append(block.raw)
 
     if current:
         segments.append(current)
 
-    # 마지막 segment의 %는 제거해야한다.
-
     return preamble, segments
 
 
@@ -132,144 +134,221 @@ def generate_segment_onumber(
     원래 O넘버 (O0001 또는 :0001)를 기반으로 세그먼트별 새로운 O넘버를 생성
     segment_index 0부터 시작, 1000 더해서 생성
     """
+    new_onum = _segment_onumber(base_onumber, segment_index)
+    if new_onum is not None:
+        full_segment.insert(0, new_onum)
+    return full_segment
+
+
+def _segment_onumber(base_onumber: Optional[str], segment_index: int) -> Optional[str]:
     if base_onumber is None:
-        return full_segment
+        return None
 
     match = re.match(r"^(O|:)(\d+)", base_onumber.strip(), re.IGNORECASE)
     if not match:
-        return full_segment
+        return None
 
     prefix = match.group(1)  # 'O' 또는 ':'
     base_num = int(match.group(2))
     new_num = 1000 + base_num + segment_index  # 예: 1000 + 1 + 0 = 1001
 
-    new_onum = prefix + str(new_num) + "\n"
+    return prefix + str(new_num) + "\n"
 
-    full_segment.insert(0, new_onum)
-    return full_segment
+
+_TERMINATED = re.compile(r"M(?:30|02|2)(?!\d)")
 
 
 def find_terminated_code(full_segment: List[str]):
     """
     라인의 마지막 줄에 M30 혹은 M02이 없다면 추가로 붙여주는 함수
     """
-    last_line = full_segment[-1]
-
-    pattern = re.compile(r"M(?:30|02|2)(?!\d)")
-    if not pattern.search(last_line):
+    if not _TERMINATED.search(full_segment[-1]):
         full_segment.append("M30")
 
     return full_segment
 
 
-def process_nc_file(input_path: str, output_dir: str):
-    """전체 처리 함수"""
-    os.makedirs(output_dir, exist_ok=True)
-    with open(input_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
+@dataclass
+class NcScan:
+    """scan_nc 결과: 분할/리넘버링에 필요한 정보 (원본 한 번 읽기)."""
 
-    # N 포맷 감지
-    # n_lines = [l for l in lines if re.match(r"^N\d+", l.strip())]
-    # n_format = detect_n_format(n_lines)
+    n_format: Dict[str, Any]
+    has_n_number: bool
+    preamble: List[str] = field(default_factory=list)  # %/O넘버 제거된 초기 셋팅 블럭
+    onumber: Optional[str] = None
+    boundaries: List[int] = field(default_factory=list)  # 세그먼트 시작 줄 index (0-based)
+    tool_numbers: List[int] = field(default_factory=list)  # 세그먼트별 툴 번호
+    tool_changes: List[Dict[str, Any]] = field(default_factory=list)  # 전체 툴 교체 이벤트
 
-    n_lines = [l for l in lines if re.match(r"^N\d+", l.strip())]
-    n_format = detect_n_format(n_lines)
-    has_n_number = bool(n_lines)
 
-    # 초기 블럭 + 세그먼트 분할
-    preamble, segments = split_by_tool_change_with_preamble(lines)
+@dataclass
+class NcSplitResult:
+    paths: List[str]  # 세그먼트 위치 (파일: 실제 경로, zip: "<이름>_<i>/<이름>_<i>")
+    tool_numbers: List[Optional[int]]
+    tool_changes: List[Dict[str, Any]] = field(default_factory=list)  # 전체 툴 교체 이벤트
 
-    # %와 O넘버 제거
-    clear_preamble, onumber = extract_onumber_from_preamble(preamble)
 
-    saved_paths = []
-    for i, segment in enumerate(segments):
-        full_segment = clear_preamble + segment  # 초기 설정 포함
+# 세그먼트 이름("<이름>_<i>") → (저장 위치, 쓰기용 text IO)
+SegmentOpener = Callable[[str], Tuple[str, IO[str]]]
 
-        # full_seg에 M30이나 M02가 없다면 M30을 추가
-        full_segment = find_terminated_code(full_segment)
 
-        # 넘버링이 있으면 리넘버링 아니면 안함.
-        if has_n_number:
-            renumbered = renumber_lines(full_segment, n_format=n_format)
-        else:
-            renumbered = full_segment  # N 넘버 추가 안 함
+def scan_nc(lines: Iterable[str], lookahead_lines: int = 2) -> NcScan:
+    """
+    NC 원본을 한 번 스트리밍으로 읽어 N 포맷, 초기 셋팅 블럭, 세그먼트 경계, 툴 교체 이벤트 수집.
+    (초기 셋팅 블럭만 메모리에 유지)
+    """
+    lexer = NcLexer(lookahead_lines)
+    preamble: List[str] = []
+    boundaries: List[int] = []
+    tool_numbers: List[int] = []
+    events: List[Dict[str, Any]] = []
+
+    def consume(blocks: List[NcBlock]) -> None:
+        for block in blocks:
+            if block.tool_change:
+                events.append(block.tool_change.as_dict())
+            # 라인에 %가 있으면 바로 패스한다.
+            if block.is_percent:
+                continue
+            if block.tool_change:
+                boundaries.append(block.index)
+                tool_numbers.append(block.tool_change.number)
+            elif not boundaries:
+                preamble.append(block.raw)
+
+    for raw in iter_lines(lines):
+        consume(lexer.push_line(raw))
+    consume(lexer.close())
+
+    # %와 O넘버 제거
+    clear_preamble, onumber = extract_onumber_from_preamble(preamble)
+    return NcScan(
+        n_format=lexer.n_stats.as_format(),
+        has_n_number=lexer.n_stats.has_n_number,
+        preamble=clear_preamble,
+        onumber=onumber,
+        boundaries=boundaries,
+        tool_numbers=tool_numbers,
+        tool_changes=events,
+    )
+
+
+def iter_segment_lines(lines: Iterable[str], scan: NcScan) -> Iterator[Tuple[int, str]]:
+    """
+    scan_nc 결과로 원본을 다시 흘려 읽으며 세그먼트 출력 줄을 (세그먼트 index, 줄) 로 생성.
+    세그먼트 = % + (O넘버) + 초기 셋팅 블럭 + 툴 교체 구간 (+ M30) + %, N넘버가 있으면 리넘버링.
+    """
+    boundaries = iter(scan.boundaries)
+    next_start = next(boundaries, None)
+    seg = -1
+    renumber: Optional[_Renumberer] = None
+    last_line = ""
+
+    def emit(i: int, line: str) -> Iterator[Tuple[int, str]]:
+        out = line if renumber is None else renumber(line)
+        if out is not None:
+            yield i, out
+
+    def close_segment(i: int) -> Iterator[Tuple[int, str]]:
+        # full_seg에 M30이나 M02가 없다면 M30을 추가
+        if not _TERMINATED.search(last_line):
+            yield from emit(i, "M30\n")
+        yield i, "%\n"
+
+    for index, raw in enumerate(iter_lines(lines)):
+        if index == next_start:
+            if seg >= 0:
+                yield from close_segment(seg)
+            seg += 1
+            next_start = next(boundaries, None)
+            # 넘버링이 있으면 리넘버링 아니면 안함.
+            renumber = _Renumberer(n_format=scan.n_format) if scan.has_n_number else None
+
+            # 맨 앞에 %, 기존에 onumber가 있다면 세그먼트마다 onumber를 다시 붙여준다.
+            yield seg, "%\n"
+            onum = _segment_onumber(scan.onumber, seg)
+            if onum is not None:
+                yield seg, onum
+            for line in scan.preamble:
+                yield from emit(seg, line)
 
-        # 기존에 onumber가 있다면 full segment 마다 onumber를 다시 붙여준다.
-        add_onumbered = generate_segment_onumber(onumber, i, renumbered)
+        # 라인에 %가 있으면 바로 패스한다.
+        if seg < 0 or "%" in raw:
+            continue
+        last_line = raw
+        out = raw if renumber is None else renumber(raw)
+        if out is not None:
+            yield seg, out
 
-        # 맨 앞과 뒤에 %를 붙여준다.
-        add_onumbered.insert(0, "%\n")
-        add_onumbered.append("%\n")
+    if seg >= 0:
+        yield from close_segment(seg)
 
-        base_filename = os.path.splitext(os.path.basename(input_path))[0]
-        filename = f"{base_filename}_{i + 1}"
 
-        # 🔽 폴더 이름은 파일 이름에서 확장자를 뺀 것
-        folder_name = filename
+def split_nc(
+    source: IO[str], base_name: str, open_segment: SegmentOpener, lookahead_lines: int = 2
+) -> NcSplitResult:
+    """
+    NC 원본을 툴 교체 기준으로 분할해 세그먼트마다 open_segment 로 연 IO 에 기록.
+    source 는 scan 한 번 + 쓰기 한 번 흘려 읽으므로 seek 가능한 text IO (파일, io.StringIO)
+    """
+    scan = scan_nc(source, lookahead_lines)
+    source.seek(0)
+
+    paths: List[str] = []
+    out: Optional[IO[str]] = None
+    current = -1
+    try:
+        for i, line in iter_segment_lines(source, scan):
+            if i != current:
+                if out is not None:
+                    out.close()
+                current = i
+                path, out = open_segment(f"{base_name}_{i + 1}")
+                paths.append(path)
+            out.write(line)
+    finally:
+        if out is not None:
+            out.close()
+
+    return NcSplitResult(
+        paths=paths, tool_numbers=list(scan.tool_numbers), tool_changes=scan.tool_changes
+    )
+
+
+def split_nc_file(input_path: str, output_dir: str) -> NcSplitResult:
+    """NC 파일을 툴 교체 기준으로 분할해 output_dir/<이름>_<i>/<이름>_<i> 로 저장."""
+    os.makedirs(output_dir, exist_ok=True)
+    base_filename = os.path.splitext(os.path.basename(input_path))[0]
 
-        # 🔽 하위 디렉토리 생성: output_dir / folder_name
-        segment_output_dir = os.path.join(output_dir, folder_name)
+    def open_segment(filename: str) -> Tuple[str, IO[str]]:
+        # 🔽 하위 디렉토리 생성: output_dir / 파일 이름 (확장자 제외)
+        segment_output_dir = os.path.join(output_dir, filename)
         os.makedirs(segment_output_dir, exist_ok=True)
-
-        # 🔽 해당 폴더 아래에 파일 저장
         filepath = os.path.join(segment_output_dir, filename)
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.writelines(add_onumbered)
+        return filepath, open(filepath, "w", encoding="utf-8")
 
-        saved_paths.append(filepath)
+    with open(input_path, "r", encoding="utf-8") as src:
+        return split_nc(src, base_filename, open_segment)
 
-    return saved_paths
 
-
-def extract_tool_numbers_from_paths(file_paths: List[str]) -> List[int]:
+def write_nc_segments_zip(source: IO[str], base_name: str, fileobj: IO[bytes]) -> NcSplitResult:
     """
-    주어진 NC 파일 목록에서 툴 번호(T코드)를 순서대로 추출하여 정수 리스트로 반환.
+    NC 원본을 분할하면서 세그먼트를 바로 zip 으로 기록 (임시 폴더 없이 ncdata.zip 생성).
+    zip 구조는 기존 ncdata 폴더 압축(shutil.make_archive)과 같음: <이름>_<i>/<이름>_<i>
     """
-    tool_pattern = re.compile(r"(T0*\d{1,3})\s*M0?6|M0?6\s*(T0*\d{1,3})", re.IGNORECASE)
-    tool_numbers = []
-
-    for path in file_paths:
-        with open(path, "r") as f:
-            text = f.read()
-
-        match = tool_pattern.search(text)
-        if match:
-            tool_str = match.group(1) or match.group(2)
-            number = int(re.sub(r"[^\d]", "", tool_str))  # T코드에서 숫자만 추출
-            tool_numbers.append(number)
-        else:
-            tool_numbers.append(None)
-
-    return tool_numbers
-
-
-# --- 패턴 정의(확장 포인트) --- # NC 에서 T번호 추출하는 함수들
-PATTERNS = {
-    "TOOL": re.compile(r"\bT0*([0-9]+)\b", re.IGNORECASE),  # T1, T01, t12 ...
-    "CHANGE": re.compile(r"\bM0?6\b", re.IGNORECASE),  # M6, M06
-}
-
-
-def _strip_comments(line: str) -> str:
-    """NC 주석 제거: ( ... ), ; 이후, % 단독 라인."""
-    # ; 이후 제거
-    line = line.split(";", 1)[0]
-    # (...) 주석 제거(중첩 고려 X, 일반 케이스 대응)
-    line = re.sub(r"\([^)]*\)", "", line)
-    return line.strip()
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as zf:
 
+        def open_segment(filename: str) -> Tuple[str, IO[str]]:
+            path = f"{filename}/{filename}"
+            zf.writestr(f"{filename}/", b"")
+            return path, io.TextIOWrapper(zf.open(path, "w"), encoding="utf-8")
 
-def _has_change_after(text: str, start_idx: int) -> bool:
-    """same-line에서 T 이후에 M6/M06이 나오는지 검사."""
-    m = PATTERNS["CHANGE"].search(text, pos=start_idx)
-    return m is not None
+        return split_nc(source, base_name, open_segment)
 
 
-def _has_tool_after(text: str, start_idx: int) -> Optional[str]:
-    """same-line에서 M6 이후에 T가 나오는지 검사. 있으면 tool str 반환."""
-    m = PATTERNS["TOOL"].search(text, pos=start_idx)
-    return m.group(1) if m else None
+def process_nc_file(input_path: str, output_dir: str):
+    """전체 처리 함수"""
+    return split_nc_file(input_path, output_dir).paths
 
 
 def extract_tool_changes(
@@ -279,105 +358,9 @@ def extract_tool_changes(
     NC 텍스트에서 도구 교체 이벤트(Tn + M6/M06)를 추출.
     - same-line: "T1 M6", "M06 T1" 모두 지원
     - next-line: "T1" 다음 1~N줄 안에 "M6"가 나오면 교체로 간주
+    (판정은 nc_lexer.NcLexer 참고, 분할 기준과 동일)
     """
-    changes: List[Dict[str, Any]] = []
-    seen: set[tuple[int, str]] = set()  # (line_idx, tool)
-
-    raw_lines = nc_text.splitlines()
-    # 미리 전처리(주석 제거 & 대문자화는 비교용으로만)
-    lines = [_strip_comments(l) for l in raw_lines]
-
-    for i, line in enumerate(lines):
-        if not line or line.strip() == "%":
-            continue
-
-        upp = line.upper()
-
-        # 1) same-line: "Tn ... M6"
-        for tmatch in PATTERNS["TOOL"].finditer(upp):
-            tool_num = tmatch.group(1)  # '1'
-            tool_tag = f"T{int(tool_num)}"  # 'T1' (앞 0 제거)
-            t_end = tmatch.end()
-
-            if _has_change_after(upp, t_end):
-                key = (i, tool_tag)
-                if key not in seen:
-                    seen.add(key)
-                    changes.append(
-                        {
-                            "tool": tool_tag,
-                            "line": i + 1,
-                            "raw": raw_lines[i].rstrip(),
-                            "mode": "same-line T->M6",
-                        }
-                    )
-
-        # 2) same-line: "M6 ... Tn"
-        m6_match = PATTERNS["CHANGE"].search(upp)
-        if m6_match:
-            t_after = _has_tool_after(upp, m6_match.end())
-            if t_after:
-                tool_tag = f"T{int(t_after)}"
-                key = (i, tool_tag)
-                if key not in seen:
-                    seen.add(key)
-                    changes.append(
-                        {
-                            "tool": tool_tag,
-                            "line": i + 1,
-                            "raw": raw_lines[i].rstrip(),
-                            "mode": "same-line M6->T",
-                        }
-                    )
-
-        # 3) next-line: "Tn" 만 있고, 다음 N줄 안에 "M6" 등장
-        #    (해당 구간에 다른 T가 먼저 나오면 무시)
-        #    -> 가장 흔한 "Tn" 지정 후 다음 줄에서 M6 호출하는 패턴
-        only_t_matches = list(PATTERNS["TOOL"].finditer(upp))
-        if only_t_matches:
-            for tmatch in only_t_matches:
-                tool_num = tmatch.group(1)
-                tool_tag = f"T{int(tool_num)}"
-                # 같은 라인에서 이미 same-line로 잡혔다면 skip
-                if (i, tool_tag) in seen:
-                    continue
-
-                found = False
-                # 다음 줄들 스캔
-                for j in range(1, lookahead_lines + 1):
-                    if i + j >= len(lines):
-                        break
-                    nxt = lines[i + j]
-                    if not nxt:
-                        continue
-                    nxt_upp = nxt.upper()
-
-                    # 사이에 다른 T가 먼저 나오면 이 T 교체는 무효 처리
-                    earlier_t = PATTERNS["TOOL"].search(nxt_upp)
-                    m6_here = PATTERNS["CHANGE"].search(nxt_upp)
-
-                    if m6_here and (
-                        not earlier_t or m6_here.start() < earlier_t.start()
-                    ):
-                        key = (i + j, tool_tag)
-                        if key not in seen:
-                            seen.add(key)
-                            changes.append(
-                                {
-                                    "tool": tool_tag,
-                                    "line": i + j + 1,
-                                    "raw": raw_lines[i + j].rstrip(),
-                                    "mode": f"next-line(+{j})",
-                                }
-                            )
-                        found = True
-                        break
-
-                # lookahead 범위에서 M6를 못 찾으면 skip
-                if not found:
-                    pass
-
-    return changes
+    return tool_changes(lex_nc([nc_text], lookahead_lines))
 
 
 def extract_tool_sequence(nc_text: str, lookahead_lines: int = 2) -> list[str]:
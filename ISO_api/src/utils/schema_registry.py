@@ -0,0 +1,393 @@
+"""
+ISO14649 xsdata 스키마 레지스트리.
+
+스키마 버전별(v27/v30/v31, 레거시 model) dataclass 모듈과 xsdata 파서/시리얼라이저를 한 곳에서 관리한다.
+
+- XmlContext 는 클래스별 바인딩 메타데이터를 캐시하므로 프로세스 전체에서 공유
+  (엄격 검증용 기본 context / snake_case 이름 생성 context 두 개)
+- warm_schemas(): 앱 startup 에서 루트 클래스(DtAsset, Project, DtProject) 메타데이터와
+  xsi:type 인덱스를 미리 구성 → 첫 검증 요청이 cold 비용을 치르지 않음
+- 버전 지정 parse / validate / serialize 함수 제공 (기존 *_xml_parser 모듈은 이 레지스트리를 사용)
+- 스키마 모듈(수천 개 dataclass)은 해당 버전이 처음 요청될 때 import (lazy)
+- 버전별 클래스명 → 클래스, snake_case 이름 → 클래스 테이블을 한 번만 구성
+  (module globals() 를 매번 스캔하지 않음)
+- validate_incremental(): 문서를 검증 단위(dt_elements, dt_project 워크플랜의 workingstep)와
+  나머지 골격(shell)으로 나눠 구조 해시를 비교하고, 새로 바뀐 단위만 엄격 검증
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import io
+import logging
+import re
+import time
+from collections import OrderedDict
+from types import ModuleType
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from lxml import etree
+from xsdata.exceptions import ConverterError, ParserError
+from xsdata.formats.dataclass.context import XmlContext
+from xsdata.formats.dataclass.parsers import XmlParser
+from xsdata.formats.dataclass.parsers.config import ParserConfig
+from xsdata.formats.dataclass.serializers import XmlSerializer
+from xsdata.formats.dataclass.serializers.config import SerializerConfig
+from xsdata.utils import text
+
+from src.utils.env import get_env_or_default
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCHEMA_VERSION = "v31"
+
+# 스키마 버전 → dataclass 모듈
+SCHEMA_MODULES: Dict[str, str] = {
+    "legacy": "src.entities.model",
+    "v27": "src.entities.model_v27",
+    "v30": "src.entities.model_v30",
+    "v31": "src.entities.model_v31",
+}
+
+# 문서 루트로 쓰이는 클래스 (warm-up 대상)
+ROOT_CLASSES = ("DtAsset", "Project", "DtProject")
+
+# 증분 검증에서 기억할 검증 통과 구조 해시 수 (shell / 단위 각각)
+SCHEMA_VALIDATION_CACHE_SIZE = int(
+    get_env_or_default("SCHEMA_VALIDATION_CACHE_SIZE", "4096")
+)
+
+# startup 에서 미리 로드할 버전 (쉼표 구분, 나머지 버전은 첫 요청 시 로드)
+SCHEMA_WARM_VERSIONS = get_env_or_default("SCHEMA_WARM_VERSIONS", "v27,v31")
+
+# --- 공유 context / 파서 / 시리얼라이저 ---
+
+# 기본 context (엄격 검증, v3 시리얼라이저)
+strict_context = XmlContext()
+# snake_case 이름 생성 context (관대한 파서, 레거시 시리얼라이저)
+snake_context = XmlContext(element_name_generator=text.snake_case)
+
+# 엄격한 파서 (유효성 검증용)
+strict_parser = XmlParser(context=strict_context)
+# 관대한 파서 (스키마에 없는 속성은 무시)
+lenient_parser = XmlParser(
+    config=ParserConfig(fail_on_unknown_properties=False), context=snake_context
+)
+# XML 생성용 시리얼라이저
+serializer = XmlSerializer(config=SerializerConfig(pretty_print=True), context=strict_context)
+
+_modules: Dict[str, ModuleType] = {}
+_class_tables: Dict[str, Dict[str, type]] = {}
+_snake_tables: Dict[str, Dict[str, type]] = {}
+_warmed: Dict[str, float] = {}
+
+_CAMEL_RE = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+def _check_version(version: str) -> str:
+    if version not in SCHEMA_MODULES:
+        raise ValueError(f"지원하지 않는 스키마 버전: {version}")
+    return version
+
+
+def get_schema_module(version: str = DEFAULT_SCHEMA_VERSION) -> ModuleType:
+    """스키마 버전의 dataclass 모듈 (최초 1회 import)."""
+    module = _modules.get(version)
+    if module is None:
+        module = importlib.import_module(SCHEMA_MODULES[_check_version(version)])
+        _modules[version] = module
+    return module
+
+
+def get_class_table(version: str = DEFAULT_SCHEMA_VERSION) -> Dict[str, type]:
+    """스키마 버전의 클래스명 → 클래스 테이블 (모듈에 정의/import 된 모든 타입)."""
+    table = _class_tables.get(version)
+    if table is None:
+        table = {
+            name: obj
+            for name, obj in vars(get_schema_module(version)).items()
+            if isinstance(obj, type) and not name.startswith("_")
+        }
+        _class_tables[version] = table
+    return table
+
+
+def get_snake_table(version: str = DEFAULT_SCHEMA_VERSION) -> Dict[str, type]:
+    """스키마 버전의 snake_case 이름(camel_to_snake(클래스명)) → 클래스 테이블."""
+    table = _snake_tables.get(version)
+    if table is None:
+        table = {}
+        for name, clazz in get_class_table(version).items():
+            # 이름이 겹치면 모듈 정의 순서상 먼저 나온 클래스 유지
+            table.setdefault(_CAMEL_RE.sub("_", name).lower(), clazz)
+        _snake_tables[version] = table
+    return table
+
+
+def get_class(name: str, version: str = DEFAULT_SCHEMA_VERSION) -> Optional[type]:
+    """스키마 버전에서 클래스 이름으로 dataclass 조회 (없으면 None)."""
+    return get_class_table(version).get(name)
+
+
+def _resolve_class(clazz: Union[str, type], version: str) -> type:
+    if isinstance(clazz, type):
+        return clazz
+    resolved = get_class(clazz, version)
+    if resolved is None:
+        raise ValueError(f"{version} 스키마에 {clazz} 클래스가 없습니다.")
+    return resolved
+
+
+def warm_schemas(versions: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """
+    스키마 모듈 import + 클래스 테이블 + 루트 클래스 바인딩 메타데이터/xsi:type 인덱스 구성.
+    이미 warm 된 버전은 건너뜀. 반환: {버전: 소요 시간(초)}
+    """
+    if versions is None:
+        versions = [v.strip() for v in SCHEMA_WARM_VERSIONS.split(",") if v.strip()]
+    elapsed: Dict[str, float] = {}
+    for version in versions:
+        if version in _warmed:
+            continue
+        started = time.perf_counter()
+        classes = get_class_table(version)
+        get_snake_table(version)
+        for name in ROOT_CLASSES:
+            clazz = classes.get(name)
+            if clazz is None:
+                continue
+            strict_context.build_recursive(clazz)
+            snake_context.build_recursive(clazz)
+        elapsed[version] = _warmed[version] = time.perf_counter() - started
+    # xsi:type 인덱스는 import 된 전체 모듈 기준이므로 마지막에 한 번만 구성
+    strict_context.build_xsi_cache()
+    snake_context.build_xsi_cache()
+    if elapsed:
+        logger.info(
+            "[schema_registry] warmed %s",
+            ", ".join(f"{v}={t * 1000:.0f}ms" for v, t in elapsed.items()),
+        )
+    return elapsed
+
+
+def warmed_versions() -> Dict[str, float]:
+    return dict(_warmed)
+
+
+def parse(
+    source: Union[str, bytes],
+    clazz: Union[str, type],
+    version: str = DEFAULT_SCHEMA_VERSION,
+    *,
+    strict: bool = False,
+) -> Any:
+    """
+    XML 문자열/bytes → dataclass 인스턴스.
+    strict=True 면 스키마에 없는 요소/속성이 있으면 ParserError.
+    """
+    data = source.encode("utf-8") if isinstance(source, str) else source
+    parser = strict_parser if strict else lenient_parser
+    return parser.parse(io.BytesIO(data), _resolve_class(clazz, version))
+
+
+def validate_or_raise(
+    xml_content: Union[str, bytes],
+    version: str = DEFAULT_SCHEMA_VERSION,
+    root: Union[str, type] = "DtAsset",
+) -> Any:
+    """
+    스키마 버전의 root 클래스로 엄격 파싱 (위반 시 ParserError, 값 변환 실패 시 ConverterError).
+    파싱 결과 반환.
+    """
+    return parse(xml_content, root, version, strict=True)
+
+
+# 스키마 위반으로 보는 예외 (선언되지 않은 xsi:type 접두사 등 값 변환 실패 포함)
+_INVALID = (ParserError, ConverterError)
+
+
+def validate(
+    xml_content: Union[str, bytes],
+    version: str = DEFAULT_SCHEMA_VERSION,
+    root: Union[str, type] = "DtAsset",
+) -> bool:
+    """스키마 버전의 root 클래스 구조에 맞으면 True."""
+    try:
+        validate_or_raise(xml_content, version, root)
+        return True
+    except _INVALID as e:
+        logger.info("[schema_registry] %s %s validation failed: %s", version, root, e)
+        return False
+
+
+def serialize(obj: Any) -> str:
+    """dataclass 인스턴스 → XML 문자열 (pretty print)."""
+    return serializer.render(obj)
+
+
+# ---- 증분 검증 ----
+
+_XSI_TYPE = "{http://www.w3.org/2001/XMLSchema-instance}type"
+DT_ASSET_NS = "http://digital-thread.re/dt_asset"
+_DT_ELEMENTS = f"{{{DT_ASSET_NS}}}dt_elements"
+_MAIN_WORKPLAN = f"{{{DT_ASSET_NS}}}main_workplan"
+_ITS_ELEMENTS = f"{{{DT_ASSET_NS}}}its_elements"
+_DT_PROJECT = f"{{{DT_ASSET_NS}}}dt_project"
+
+
+class _ForeignTag(Exception):
+    """검증 단위 이름인데 네임스페이스가 다른 요소 → 증분 검증 불가 (전체 검증으로)."""
+
+
+class _HashSet:
+    """검증 통과한 구조 해시 LRU 집합."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[tuple, None]" = OrderedDict()
+
+    def __contains__(self, key: tuple) -> bool:
+        if key in self._items:
+            self._items.move_to_end(key)
+            return True
+        return False
+
+    def add(self, key: tuple) -> None:
+        self._items[key] = None
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+_XML_PARSER = etree.XMLParser(huge_tree=True)
+_valid_shells = _HashSet(SCHEMA_VALIDATION_CACHE_SIZE)
+_valid_units = _HashSet(SCHEMA_VALIDATION_CACHE_SIZE)
+
+
+def _local(name: str) -> str:
+    return name.rsplit("}", 1)[-1].rsplit(":", 1)[-1]
+
+
+def _match(elem, qname: str) -> bool:
+    """
+    요소 태그가 qname({ns}local) 과 같으면 True.
+    로컬 이름만 같고 네임스페이스가 다르면 _ForeignTag
+    (단위를 떼어 내 검증하면 루트 태그 네임스페이스를 검사하지 않으므로).
+    """
+    if elem.tag == qname:
+        return True
+    if _local(elem.tag) == _local(qname):
+        raise _ForeignTag(elem.tag)
+    return False
+
+
+def _xsi_type(elem) -> Optional[str]:
+    """xsi:type 값을 {ns}local 로 해석 (접두사가 선언되지 않았으면 _ForeignTag)."""
+    value = elem.get(_XSI_TYPE)
+    if not value:
+        return None
+    prefix, _, local = value.rpartition(":")
+    ns = elem.nsmap.get(prefix or None)
+    if prefix and ns is None:
+        raise _ForeignTag(value)
+    return f"{{{ns}}}{local}" if ns else local
+
+
+def _split_units(root) -> List[Tuple[Any, Any, str]]:
+    """
+    검증 단위 (부모, 요소, 선언 타입명) 목록. 태그는 네임스페이스까지 일치해야 단위로 인정.
+    - dt_asset/dt_elements → DtElement
+      (단, dt_project 는 골격에 남기고 main_workplan/its_elements(workingstep) → Executable)
+    """
+    units = []
+    for elem in root.iterchildren(tag=etree.Element):
+        if not _match(elem, _DT_ELEMENTS):
+            continue
+        if _xsi_type(elem) == _DT_PROJECT:
+            for wp in elem.iterchildren(tag=etree.Element):
+                if not _match(wp, _MAIN_WORKPLAN):
+                    continue
+                for ws in wp.iterchildren(tag=etree.Element):
+                    if _match(ws, _ITS_ELEMENTS):
+                        units.append((wp, ws, "Executable"))
+        else:
+            units.append((root, elem, "DtElement"))
+    return units
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def validate_incremental(
+    xml_content: Union[str, bytes],
+    version: str = DEFAULT_SCHEMA_VERSION,
+    root: str = "DtAsset",
+    *,
+    full: bool = False,
+) -> bool:
+    """
+    증분 스키마 검증.
+
+    - 문서를 검증 단위(dt_elements / workingstep)와 나머지 골격(shell)으로 나누고 각각 구조 해시 계산
+    - 골격 해시가 이전에 전체 검증을 통과한 골격과 같으면, 처음 보는 단위만 해당 타입으로 엄격 검증
+    - 골격이 처음 보는 구조이거나 full=True 면 전체 검증 후 골격/단위 해시를 기록
+    - 증분 검증이 실패하면 전체 검증으로 다시 확인 (결과는 항상 전체 검증과 동일)
+    - 단위 이름(dt_elements/main_workplan/its_elements)인데 네임스페이스가 다른 요소가 있으면 전체 검증
+    - 해시 키에는 태그 QName 을 포함 (같은 내용이라도 다른 이름/네임스페이스면 다른 단위)
+    xsdata 파서는 요소 개수(min/max occurs)를 검사하지 않으므로 단위 추가/삭제가 골격 유효성을 바꾸지 않는다.
+    """
+    data = xml_content.encode("utf-8") if isinstance(xml_content, str) else xml_content
+    try:
+        tree = etree.fromstring(data, _XML_PARSER)
+        split = _split_units(tree)
+    except etree.XMLSyntaxError:
+        return False
+    except _ForeignTag as e:
+        logger.debug("[schema_registry] foreign tag %s, full validation", e)
+        return validate(data, version, root)
+
+    units = []
+    for parent, elem, type_name in split:
+        # 하위 트리 직렬화 시 상위 네임스페이스 선언 포함 (xsi:type 접두사 유지)
+        # tail(뒤따르는 공백)은 위치마다 달라지므로 해시에서 제외
+        unit_xml = etree.tostring(elem, with_tail=False)
+        units.append(((version, type_name, elem.tag, _digest(unit_xml)), unit_xml))
+        parent.remove(elem)
+    shell_key = (version, root, tree.tag, _digest(etree.tostring(tree)))
+    unit_keys = [key for key, _ in units]
+
+    if full or shell_key not in _valid_shells:
+        return _validate_full(data, version, root, shell_key, unit_keys)
+
+    for key, unit_xml in units:
+        if key in _valid_units:
+            continue
+        try:
+            validate_or_raise(unit_xml, version, key[1])
+        except _INVALID:
+            return _validate_full(data, version, root, shell_key, unit_keys)
+        _valid_units.add(key)
+    return True
+
+
+def _validate_full(
+    data: bytes, version: str, root: str, shell_key: tuple, unit_keys: List[tuple]
+) -> bool:
+    """전체 검증. 통과하면 골격/단위 해시를 검증 통과로 기록."""
+    if not validate(data, version, root):
+        return False
+    _valid_shells.add(shell_key)
+    for key in unit_keys:
+        _valid_units.add(key)
+    return True
+
+
+def clear_validation_cache() -> None:
+    _valid_shells.clear()
+    _valid_units.clear()
+
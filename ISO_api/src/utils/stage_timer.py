@@ -0,0 +1,51 @@
+"""
+요청 처리 단계별 소요 시간 측정 유틸.
+
+    timer = StageTimer("apply_cam")
+    with timer.stage("load"):
+        ...
+    timer.log()                                  # "[apply_cam] load=12.3ms ... total=40.1ms"
+    response.headers["Server-Timing"] = timer.server_timing()
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimer:
+    """단계 이름 → 누적 소요 시간(ms). 같은 이름으로 여러 번 측정하면 합산."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        return {**{k: round(v, 1) for k, v in self.stages.items()}, "total": round(self.total_ms, 1)}
+
+    def server_timing(self) -> str:
+        """Server-Timing 응답 헤더 값 (브라우저 개발자 도구에서 단계별 표시)."""
+        return ", ".join(f"{k};dur={v}" for k, v in self.as_dict().items())
+
+    def log(self, level: int = logging.INFO) -> None:
+        parts = " ".join(f"{k}={v}ms" for k, v in self.as_dict().items())
+        logger.log(level, "[%s] %s", self.name, parts)
@@ -0,0 +1,476 @@
+"""
+STEP → STL 변환(테셀레이션) 엔진.
+
+OpenCASCADE 메싱은 CPU를 오래 점유하는 동기 호출이라 async 핸들러 안에서 바로 돌리면
+ISO_api 이벤트 루프 전체가 멈춘다. 이 모듈은 변환을 별도 프로세스에서 실행한다.
+
+- 동시 실행 슬롯(TESSELLATION_WORKERS) + 대기열 상한(TESSELLATION_QUEUE) → 초과 시 503
+- 작업마다 별도 프로세스: 타임아웃/취소 시 해당 프로세스만 종료 (다른 작업/서버 영향 없음)
+- 작업 상태(queued/running/done/failed/timeout/cancelled)는 MongoDB(tessellation_jobs)에 기록
+  → 다른 워커 프로세스나 재시작 후에도 조회/대기/취소 가능, 끝난 작업은 TTL 후 삭제
+- 실행 중인 작업은 TESSELLATION_HEARTBEAT 마다 updated_at 갱신 (다른 프로세스의 취소 요청도 이때 확인),
+  실행하던 프로세스가 죽어 TESSELLATION_STALE_AFTER 동안 갱신이 없는 작업은 조회 시 failed 로 정리
+  (등록/조회/대기/취소/상태 기록은 VM 프로젝트 생성 작업과 같은 entities.job.JobRunner)
+- finalize 코루틴: 변환 결과(LOD별 파일 경로)를 받아 GridFS 업로드/프로젝트 연결 등 후처리
+- 한 작업에서 STEP 을 한 번만 읽고 여러 LOD(coarse/default/fine)를 binary STL 로 기록,
+  선택적으로 인덱스 메쉬(glTF binary, .glb)도 함께 기록
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing as mp
+import json
+import os
+import shutil
+import struct
+import tempfile
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+
+from src.entities.job import JOB_DONE, JOB_RUNNING, JobRunner
+from src.utils.env import get_env_or_default
+from src.utils.exceptions import CustomException, ExceptionEnum
+
+if TYPE_CHECKING:
+    from src.entities.tessellation_job import TessellationJobRepository
+
+logger = logging.getLogger(__name__)
+
+TESSELLATION_WORKERS = int(
+    get_env_or_default("TESSELLATION_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))
+)
+TESSELLATION_QUEUE = int(get_env_or_default("TESSELLATION_QUEUE", "16"))
+TESSELLATION_TIMEOUT = float(get_env_or_default("TESSELLATION_TIMEOUT", "600"))
+TESSELLATION_JOB_TTL = float(get_env_or_default("TESSELLATION_JOB_TTL", "3600"))
+# 실행 중 작업 상태 갱신 간격(초), 이 시간의 몇 배 동안 갱신이 없으면 중단된 작업으로 정리
+TESSELLATION_HEARTBEAT = float(get_env_or_default("TESSELLATION_HEARTBEAT", "10"))
+TESSELLATION_STALE_AFTER = float(
+    get_env_or_default("TESSELLATION_STALE_AFTER", str(TESSELLATION_HEARTBEAT * 6))
+)
+# 다른 프로세스에서 실행 중인 작업을 기다릴 때 상태 조회 간격(초)
+TESSELLATION_WAIT_INTERVAL = float(get_env_or_default("TESSELLATION_WAIT_INTERVAL", "1"))
+# spawn: 부모(Motor 스레드 등) 상태를 물려받지 않는 깨끗한 자식 프로세스
+TESSELLATION_START_METHOD = get_env_or_default("TESSELLATION_START_METHOD", "spawn")
+
+_POLL_INTERVAL = 0.1
+
+# LOD 프리셋: (linear deflection, angular deflection[rad])
+# default 는 기존 stl_convert 의 고정값(0.1)과 같은 결과
+LOD_PRESETS: Dict[str, Dict[str, float]] = {
+    "coarse": {"linear_deflection": 1.0, "angular_deflection": 0.8},
+    "default": {"linear_deflection": 0.1, "angular_deflection": 0.5},
+    "fine": {"linear_deflection": 0.02, "angular_deflection": 0.2},
+}
+_MIN_LINEAR_DEFLECTION = 0.001
+_MIN_ANGULAR_DEFLECTION = 0.01
+
+
+def resolve_lod(
+    lod: str = "default",
+    linear_deflection: Optional[float] = None,
+    angular_deflection: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    LOD 이름(+ 선택적 직접 지정값) → 메싱 파라미터.
+    캐시 키로 쓰이므로 소수 4자리로 정규화, 하한 미만 값은 하한으로 보정.
+    알 수 없는 LOD 이름은 ValueError.
+    """
+    if lod not in LOD_PRESETS:
+        raise ValueError(f"unknown lod: {lod}")
+    preset = LOD_PRESETS[lod]
+    lin = preset["linear_deflection"] if linear_deflection is None else linear_deflection
+    ang = preset["angular_deflection"] if angular_deflection is None else angular_deflection
+    lin = round(max(float(lin), _MIN_LINEAR_DEFLECTION), 4)
+    ang = round(max(float(ang), _MIN_ANGULAR_DEFLECTION), 4)
+    custom = (lin, ang) != (preset["linear_deflection"], preset["angular_deflection"])
+    return {
+        "lod": f"{lod}-{lin}-{ang}" if custom else lod,
+        "linear_deflection": lin,
+        "angular_deflection": ang,
+    }
+
+
+def _extract_indexed_mesh(shape):
+    """메싱된 shape 의 face 삼각분할을 (vertices float32[N,3], indices uint32[M]) 로 수집."""
+    import numpy as np
+    from OCC.Core.BRep import BRep_Tool
+    from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_REVERSED
+    from OCC.Core.TopExp import TopExp_Explorer
+    from OCC.Core.TopLoc import TopLoc_Location
+    from OCC.Core.TopoDS import topods
+
+    vertices: List[tuple] = []
+    indices: List[int] = []
+    exp = TopExp_Explorer(shape, TopAbs_FACE)
+    while exp.More():
+        face = topods.Face(exp.Current())
+        loc = TopLoc_Location()
+        tri = BRep_Tool.Triangulation(face, loc)
+        if tri is not None:
+            trsf = loc.Transformation()
+            base = len(vertices)
+            for i in range(1, tri.NbNodes() + 1):
+                p = tri.Node(i).Transformed(trsf)
+                vertices.append((p.X(), p.Y(), p.Z()))
+            reversed_face = face.Orientation() == TopAbs_REVERSED
+            for i in range(1, tri.NbTriangles() + 1):
+                a, b, c = tri.Triangle(i).Get()
+                if reversed_face:
+                    b, c = c, b
+                indices.extend((base + a - 1, base + b - 1, base + c - 1))
+        exp.Next()
+    return (
+        np.asarray(vertices, dtype="<f4").reshape(-1, 3),
+        np.asarray(indices, dtype="<u4"),
+    )
+
+
+def write_glb(path: str, vertices, indices) -> None:
+    """
+    위치(VEC3 float32) + 인덱스(uint32) 만 가진 최소 glTF 2.0 binary(.glb) 기록.
+    """
+    if len(indices) == 0:
+        raise RuntimeError("shape has no triangulation")
+
+    def _pad(data: bytes, fill: bytes) -> bytes:
+        return data + fill * (-len(data) % 4)
+
+    idx_bytes = _pad(indices.tobytes(), b"\x00")
+    pos_bytes = vertices.tobytes()
+    bin_chunk = _pad(idx_bytes + pos_bytes, b"\x00")
+    gltf = {
+        "asset": {"version": "2.0", "generator": "Digital-Thread ISO_api"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0}],
+        "meshes": [
+            {"primitives": [{"attributes": {"POSITION": 1}, "indices": 0, "mode": 4}]}
+        ],
+        "buffers": [{"byteLength": len(bin_chunk)}],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": 0, "byteLength": indices.nbytes, "target": 34963},
+            {
+                "buffer": 0,
+                "byteOffset": len(idx_bytes),
+                "byteLength": len(pos_bytes),
+                "target": 34962,
+            },
+        ],
+        "accessors": [
+            {
+                "bufferView": 0,
+                "componentType": 5125,
+                "count": int(len(indices)),
+                "type": "SCALAR",
+            },
+            {
+                "bufferView": 1,
+                "componentType": 5126,
+                "count": int(len(vertices)),
+                "type": "VEC3",
+                "min": [float(v) for v in vertices.min(axis=0)],
+                "max": [float(v) for v in vertices.max(axis=0)],
+            },
+        ],
+    }
+    json_chunk = _pad(json.dumps(gltf, separators=(",", ":")).encode("utf-8"), b" ")
+    total = 12 + 8 + len(json_chunk) + 8 + len(bin_chunk)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<III", 0x46546C67, 2, total))
+        f.write(struct.pack("<II", len(json_chunk), 0x4E4F534A))
+        f.write(json_chunk)
+        f.write(struct.pack("<II", len(bin_chunk), 0x004E4942))
+        f.write(bin_chunk)
+
+
+def tessellate_lods(step_path: str, outputs: List[Dict[str, Any]]) -> None:
+    """
+    STEP 파일을 한 번 읽어 LOD 별로 메싱 후 기록 (OpenCASCADE, 호출한 프로세스에서 동기 실행).
+
+    outputs 항목: {"linear_deflection", "angular_deflection", "stl_path", "mesh_path"(선택)}
+    - stl_path: binary STL
+    - mesh_path: 인덱스 메쉬 (.glb)
+    읽기 실패 시 RuntimeError.
+    """
+    from OCC.Core.STEPControl import STEPControl_Reader
+    from OCC.Core.StlAPI import StlAPI_Writer
+    from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+    from OCC.Core.IFSelect import IFSelect_RetDone
+
+    try:
+        from OCC.Core.BRepTools import breptools
+
+        clean = breptools.Clean
+    except ImportError:  # pythonocc < 7.7
+        from OCC.Core.BRepTools import breptools_Clean as clean
+
+    reader = STEPControl_Reader()
+    status = reader.ReadFile(step_path)
+    if status != IFSelect_RetDone:
+        raise RuntimeError(f"STEP read failed: {step_path}")
+
+    reader.TransferRoots()
+    shape = reader.Shape()
+
+    for out in outputs:
+        # 이전 LOD 의 삼각분할 제거 (남아 있으면 더 거친 값으로 다시 메싱되지 않음)
+        clean(shape)
+        mesh = BRepMesh_IncrementalMesh(
+            shape, out["linear_deflection"], False, out["angular_deflection"]
+        )
+        mesh.Perform()
+
+        stl_writer = StlAPI_Writer()
+        stl_writer.SetASCIIMode(False)
+        stl_writer.Write(shape, out["stl_path"])
+
+        if out.get("mesh_path"):
+            vertices, indices = _extract_indexed_mesh(shape)
+            write_glb(out["mesh_path"], vertices, indices)
+
+
+def tessellate_step(
+    step_path: str,
+    stl_path: str,
+    linear_deflection: float = 0.1,
+    angular_deflection: float = 0.5,
+) -> None:
+    """STEP 파일 → binary STL 파일 (단일 LOD)."""
+    tessellate_lods(
+        step_path,
+        [
+            {
+                "linear_deflection": linear_deflection,
+                "angular_deflection": angular_deflection,
+                "stl_path": stl_path,
+            }
+        ],
+    )
+
+
+def _worker_entry(conn, step_path: str, outputs: List[Dict[str, Any]]) -> None:
+    """자식 프로세스 진입점: 결과를 ("ok", None) / ("error", 메시지)로 돌려준다."""
+    try:
+        tessellate_lods(step_path, outputs)
+        conn.send(("ok", None))
+    except BaseException as e:  # noqa: BLE001 - 자식 프로세스 경계
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    """작업 문서 → 상태 조회 응답 (context 값은 최상위로 펼침)."""
+    return {
+        "job_id": job["_id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "result": job.get("result"),
+        "error": job.get("error"),
+        **(job.get("context") or {}),
+    }
+
+
+# LOD 별 {"lod", "linear_deflection", "angular_deflection", "stl_path", "mesh_path"} 목록을 받음
+Finalizer = Callable[[List[Dict[str, Any]]], Awaitable[Dict[str, Any]]]
+# 실패/타임아웃/취소로 끝난 작업 문서를 받음
+ErrorHook = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class TessellationEngine(JobRunner):
+    """
+    STEP → STL 변환 작업 큐 (상태는 TessellationJobRepository 에 기록, 실행 규칙은 JobRunner).
+
+    submit() 은 작업 문서를 즉시 반환하고, 실제 변환은 백그라운드 태스크가
+    슬롯을 얻은 뒤 자식 프로세스에서 실행한다. wait()/get()/cancel() 로 상태를 조회/제어.
+    """
+
+    log_name = "tessellation"
+    timeout_message = "conversion exceeded {timeout:.0f}s"
+
+    def __init__(
+        self,
+        workers: int = TESSELLATION_WORKERS,
+        max_queue: int = TESSELLATION_QUEUE,
+        timeout: float = TESSELLATION_TIMEOUT,
+        job_ttl: float = TESSELLATION_JOB_TTL,
+        start_method: str = TESSELLATION_START_METHOD,
+        heartbeat: float = TESSELLATION_HEARTBEAT,
+        stale_after: float = TESSELLATION_STALE_AFTER,
+    ):
+        super().__init__(
+            workers=workers,
+            timeout=timeout,
+            ttl=job_ttl,
+            stale_after=stale_after,
+            wait_interval=TESSELLATION_WAIT_INTERVAL,
+            heartbeat=heartbeat,
+        )
+        self.max_queue = max_queue
+        self._ctx = mp.get_context(start_method)
+
+    async def submit(
+        self,
+        repo: "TessellationJobRepository",
+        step_path: str,
+        finalize: Finalizer,
+        *,
+        lods: Optional[List[Dict[str, Any]]] = None,
+        mesh: bool = False,
+        timeout: Optional[float] = None,
+        context: Optional[Dict[str, Any]] = None,
+        cleanup_input: bool = True,
+        on_error: Optional[ErrorHook] = None,
+        key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        변환 작업 등록 후 작업 문서 반환. 이 프로세스의 대기+실행 중 작업이 workers+max_queue 이상이면
+        CONVERSION_QUEUE_FULL(503).
+
+        Args:
+            repo: 작업 상태 저장소
+            step_path (str): 입력 STEP 로컬 경로
+            finalize: LOD 별 출력 경로 목록을 받아 후처리 후 결과 dict 반환 (출력 파일은 엔진이 삭제)
+            lods (list, optional): resolve_lod() 결과 목록, 기본 [default]
+            mesh (bool): LOD 마다 인덱스 메쉬(.glb)도 기록할지 여부
+            timeout (float, optional): 변환 제한 시간(초), 기본 TESSELLATION_TIMEOUT
+            context (dict, optional): 상태 조회 시 함께 내려줄 값 (step_id 등)
+            cleanup_input (bool): 작업 종료 시 step_path 삭제 여부
+            on_error (optional): 실패/타임아웃/취소 시 호출 (업로드된 원본 정리 등)
+            key (str, optional): 같은 key 의 작업이 진행 중이면(다른 프로세스 포함) 새로 만들지 않고 그 작업을 반환
+        """
+        try:
+            active = await self._find_active(repo, key)
+            if active is None:
+                if self.pending() >= self.workers + self.max_queue:
+                    raise CustomException(ExceptionEnum.CONVERSION_QUEUE_FULL)
+                job = self.new_job(
+                    lods=list(lods or [resolve_lod()]),
+                    mesh=mesh,
+                    timeout=timeout or self.timeout,
+                    context=dict(context or {}),
+                )
+                if key is not None:
+                    job["key"] = key
+                active = await self._insert(repo, job)
+            if active is not None:
+                if cleanup_input:
+                    _remove_quietly(step_path)
+                return active
+        except BaseException:
+            if cleanup_input:
+                _remove_quietly(step_path)
+            raise
+
+        self._start(job["_id"], self._run(repo, job, step_path, finalize, cleanup_input, on_error))
+        return job
+
+    # ----------------- 내부 -----------------
+
+    async def _run(
+        self,
+        repo: "TessellationJobRepository",
+        job: Dict[str, Any],
+        step_path: str,
+        finalize: Finalizer,
+        cleanup_input: bool,
+        on_error: Optional[ErrorHook],
+    ):
+        job_id = job["_id"]
+
+        async def work() -> Dict[str, Any]:
+            out_dir: Optional[str] = None
+            try:
+                async with self._slots:
+                    await repo.update_job(job_id, status=JOB_RUNNING, started_at=time.time())
+                    out_dir = tempfile.mkdtemp(prefix="tessellation_")
+                    outputs = [
+                        {
+                            **lod,
+                            "stl_path": os.path.join(out_dir, f"{i}.stl"),
+                            "mesh_path": os.path.join(out_dir, f"{i}.glb") if job["mesh"] else None,
+                        }
+                        for i, lod in enumerate(job["lods"])
+                    ]
+                    await self._convert(step_path, outputs, job["timeout"])
+                return {"result": await finalize(outputs)}
+            finally:
+                if out_dir:
+                    shutil.rmtree(out_dir, ignore_errors=True)
+                if cleanup_input:
+                    _remove_quietly(step_path)
+
+        fields = await self._execute(repo, job, work)
+        if fields["status"] != JOB_DONE and on_error is not None:
+            try:
+                await on_error({**job, **fields})
+            except Exception as e:
+                logger.warning("[tessellation] on_error hook failed: %s / %s", job_id, e)
+
+    async def _convert(
+        self, step_path: str, outputs: List[Dict[str, Any]], timeout: float
+    ) -> None:
+        """자식 프로세스에서 변환 실행, 제한 시간 초과/취소 시 프로세스 종료."""
+        parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_worker_entry,
+            args=(child_conn, step_path, outputs),
+            daemon=True,
+        )
+        proc.start()
+        child_conn.close()
+        deadline = time.monotonic() + timeout
+        try:
+            while not parent_conn.poll():
+                if not proc.is_alive():
+                    # 메시지 없이 종료 (segfault 등)
+                    if parent_conn.poll():
+                        break
+                    raise RuntimeError(f"worker exited with code {proc.exitcode}")
+                if time.monotonic() > deadline:
+                    raise asyncio.TimeoutError()
+                await asyncio.sleep(_POLL_INTERVAL)
+            try:
+                status, message = parent_conn.recv()
+            except EOFError:
+                # 결과를 보내지 못하고 종료 (파이프가 닫혀 poll 은 True)
+                await asyncio.to_thread(proc.join, 1)
+                raise RuntimeError(f"worker exited with code {proc.exitcode}")
+            if status != "ok":
+                raise RuntimeError(message)
+        finally:
+            if proc.is_alive():
+                proc.kill()
+            # 종료 대기는 스레드에서 (이벤트 루프를 막지 않음)
+            await asyncio.to_thread(proc.join, 1)
+            parent_conn.close()
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        logger.debug("[tessellation] temp file cleanup failed: %s / %s", path, e)
+
+
+_engine: Optional[TessellationEngine] = None
+
+
+def get_tessellation_engine() -> TessellationEngine:
+    """프로세스 전역 변환 엔진 (startup 이후 첫 호출 시 생성)."""
+    global _engine
+    if _engine is None:
+        _engine = TessellationEngine()
+    return _engine
+
+
+async def shutdown_tessellation_engine() -> None:
+    global _engine
+    if _engine is not None:
+        await _engine.shutdown()
+        _engine = None
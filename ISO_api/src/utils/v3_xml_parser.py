@@ -1,13 +1,8 @@
 import re, io
+import hashlib
 import xmltodict
 import dataclasses
-from xsdata.formats.dataclass.parsers import XmlParser
-from xsdata.formats.dataclass.parsers.config import ParserConfig
-from xsdata.formats.dataclass.context import XmlContext
-from xsdata.utils import text
-from xsdata.formats.dataclass.context import XmlContext
-from xsdata.formats.dataclass.serializers import XmlSerializer
-from xsdata.formats.dataclass.serializers.config import SerializerConfig
+from dataclasses import dataclass
 from xsdata.exceptions import ParserError
 import xml.etree.ElementTree as ET
 from typing import (
@@ -23,11 +18,11 @@ from typing import (
 )
 from enum import Enum
 
-from src.entities.model_v31 import *
+from src.utils import schema_registry
 
 import logging
 
-DEFAULT_SCHEMA_VERSION = "v31"
+DEFAULT_SCHEMA_VERSION = schema_registry.DEFAULT_SCHEMA_VERSION
 
 # -------- 경로 토크나이저용 정규식 --------
 _INDEX_RE = re.compile(r"^\s*(?P<idx>\d+)\s*$")
@@ -49,37 +44,26 @@ if not logger.handlers:  # 중복 핸들러 방지
     )
 
 # --- xsdata 파서 및 시리얼라이저 설정 ---
+# 스키마 레지스트리의 공유 context/파서/시리얼라이저 사용 (프로세스 전체에서 메타데이터 캐시 공유)
+lenient_parser = schema_registry.lenient_parser
+strict_parser = schema_registry.strict_parser
+serializer = schema_registry.serializer
 
-# 관대한 파서 (스키마에 없는 속성은 무시)
-lenient_parser_config = ParserConfig(fail_on_unknown_properties=False)
-lenient_context = XmlContext(element_name_generator=text.snake_case)
-lenient_parser = XmlParser(config=lenient_parser_config, context=lenient_context)
 
-# 엄격한 파서 (유효성 검증용)
-strict_parser = XmlParser()
-
-# XML 생성용 시리얼라이저
-serializer_config = SerializerConfig(pretty_print=True)
-serializer = XmlSerializer(config=serializer_config)
-
-
-def validate_xml_against_schema(xml_content: str) -> bool:
+def validate_xml_against_schema(xml_content: str, *, full: bool = False) -> bool:
     """
     주어진 XML 문자열이 DtAsset 스키마 구조에 맞는지 엄격하게 검증합니다.
+    - 기본: 증분 검증 (이전에 통과한 골격은 구조 해시로 확인, 새로 바뀐 dt_elements/workingstep 만 검증)
+    - full=True: 항상 문서 전체 검증
     """
-    try:
-        # 문자열을 바이트로 변환하여 BytesIO 사용
-        xml_bytes = xml_content.encode("utf-8")
-        stream = io.BytesIO(xml_bytes)
-
-        # 엄격한 파서(strict_parser)를 사용하여 검증
-        strict_parser.parse(stream, DtAsset)
+    # 엄격한 파서(strict_parser)를 사용하여 검증
+    if schema_registry.validate_incremental(
+        xml_content, DEFAULT_SCHEMA_VERSION, "DtAsset", full=full
+    ):
         print("성공: XML이 스키마 구조와 일치합니다.")
         return True
-    except ParserError as e:
-        print(f"실패: XML이 스키마 구조와 일치하지 않습니다.")
-        print(f"오류 원인: {e}")
-        return False
+    print(f"실패: XML이 스키마 구조와 일치하지 않습니다.")
+    return False
 
 
 def validate_dtasset_or_raise(xml_text: str) -> None:
@@ -88,7 +72,7 @@ def validate_dtasset_or_raise(xml_text: str) -> None:
     위반 시 ParserError 포함한 ValueError를 던진다.
     """
     try:
-        strict_parser.parse(io.BytesIO(xml_text.encode("utf-8")), DtAsset)
+        schema_registry.validate_or_raise(xml_text, DEFAULT_SCHEMA_VERSION, "DtAsset")
     except ParserError as e:
         # xsdata의 ParserError를 그대로 올리면 FastAPI에서 직렬화하기 까다로우니 깔끔하게 래핑
         raise ValueError(f"Schema validation failed: {e}")  # 422로 매핑 예정
@@ -149,7 +133,7 @@ def remove_empty_lists(data):
 
 
 def get_class_by_name(class_name):
-    return globals().get(class_name)
+    return schema_registry.get_class(class_name, DEFAULT_SCHEMA_VERSION)
 
 
 def camel_to_snake(name):
@@ -252,6 +236,25 @@ def _inject_xsi_type_once(container: Dict[str, Any], key: str, py_type: type):
             container[key]["@xsi:type"] = name
 
 
+# dataclass 타입 → ((필드명, required, 하위 dataclass 타입), ...) (타입별 1회 계산)
+_FIELD_SPECS: Dict[type, Tuple[Tuple[str, bool, Optional[type]], ...]] = {}
+
+
+def _field_specs(dataclass_type: type) -> Tuple[Tuple[str, bool, Optional[type]], ...]:
+    specs = _FIELD_SPECS.get(dataclass_type)
+    if specs is None:
+        specs = tuple(
+            (
+                fname,
+                bool((getattr(fobj, "metadata", {}) or {}).get("required", False)),
+                _resolve_dataclass_field_type(fobj.type),
+            )
+            for fname, fobj in dataclass_type.__dataclass_fields__.items()
+        )
+        _FIELD_SPECS[dataclass_type] = specs
+    return specs
+
+
 def _validate_required_fields(
     dataclass_type: type, node: Dict[str, Any], path: str = ""
 ) -> list[str]:
@@ -263,15 +266,14 @@ def _validate_required_fields(
     if not hasattr(dataclass_type, "__dataclass_fields__"):
         return missing
 
-    for fname, fobj in dataclass_type.__dataclass_fields__.items():
-        fmeta = getattr(fobj, "metadata", {}) or {}
+    for fname, required, inner_dt in _field_specs(dataclass_type):
         fpath = f"{path}.{fname}" if path else fname
 
         present = fname in node
         val = node.get(fname)
 
         # required 검사
-        if fmeta.get("required", False):
+        if required:
             if (
                 (not present)
                 or val in (None, "", {})
@@ -280,7 +282,6 @@ def _validate_required_fields(
                 missing.append(fpath)
 
         # 하위 dataclass 검사
-        inner_dt = _resolve_dataclass_field_type(fobj.type)
         if inner_dt and isinstance(val, dict):
             missing.extend(_validate_required_fields(inner_dt, val, fpath))
         elif inner_dt and isinstance(val, list):
@@ -294,8 +295,12 @@ def _validate_required_fields(
 
 
 def create_feature_xml(
-    json_data: Dict[str, Any], mapping_data: dict, dataclass_type=MachiningWorkingstep
+    json_data: Dict[str, Any], mapping_data: dict, dataclass_type=None
 ):
+    # 경로의 클래스명 → 스키마 클래스 (lazy 로드된 스키마 클래스 테이블)
+    classes = schema_registry.get_class_table(DEFAULT_SCHEMA_VERSION)
+    if dataclass_type is None:
+        dataclass_type = classes["MachiningWorkingstep"]
     nested_structure = {
         "its_id": {},
         "its_secplane": {},
@@ -317,11 +322,11 @@ def create_feature_xml(
         for i, part in enumerate(path_parts):
             if part[0].isupper():
                 # 클래스 전환(기존 로직 그대로)
-                if part in globals():
-                    new_type = globals()[part]
+                if part in classes:
+                    new_type = classes[part]
                     if isinstance(new_type, type):
                         if prev_key and prev_key[0].isupper():
-                            parent_type = globals().get(prev_key)
+                            parent_type = classes.get(prev_key)
                             if (
                                 parent_type
                                 and isinstance(parent_type, type)
@@ -395,13 +400,8 @@ def _snake_name(py_type: type) -> str:
 
 
 def _class_by_snake(snake_name: str) -> type | None:
-    # globals() 에 등록된 dataclass들 중 snake_case 이름이 일치하는 타입을 찾는다
-    target = snake_name.strip()
-    for _name, obj in globals().items():
-        if isinstance(obj, type) and hasattr(obj, "__name__"):
-            if camel_to_snake(obj.__name__) == target:
-                return obj
-    return None
+    # 스키마 클래스의 snake_case 이름 테이블에서 조회 (레지스트리가 한 번만 구성)
+    return schema_registry.get_snake_table(DEFAULT_SCHEMA_VERSION).get(snake_name.strip())
 
 
 def _inject_or_upgrade_xsi_type(container: Dict[str, Any], key: str, new_type: type):
@@ -436,40 +436,62 @@ def _inject_or_upgrade_xsi_type(container: Dict[str, Any], key: str, new_type: t
         pass
 
 
-def create_feature_xml_temp(
-    json_data: Dict[str, Any],
-    mapping_data: dict,
-    dataclass_type=MachiningWorkingstep,  # 루트 스키마 타입
-    *,
-    strict_required: bool = True,  # ← 추가: 기본은 기존처럼 엄격, 필요 시 False로 완화
-) -> str:
-    """
-    CAM JSON + 매핑(14649 경로) → its_elements XML 생성.
+# ---- 매핑 컴파일 (create_feature_xml_temp) ----
+# 매핑(json_key → 14649 경로)의 클래스/필드/enum/required/xsi:type 해석을 매핑 내용별로 1회만 수행하고,
+# CAM 오퍼레이션마다 컴파일된 단계만 실행한다.
 
-    엄격 모드(strict_required=True):
-      - 경로의 '클래스명'은 실제 타입으로 해석. 없으면 에러.
-      - 경로의 '필드명'은 current_type의 dataclass 필드에 반드시 존재해야 함. 없으면 에러.
-      - required=True 인 필드는 값이 비어 있으면 에러.
-      - @xsi:type 은 노드마다 1회만 주입.
 
-    완화 모드(strict_required=False):
-      - 상동이나, required 누락을 에러로 올리지 않고 그대로 진행(빈값/누락 허용).
-      - 후속 단계(라우터 등)에서 ensure_* 류로 더미 보강 → 최종 전체 XML로 스키마 검증.
+@dataclass(frozen=True)
+class _PlanStep:
+    name: str  # dataclass 필드명
+    is_leaf: bool
+    xsi_type: Optional[str]  # 현재 노드에 주입할 @xsi:type (첫 필드는 None)
+    xsi_upgradable: frozenset  # 이 값들 중 하나가 이미 있으면 xsi_type 으로 승격
+    enum_type: Optional[type]
+    required: bool
+
+
+@dataclass(frozen=True)
+class _PlanEntry:
+    json_key: str
+    json_path: Tuple[str, ...]
+    dataclass_path: str
+    steps: Tuple[_PlanStep, ...]
+
+
+@dataclass(frozen=True)
+class _MappingPlan:
+    root_type: type
+    entries: Tuple[_PlanEntry, ...]
+
+
+_MAPPING_PLAN_CACHE: Dict[Tuple[str, type], _MappingPlan] = {}
+_MAPPING_PLAN_CACHE_SIZE = 32
+
+
+def _xsi_upgradable(py_type: type) -> frozenset:
     """
-    nested = {
-        "its_id": {},
-        "its_secplane": {},
-        "its_feature": {},
-        "its_operation": {},
-        "its_effect": {},
-    }
+    _inject_or_upgrade_xsi_type 의 승격 조건(issubclass(py_type, 기존 타입))을 만족하는
+    기존 @xsi:type 값 집합 (= MRO 상 조상 클래스의 snake_case 이름).
+    """
+    snake_table = schema_registry.get_snake_table(DEFAULT_SCHEMA_VERSION)
+    return frozenset(
+        key
+        for key in (camel_to_snake(c.__name__) for c in py_type.__mro__)
+        if snake_table.get(key) in py_type.__mro__
+    )
+
+
+def _compile_mapping_plan(mapping_data: dict, dataclass_type: type) -> _MappingPlan:
+    """매핑 경로 전체를 해석해 _MappingPlan 생성 (경로 오류는 여기서 ValueError)."""
+    classes = schema_registry.get_class_table(DEFAULT_SCHEMA_VERSION)
+    upgradable_cache: Dict[type, frozenset] = {}
+    entries = []
 
     for json_key, dataclass_path in mapping_data.items():
         path_parts = dataclass_path.split(".")
         current_type = dataclass_type
-        parent = nested
-        grand_parent = None
-        prev_key = None
+        steps = []
 
         for i, part in enumerate(path_parts):
             if not part:
@@ -479,70 +501,155 @@ def create_feature_xml_temp(
 
             if part[0].isupper():
                 # ---- 클래스명 전환(엄격) ----
-                new_type = globals().get(part)
+                new_type = classes.get(part)
                 if not (isinstance(new_type, type)):
                     raise ValueError(
                         f"알 수 없는 클래스명 '{part}' in path '{dataclass_path}' (json_key={json_key})"
                     )
                 current_type = new_type
-            else:
-                # ---- 필드명(엄격: 타입에 실제 필드가 있어야 함) ----
-                if (
-                    not hasattr(current_type, "__dataclass_fields__")
-                    or part not in current_type.__dataclass_fields__
-                ):
-                    raise ValueError(
-                        f"스키마 불일치: '{getattr(current_type,'__name__',current_type)}'에 필드 '{part}' 없음 "
-                        f"(json_key={json_key}, path={dataclass_path})"
+                continue
+
+            # ---- 필드명(엄격: 타입에 실제 필드가 있어야 함) ----
+            if (
+                not hasattr(current_type, "__dataclass_fields__")
+                or part not in current_type.__dataclass_fields__
+            ):
+                raise ValueError(
+                    f"스키마 불일치: '{getattr(current_type,'__name__',current_type)}'에 필드 '{part}' 없음 "
+                    f"(json_key={json_key}, path={dataclass_path})"
+                )
+
+            # 첫 필드 이후에는 현재 노드에 xsi:type 주입/승격
+            xsi_type = None
+            upgradable = frozenset()
+            if steps:
+                xsi_type = _snake_name(current_type)
+                upgradable = upgradable_cache.get(current_type)
+                if upgradable is None:
+                    upgradable = upgradable_cache[current_type] = _xsi_upgradable(
+                        current_type
                     )
 
-                # 상위 노드에 xsi:type 1회 주입
-                if prev_key is not None and grand_parent is not None:
-                    _inject_or_upgrade_xsi_type(grand_parent, prev_key, current_type)
+            is_leaf = i == len(path_parts) - 1
+            fobj = current_type.__dataclass_fields__[part]
+            steps.append(
+                _PlanStep(
+                    name=part,
+                    is_leaf=is_leaf,
+                    xsi_type=xsi_type,
+                    xsi_upgradable=upgradable,
+                    enum_type=_resolve_enum_type(fobj.type) if is_leaf else None,
+                    required=is_leaf and bool(fobj.metadata.get("required", False)),
+                )
+            )
 
-                is_leaf = i == len(path_parts) - 1
+        entries.append(
+            _PlanEntry(
+                json_key=json_key,
+                json_path=tuple(json_key.split(".")),
+                dataclass_path=dataclass_path,
+                steps=tuple(steps),
+            )
+        )
 
-                if is_leaf:
-                    # CAM 값 추출
-                    value = get_nested_value(json_data, json_key.split("."))
+    return _MappingPlan(root_type=dataclass_type, entries=tuple(entries))
 
-                    # --- enum 처리: 값/이름 둘 다 허용 (대소문자 안전)
-                    fobj = current_type.__dataclass_fields__[part]
-                    enum_type = _resolve_enum_type(fobj.type)
-                    if enum_type:
-                        if value is None or (
-                            isinstance(value, str) and not value.strip()
-                        ):
-                            value = None
-                        else:
-                            enum_val = _resolve_enum(enum_type, value)
-                            # ★ enum 객체 그대로 쓰지 말고 .value 로 교체
-                            value = (
-                                enum_val.value
-                                if isinstance(enum_val, Enum)
-                                else enum_val
-                            )
-
-                    # required 즉시 검사(엄격 모드에서만 실패)
-                    if fobj.metadata.get("required", False) and strict_required:
-                        if value in (None, ""):
-                            raise ValueError(
-                                f"required 필드 누락: '{part}' "
-                                f"(json_key={json_key}, path={dataclass_path})"
-                            )
 
-                    parent[part] = value
+def get_mapping_plan(mapping_data: dict, dataclass_type=None) -> _MappingPlan:
+    """매핑 내용 해시(+루트 타입) 기준으로 캐시된 컴파일 결과 반환."""
+    if dataclass_type is None:
+        dataclass_type = schema_registry.get_class("MachiningWorkingstep")
+    # 매핑은 str → str 이므로 repr 로 충분 (순서 포함)
+    digest = hashlib.sha1(repr(tuple(mapping_data.items())).encode("utf-8")).hexdigest()
+    key = (digest, dataclass_type)
+    plan = _MAPPING_PLAN_CACHE.get(key)
+    if plan is None:
+        plan = _compile_mapping_plan(mapping_data, dataclass_type)
+        if len(_MAPPING_PLAN_CACHE) >= _MAPPING_PLAN_CACHE_SIZE:
+            _MAPPING_PLAN_CACHE.pop(next(iter(_MAPPING_PLAN_CACHE)))
+        _MAPPING_PLAN_CACHE[key] = plan
+    return plan
+
+
+def _apply_mapping_plan(
+    plan: _MappingPlan, json_data: Dict[str, Any], strict_required: bool
+) -> Dict[str, Any]:
+    """컴파일된 매핑을 CAM 오퍼레이션 하나에 적용해 its_elements dict 생성."""
+    nested = {
+        "its_id": {},
+        "its_secplane": {},
+        "its_feature": {},
+        "its_operation": {},
+        "its_effect": {},
+    }
+
+    for entry in plan.entries:
+        parent = nested
+        for step in entry.steps:
+            # 상위 노드에 xsi:type 주입 (기존 타입의 서브클래스면 승격)
+            if step.xsi_type is not None:
+                cur = parent.get("@xsi:type")
+                if not cur or cur.strip() in step.xsi_upgradable:
+                    parent["@xsi:type"] = step.xsi_type
+
+            if not step.is_leaf:
+                # 중간 노드: dict 보장 후 하강
+                child = parent.get(step.name)
+                if not isinstance(child, dict):
+                    child = parent[step.name] = {}
+                parent = child
+                continue
+
+            # CAM 값 추출
+            value = get_nested_value(json_data, entry.json_path)
+
+            # --- enum 처리: 값/이름 둘 다 허용 (대소문자 안전)
+            if step.enum_type:
+                if value is None or (isinstance(value, str) and not value.strip()):
+                    value = None
                 else:
-                    # 중간 노드: dict 보장
-                    if part not in parent or not isinstance(parent[part], dict):
-                        parent[part] = {}
-                    # 하강
-                    grand_parent = parent
-                    prev_key = part
-                    parent = parent[part]
+                    enum_val = _resolve_enum(step.enum_type, value)
+                    # ★ enum 객체 그대로 쓰지 말고 .value 로 교체
+                    value = enum_val.value if isinstance(enum_val, Enum) else enum_val
+
+            # required 즉시 검사(엄격 모드에서만 실패)
+            if step.required and strict_required and value in (None, ""):
+                raise ValueError(
+                    f"required 필드 누락: '{step.name}' "
+                    f"(json_key={entry.json_key}, path={entry.dataclass_path})"
+                )
+
+            parent[step.name] = value
+
+    return nested
+
+
+def create_feature_xml_temp(
+    json_data: Dict[str, Any],
+    mapping_data: dict,
+    dataclass_type=None,  # 루트 스키마 타입
+    *,
+    strict_required: bool = True,  # ← 추가: 기본은 기존처럼 엄격, 필요 시 False로 완화
+) -> str:
+    """
+    CAM JSON + 매핑(14649 경로) → its_elements XML 생성.
+    매핑 해석은 get_mapping_plan() 으로 매핑 내용별 1회만 수행 (같은 매핑의 오퍼레이션 반복 변환 시 재사용).
+
+    엄격 모드(strict_required=True):
+      - 경로의 '클래스명'은 실제 타입으로 해석. 없으면 에러.
+      - 경로의 '필드명'은 current_type의 dataclass 필드에 반드시 존재해야 함. 없으면 에러.
+      - required=True 인 필드는 값이 비어 있으면 에러.
+      - @xsi:type 은 노드마다 1회만 주입.
+
+    완화 모드(strict_required=False):
+      - 상동이나, required 누락을 에러로 올리지 않고 그대로 진행(빈값/누락 허용).
+      - 후속 단계(라우터 등)에서 ensure_* 류로 더미 보강 → 최종 전체 XML로 스키마 검증.
+    """
+    plan = get_mapping_plan(mapping_data, dataclass_type)
+    nested = _apply_mapping_plan(plan, json_data, strict_required)
 
     # 전체 트리 required 일괄 검사(엄격 모드에서만 예외)
-    missing = _validate_required_fields(dataclass_type, nested)
+    missing = _validate_required_fields(plan.root_type, nested)
     if missing and strict_required:
         raise ValueError("required 필드 누락: " + ", ".join(missing))
     if missing and not strict_required:
@@ -683,6 +790,13 @@ def extract_dtasset_meta(
     except Exception as e:
         raise ValueError(f"XML 파싱 실패: {e}")
 
+    return dtasset_meta_from_doc(doc, strict=strict)
+
+
+def dtasset_meta_from_doc(
+    doc: Dict[str, Any], *, strict: bool = True
+) -> Dict[str, Optional[str]]:
+    """이미 파싱된 dt_asset dict에서 메타데이터 추출 (extract_dtasset_meta 공용)."""
     dt_asset = _get_by_local(doc, "dt_asset")
     if not isinstance(dt_asset, dict):
         raise ValueError("루트에 <dt_asset> 가 없습니다.")
@@ -730,6 +844,155 @@ def extract_dtasset_meta(
     return meta
 
 
+# -------- 구조화 프로젝션 (assets.parsed) --------
+
+# 프로젝션 포맷 버전: 추출 규칙이 바뀌면 올려서 재계산 대상 식별
+# (2: 조회에 쓰지 않는 tree/workplan_ids/workingstep_ids 제거, 3: refs 값 소문자 정규화)
+PROJECTION_VERSION = 3
+
+# reference/keys 중 프로젝션에 보존하는 키 (Mongo 필드명으로 그대로 사용)
+REFERENCE_KEYS = ("DT_GLOBAL_ASSET", "DT_ASSET", "DT_PROJECT", "WORKPLAN", "WORKINGSTEP")
+
+
+def normalize_ref_value(value: Optional[str]) -> Optional[str]:
+    """
+    refs 값 정규화 (앞뒤 공백 제거 + 소문자).
+    저장(프로젝션)과 조회(_ref_match) 양쪽에 같이 적용 → 예전 regex($options "i") 처럼 대소문자 무시 매칭
+    """
+    if not isinstance(value, str):
+        return value
+    return value.strip().lower() or None
+
+_PROJECTION_NAMESPACES = {
+    "http://digital-thread.re/dt_asset": None,
+    "http://digital-thread.re/iso14649": None,
+    "http://www.w3.org/2001/XMLSchema-instance": "xsi",
+}
+
+
+def _iter_workplans_in_project(project_node: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    """find_workplan_in_project 와 동일한 규칙으로 dt_project 아래 workplan 노드를 순회."""
+    wp = project_node.get("main_workplan")
+    if isinstance(wp, dict):
+        yield wp
+    for el in _as_list(project_node.get("its_elements")):
+        if not isinstance(el, dict):
+            continue
+        if el.get("@xsi:type") == "workplan":
+            yield el
+        elif isinstance(el.get("workplan"), dict):
+            yield el["workplan"]
+
+
+def _iter_workingstep_ids(workplan_node: Dict[str, Any]) -> Iterable[str]:
+    """workingstep_exists_in_project_xml 과 동일한 규칙으로 workingstep its_id 순회."""
+    for el in _as_list(workplan_node.get("its_elements")):
+        if not isinstance(el, dict):
+            continue
+        ws = el.get("workingstep") if "workingstep" in el else el
+        if not isinstance(ws, dict):
+            continue
+        if not (
+            ws.get("@xsi:type") in ("workingstep", "machining_workingstep")
+            or "machining_workingstep" in ws
+            or "workingstep" in el
+        ):
+            continue
+        ws_id = _first_str(ws.get("its_id"))
+        if not ws_id and isinstance(ws.get("machining_workingstep"), dict):
+            ws_id = _first_str(ws["machining_workingstep"].get("its_id"))
+        if ws_id:
+            yield ws_id
+
+
+def _reference_projection(ref_node: Dict[str, Any]) -> Dict[str, str]:
+    """<reference><keys> 를 {KEY: value} 로 평탄화 (REFERENCE_KEYS 만 보존, 값은 normalize_ref_value)."""
+    out: Dict[str, str] = {}
+    for kv in _as_list(ref_node.get("keys")):
+        if not isinstance(kv, dict):
+            continue
+        k = _first_str(_get_by_local(kv, "key"))
+        v = _first_str(_get_by_local(kv, "value"))
+        if not k or not v:
+            continue
+        key_up = k.upper()
+        if key_up in REFERENCE_KEYS and key_up not in out:
+            out[key_up] = normalize_ref_value(v)
+    return out
+
+
+def build_dtasset_projection(
+    xml_string: str, *, strict: bool = True
+) -> Tuple[Dict[str, Optional[str]], Dict[str, Any]]:
+    """
+    dt_asset XML을 한 번만 파싱해서 (meta, projection) 반환.
+    - meta: extract_dtasset_meta 와 동일
+    - projection: assets.parsed 필드에 저장되는 구조화 데이터
+        {
+          v: PROJECTION_VERSION,
+          refs: [{element_id, DT_GLOBAL_ASSET, DT_ASSET, DT_PROJECT, WORKPLAN, WORKINGSTEP}, ...],
+          workplans: [{project_element_id, workplan_id, workingstep_ids}, ...],
+          file_oids: [...],   # dt_file 노드의 GridFS OID
+        }
+    원본 XML(data)은 계속 source of truth 이며, projection은 조회/존재 확인에 쓰는 키만 담는다.
+    (refs → 참조 조회 인덱스, workplans → workplan/workingstep 존재 확인, file_oids → dt_file OID 조회)
+    """
+    try:
+        doc = xmltodict.parse(
+            xml_string,
+            process_namespaces=True,
+            namespaces=_PROJECTION_NAMESPACES,
+            attr_prefix="@",
+        )
+    except Exception as e:
+        raise ValueError(f"XML 파싱 실패: {e}")
+
+    meta = dtasset_meta_from_doc(doc, strict=strict)
+    dt_asset = _get_by_local(doc, "dt_asset")
+
+    refs: List[Dict[str, Any]] = []
+    workplans: List[Dict[str, Any]] = []
+    file_oids: List[str] = []
+
+    for e in _as_list(_get_by_local(dt_asset, "dt_elements")):
+        if not isinstance(e, dict):
+            continue
+        el_type = e.get("@xsi:type") or e.get("xsi:type")
+        element_id = _first_str(_get_by_local(e, "element_id"))
+
+        for ref in _as_list(_get_by_local(e, "reference")):
+            if not isinstance(ref, dict):
+                continue
+            kv = _reference_projection(ref)
+            if kv:
+                refs.append({"element_id": element_id, **kv})
+
+        if el_type == "dt_project":
+            for wp in _iter_workplans_in_project(e):
+                wp_id = _first_str(wp.get("its_id"))
+                if not wp_id:
+                    continue
+                workplans.append(
+                    {
+                        "project_element_id": element_id,
+                        "workplan_id": wp_id,
+                        "workingstep_ids": list(_iter_workingstep_ids(wp)),
+                    }
+                )
+        elif el_type == "dt_file":
+            oid = __first_oid_from_dtfile_node(e)
+            if oid and oid not in file_oids:
+                file_oids.append(oid)
+
+    projection = {
+        "v": PROJECTION_VERSION,
+        "refs": refs,
+        "workplans": workplans,
+        "file_oids": file_oids,
+    }
+    return meta, projection
+
+
 def ensure_dtasset_namespaces(root: Dict[str, Any]) -> None:
     """루트 dt_asset에 xmlns / xsi 누락 시 보정."""
     if "@xmlns" not in root:
@@ -1816,27 +2079,37 @@ def extract_dtfile_oid(
 
 
 ## -- 새로 추가된 Cam json 파싱 관련 유틸 -- ##
-def append_ws_into_project_xml(
+def parse_dtasset_doc(xml_text: str) -> Dict[str, Any]:
+    """
+    dt_asset XML → xmltodict dict (네임스페이스 로컬화, attr_prefix='@').
+    append_ws_into_project_doc / count_workingsteps_in_workplan_doc 에 넘길 작업 문서용.
+    """
+    return xmltodict.parse(
+        xml_text,
+        process_namespaces=True,
+        namespaces=_PROJECTION_NAMESPACES,
+        attr_prefix="@",
+    )
+
+
+def serialize_dtasset_doc(doc: Dict[str, Any]) -> str:
+    """parse_dtasset_doc 로 만든(또는 수정한) 문서를 dt_asset XML 문자열로 직렬화."""
+    dt_asset = doc.get("dt_asset") or doc
+    ensure_dtasset_namespaces(dt_asset)  # 안전 보정
+    return xmltodict.unparse({"dt_asset": dt_asset}, pretty=True, attr_prefix="@")
+
+
+def append_ws_into_project_doc(
+    doc: Dict[str, Any],
     *,
-    project_xml_text: str,
     project_element_id: str,
     workplan_id: str,
     ws_node_dict: Dict[str, Any],
-) -> str:
+) -> None:
     """
-    dt_project XML에 workingstep(its_elements 한 덩어리)을 해당 workplan 아래 its_elements로 append.
-    반환: 갱신된 전체 프로젝트 dt_asset XML 문자열
+    parse_dtasset_doc 문서의 해당 workplan 아래 its_elements 로 workingstep 을 append (in-place).
+    여러 workingstep 을 붙일 때 문서를 매번 파싱/직렬화하지 않도록 dict 상태에서 누적한다.
     """
-    doc = xmltodict.parse(
-        project_xml_text,
-        process_namespaces=True,
-        namespaces={
-            "http://digital-thread.re/dt_asset": None,
-            "http://digital-thread.re/iso14649": None,
-            "http://www.w3.org/2001/XMLSchema-instance": "xsi",
-        },
-        attr_prefix="@",
-    )
     dt_asset = doc.get("dt_asset") or doc
     proj = pick_dt_project(dt_asset, project_element_id)
     wp = find_workplan_in_project(proj, workplan_id)
@@ -1850,8 +2123,27 @@ def append_ws_into_project_xml(
     else:
         wp["its_elements"] = [cur, ws_node_dict]
 
-    ensure_dtasset_namespaces(dt_asset)  # 안전 보정
-    return xmltodict.unparse({"dt_asset": dt_asset}, pretty=True, attr_prefix="@")
+
+def append_ws_into_project_xml(
+    *,
+    project_xml_text: str,
+    project_element_id: str,
+    workplan_id: str,
+    ws_node_dict: Dict[str, Any],
+) -> str:
+    """
+    dt_project XML에 workingstep(its_elements 한 덩어리)을 해당 workplan 아래 its_elements로 append.
+    반환: 갱신된 전체 프로젝트 dt_asset XML 문자열
+    (여러 개를 붙일 때는 append_ws_into_project_doc 으로 누적 후 한 번만 직렬화)
+    """
+    doc = parse_dtasset_doc(project_xml_text)
+    append_ws_into_project_doc(
+        doc,
+        project_element_id=project_element_id,
+        workplan_id=workplan_id,
+        ws_node_dict=ws_node_dict,
+    )
+    return serialize_dtasset_doc(doc)
 
 
 def inject_cutting_tool_ref(
@@ -1909,16 +2201,15 @@ def inject_cutting_tool_ref(
 def count_workingsteps_in_workplan_xml(
     project_xml: str, project_element_id: str, workplan_id: str
 ) -> int:
-    doc = xmltodict.parse(
-        project_xml,
-        process_namespaces=True,
-        namespaces={
-            "http://digital-thread.re/dt_asset": None,
-            "http://digital-thread.re/iso14649": None,
-            "http://www.w3.org/2001/XMLSchema-instance": "xsi",
-        },
-        attr_prefix="@",
+    return count_workingsteps_in_workplan_doc(
+        parse_dtasset_doc(project_xml), project_element_id, workplan_id
     )
+
+
+def count_workingsteps_in_workplan_doc(
+    doc: Dict[str, Any], project_element_id: str, workplan_id: str
+) -> int:
+    """parse_dtasset_doc 문서 기준 workplan 아래 workingstep 개수."""
     dt_proj = pick_dt_project(doc, project_element_id)
     wp = find_workplan_in_project(dt_proj, workplan_id)
 
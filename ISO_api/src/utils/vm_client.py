@@ -0,0 +1,143 @@
+"""
+ISO_api → VM(가상 가공) 서버 HTTP 클라이언트.
+
+- 공유 httpx.AsyncClient (keep-alive 커넥션 풀) → 요청마다 TCP/TLS 연결을 새로 맺지 않음
+- connect/read/write/pool 타임아웃 개별 설정 → 느린 VM 서버가 있어도 이벤트 루프는 멈추지 않음
+- 액세스 토큰은 VM_TOKEN_TTL 동안 재사용, 401 응답이면 한 번 재발급 후 재시도
+- 프로젝트 생성은 멱등이 아니므로 응답 오류 시 재시도하지 않음
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from src.config import settings
+from src.utils.env import get_env_or_default
+from src.utils.exceptions import CustomException, ExceptionEnum
+
+logger = logging.getLogger(__name__)
+
+VM_CONNECT_TIMEOUT = float(get_env_or_default("VM_CONNECT_TIMEOUT", "5"))
+VM_READ_TIMEOUT = float(get_env_or_default("VM_READ_TIMEOUT", "120"))
+VM_WRITE_TIMEOUT = float(get_env_or_default("VM_WRITE_TIMEOUT", "30"))
+VM_POOL_TIMEOUT = float(get_env_or_default("VM_POOL_TIMEOUT", "30"))
+VM_MAX_CONNECTIONS = int(get_env_or_default("VM_MAX_CONNECTIONS", "8"))
+VM_MAX_KEEPALIVE = int(get_env_or_default("VM_MAX_KEEPALIVE", "4"))
+VM_KEEPALIVE_EXPIRY = float(get_env_or_default("VM_KEEPALIVE_EXPIRY", "30"))
+# 발급받은 토큰 재사용 시간(초), 0 이면 매번 발급
+VM_TOKEN_TTL = float(get_env_or_default("VM_TOKEN_TTL", "600"))
+
+TOKEN_PATH = "/api/v1/auths/login/access-token"
+PROJECT_PATH = "/api/v1/macsim"
+
+
+class VmClient:
+    """VM 서버 전용 공유 비동기 HTTP 클라이언트."""
+
+    def __init__(
+        self,
+        base_url: str = settings.vm_api_url,
+        username: str = settings.vm_username,
+        password: str = settings.vm_password,
+        *,
+        token_ttl: float = VM_TOKEN_TTL,
+    ):
+        self.username = username
+        self.password = password
+        self.token_ttl = token_ttl
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._token_lock = asyncio.Lock()
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(
+                connect=VM_CONNECT_TIMEOUT,
+                read=VM_READ_TIMEOUT,
+                write=VM_WRITE_TIMEOUT,
+                pool=VM_POOL_TIMEOUT,
+            ),
+            limits=httpx.Limits(
+                max_connections=VM_MAX_CONNECTIONS,
+                max_keepalive_connections=VM_MAX_KEEPALIVE,
+                keepalive_expiry=VM_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def access_token(self, refresh: bool = False) -> str:
+        """
+        액세스 토큰 (TTL 내에는 재사용, 동시 요청은 한 번만 발급).
+        발급 실패 시 VM_AUTH_FAIL, 응답에 토큰이 없으면 VM_NOT_TOKEN.
+        """
+        async with self._token_lock:
+            if not refresh and self._token and time.monotonic() < self._token_expires:
+                return self._token
+            try:
+                res = await self.client.post(
+                    TOKEN_PATH,
+                    data={"username": self.username, "password": self.password},
+                    headers={"Content-Type": "application/x-www-form-urlencoded"},
+                )
+                res.raise_for_status()
+                token = res.json()["access_token"]
+            except (httpx.HTTPError, ValueError) as e:
+                logger.warning("[vm_client] token request failed: %s", e)
+                raise CustomException(ExceptionEnum.VM_AUTH_FAIL)
+            except (KeyError, TypeError):
+                raise CustomException(ExceptionEnum.VM_NOT_TOKEN)
+            self._token = token
+            self._token_expires = time.monotonic() + self.token_ttl
+            return token
+
+    async def create_project(
+        self, machine_name: str, project_url: str, nc_url: str
+    ) -> Dict[str, Any]:
+        """VM 프로젝트 생성 → VM 서버 응답(json). 실패 시 VM_PRJ_FAIL."""
+        body = {
+            "machine_name": machine_name,
+            "upload_file_link1": project_url,
+            "upload_file_link2": nc_url,
+        }
+        token = await self.access_token()
+        try:
+            res = await self._post_project(body, token)
+            if res.status_code == 401:
+                # 캐시된 토큰이 서버에서 만료된 경우
+                res = await self._post_project(body, await self.access_token(refresh=True))
+            res.raise_for_status()
+            return res.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("[vm_client] create project failed: %s", e)
+            raise CustomException(ExceptionEnum.VM_PRJ_FAIL)
+
+    async def _post_project(self, body: Dict[str, Any], token: str) -> httpx.Response:
+        return await self.client.post(
+            PROJECT_PATH,
+            json=body,
+            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+        )
+
+
+_client: Optional[VmClient] = None
+
+
+def get_vm_client() -> VmClient:
+    """프로세스 전역 VM 서버 클라이언트 (첫 사용 시 생성)."""
+    global _client
+    if _client is None:
+        _client = VmClient()
+    return _client
+
+
+async def close_vm_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,142 @@
+"""
+VM 프로젝트 생성 백그라운드 작업.
+
+VM 프로젝트 생성은 NC 분할/패키징 + VM 서버 토큰 발급 + 프로젝트 생성 호출로 이어지는 긴 작업이라
+요청 핸들러 안에서 끝까지 기다리게 하면 느린 VM 서버가 곧바로 API 응답 지연이 된다.
+이 모듈은 작업을 백그라운드 태스크로 실행하고 상태를 MongoDB(vm_jobs)에 기록한다.
+
+- 동시 실행 슬롯(VM_JOB_WORKERS), 작업 제한 시간(VM_JOB_TIMEOUT, 슬롯 대기 포함)
+- 같은 프로젝트의 진행 중 작업이 있으면 새로 만들지 않고 그 작업을 반환 (부분 유니크 인덱스로 보장)
+- 상태(queued/running/done/failed/timeout/cancelled) + 단계(stage) + 진행률(progress)을 단계마다 기록
+  → 다른 워커 프로세스나 재시작 후에도 조회 가능, 끝난 작업은 VM_JOB_TTL 후 삭제
+- 실행하던 프로세스가 죽어 VM_JOB_STALE_AFTER 동안 갱신이 없는 작업은 조회 시 failed 로 정리
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.entities.job import JOB_DONE, JOB_QUEUED, JOB_RUNNING, JOB_TIMEOUT, JobRunner
+from src.entities.vm_job import VmJobRepository
+from src.utils.env import get_env_or_default
+from src.utils.exceptions import CustomException, ExceptionEnum
+
+VM_JOB_WORKERS = int(get_env_or_default("VM_JOB_WORKERS", "2"))
+VM_JOB_TIMEOUT = float(get_env_or_default("VM_JOB_TIMEOUT", "900"))
+VM_JOB_TTL = float(get_env_or_default("VM_JOB_TTL", str(7 * 24 * 3600)))
+VM_JOB_STALE_AFTER = float(get_env_or_default("VM_JOB_STALE_AFTER", str(VM_JOB_TIMEOUT + 60)))
+# 다른 프로세스에서 실행 중인 작업을 기다릴 때 상태 조회 간격(초)
+VM_JOB_POLL_INTERVAL = float(get_env_or_default("VM_JOB_POLL_INTERVAL", "1"))
+
+# (단계 이름, 진행률 0~100) 기록
+Progress = Callable[[str, int], Awaitable[None]]
+# 진행률 콜백을 받아 작업을 실행하고 결과 dict 반환
+Work = Callable[[Progress], Awaitable[Dict[str, Any]]]
+
+
+def job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    """작업 문서 → 상태 조회 응답."""
+    return {
+        "job_id": job["_id"],
+        "project_id": job["project_id"],
+        "status": job["status"],
+        "stage": job.get("stage"),
+        "progress": job.get("progress", 0),
+        "created_at": job["created_at"],
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "result": job.get("result"),
+        "error": job.get("error"),
+    }
+
+
+def job_result(job: Dict[str, Any]) -> Dict[str, Any]:
+    """끝난 작업 문서 → VM 서버 응답, 실패한 작업은 원래 예외로 변환."""
+    if job["status"] == JOB_DONE:
+        return job["result"]
+    if job["status"] == JOB_TIMEOUT:
+        raise CustomException(ExceptionEnum.VM_PRJ_TIMEOUT, detail=job.get("error"))
+    code = job.get("error_code")
+    if code in ExceptionEnum.__members__:
+        raise CustomException(ExceptionEnum[code], detail=job.get("error"))
+    raise CustomException(ExceptionEnum.VM_PRJ_FAIL, detail=job.get("error"))
+
+
+class VmJobRunner(JobRunner):
+    """VM 프로젝트 생성 작업 실행기 (상태는 VmJobRepository 에 기록, 실행 규칙은 JobRunner)."""
+
+    log_name = "vm_jobs"
+    timeout_message = "VM project generation exceeded {timeout:.0f}s"
+
+    def __init__(
+        self,
+        workers: int = VM_JOB_WORKERS,
+        timeout: float = VM_JOB_TIMEOUT,
+        ttl: float = VM_JOB_TTL,
+        stale_after: float = VM_JOB_STALE_AFTER,
+    ):
+        # heartbeat 없음: 제한 시간(대기 포함) 안에 반드시 종료 상태가 기록되므로 stale_after 로 충분
+        super().__init__(
+            workers=workers,
+            timeout=timeout,
+            ttl=ttl,
+            stale_after=stale_after,
+            wait_interval=VM_JOB_POLL_INTERVAL,
+        )
+
+    async def submit(
+        self, repo: VmJobRepository, project_id: str, work: Work
+    ) -> Dict[str, Any]:
+        """
+        작업 등록 후 작업 문서를 즉시 반환 (실행은 백그라운드).
+        같은 프로젝트의 진행 중 작업이 있으면 그 작업 문서를 반환.
+        """
+        active = await self._find_active(repo, project_id)
+        if active is not None:
+            return active
+        job = self.new_job(project_id=project_id, stage=JOB_QUEUED, progress=0)
+        active = await self._insert(repo, job)
+        if active is not None:
+            return active
+        self._start(job["_id"], self._run(repo, job, work))
+        return job
+
+    async def _run(self, repo: VmJobRepository, job: Dict[str, Any], work: Work) -> None:
+        job_id = job["_id"]
+
+        async def progress(stage: str, percent: int) -> None:
+            await repo.update_job(job_id, stage=stage, progress=percent)
+
+        async def run_in_slot() -> Dict[str, Any]:
+            async with self._slots:
+                await repo.update_job(
+                    job_id, status=JOB_RUNNING, stage=JOB_RUNNING, started_at=time.time()
+                )
+                return await work(progress)
+
+        async def run() -> Dict[str, Any]:
+            # 대기 시간까지 포함해 제한 → VM_JOB_STALE_AFTER 안에 반드시 종료 상태가 기록됨
+            result = await asyncio.wait_for(run_in_slot(), self.timeout)
+            return {"stage": JOB_DONE, "progress": 100, "result": result}
+
+        await self._execute(repo, job, run)
+
+
+_runner: Optional[VmJobRunner] = None
+
+
+def get_vm_job_runner() -> VmJobRunner:
+    """프로세스 전역 VM 프로젝트 생성 작업 실행기."""
+    global _runner
+    if _runner is None:
+        _runner = VmJobRunner()
+    return _runner
+
+
+async def shutdown_vm_job_runner() -> None:
+    global _runner
+    if _runner is not None:
+        await _runner.shutdown()
+        _runner = None
@@ -1,25 +1,20 @@
 import re
 import xmltodict
 import dataclasses
-from xsdata.formats.dataclass.parsers import XmlParser
-from xsdata.formats.dataclass.parsers.config import ParserConfig
-from xsdata.formats.dataclass.context import XmlContext
-from xsdata.utils import text
-from xsdata.formats.dataclass.context import XmlContext
 from xsdata.formats.dataclass.serializers import XmlSerializer
 from xsdata.formats.dataclass.serializers.config import SerializerConfig
 import xml.etree.ElementTree as ET
 from typing import Any, Dict
-from src.entities.model import *
+from enum import Enum
+from src.utils import schema_registry
 
-parser_config = ParserConfig(fail_on_unknown_properties=False)
-context = XmlContext(element_name_generator=text.snake_case)
-parser = XmlParser(config=parser_config, context=context)
+# 스키마 레지스트리의 공유 snake_case context 사용 (레거시 model 스키마)
+SCHEMA_VERSION = "legacy"
+parser = schema_registry.lenient_parser
 
 
 config = SerializerConfig(indent="    ")
-context = XmlContext(element_name_generator=text.snake_case)
-serializer = XmlSerializer(context=context, config=config)
+serializer = XmlSerializer(context=schema_registry.snake_context, config=config)
 
 def to_camel_case(snake_str):
     components = snake_str.split('_')  
@@ -42,7 +37,7 @@ def remove_empty_lists(data):
     return data
 
 def get_class_by_name(class_name):
-    return globals().get(class_name)
+    return schema_registry.get_class(class_name, SCHEMA_VERSION)
 
 def camel_to_snake(name):
     """camelCase 문자열을 snake_case로 변환하는 함수"""
@@ -103,7 +98,11 @@ def dict_to_xml(parent, data):
 
 
 
-def create_feature_xml(json_data: Dict[str, Any], mapping_data: dict, dataclass_type = MachiningWorkingstep): # mapping_config: Dict[str, str], 
+def create_feature_xml(json_data: Dict[str, Any], mapping_data: dict, dataclass_type=None): # mapping_config: Dict[str, str], 
+    # 경로의 클래스명 → 스키마 클래스 (lazy 로드된 스키마 클래스 테이블)
+    classes = schema_registry.get_class_table(SCHEMA_VERSION)
+    if dataclass_type is None:
+        dataclass_type = classes["MachiningWorkingstep"]
     nested_structure = {
         "its_id": {},
         "its_secplane": {},
@@ -121,12 +120,12 @@ def create_feature_xml(json_data: Dict[str, Any], mapping_data: dict, dataclass_
 
         for i, part in enumerate(path_parts):
             if part[0].isupper():  # 현재 요소가 대문자로 시작하는 경우 (클래스)
-                if part in globals():  
-                    new_type = globals()[part]
+                if part in classes:  
+                    new_type = classes[part]
 
                     if isinstance(new_type, type): 
                         if prev_key and prev_key[0].isupper():  # 이전 키가 대문자였을 경우 (대문자가 연속으로 나온 경우) 클래스 가져오기
-                            parent_type = globals().get(prev_key)
+                            parent_type = classes.get(prev_key)
                             if parent_type and isinstance(parent_type, type) and issubclass(new_type, parent_type):
                                 current_type = new_type
                         else:
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.entities import unit_of_work
+from src.schemas.asset import AssetCreateResponse
+from src.services.asset import AssetService
+from src.utils.exceptions import CustomException, ExceptionEnum
+
+XML = """<?xml version="1.0" encoding="UTF-8"?>
+<dt_asset xmlns="http://digital-thread.re/dt_asset"
+          xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" schemaVersion="v31">
+  <asset_global_id>https://digital-thread.re/kitech/g</asset_global_id>
+  <id>a</id>
+  {elements}
+</dt_asset>
+"""
+
+FILE_ELEMENT = """
+  <dt_elements xsi:type="dt_file">
+    <element_id>{element_id}</element_id>
+    <category>CAD</category>
+    <display_name>{element_id}.stp</display_name>
+    <reference>
+      <keys><key>DT_GLOBAL_ASSET</key><value>https://digital-thread.re/kitech/g</value></keys>
+      <keys><key>DT_ASSET</key><value>a</value></keys>
+      <keys><key>DT_PROJECT</key><value>p1</value></keys>
+    </reference>
+  </dt_elements>
+"""
+
+
+class FakeRepo:
+    """insert_missing_assets 는 항상 경쟁 생성 충돌, insert_asset 은 conflicts 에 든 element 만 실패."""
+
+    def __init__(self, conflicts):
+        self.conflicts = set(conflicts)
+        self.collection = SimpleNamespace(database=SimpleNamespace(client=None))
+        self.inserted = []
+
+    async def get_project_workplans(self, **kw):
+        return []
+
+    async def insert_missing_assets(self, reqs, *, session=None):
+        raise CustomException(ExceptionEnum.ASSET_ID_DUPLICATION)
+
+    async def insert_asset(self, req):
+        element_id = next(e for e in ("f1", "f2", "f3") if f"<element_id>{e}<" in req.xml)
+        if element_id in self.conflicts:
+            raise CustomException(ExceptionEnum.ASSET_ID_DUPLICATION)
+        self.inserted.append(element_id)
+        return AssetCreateResponse(asset_mongo_id=f"m-{element_id}")
+
+
+class FakeFileService:
+    def __init__(self):
+        self.uploaded = {}
+        self.deleted = []
+
+    async def process_upload(self, file, nc=False):
+        oid = f"{len(self.uploaded) + 1:024x}"
+        self.uploaded[file.filename] = oid
+        return oid
+
+    async def delete_file_by_id(self, file_id):
+        self.deleted.append(file_id)
+
+
+@pytest.fixture(autouse=True)
+def standalone(monkeypatch):
+    async def supports_transactions(client):
+        return False
+
+    monkeypatch.setattr(unit_of_work, "supports_transactions", supports_transactions)
+
+
+async def test_batch_conflict_falls_back_per_part_and_cleans_up_files():
+    svc = AssetService.__new__(AssetService)
+    svc.repo = FakeRepo(conflicts={"f2"})
+    files = FakeFileService()
+    xml = XML.format(elements="".join(FILE_ELEMENT.format(element_id=e) for e in ("f1", "f2", "f3")))
+    uploads = [
+        SimpleNamespace(filename=f"{e}.stp", content_type="application/step")
+        for e in ("f1", "f2", "f3")
+    ]
+
+    out = await svc.create_from_xml_multi(
+        xml=xml, upload_files=uploads, file_service=files, validate_schema=False
+    )
+
+    status = {r["element_id"]: r["status"] for r in out["results"]}
+    assert status == {"f1": "created", "f2": "failed", "f3": "created"}
+    assert out["summary"] == {"total": 3, "created": 2, "failed": 1}
+    assert svc.repo.inserted == ["f1", "f3"]
+    # 저장되지 못한 f2 의 업로드 파일만 삭제
+    assert files.deleted == [files.uploaded["f2.stp"]]
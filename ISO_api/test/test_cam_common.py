@@ -0,0 +1,46 @@
+import copy
+
+import xmltodict
+
+from src.utils.cam_common import normalize_dt_project_doc, normalize_dt_project_structure
+
+XML = """<?xml version="1.0" encoding="utf-8"?>
+<dt_asset xmlns="http://digital-thread.re/dt_asset" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+  <id>a</id>
+  <asset_global_id>g</asset_global_id>
+  <dt_elements xsi:type="{xsi_type}">
+    <its_id>P</its_id>
+    <element_id>p1</element_id>
+    <main_workplan>
+      <its_elements>
+        <its_id>ws1</its_id>
+      </its_elements>
+      <its_id>wp</its_id>
+    </main_workplan>
+  </dt_elements>
+</dt_asset>
+"""
+
+
+def test_dt_project_is_reordered():
+    doc = xmltodict.parse(XML.format(xsi_type="dt_project"))
+    assert normalize_dt_project_doc(doc, "p1") is True
+    assert list(doc["dt_asset"])[2:4] == ["asset_global_id", "id"]
+    assert list(doc["dt_asset"]["dt_elements"])[:2] == ["element_id", "its_id"]
+
+
+def test_non_project_element_with_matching_id_is_untouched():
+    doc = xmltodict.parse(XML.format(xsi_type="dt_cutting_tool"))
+    before = copy.deepcopy(doc)
+    assert normalize_dt_project_doc(doc, "p1") is False
+    assert doc == before
+    assert list(doc["dt_asset"]) == list(before["dt_asset"])
+    assert list(doc["dt_asset"]["dt_elements"]) == list(before["dt_asset"]["dt_elements"])
+
+    xml = XML.format(xsi_type="dt_cutting_tool")
+    assert normalize_dt_project_structure(xml, "p1") == xml
+
+
+def test_other_element_id_is_untouched():
+    xml = XML.format(xsi_type="dt_project")
+    assert normalize_dt_project_structure(xml, "other") == xml
@@ -0,0 +1,139 @@
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+from starlette.requests import Request
+
+from src.utils.download import gridfs_download_response, parse_range
+
+
+class FakeGridOut:
+    """open_download_stream() 결과 대역 (seek / read 만 사용)."""
+
+    def __init__(self, data: bytes):
+        self._id = ObjectId()
+        self.data = data
+        self.length = len(data)
+        self.md5 = None
+        self.upload_date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.pos = 0
+
+    def seek(self, pos):
+        self.pos = pos
+
+    async def read(self, size=-1):
+        end = self.length if size < 0 else self.pos + size
+        chunk = self.data[self.pos:end]
+        self.pos += len(chunk)
+        return chunk
+
+
+def make_request(**headers):
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()],
+        }
+    )
+
+
+async def body_of(resp):
+    return b"".join([chunk async for chunk in resp.body_iterator])
+
+
+# ----------------- parse_range -----------------
+
+
+def test_parse_range_without_header_is_full():
+    assert parse_range(None, 10) is None
+    assert parse_range("", 10) is None
+
+
+def test_parse_range_closed_and_clamped():
+    assert parse_range("bytes=2-5", 10) == (2, 5)
+    assert parse_range("bytes=8-100", 10) == (8, 9)
+
+
+def test_parse_range_open_ended():
+    assert parse_range("bytes=4-", 10) == (4, 9)
+
+
+def test_parse_range_suffix():
+    assert parse_range("bytes=-3", 10) == (7, 9)
+    # 파일보다 긴 접미 범위는 전체
+    assert parse_range("bytes=-50", 10) == (0, 9)
+
+
+@pytest.mark.parametrize("header", ["bytes=10-", "bytes=20-30", "bytes=5-2", "bytes=-0"])
+def test_parse_range_out_of_range(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 10)
+
+
+@pytest.mark.parametrize("header", ["bytes=-3", "bytes=0-", "bytes=0-0"])
+def test_parse_range_on_empty_file_is_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 0)
+
+
+def test_parse_range_multi_range_is_full():
+    assert parse_range("bytes=0-1,4-5", 10) is None
+
+
+@pytest.mark.parametrize("header", ["items=0-5", "bytes=a-b", "bytes=-", "bytes 0-5", "bytes=1-2-3"])
+def test_parse_range_malformed_is_full(header):
+    assert parse_range(header, 10) is None
+
+
+# ----------------- gridfs_download_response -----------------
+
+
+async def test_download_full_200():
+    grid_out = FakeGridOut(b"0123456789")
+    resp = gridfs_download_response(make_request(), grid_out, filename="a.nc")
+    assert resp.status_code == 200
+    assert resp.headers["content-length"] == "10"
+    assert resp.headers["accept-ranges"] == "bytes"
+    assert await body_of(resp) == b"0123456789"
+
+
+async def test_download_partial_206():
+    grid_out = FakeGridOut(b"0123456789")
+    resp = gridfs_download_response(make_request(range="bytes=2-4"), grid_out, filename="a.nc")
+    assert resp.status_code == 206
+    assert resp.headers["content-range"] == "bytes 2-4/10"
+    assert resp.headers["content-length"] == "3"
+    assert await body_of(resp) == b"234"
+
+
+async def test_download_suffix_206():
+    grid_out = FakeGridOut(b"0123456789")
+    resp = gridfs_download_response(make_request(range="bytes=-2"), grid_out, filename="a.nc")
+    assert resp.status_code == 206
+    assert resp.headers["content-range"] == "bytes 8-9/10"
+    assert await body_of(resp) == b"89"
+
+
+async def test_download_unsatisfiable_416():
+    grid_out = FakeGridOut(b"0123456789")
+    resp = gridfs_download_response(make_request(range="bytes=10-"), grid_out, filename="a.nc")
+    assert resp.status_code == 416
+    assert resp.headers["content-range"] == "bytes */10"
+
+
+async def test_download_empty_file_range_416():
+    grid_out = FakeGridOut(b"")
+    resp = gridfs_download_response(make_request(range="bytes=-5"), grid_out, filename="a.nc")
+    assert resp.status_code == 416
+    assert resp.headers["content-range"] == "bytes */0"
+
+
+async def test_download_stale_if_range_sends_full_200():
+    grid_out = FakeGridOut(b"0123456789")
+    resp = gridfs_download_response(
+        make_request(range="bytes=2-4", if_range='"stale"'), grid_out, filename="a.nc"
+    )
+    assert resp.status_code == 200
+    assert await body_of(resp) == b"0123456789"
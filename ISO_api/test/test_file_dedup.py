@@ -0,0 +1,154 @@
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from dt_common.file_contents import ContentStore
+from src.entities.file import FileRepository
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict) and "$lte" in cond:
+            if value is None or value > cond["$lte"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class FakeContents:
+    """file_contents 컬렉션 대역 (uniq_sha256_filename_meta 유니크 인덱스 포함)."""
+
+    def __init__(self):
+        self.docs = []
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=ReturnDocument.BEFORE):
+        for doc in self.docs:
+            if _matches(doc, query):
+                before = dict(doc)
+                for key, inc in update["$inc"].items():
+                    doc[key] += inc
+                return dict(doc) if return_document == ReturnDocument.AFTER else before
+        return None
+
+    async def insert_one(self, doc):
+        key = (doc["sha256"], doc["filename"], doc.get("meta_key"))
+        if any((d["sha256"], d["filename"], d.get("meta_key")) == key for d in self.docs):
+            raise DuplicateKeyError("uniq_sha256_filename_meta")
+        self.docs.append({"_id": ObjectId(), **doc})
+
+    async def delete_one(self, query):
+        for doc in self.docs:
+            if _matches(doc, query):
+                self.docs.remove(doc)
+                return type("Res", (), {"deleted_count": 1})()
+        return type("Res", (), {"deleted_count": 0})()
+
+
+class FakeGridFS:
+    def __init__(self):
+        self.blobs = {}
+
+    async def upload_from_stream(self, filename, data, metadata=None):
+        oid = ObjectId()
+        self.blobs[oid] = (filename, data, metadata)
+        return oid
+
+    async def delete(self, oid):
+        del self.blobs[oid]
+
+
+def make_repo():
+    return FileRepository(FakeGridFS(), FakeContents())
+
+
+async def test_same_content_shares_blob_until_last_release():
+    repo = make_repo()
+    a = await repo.insert_file(b"G0 X0", "O0001.nc")
+    b = await repo.insert_file(b"G0 X0", "O0001.nc")
+    assert a == b
+    assert len(repo.grid_fs.blobs) == 1
+    assert repo.contents.docs[0]["refcount"] == 2
+
+    await repo.delete_file_by_id(a)
+    assert len(repo.grid_fs.blobs) == 1
+    assert repo.contents.docs[0]["refcount"] == 1
+
+    await repo.delete_file_by_id(b)
+    assert repo.grid_fs.blobs == {}
+    assert repo.contents.docs == []
+
+
+async def test_different_filename_is_not_shared():
+    repo = make_repo()
+    a = await repo.insert_file(b"G0 X0", "O0001.nc")
+    b = await repo.insert_file(b"G0 X0", "O0002.nc")
+    assert a != b
+
+
+async def test_metadata_is_kept_per_upload():
+    repo = make_repo()
+    a = await repo.insert_file(b"G0 X0", "O0001.nc", metadata={"nc_code": "n1"})
+    b = await repo.insert_file(b"G0 X0", "O0001.nc", metadata={"nc_code": "n2"})
+    plain = await repo.insert_file(b"G0 X0", "O0001.nc")
+    assert len({a, b, plain}) == 3
+    assert repo.grid_fs.blobs[ObjectId(a)][2]["nc_code"] == "n1"
+    assert repo.grid_fs.blobs[ObjectId(b)][2]["nc_code"] == "n2"
+
+    # 같은 메타데이터면 다시 공유
+    again = await repo.insert_file(b"G0 X0", "O0001.nc", metadata={"nc_code": "n1"})
+    assert again == a
+
+
+async def test_unregistered_file_is_deleted_directly():
+    repo = make_repo()
+    oid = await repo.grid_fs.upload_from_stream("old.nc", b"x")
+    await repo.delete_file_by_id(str(oid))
+    assert repo.grid_fs.blobs == {}
+
+
+async def test_nc_split_zip_keeps_source_link():
+    # 서로 다른 NC 파일이 같은 zip 을 만들어도 각 zip 은 자기 nc_file_id 를 유지
+    repo = make_repo()
+    zip_a = await repo.insert_file(
+        b"PK\x03\x04", "O0001_ncdata.zip", metadata={"kind": "nc_split", "nc_file_id": "a"}
+    )
+    zip_b = await repo.insert_file(
+        b"PK\x03\x04", "O0001_ncdata.zip", metadata={"kind": "nc_split", "nc_file_id": "b"}
+    )
+    assert zip_a != zip_b
+    assert repo.grid_fs.blobs[ObjectId(zip_b)][2]["nc_file_id"] == "b"
+
+    again = await repo.insert_file(
+        b"PK\x03\x04", "O0001_ncdata.zip", metadata={"nc_file_id": "a", "kind": "nc_split"}
+    )
+    assert again == zip_a
+
+
+async def test_other_service_store_shares_refcount():
+    # Operation_Manager 도 같은 file_contents / 버킷을 ContentStore 로 다룸
+    repo = make_repo()
+    other = ContentStore(repo.contents, repo.grid_fs)
+    a = await repo.insert_file(b"G0 X0", "O0001.nc")
+    b = await other.put(b"G0 X0", "O0001.nc")
+    assert a == b
+    assert repo.contents.docs[0]["refcount"] == 2
+
+    await other.delete(ObjectId(b))
+    await repo.delete_file_by_id(a)
+    assert repo.grid_fs.blobs == {}
+    assert repo.contents.docs == []
+
+
+async def test_register_drops_own_blob_when_already_registered():
+    repo = make_repo()
+    a = await repo.insert_file(b"G0 X0", "O0001.nc")
+    # 해시를 모른 채 먼저 올린 blob (스트리밍 업로드)
+    late = await repo.grid_fs.upload_from_stream("O0001.nc", b"G0 X0")
+    final = await repo.store.register(
+        repo.contents.docs[0]["sha256"], "O0001.nc", 5, late
+    )
+    assert final == a
+    assert late not in repo.grid_fs.blobs
+    assert repo.contents.docs[0]["refcount"] == 2
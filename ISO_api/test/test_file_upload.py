@@ -0,0 +1,42 @@
+import io
+import threading
+
+from src.services.file import FileService
+from src.utils.nc_lexer import ToolChangeCollector
+
+NC = b"%\nO0001\nN10 T1 M6\nN20 G0 X0\nN30 T2\nN40 M6\nN50 M30\n%\n"
+
+
+class FakeUploadFile:
+    def __init__(self, data: bytes):
+        self.buf = io.BytesIO(data)
+
+    async def seek(self, pos):
+        self.buf.seek(pos)
+
+    async def read(self, size=-1):
+        return self.buf.read(size)
+
+
+class ThreadRecordingTee(io.BytesIO):
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def write(self, data):
+        self.threads.add(threading.get_ident())
+        return super().write(data)
+
+
+async def test_iter_upload_tees_and_lexes_off_the_event_loop():
+    svc = FileService.__new__(FileService)
+    svc.UPLOAD_CHUNK_SIZE = 7
+    tee = ThreadRecordingTee()
+    collector = ToolChangeCollector()
+
+    chunks = [c async for c in svc._iter_upload(FakeUploadFile(NC), tee, collector)]
+
+    assert b"".join(chunks) == NC
+    assert tee.getvalue() == NC
+    assert threading.get_ident() not in tee.threads
+    assert [e["tool"] for e in collector.close()] == ["T1", "T2"]
@@ -0,0 +1,82 @@
+import pytest
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+from dt_common.indexes import IndexSpec, ensure_indexes, index_report
+from src import indexes as iso_indexes
+
+
+class FakeCollection:
+    def __init__(self, existing=None, fail=()):
+        self.indexes = dict(existing or {})
+        self.fail = set(fail)
+        self.dropped = []
+
+    async def create_index(self, keys, name, **kw):
+        if name in self.fail:
+            raise OperationFailure("E11000 duplicate key")
+        self.indexes[name] = {"key": keys, **kw}
+
+    async def drop_index(self, name):
+        self.dropped.append(name)
+        del self.indexes[name]
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    def aggregate(self, pipeline):
+        raise OperationFailure("$indexStats not allowed")
+
+
+class FakeDb(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+NEW = IndexSpec(
+    name="uniq_new",
+    keys=[("a", ASCENDING), ("b", ASCENDING)],
+    unique=True,
+    required=True,
+    replaces=("uniq_old",),
+)
+
+
+async def test_replaced_index_dropped_after_new_one_exists():
+    db = FakeDb(c=FakeCollection({"uniq_old": {"key": [("a", 1)]}}))
+    result = await ensure_indexes(db, {"c": [NEW]})
+    assert result == {"c": {"created": ["uniq_new"], "failed": []}}
+    assert db["c"].dropped == ["uniq_old"]
+    assert db["c"].indexes["uniq_new"]["unique"] is True
+
+
+async def test_required_index_failure_stops_startup():
+    db = FakeDb(c=FakeCollection({"uniq_old": {"key": [("a", 1)]}}, fail={"uniq_new"}))
+    with pytest.raises(RuntimeError):
+        await ensure_indexes(db, {"c": [NEW]})
+    # 새 인덱스를 못 만들었으면 이전 인덱스는 남김
+    assert "uniq_old" in db["c"].indexes
+
+
+async def test_optional_index_failure_is_reported():
+    spec = IndexSpec(name="idx_x", keys=[("x", ASCENDING)])
+    db = FakeDb(c=FakeCollection(fail={"idx_x"}))
+    assert await ensure_indexes(db, {"c": [spec]}) == {"c": {"created": [], "failed": ["idx_x"]}}
+
+
+async def test_report_missing_and_undeclared():
+    db = FakeDb(
+        c=FakeCollection({"_id_": {"key": [("_id", 1)]}, "uniq_new": {"key": [("a", 1)]}, "stray": {"key": [("z", 1)]}})
+    )
+    report = await index_report(db, {"c": [NEW]})
+    # 키 구성이 다르면 missing
+    assert report["c"]["missing"] == ["uniq_new"]
+    assert report["c"]["undeclared"] == ["stray"]
+    assert report["c"]["usage"] == {}
+
+
+async def test_service_wrapper_uses_its_own_specs():
+    db = FakeDb()
+    result = await iso_indexes.ensure_indexes(db)
+    assert set(result) == set(iso_indexes.INDEX_SPECS)
@@ -0,0 +1,173 @@
+import asyncio
+import time
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from src.entities.job import (
+    JOB_CANCELLED,
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_TIMEOUT,
+    JobRepository,
+    JobRunner,
+)
+from src.utils.exceptions import CustomException, ExceptionEnum
+from src.utils.vm_jobs import VmJobRunner, job_result
+
+
+class FakeJobRepository(JobRepository):
+    """작업 컬렉션 대역 (key_field 진행 중 작업 부분 유니크 인덱스 포함)."""
+
+    key_field = "project_id"
+
+    def __init__(self):
+        self.docs = {}
+
+    async def insert_job(self, job):
+        key = job.get(self.key_field)
+        if key is not None and await self.find_active_job(key):
+            raise DuplicateKeyError("uniq_active")
+        self.docs[job["_id"]] = dict(job)
+
+    async def get_job(self, job_id):
+        doc = self.docs.get(job_id)
+        return dict(doc) if doc else None
+
+    async def find_active_job(self, key):
+        for doc in self.docs.values():
+            if doc.get(self.key_field) == key and doc["active"]:
+                return dict(doc)
+        return None
+
+    async def update_job(self, job_id, **fields):
+        doc = self.docs.get(job_id)
+        if not doc or not doc["active"]:
+            return None
+        doc.update(fields, updated_at=time.time())
+        return dict(doc)
+
+    async def finish_job(self, job_id, ttl_seconds, *, stale_before=None, **fields):
+        doc = self.docs.get(job_id)
+        if not doc or not doc["active"]:
+            return None
+        if stale_before is not None and doc["updated_at"] >= stale_before:
+            return None
+        doc.update(fields, active=False, finished_at=time.time(), updated_at=time.time())
+        return dict(doc)
+
+
+@pytest.fixture
+def repo():
+    return FakeJobRepository()
+
+
+def make_runner(**kw):
+    return VmJobRunner(**{"workers": 1, "timeout": 5, "ttl": 60, "stale_after": 30, **kw})
+
+
+async def test_submit_runs_in_background_and_records_result(repo):
+    runner = make_runner()
+    stages = []
+
+    async def work(progress):
+        await progress("upload", 50)
+        stages.append(repo.docs[job["_id"]]["stage"])
+        return {"ok": 1}
+
+    job = await runner.submit(repo, "p1", work)
+    assert job["status"] == "queued"
+    done = await runner.wait(repo, job["_id"])
+    assert done["status"] == JOB_DONE
+    assert (done["stage"], done["progress"]) == (JOB_DONE, 100)
+    assert stages == ["upload"]
+    assert job_result(done) == {"ok": 1}
+    assert runner.pending() == 0
+
+
+async def test_same_key_returns_active_job(repo):
+    runner = make_runner()
+    gate = asyncio.Event()
+
+    async def work(progress):
+        await gate.wait()
+        return {}
+
+    first = await runner.submit(repo, "p1", work)
+    second = await runner.submit(repo, "p1", work)
+    assert second["_id"] == first["_id"]
+    gate.set()
+    await runner.wait(repo, first["_id"])
+    # 끝난 뒤에는 새 작업
+    third = await runner.submit(repo, "p1", work)
+    assert third["_id"] != first["_id"]
+    await runner.wait(repo, third["_id"])
+
+
+async def test_failure_keeps_error_code(repo):
+    runner = make_runner()
+
+    async def work(progress):
+        raise CustomException(ExceptionEnum.VM_AUTH_FAIL, detail="denied")
+
+    job = await runner.wait(repo, (await runner.submit(repo, "p1", work))["_id"])
+    assert (job["status"], job["error_code"]) == (JOB_FAILED, "VM_AUTH_FAIL")
+    with pytest.raises(CustomException) as exc:
+        job_result(job)
+    assert exc.value.enum == ExceptionEnum.VM_AUTH_FAIL
+
+
+async def test_timeout_is_recorded(repo):
+    runner = make_runner(timeout=0.05)
+
+    async def work(progress):
+        await asyncio.sleep(1)
+
+    job = await runner.wait(repo, (await runner.submit(repo, "p1", work))["_id"])
+    assert job["status"] == JOB_TIMEOUT
+    assert job["error"] == "VM project generation exceeded 0s"
+
+
+async def test_stale_job_from_dead_worker_is_failed(repo):
+    runner = make_runner(stale_after=10)
+    job = JobRunner.new_job(project_id="p1", updated_at=time.time() - 60)
+    await repo.insert_job(job)
+    seen = await runner.get(repo, job["_id"])
+    assert (seen["status"], seen["active"]) == (JOB_FAILED, False)
+
+
+async def test_cancel_local_and_remote(repo):
+    runner = make_runner()
+
+    async def work(progress):
+        await asyncio.sleep(10)
+
+    job = await runner.submit(repo, "p1", work)
+    await asyncio.sleep(0)
+    assert (await runner.cancel(repo, job["_id"]))["status"] == JOB_CANCELLED
+
+    # 다른 프로세스의 작업: 취소 요청만 기록
+    remote = JobRunner.new_job(project_id="p2")
+    await repo.insert_job(remote)
+    assert (await runner.cancel(repo, remote["_id"]))["cancel_requested"] is True
+
+
+async def test_heartbeat_cancels_on_remote_request(repo):
+    runner = JobRunner(workers=1, timeout=5, ttl=60, stale_after=30, wait_interval=0.01, heartbeat=0.01)
+    job = JobRunner.new_job(project_id="p1")
+    await repo.insert_job(job)
+
+    async def work():
+        await repo.update_job(job["_id"], cancel_requested=True)
+        await asyncio.sleep(10)
+        return {}
+
+    fields = await asyncio.wait_for(runner._execute(repo, job, work), 2)
+    assert fields["status"] == JOB_CANCELLED
+    assert repo.docs[job["_id"]]["status"] == JOB_CANCELLED
+
+
+async def test_unknown_job_is_not_found(repo):
+    with pytest.raises(CustomException) as exc:
+        await make_runner().get(repo, "nope")
+    assert exc.value.enum == ExceptionEnum.JOB_NOT_FOUND
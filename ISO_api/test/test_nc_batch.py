@@ -0,0 +1,67 @@
+import io
+import zipfile
+
+import pytest
+
+from src.utils.nc_batch import NcBatchSplitter
+
+SOURCES = {
+    "a": (b"%\nO0001\nN10 T1 M6\nN20 G0 X0\nN30 T2 M6\nN40 M30\n%\n", "a"),
+    # 잘못된 인코딩 → 워커에서 디코딩 실패
+    "bad": (b"%\nO0002\n\xff\xfe T1 M6\n%\n", "bad"),
+    "b": (b"O0003\nG90\nT5 M6\nG1 X1\n", "b"),
+}
+
+
+@pytest.fixture
+def splitter():
+    s = NcBatchSplitter(workers=2, inflight=2)
+    yield s
+    s.shutdown()
+
+
+async def load(nc_file_id):
+    if nc_file_id == "missing":
+        raise FileNotFoundError(nc_file_id)
+    return SOURCES[nc_file_id]
+
+
+async def test_bad_file_is_reported_alone(splitter):
+    stored = {}
+
+    async def store_zip(nc_file_id, base_name, zip_bytes):
+        stored[nc_file_id] = zip_bytes
+        return f"zip-{nc_file_id}"
+
+    items = {
+        item["nc_file_id"]: item
+        async for item in splitter.run(["a", "bad", "missing", "b"], load, store_zip)
+    }
+
+    assert items["bad"]["status"] == "failed"
+    assert items["bad"]["error"].startswith("UnicodeDecodeError")
+    assert items["missing"]["status"] == "failed"
+    assert items["missing"]["error"].startswith("FileNotFoundError")
+
+    assert items["a"]["status"] == "ok"
+    assert items["a"]["zip_file_id"] == "zip-a"
+    assert items["a"]["tool_sequence"] == ["T1", "T2"]
+    assert items["b"]["status"] == "ok"
+    assert items["b"]["segment_count"] == 1
+
+    # 실패한 파일은 zip 을 저장하지 않고, 나머지는 각자 zip 을 가짐
+    assert set(stored) == {"a", "b"}
+    with zipfile.ZipFile(io.BytesIO(stored["a"])) as zf:
+        assert zf.namelist() == ["a_1/", "a_1/a_1", "a_2/", "a_2/a_2"]
+
+
+async def test_store_failure_is_isolated(splitter):
+    async def store_zip(nc_file_id, base_name, zip_bytes):
+        if nc_file_id == "a":
+            raise RuntimeError("gridfs down")
+        return f"zip-{nc_file_id}"
+
+    items = {item["nc_file_id"]: item async for item in splitter.run(["a", "b"], load, store_zip)}
+    assert items["a"]["status"] == "failed"
+    assert items["b"]["status"] == "ok"
+    assert items["b"]["zip_file_id"] == "zip-b"
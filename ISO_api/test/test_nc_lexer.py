@@ -0,0 +1,68 @@
+import pytest
+from src.utils.nc_lexer import ToolChangeCollector, NcLexer, lex_nc, tool_changes
+
+NC = (
+    "%\r\n"
+    "O0001 (툴 교체 예시)\r\n"
+    "N0010 G90 G54\r\n"
+    "N0020 T1 M6\r\n"
+    "N0030 G0 X0 Y0 ; T9 M6 는 주석\r\n"
+    "N0040 M06 T2\r\n"
+    "N0050 T3\r\n"
+    "N0060 G0 Z50.\r\n"
+    "N0070 M6\r\n"
+    "N0080 T4\r\n"
+    "N0090 G0 Z10.\r\n"
+    "N0100 G0 Z20.\r\n"
+    "N0110 M6 (lookahead 밖)\r\n"
+    "N0120 T5 (닫히지 않은 주석 M6\r\n"
+    "N0130 T6 M6\r\n"
+    "M30\r\n"
+    "%"
+)
+
+
+def lex_whole(text):
+    return [(b.index, b.raw, b.code, b.tool_change) for b in lex_nc([text])]
+
+
+def lex_chunked(text, size):
+    lexer = NcLexer()
+    blocks = []
+    for i in range(0, len(text), size):
+        blocks.extend(lexer.feed(text[i : i + size]))
+    blocks.extend(lexer.close())
+    return [(b.index, b.raw, b.code, b.tool_change) for b in blocks]
+
+
+def test_whole_text_events():
+    events = tool_changes(lex_nc([NC]))
+    assert [(e["tool"], e["mode"]) for e in events] == [
+        ("T1", "same-line T->M6"),
+        ("T2", "same-line M6->T"),
+        ("T3", "next-line(+2)"),
+        ("T6", "same-line T->M6"),
+    ]
+    # next-line 이벤트의 line/raw 는 M6 줄 기준
+    assert events[2]["line"] == 9 and events[2]["raw"] == "N0070 M6"
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(NC)])
+def test_chunked_feed_matches_whole_text(size):
+    # CRLF 가 chunk 경계에 걸쳐도 같은 줄/블록/이벤트
+    assert lex_chunked(NC, size) == lex_whole(NC)
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 33])
+def test_byte_collector_matches_whole_text(size):
+    # UTF-8 멀티바이트 문자가 chunk 경계에서 잘려도 같은 이벤트
+    data = NC.encode("utf-8")
+    collector = ToolChangeCollector()
+    for i in range(0, len(data), size):
+        collector.feed(data[i : i + size])
+    assert collector.close() == tool_changes(lex_nc([NC]))
+
+
+def test_lookahead_limit_is_respected():
+    assert tool_changes(lex_nc(["T1\nG0\nM6\n"], lookahead_lines=2))
+    assert not tool_changes(lex_nc(["T1\nG0\nG0\nM6\n"], lookahead_lines=2))
@@ -0,0 +1,97 @@
+import io
+import zipfile
+
+from src.utils.nc_spliter import scan_nc, split_nc, write_nc_segments_zip
+
+NC = (
+    "%\n"
+    "O0001\n"
+    "N10 G90 G54\n"
+    "N20 T1 M6\n"
+    "N30 G0 X0\n"
+    "N40 T2\n"
+    "N50 M6\n"
+    "N60 G1 X5\n"
+    "N70 M30\n"
+    "%\n"
+)
+
+
+def split_to_dict(text, base_name="part"):
+    """split_nc 결과를 {세그먼트 이름: 내용} 으로 수집."""
+    outs = {}
+
+    class Capture(io.StringIO):
+        def __init__(self, name):
+            super().__init__()
+            self.name = name
+
+        def close(self):
+            outs[self.name] = self.getvalue()
+            super().close()
+
+    def open_segment(name):
+        return name, Capture(name)
+
+    result = split_nc(io.StringIO(text), base_name, open_segment)
+    return result, outs
+
+
+def test_scan_boundaries_and_preamble():
+    scan = scan_nc(io.StringIO(NC))
+    # 다음 줄 M6 로 이어지는 교체는 T 줄부터 세그먼트 시작
+    assert scan.boundaries == [3, 5]
+    assert scan.tool_numbers == [1, 2]
+    assert scan.onumber == "O0001"
+    assert scan.preamble == ["N10 G90 G54\n"]
+    assert scan.n_format == {"padding": False, "width": 2}
+
+
+def test_segments_renumbered_with_onumber_and_m30():
+    result, outs = split_to_dict(NC)
+    assert result.paths == ["part_1", "part_2"]
+    assert result.tool_numbers == [1, 2]
+    assert outs["part_1"] == (
+        "%\nO1001\nN10 G90 G54\nN20 T1 M6\nN30 G0 X0\nN40 M30\n%\n"
+    )
+    # 원본 M30 은 마지막 세그먼트에 남고 중복 추가되지 않음
+    assert outs["part_2"] == (
+        "%\nO1002\nN10 G90 G54\nN20 T2\nN30 M6\nN40 G1 X5\nN50 M30\n%\n"
+    )
+
+
+def test_padded_attached_n_and_colon_onumber():
+    text = "%\n:0012\nN0010G90\nN0020T1M6\nN0030G0X0\n%\n"
+    _, outs = split_to_dict(text, "p")
+    assert outs == {"p_1": "%\n:1012\nN0010G90\nN0020T1M6\nN0030G0X0\nN0040M30\n%\n"}
+
+
+def test_without_n_numbers_keeps_lines_and_terminates():
+    text = "O0007\nG90\nT1 M6\nG0 X0\nT2 M6\nG1 X1\nM02\n"
+    _, outs = split_to_dict(text, "p")
+    assert outs["p_1"] == "%\nO1007\nG90\nT1 M6\nG0 X0\nM30\n%\n"
+    # M02 로 끝나면 M30 을 붙이지 않음
+    assert outs["p_2"] == "%\nO1008\nG90\nT2 M6\nG1 X1\nM02\n%\n"
+
+
+def test_without_onumber_has_no_o_line():
+    _, outs = split_to_dict("G90\nT3 M6\nG0 X0\nM30\n", "p")
+    assert outs == {"p_1": "%\nG90\nT3 M6\nG0 X0\nM30\n%\n"}
+
+
+def test_without_tool_change_has_no_segments():
+    result, outs = split_to_dict("%\nO0001\nG90\nG0 X0\nM30\n%\n")
+    assert result.paths == []
+    assert outs == {}
+
+
+def test_zip_layout_matches_ncdata_folder():
+    buf = io.BytesIO()
+    result = write_nc_segments_zip(io.StringIO(NC), "part", buf)
+    assert result.paths == ["part_1/part_1", "part_2/part_2"]
+
+    _, expected = split_to_dict(NC)
+    with zipfile.ZipFile(io.BytesIO(buf.getvalue())) as zf:
+        assert zf.namelist() == ["part_1/", "part_1/part_1", "part_2/", "part_2/part_2"]
+        assert zf.read("part_1/part_1").decode("utf-8") == expected["part_1"]
+        assert zf.read("part_2/part_2").decode("utf-8") == expected["part_2"]
@@ -0,0 +1,38 @@
+from src.entities.asset import _ref_match
+from src.utils.v3_xml_parser import build_dtasset_projection
+
+DOC = """<?xml version="1.0" encoding="UTF-8"?>
+<dt_asset xmlns="http://digital-thread.re/dt_asset"
+          xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+  <asset_global_id>g</asset_global_id>
+  <id>a</id>
+  <dt_elements xsi:type="dt_file">
+    <element_id>f1</element_id>
+    <reference>
+      <keys><key>dt_global_asset</key><value> HTTP://Example/G </value></keys>
+      <keys><key>DT_PROJECT</key><value>Proj_1</value></keys>
+    </reference>
+  </dt_elements>
+</dt_asset>
+"""
+
+
+def test_projection_refs_are_case_folded():
+    _, projection = build_dtasset_projection(DOC, strict=False)
+    assert projection["refs"] == [
+        {"element_id": "f1", "DT_GLOBAL_ASSET": "http://example/g", "DT_PROJECT": "proj_1"}
+    ]
+
+
+def test_ref_match_uses_same_normalization():
+    # 저장 값과 같은 규칙 → 예전 regex($options "i")처럼 대소문자 무시
+    q = _ref_match({"DT_GLOBAL_ASSET": "HTTP://Example/G", "DT_PROJECT": " PROJ_1 ", "WORKPLAN": ""})
+    assert q == {
+        "parsed.refs": {
+            "$elemMatch": {
+                "DT_GLOBAL_ASSET": "http://example/g",
+                "DT_PROJECT": "proj_1",
+                "WORKPLAN": None,
+            }
+        }
+    }
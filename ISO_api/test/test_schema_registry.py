@@ -0,0 +1,85 @@
+import pytest
+from src.utils import schema_registry
+
+DOC = """<?xml version="1.0" encoding="UTF-8"?>
+<dt_asset xmlns="http://digital-thread.re/dt_asset"
+          xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" schemaVersion="v31">
+  <asset_global_id>g</asset_global_id>
+  <id>a</id>
+  <dt_elements xsi:type="dt_cutting_tool">
+    <element_id>{tool_id}</element_id>
+  </dt_elements>
+  <dt_elements xsi:type="dt_project">
+    <element_id>p1</element_id>
+    <its_id>P</its_id>
+    <main_workplan>
+      <its_id>wp</its_id>
+      <its_elements xsi:type="machining_workingstep">
+        <{ws_field}>ws1</{ws_field}>
+      </its_elements>
+      <its_elements xsi:type="machining_workingstep">
+        <its_id>ws2</its_id>
+      </its_elements>
+    </main_workplan>
+  </dt_elements>
+  {extra}
+</dt_asset>
+"""
+
+# 로컬 이름은 dt_elements 지만 다른 네임스페이스 → 전체 검증에서는 거부됨
+# (내용은 유효한 dt_cutting_tool 이라 단위만 떼어 검증하면 통과)
+FOREIGN_UNIT = (
+    '<q:dt_elements xmlns:q="urn:other" xsi:type="dt_cutting_tool">'
+    "<element_id>x</element_id></q:dt_elements>"
+)
+# 같은 자리의 정상 단위 (떼어 낸 뒤 골격 해시가 FOREIGN_UNIT 문서와 같음)
+LOCAL_UNIT = '<dt_elements xsi:type="dt_cutting_tool"><element_id>x</element_id></dt_elements>'
+
+
+def make_doc(tool_id="t1", ws_field="its_id", extra=""):
+    return DOC.format(tool_id=tool_id, ws_field=ws_field, extra=extra)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    schema_registry.clear_validation_cache()
+    yield
+    schema_registry.clear_validation_cache()
+
+
+def assert_same_as_full(xml: str) -> bool:
+    full = schema_registry.validate(xml)
+    assert schema_registry.validate_incremental(xml) == full
+    return full
+
+
+def test_incremental_matches_full_after_unit_changes():
+    # 첫 호출: 골격을 처음 보므로 전체 검증, 이후 단위 변경은 증분 검증
+    assert assert_same_as_full(make_doc()) is True
+    assert assert_same_as_full(make_doc(tool_id="t2")) is True
+    assert assert_same_as_full(make_doc(ws_field="its_idx")) is False
+    assert assert_same_as_full(make_doc(tool_id="t3")) is True
+
+
+def test_added_unknown_element_in_shell_fails_like_full():
+    assert assert_same_as_full(make_doc()) is True
+    assert assert_same_as_full(make_doc(extra="<unknown_field>1</unknown_field>")) is False
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_wrong_namespace_unit_is_rejected(warm):
+    if warm:
+        # 같은 골격이 이미 검증 통과로 기록된 상태에서도 거부되어야 함
+        assert assert_same_as_full(make_doc(extra=LOCAL_UNIT)) is True
+    xml = make_doc(extra=FOREIGN_UNIT)
+    assert schema_registry.validate(xml) is False
+    assert schema_registry.validate_incremental(xml) is False
+
+
+def test_undeclared_xsi_type_prefix_falls_back_to_full():
+    xml = make_doc().replace('xsi:type="dt_project"', 'xsi:type="nope:dt_project"')
+    assert_same_as_full(xml)
+
+
+def test_malformed_xml_is_invalid():
+    assert schema_registry.validate_incremental("<dt_asset") is False
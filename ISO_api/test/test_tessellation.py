@@ -0,0 +1,76 @@
+import asyncio
+import os
+
+import pytest
+
+from src.entities.job import JOB_DONE, JOB_FAILED
+from src.utils import tessellation
+from src.utils.tessellation import TessellationEngine, resolve_lod
+from test_job_runner import FakeJobRepository
+
+
+class FakeTessellationJobRepository(FakeJobRepository):
+    key_field = "key"
+
+
+def fake_tessellate_lods(step_path, outputs):
+    """(fork 된 자식 프로세스) 입력 파일 이름으로 결과를 정하는 메싱 대역."""
+    name = os.path.basename(step_path)
+    if name.startswith("bad"):
+        raise RuntimeError("STEP read failed")
+    if name.startswith("crash"):
+        os._exit(3)
+    for out in outputs:
+        with open(out["stl_path"], "wb") as f:
+            f.write(b"solid")
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    # fork: 자식 프로세스가 monkeypatch 된 tessellate_lods 를 그대로 물려받음
+    monkeypatch.setattr(tessellation, "tessellate_lods", fake_tessellate_lods)
+    return TessellationEngine(
+        workers=2, max_queue=4, timeout=30, job_ttl=60, start_method="fork", heartbeat=0
+    )
+
+
+async def test_failed_and_crashed_jobs_do_not_affect_others(engine, tmp_path):
+    repo = FakeTessellationJobRepository()
+    failed_hooks = []
+
+    async def finalize(outputs):
+        return {"sizes": [os.path.getsize(o["stl_path"]) for o in outputs]}
+
+    async def on_error(job):
+        failed_hooks.append(job["context"]["name"])
+
+    jobs = {}
+    for name in ("good1.step", "bad.step", "crash.step", "good2.step"):
+        path = tmp_path / name
+        path.write_bytes(b"ISO-10303-21;")
+        jobs[name] = await engine.submit(
+            repo,
+            str(path),
+            finalize,
+            lods=[resolve_lod("coarse"), resolve_lod()],
+            context={"name": name},
+            on_error=on_error,
+        )
+
+    done = dict(
+        zip(jobs, await asyncio.gather(*(engine.wait(repo, j["_id"]) for j in jobs.values())))
+    )
+
+    assert done["good1.step"]["status"] == JOB_DONE
+    assert done["good1.step"]["result"] == {"sizes": [5, 5]}
+    assert done["good2.step"]["status"] == JOB_DONE
+    assert done["bad.step"]["status"] == JOB_FAILED
+    assert "STEP read failed" in done["bad.step"]["error"]
+    assert done["crash.step"]["status"] == JOB_FAILED
+    assert "exited with code 3" in done["crash.step"]["error"]
+    assert sorted(failed_hooks) == ["bad.step", "crash.step"]
+
+    # 입력 파일은 성공/실패와 무관하게 정리
+    assert list(tmp_path.iterdir()) == []
+    assert engine.pending() == 0
+    await engine.shutdown()
@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.entities import unit_of_work
+from src.entities.unit_of_work import VersionConflict, run_unit_of_work, version_filter
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def with_transaction(self, work):
+        return await work(self)
+
+
+class FakeClient:
+    def __init__(self):
+        self.sessions = 0
+
+    async def start_session(self):
+        self.sessions += 1
+        return FakeSession()
+
+
+def make_collection(client=None):
+    return SimpleNamespace(database=SimpleNamespace(client=client or FakeClient()))
+
+
+@pytest.fixture
+def transactional(monkeypatch):
+    state = {"value": False}
+
+    async def supports_transactions(client):
+        return state["value"]
+
+    monkeypatch.setattr(unit_of_work, "supports_transactions", supports_transactions)
+    return state
+
+
+def conflicting_work(conflicts: int):
+    """처음 conflicts 번은 VersionConflict, 그 다음 호출은 성공하는 work."""
+    sessions = []
+
+    async def work(session):
+        sessions.append(session)
+        if len(sessions) <= conflicts:
+            raise VersionConflict("m1")
+        return "ok"
+
+    return work, sessions
+
+
+async def test_conflict_reruns_work_until_success(transactional):
+    work, sessions = conflicting_work(2)
+    assert await run_unit_of_work(make_collection(), work, retries=3) == "ok"
+    # standalone: 매번 session 없이 work 를 처음부터 다시 실행
+    assert sessions == [None, None, None]
+
+
+async def test_conflict_after_retries_is_raised(transactional):
+    work, sessions = conflicting_work(10)
+    with pytest.raises(VersionConflict) as exc:
+        await run_unit_of_work(make_collection(), work, retries=2)
+    assert len(sessions) == 3
+    assert exc.value.enum.name == "ASSET_VERSION_CONFLICT"
+
+
+async def test_zero_retries_raises_first_conflict(transactional):
+    work, sessions = conflicting_work(1)
+    with pytest.raises(VersionConflict):
+        await run_unit_of_work(make_collection(), work, retries=0)
+    assert len(sessions) == 1
+
+
+async def test_transactional_conflict_retries_in_new_session(transactional):
+    transactional["value"] = True
+    client = FakeClient()
+    work, sessions = conflicting_work(1)
+    assert await run_unit_of_work(make_collection(client), work, retries=1) == "ok"
+    assert client.sessions == 2
+    assert all(isinstance(s, FakeSession) for s in sessions)
+
+
+async def test_other_errors_are_not_retried(transactional):
+    calls = []
+
+    async def work(session):
+        calls.append(session)
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await run_unit_of_work(make_collection(), work, retries=3)
+    assert len(calls) == 1
+
+
+def test_version_filter_treats_missing_version_as_zero():
+    assert version_filter(0) == {"$in": [0, None]}
+    assert version_filter(4) == 4
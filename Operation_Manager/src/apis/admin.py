@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from src.database import get_db
+from src.indexes import ensure_indexes, index_report
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+@router.get("/indexes", summary="MongoDB 인덱스 상태 보고")
+async def get_index_report():
+    """
+    선언된 인덱스 대비 누락(missing)/미선언(undeclared)/미사용(unused) 인덱스와
+    인덱스별 사용 횟수($indexStats)를 컬렉션별로 반환합니다.
+    """
+    return await index_report(await get_db())
+
+@router.post("/indexes", summary="선언된 MongoDB 인덱스 재생성")
+async def rebuild_indexes():
+    """
+    선언된 인덱스를 다시 생성(이미 있으면 no-op)하고 결과를 반환합니다.
+    """
+    return await ensure_indexes(await get_db())
@@ -0,0 +1,54 @@
+"""
+MongoDB 인덱스 선언/검증 모듈 (Operation_Manager).
+
+- INDEX_SPECS 에 컬렉션별 인덱스를 선언하고, startup 시 ensure_indexes()로 생성/검증
+  (IndexSpec / 생성 / 보고 로직은 두 서비스 공용 dt_common.indexes, 여기는 선언만)
+- required=True 인덱스를 만들 수 없으면 RuntimeError → 서버 기동 중단
+- index_report()는 누락/미선언/미사용 인덱스를 보고 (admin 엔드포인트용)
+
+인덱스 소유:
+  ISO_api 와 같은 DB 를 쓰지만 여기서는 Operation_Manager 전용 컬렉션(product_logs)만 선언한다.
+  공유 컬렉션(projects.projects, GridFS files.*, file_contents)의 인덱스는 ISO_api/src/indexes.py 가
+  유일한 정의이고 ISO_api 기동 시 생성된다. → 공유 컬렉션 인덱스는 ISO_api 쪽에서만 수정
+  (두 서비스가 file_contents 유니크 인덱스를 서로 다르게 만들거나 지우는 일 방지)
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+
+from dt_common.indexes import IndexSpec
+from dt_common.indexes import ensure_indexes as _ensure_indexes
+from dt_common.indexes import index_report as _index_report
+
+LOG_COLLECTION = "product_logs"
+
+
+INDEX_SPECS: Dict[str, List[IndexSpec]] = {
+    LOG_COLLECTION: [
+        # 프로젝트별 가공 로그 조회 (get_logs_by_project_id)
+        IndexSpec(
+            name="idx_project_start",
+            keys=[("project_id", ASCENDING), ("start_time", ASCENDING)],
+        ),
+    ],
+}
+
+
+async def ensure_indexes(
+    db: AsyncIOMotorDatabase,
+    specs: Dict[str, List[IndexSpec]] = INDEX_SPECS,
+) -> Dict[str, Dict[str, List[str]]]:
+    """선언된 인덱스 생성/검증 (dt_common.indexes.ensure_indexes)."""
+    return await _ensure_indexes(db, specs)
+
+
+async def index_report(
+    db: AsyncIOMotorDatabase,
+    specs: Dict[str, List[IndexSpec]] = INDEX_SPECS,
+) -> Dict[str, Any]:
+    """컬렉션별 인덱스 상태 보고 (dt_common.indexes.index_report)."""
+    return await _index_report(db, specs)
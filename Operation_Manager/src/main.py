@@ -4,6 +4,9 @@ from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from src.apis.project import router as project_router
 from src.apis.machine import router as machine_router
+from src.apis.admin import router as admin_router
+from src.database import get_db
+from src.indexes import ensure_indexes
 from src.utils.exceptions import CustomException
 from src.services import MachineService, get_machine_service
 import logging
@@ -33,6 +36,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- 서버 시작 시 인덱스 생성/검증 (필수 인덱스 실패 시 기동 중단) ---
+@app.on_event("startup")
+async def ensure_mongo_indexes():
+    """
+    src/indexes.py 에 선언된 MongoDB 인덱스를 생성/검증합니다.
+    """
+    await ensure_indexes(await get_db())
+
 # --- 서버 시작 시 모든 CNC 장비 추적 백그라운드 태스크 시작 ---
 @app.on_event("startup")
 async def start_tracking_all_machines():
@@ -61,3 +72,4 @@ async def custom_exception_handler(request: Request, exc: CustomException):
 # --- API 라우터 등록 ---
 app.include_router(project_router)
 app.include_router(machine_router)
+app.include_router(admin_router)
@@ -35,10 +35,11 @@ async def get_machine_repository() -> MachineRepository:
 async def get_file_repository() -> FileRepository:
     """
     MongoDB GridFS 기반의 파일(바이너리) 리포지토리 반환.
+    (file_contents: ISO_api 와 공유하는 내용 주소/refcount 컬렉션)
     """
     db = await get_db()
     grid_fs = await get_grid_fs(db)
-    return FileRepository(grid_fs)
+    return FileRepository(grid_fs, db['file_contents'])
 
 # --- Redis 리포지토리 반환 ---
 async def get_redis_repository() -> RedisRepository:
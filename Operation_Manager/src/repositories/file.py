@@ -1,20 +1,36 @@
+import hashlib
 from io import BytesIO
 from typing import Optional, Tuple
-from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorGridFSBucket
 from bson import ObjectId
 
+from dt_common.file_contents import ContentStore
+
+
 class FileRepository:
     """
     MongoDB GridFS를 통한 대용량 파일(바이너리) 저장/조회/삭제/존재확인 등 기능 제공.
+    - contents 컬렉션이 있으면 ISO_api 와 같은 내용 주소 중복 제거 사용
+      (공용 구현 dt_common.file_contents.ContentStore: 같은 내용이면 blob 공유 + refcount,
+       삭제는 refcount 감소)
     """
-    def __init__(self, grid_fs: AsyncIOMotorGridFSBucket):
+    def __init__(self, grid_fs: AsyncIOMotorGridFSBucket, contents: Optional[AsyncIOMotorCollection] = None):
         self.grid_fs = grid_fs
+        self.contents = contents
+        self.store = ContentStore(contents, grid_fs) if contents is not None else None
 
     async def insert_file(self, step_file_content: bytes, filename: str, metadata: Optional[dict] = None):
         """
         새 파일을 GridFS에 저장하고, 파일 id(ObjectId)를 반환합니다.
+        같은 (sha256, 파일명, 메타데이터)가 이미 있으면 업로드 없이 기존 id 반환.
         """
-        file_id = await self.grid_fs.upload_from_stream(filename, step_file_content, metadata=metadata or {})
+        data = step_file_content.read() if hasattr(step_file_content, "read") else step_file_content
+        if self.store is not None:
+            return await self.store.put(data, filename, metadata)
+        sha256 = hashlib.sha256(data).hexdigest()
+        file_id = await self.grid_fs.upload_from_stream(
+            filename, data, metadata={**(metadata or {}), "sha256": sha256}
+        )
         return str(file_id)
 
     async def get_file(self, file_id: str):
@@ -27,8 +43,13 @@ class FileRepository:
     async def delete_file_by_id(self, file_id: str):
         """
         파일 id로 GridFS에서 파일 삭제.
+        (공유 중인 blob 이면 refcount 만 감소, 마지막 참조일 때 삭제)
         """
-        await self.grid_fs.delete(ObjectId(file_id))
+        oid = ObjectId(file_id)
+        if self.store is None:
+            await self.grid_fs.delete(oid)
+        else:
+            await self.store.delete(oid)
         return
 
     async def file_exists(self, file_id: str) -> bool:
@@ -57,3 +78,11 @@ class FileRepository:
         file_bytes = await grid_out.read()
         filename = grid_out.filename
         return BytesIO(file_bytes), filename
+
+    async def get_file_name(self, file_id: str) -> Optional[str]:
+        """
+        파일 id로 파일명만 조회 (본문은 읽지 않음, 없으면 None).
+        """
+        cursor = self.grid_fs.find({"_id": ObjectId(file_id)}, limit=1)
+        docs = await cursor.to_list(length=1)
+        return docs[0].filename if docs else None
@@ -69,7 +69,7 @@ class ProjectService:
             nc_code_id = extract_nc_id(element)
             filename = None
             try:
-                _, filename = await self.file_repo.get_file_byteio_and_name(nc_code_id)
+                filename = await self.file_repo.get_file_name(nc_code_id)
             except Exception:
                 pass  # 파일 미존재 등 예외는 무시
             results.append(WorkplanNC(
@@ -107,7 +107,9 @@ class ProjectService:
         :param nc_code_id: 기존 NC 파일 ID
         :param new_nc_content: 새 NC 코드 텍스트
         """
-        _, filename = await self.file_repo.get_file_byteio_and_name(nc_code_id)
+        filename = await self.file_repo.get_file_name(nc_code_id)
+        if filename is None:
+            raise CustomException(ExceptionEnum.NC_NOT_FOUND)
         project = await self.project_repo.get_project_by_id(project_id)
         xml_string = project.get("data", "")
         if not xml_string:
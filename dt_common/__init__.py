@@ -0,0 +1,9 @@
+"""
+ISO_api / Operation_Manager 공용 모듈.
+
+두 서비스가 같은 MongoDB 를 쓰므로 공유 컬렉션을 다루는 규칙은 여기 한 곳에만 둔다.
+(각 서비스 이미지의 /app/dt_common 으로 복사됨, docker-compose.yaml 참고)
+
+- indexes: 인덱스 선언(IndexSpec) / 생성(ensure_indexes) / 보고(index_report)
+- file_contents: 내용 주소 기반 GridFS 중복 제거 + refcount (ContentStore)
+"""
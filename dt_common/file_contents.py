@@ -0,0 +1,138 @@
+"""
+내용 주소 기반 GridFS 중복 제거 (file_contents 컬렉션) 공용 구현.
+
+ISO_api / Operation_Manager 가 같은 file_contents 컬렉션의 refcount 를 갱신하므로
+등록/공유/해제 규칙은 이 모듈 하나에만 둔다. (인덱스 uniq_sha256_filename_meta 는 ISO_api/src/indexes.py)
+
+- (sha256, filename, meta_key) 가 같은 업로드는 하나의 GridFS blob 을 공유하고 refcount 만 증가
+  (파일명은 GridFS 문서에 저장되어 다운로드/NC 프로그램 번호 확인에 쓰이므로 키에 포함)
+  (meta_key 는 호출자 메타데이터 해시: 메타데이터가 다르면 blob 을 공유하지 않아 업로드마다 보존됨,
+   메타데이터가 없으면 필드를 두지 않음 → 이전에 등록된 문서와 같은 키)
+- 삭제는 refcount 를 감소시키고 0 이 되면 blob 을 삭제
+- file_contents 에 등록되지 않은 기존 파일은 바로 삭제
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorGridFSBucket
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+def metadata_key(metadata: Optional[dict]) -> Optional[str]:
+    """호출자 메타데이터 → 내용 주소 키 (없으면 None)."""
+    if not metadata:
+        return None
+    raw = json.dumps(metadata, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ContentStore:
+    """file_contents(내용 주소 → GridFS blob, refcount) 관리."""
+
+    def __init__(self, contents: AsyncIOMotorCollection, grid_fs: AsyncIOMotorGridFSBucket):
+        """
+        Args:
+            contents (AsyncIOMotorCollection): 내용 주소(refcount) 컬렉션
+            grid_fs (AsyncIOMotorGridFSBucket): blob 이 저장되는 GridFS 버킷
+        """
+        self.contents = contents
+        self.grid_fs = grid_fs
+
+    async def acquire(
+        self, sha256: str, filename: str, meta_key: Optional[str] = None
+    ) -> Optional[str]:
+        """같은 내용(+메타데이터)이 이미 있으면 refcount 를 1 올리고 그 file_id 를, 없으면 None 을 반환."""
+        doc = await self.contents.find_one_and_update(
+            {"sha256": sha256, "filename": filename, "meta_key": meta_key},
+            {"$inc": {"refcount": 1}},
+            projection={"file_id": 1},
+        )
+        return str(doc["file_id"]) if doc else None
+
+    async def register(
+        self,
+        sha256: str,
+        filename: str,
+        length: int,
+        file_id: ObjectId,
+        meta_key: Optional[str] = None,
+    ) -> str:
+        """
+        방금 올린 blob 을 내용 주소로 등록하고 최종 file_id 를 반환.
+        같은 내용이 이미(또는 동시 업로드로 먼저) 등록돼 있으면 방금 올린 blob 을 지우고 그 file_id 를 반환.
+        """
+        doc: Dict[str, Any] = {"sha256": sha256, "filename": filename}
+        if meta_key is not None:
+            doc["meta_key"] = meta_key
+        for _ in range(2):
+            shared = await self.acquire(sha256, filename, meta_key)
+            if shared:
+                await self.grid_fs.delete(file_id)
+                return shared
+            try:
+                await self.contents.insert_one(
+                    {
+                        **doc,
+                        "length": length,
+                        "file_id": file_id,
+                        "refcount": 1,
+                        "created_at": datetime.now(timezone.utc),
+                    }
+                )
+                return str(file_id)
+            except DuplicateKeyError:
+                continue
+        # 경합이 반복되면 중복 제거 없이 자기 blob 사용 (삭제 시 미등록 파일로 처리됨)
+        return str(file_id)
+
+    async def put(self, data: bytes, filename: str, metadata: Optional[dict] = None) -> str:
+        """
+        bytes 를 업로드하고 file_id 반환 (GridFS 메타데이터에 sha256 추가).
+        같은 (sha256, 파일명, 메타데이터)가 이미 있으면 업로드 없이 기존 file_id 반환.
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        meta_key = metadata_key(metadata)
+        shared = await self.acquire(sha256, filename, meta_key)
+        if shared:
+            return shared
+        file_id = await self.grid_fs.upload_from_stream(
+            filename, data, metadata={**(metadata or {}), "sha256": sha256}
+        )
+        return await self.register(sha256, filename, len(data), file_id, meta_key)
+
+    async def retain(self, file_id: str) -> bool:
+        """등록된 파일의 refcount 를 1 올림 (미등록 파일이면 False)."""
+        res = await self.contents.update_one(
+            {"file_id": ObjectId(file_id)}, {"$inc": {"refcount": 1}}
+        )
+        return res.modified_count == 1
+
+    async def release(self, oid: ObjectId) -> bool:
+        """
+        refcount 를 1 내리고, blob 을 실제로 지워야 하면 True 반환.
+        (등록되지 않은 기존 파일도 True)
+        """
+        doc = await self.contents.find_one_and_update(
+            {"file_id": oid},
+            {"$inc": {"refcount": -1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            return True
+        if doc["refcount"] > 0:
+            return False
+        # 그 사이 다른 업로드가 refcount 를 다시 올렸으면 삭제되지 않음
+        res = await self.contents.delete_one({"_id": doc["_id"], "refcount": {"$lte": 0}})
+        return res.deleted_count == 1
+
+    async def delete(self, oid: ObjectId) -> None:
+        """참조 하나 해제, 마지막 참조(또는 미등록 파일)면 blob 삭제."""
+        if await self.release(oid):
+            await self.grid_fs.delete(oid)
@@ -0,0 +1,126 @@
+"""
+MongoDB 인덱스 선언/생성/보고 공용 함수.
+
+- 각 서비스는 자기 src/indexes.py 에 컬렉션별 IndexSpec 목록(INDEX_SPECS)만 선언하고 이 함수들로 처리
+- required=True 인덱스(유니크 키 등)를 만들 수 없으면 RuntimeError → 서버 기동 중단
+- index_report()는 누락/미선언/미사용 인덱스를 보고 (admin 엔드포인트용)
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    name: str
+    keys: List[Tuple[str, int]]
+    unique: bool = False
+    sparse: bool = False
+    partial_filter: Optional[Dict[str, Any]] = None
+    # 생성 실패 시 기동 중단 여부 (유니크 키 등 무결성 인덱스)
+    required: bool = False
+    options: Dict[str, Any] = field(default_factory=dict)
+    # 이 인덱스로 대체된 이전 인덱스 이름 (있으면 생성 후 삭제)
+    replaces: Tuple[str, ...] = ()
+
+    def create_kwargs(self) -> Dict[str, Any]:
+        kw: Dict[str, Any] = {"name": self.name, **self.options}
+        if self.unique:
+            kw["unique"] = True
+        if self.sparse:
+            kw["sparse"] = True
+        if self.partial_filter:
+            kw["partialFilterExpression"] = self.partial_filter
+        return kw
+
+
+def _key_list(keys) -> List[Tuple[str, int]]:
+    return [(k, int(v)) if isinstance(v, (int, float)) else (k, v) for k, v in keys]
+
+
+async def ensure_indexes(
+    db: AsyncIOMotorDatabase,
+    specs: Dict[str, List[IndexSpec]],
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    선언된 인덱스를 생성(이미 있으면 no-op)하고 결과를 반환.
+    반환 예: {"assets.assets": {"created": [...], "failed": [...]}}
+    - required 인덱스 생성 실패 시 RuntimeError (중복 데이터 등으로 유니크 인덱스 불가)
+    - spec.replaces 의 이전 인덱스는 새 인덱스 생성 후 삭제
+    """
+    result: Dict[str, Dict[str, List[str]]] = {}
+    for coll_name, coll_specs in specs.items():
+        col = db[coll_name]
+        created: List[str] = []
+        failed: List[str] = []
+        existing = await col.index_information() if any(s.replaces for s in coll_specs) else {}
+        for spec in coll_specs:
+            try:
+                await col.create_index(spec.keys, **spec.create_kwargs())
+                # 새 인덱스가 생긴 뒤에 이전 인덱스 삭제 (무결성 공백 없음)
+                for old_name in spec.replaces:
+                    if old_name in existing:
+                        await col.drop_index(old_name)
+                created.append(spec.name)
+            except OperationFailure as e:
+                failed.append(spec.name)
+                if spec.required:
+                    raise RuntimeError(
+                        f"required index {coll_name}.{spec.name} could not be built: {e}"
+                    ) from e
+                logger.warning("index %s.%s failed: %s", coll_name, spec.name, e)
+        result[coll_name] = {"created": created, "failed": failed}
+    return result
+
+
+async def _index_usage(col) -> Dict[str, int]:
+    """$indexStats 기반 인덱스별 사용 횟수 (권한/버전 문제 시 빈 dict)."""
+    try:
+        rows = await col.aggregate([{"$indexStats": {}}]).to_list(length=None)
+    except OperationFailure:
+        return {}
+    return {r["name"]: int(r.get("accesses", {}).get("ops", 0)) for r in rows}
+
+
+async def index_report(
+    db: AsyncIOMotorDatabase,
+    specs: Dict[str, List[IndexSpec]],
+) -> Dict[str, Any]:
+    """
+    컬렉션별 인덱스 상태 보고.
+    - missing:    선언됐지만 없거나 키 구성이 다른 인덱스
+    - undeclared: 존재하지만 선언에 없는 인덱스 (_id_ 제외)
+    - unused:     $indexStats 상 서버 기동 이후 사용 0회인 인덱스
+    - usage:      인덱스별 사용 횟수
+    """
+    report: Dict[str, Any] = {}
+    for coll_name, coll_specs in specs.items():
+        col = db[coll_name]
+        existing = await col.index_information()
+        declared = {s.name: s for s in coll_specs}
+
+        missing = [
+            name
+            for name, spec in declared.items()
+            if name not in existing
+            or _key_list(existing[name]["key"]) != _key_list(spec.keys)
+        ]
+        undeclared = sorted(n for n in existing if n != "_id_" and n not in declared)
+        usage = await _index_usage(col)
+        unused = sorted(n for n, ops in usage.items() if ops == 0 and n != "_id_")
+
+        report[coll_name] = {
+            "missing": missing,
+            "undeclared": undeclared,
+            "unused": unused,
+            "usage": usage,
+        }
+    return report